@@ -23,6 +23,7 @@ from bot_core.presence import PresenceMixin
 from bot_core.runtime_mode import ensure_gateway_start_allowed, resolve_runtime_mode
 from bot_core.standalone import StandaloneMixin
 from service.config import settings
+from service.deadline_scheduler import get_scheduler
 from service.http_client import build_resilient_connector
 from service.master_broker import MasterBroker
 
@@ -219,7 +220,13 @@ class MasterBot(LoggingMixin, CogLoaderMixin, PresenceMixin, StandaloneMixin, co
         host = (os.getenv("MASTER_BROKER_HOST") or "127.0.0.1").strip() or "127.0.0.1"
         port = self._env_port("MASTER_BROKER_PORT", 8770)
         try:
-            self.master_broker = MasterBroker(self, token=token, host=host, port=port)
+            self.master_broker = MasterBroker(
+                self,
+                token=token,
+                host=host,
+                port=port,
+                persist_idempotency=self._env_bool("MASTER_BROKER_IDEMPOTENCY_PERSIST", True),
+            )
         except Exception as exc:
             logging.error("Master broker init failed: %s", exc, exc_info=True)
             self.master_broker = None
@@ -632,6 +639,8 @@ class MasterBot(LoggingMixin, CogLoaderMixin, PresenceMixin, StandaloneMixin, co
         load_span.finish(detail=f"loaded={loaded_now}")
         logging.info("Cogs geladen in %.2fs", time.perf_counter() - self._boot_started_at)
 
+        get_scheduler(self).start()
+
         if self._env_bool("COMMAND_SYNC_ON_START", True):
             sync_span = measure("slash.sync")
             scope = self._normalize_command_sync_scope(
@@ -679,6 +688,13 @@ class MasterBot(LoggingMixin, CogLoaderMixin, PresenceMixin, StandaloneMixin, co
             )
             _ = await self.unload_many(to_unload, timeout=self.per_cog_unload_timeout)
 
+        scheduler = getattr(self, "deadline_scheduler", None)
+        if scheduler is not None:
+            try:
+                await scheduler.stop()
+            except Exception as exc:
+                logging.error(f"Fehler beim Stoppen des Deadline-Schedulers: {exc}")
+
         try:
             timeout = float(os.getenv("DISCORD_CLOSE_TIMEOUT", "5"))
         except ValueError:
@@ -10,6 +10,7 @@ from typing import Any
 import discord
 
 from bot_core.boot_profile import log_event
+from cogs import voice_events
 
 _STEAM_LOG_CHANNEL_ID = 1374364800817303632
 
@@ -63,7 +64,16 @@ class PresenceMixin:
         """
         Voice Event Router - verteilt Voice State Updates parallel an alle Handler-Cogs.
         Verhindert sequenzielle Abarbeitung (40% schneller!).
+
+        Abonnenten der zentralen Pipeline (cogs/voice_events.py) bekommen ein
+        einmal normalisiertes VoiceStateEvent; Cogs mit undekoriertem
+        on_voice_state_update werden weiterhin direkt aufgerufen.
         """
+        dispatcher = voice_events.get_dispatcher(self)
+        pipeline = (
+            dispatcher.dispatch(member, before, after) if dispatcher.has_subscribers else None
+        )
+
         # Sammle alle Voice-Handler aus den Cogs (mit Metadaten für Error-Logging)
         handler_info = []
         for cog_name, cog in self.cogs.items():
@@ -79,11 +89,23 @@ class PresenceMixin:
                     handler_info.append((cog_name, handler))
 
         if not handler_info:
+            if pipeline is not None:
+                await pipeline
             return
 
         # Führe alle Handler PARALLEL aus (nicht sequenziell wie discord.py Default!)
         tasks = [(cog_name, handler(member, before, after)) for cog_name, handler in handler_info]
-        results = await asyncio.gather(*[task for _, task in tasks], return_exceptions=True)
+        results = await asyncio.gather(
+            *([pipeline] if pipeline is not None else []),
+            *[task for _, task in tasks],
+            return_exceptions=True,
+        )
+        if pipeline is not None:
+            pipeline_result, results = results[0], results[1:]
+            if isinstance(pipeline_result, Exception):
+                logging.error(
+                    "Voice event pipeline error: %s", pipeline_result, exc_info=pipeline_result
+                )
 
         # Log Fehler mit korrektem Cog-Namen (Race-Safe!)
         for (cog_name, _), result in zip(tasks, results, strict=False):
@@ -124,9 +146,7 @@ class PresenceMixin:
             logging.getLogger().debug("TempVoice Ready-Log fehlgeschlagen (ignoriert): %r", e)
 
         # Performance-Info loggen
-        voice_handlers = sum(
-            1 for cog in self.cogs.values() if hasattr(cog, "on_voice_state_update")
-        )
+        voice_handlers = len(voice_events.get_dispatcher(self).stats()["handlers"])
         if voice_handlers > 0:
             logging.info(f"Voice Event Router aktiv: {voice_handlers} Handler (parallel)")
 
@@ -15,6 +15,8 @@ from typing import Any
 import discord
 from discord.ext import commands, tasks
 
+from cogs import message_events
+
 log = logging.getLogger(__name__)
 
 
@@ -396,7 +398,20 @@ class AIModeratorCog(commands.Cog):
         if not self.cleanup_ragebait_hits.is_running():
             self.cleanup_ragebait_hits.start()
 
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            channel_ids=self.scan_channel_ids,
+            include_bots=not self.ignore_bots,
+            include_webhooks=False,
+            intent=lambda event: (
+                event.is_member
+                and not getattr(event.message.author.guild_permissions, "manage_messages", False)
+            ),
+        )
+
     def cog_unload(self) -> None:
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         if self.cleanup_ragebait_hits.is_running():
             self.cleanup_ragebait_hits.cancel()
 
@@ -410,24 +425,11 @@ class AIModeratorCog(commands.Cog):
     async def before_cleanup_ragebait_hits(self) -> None:
         await self.bot.wait_until_ready()
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        if message.guild is None:
-            return
-        if self.ignore_bots and message.author.bot:
-            return
-        if message.channel.id not in self.scan_channel_ids:
-            return
-        if message.webhook_id is not None or message.is_system():
-            return
-        if not isinstance(message.author, discord.Member):
-            return
-        perms = getattr(message.author, "guild_permissions", None)
-        if perms and perms.manage_messages:
-            return
-
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        # Kanal, Bots, Webhooks/System und Mods filtert die Message-Pipeline
+        message = event.message
         image_attachments = self._extract_image_attachments(message.attachments)
-        if not _normalize_text(message.content) and not image_attachments:
+        if not event.text_lower and not image_attachments:
             return
 
         now = asyncio.get_running_loop().time()
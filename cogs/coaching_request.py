@@ -11,7 +11,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-from service import db
+from cogs import coaching_role_manager, coaching_survey
+from service import db, deadline_scheduler
 from service.config import settings
 
 log = logging.getLogger(__name__)
@@ -36,6 +37,9 @@ Keine Erklärung, kein weiterer Text."""
 
 DISCORD_EMBED_FIELD_LIMIT = 1024
 ANALYZING_STALE_AFTER_SECONDS = 5 * 60
+ANALYZE_RETRY_SECONDS = 30
+ANALYZE_BATCH_SIZE = 5
+ANALYZE_SWEEP_JOB = "coaching.analyze_sweep"
 
 
 def _normalize_inline_text(value: str, *, fallback: str = "N/A", limit: int = 256) -> str:
@@ -172,6 +176,8 @@ class CoachClaimButton(discord.ui.Button):
                 "UPDATE coaching_requests SET status='matched', updated_at=? WHERE id=?",
                 (now, self.request_id),
             )
+            # Sitzen Coach und User schon gemeinsam im Voice, kommt kein Voice-Event mehr
+            await coaching_survey.schedule_survey_check(interaction.client, session_id)
 
             coaching_role = interaction.guild.get_role(settings.coaching_active_role_id)
             if coaching_role and coaching_role not in author.roles:
@@ -240,7 +246,6 @@ class CoachingRequestCog(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self._analyze_loop: asyncio.Task | None = None
 
     def _recover_stale_analyzing_requests(self) -> int:
         cutoff = int(time.time()) - ANALYZING_STALE_AFTER_SECONDS
@@ -271,13 +276,24 @@ class CoachingRequestCog(commands.Cog):
             )
         if rows:
             log.info("Re-registered %d persistent CoachClaimView(s) after restart", len(rows))
-        if self._analyze_loop is None or self._analyze_loop.done():
-            self._analyze_loop = asyncio.create_task(self._analyze_pending_requests())
+        deadline_scheduler.get_scheduler(self.bot).register(
+            ANALYZE_SWEEP_JOB, self._on_analysis_sweep
+        )
+        # Liegengebliebene Requests (z.B. vor dem Neustart) sofort abarbeiten
+        await self._schedule_analysis_sweep(0)
 
     async def cog_unload(self):
-        if self._analyze_loop:
-            self._analyze_loop.cancel()
-            self._analyze_loop = None
+        deadline_scheduler.get_scheduler(self.bot).unregister(ANALYZE_SWEEP_JOB)
+
+    async def _schedule_analysis_sweep(self, delay: float) -> None:
+        """Plant den Fallback-Sweep; ein bereits früher geplanter Sweep bleibt bestehen."""
+        await deadline_scheduler.get_scheduler(self.bot).schedule(
+            ANALYZE_SWEEP_JOB,
+            "pending",
+            time.time() + delay,
+            persist=False,
+            keep_earlier=True,
+        )
 
     def _get_ai_connector(self):
         """Get AIConnector cog if available"""
@@ -327,6 +343,14 @@ class CoachingRequestCog(commands.Cog):
                WHERE id=?""",
             (now, expires_at, now, request_data["id"]),
         )
+        row = db.query_one(
+            "SELECT role_expires_at FROM coaching_requests WHERE id=? AND role_removed_at IS NULL",
+            (request_data["id"],),
+        )
+        if row and row["role_expires_at"]:
+            await coaching_role_manager.schedule_role_expiry(
+                self.bot, request_data["id"], int(row["role_expires_at"])
+            )
 
         role = guild.get_role(settings.coaching_active_role_id)
         if not role:
@@ -494,6 +518,8 @@ Erstelle eine präzise, hilfreiche Zusammenfassung für den Coach."""
                     request_id,
                 )
                 return
+            # Hängt die Analyse, holt der Sweep den Request nach Ablauf zurück
+            await self._schedule_analysis_sweep(ANALYZING_STALE_AFTER_SECONDS + 1)
             ai_summary = await self._analyze_with_ai(request_data)
             if not ai_summary:
                 log.info("Coaching request %s aborted (invalid/non-serious)", request_id)
@@ -514,6 +540,7 @@ Erstelle eine präzise, hilfreiche Zusammenfassung für den Coach."""
                     "UPDATE coaching_requests SET status='pending', updated_at=? WHERE id=?",
                     (int(time.time()), request_id),
                 )
+                await self._schedule_analysis_sweep(ANALYZE_RETRY_SECONDS)
         except Exception:
             log.exception("Immediate coaching analysis failed for user %s", user_id)
             if request_id is not None:
@@ -523,82 +550,82 @@ Erstelle eine präzise, hilfreiche Zusammenfassung für den Coach."""
                        WHERE id=? AND status='analyzing'""",
                     (int(time.time()), request_id),
                 )
+                await self._schedule_analysis_sweep(ANALYZE_RETRY_SECONDS)
 
-    async def _analyze_pending_requests(self):
-        """Background loop to analyze pending requests with AI"""
+    async def _on_analysis_sweep(self, job: deadline_scheduler.ScheduledJob) -> None:
         await self.bot.wait_until_ready()
-        while True:
+        processed = await self._analyze_pending_requests()
+        if processed >= ANALYZE_BATCH_SIZE:
+            await self._schedule_analysis_sweep(2)
+        # Noch laufende/hängende Analysen: nach Ablauf der Stale-Frist erneut prüfen
+        row = db.query_one(
+            """SELECT MIN(updated_at) FROM coaching_requests
+               WHERE status='analyzing' AND message_id IS NULL"""
+        )
+        if row and row[0] is not None:
+            stale_at = int(row[0]) + ANALYZING_STALE_AFTER_SECONDS + 1
+            await self._schedule_analysis_sweep(max(1.0, stale_at - time.time()))
+
+    async def _analyze_pending_requests(self) -> int:
+        """Fallback-Sweep: analysiert liegengebliebene Requests (max. ANALYZE_BATCH_SIZE)."""
+        self._recover_stale_analyzing_requests()
+        # Find requests that have problems filled but not yet analyzed
+        rows = db.query_all(
+            """SELECT * FROM coaching_requests
+               WHERE status='pending'
+               AND current_problems IS NOT NULL
+               AND current_problems != ''
+               AND (ai_summary IS NULL OR ai_summary = '')
+               ORDER BY created_at ASC LIMIT ?""",
+            (ANALYZE_BATCH_SIZE,),
+        )
+
+        for row in rows:
+            request_data = dict(row)
+            request_id = int(request_data["id"])
+            affected = db.connect_proxy().execute(
+                "UPDATE coaching_requests SET status='analyzing', updated_at=? WHERE id=? AND status='pending'",
+                (int(time.time()), request_id),
+            ).rowcount
+            if not affected:
+                log.info(
+                    "Request %s already claimed by another path, skipping sweep",
+                    request_id,
+                )
+                continue
             try:
-                self._recover_stale_analyzing_requests()
-                # Find requests that have problems filled but not yet analyzed
-                rows = db.query_all(
-                    """SELECT * FROM coaching_requests
-                       WHERE status='pending'
-                       AND current_problems IS NOT NULL
-                       AND current_problems != ''
-                       AND (ai_summary IS NULL OR ai_summary = '')
-                       ORDER BY created_at ASC LIMIT 5"""
+                ai_summary = await self._analyze_with_ai(request_data)
+                if not ai_summary:
+                    log.info("Coaching request %s aborted (invalid/non-serious)", request_id)
+                    db.execute(
+                        "UPDATE coaching_requests SET status='invalid', updated_at=? WHERE id=?",
+                        (int(time.time()), request_id),
+                    )
+                    continue
+
+                # Post to channel
+                message_id = await self._post_request_to_channel(request_data, ai_summary)
+                if message_id:
+                    await self._assign_request_role(request_data)
+                else:
+                    db.execute(
+                        "UPDATE coaching_requests SET status='pending', updated_at=? WHERE id=?",
+                        (int(time.time()), request_id),
+                    )
+                    await self._schedule_analysis_sweep(ANALYZE_RETRY_SECONDS)
+            except Exception:
+                log.exception("Background coaching analysis failed for request %s", request_id)
+                db.execute(
+                    """UPDATE coaching_requests
+                       SET status='pending', updated_at=?
+                       WHERE id=? AND status='analyzing'""",
+                    (int(time.time()), request_id),
                 )
+                await self._schedule_analysis_sweep(ANALYZE_RETRY_SECONDS)
 
-                for row in rows:
-                    request_id: int | None = None
-                    request_data = dict(row)
-                    request_id = int(request_data["id"])
-                    affected = db.connect_proxy().execute(
-                        "UPDATE coaching_requests SET status='analyzing', updated_at=? WHERE id=? AND status='pending'",
-                        (int(time.time()), request_id),
-                    ).rowcount
-                    if not affected:
-                        log.info(
-                            "Request %s already claimed by another path, skipping loop",
-                            request_data["id"],
-                        )
-                        continue
-                    ai_summary = await self._analyze_with_ai(request_data)
-                    if not ai_summary:
-                        log.info(
-                            "Coaching request %s aborted (invalid/non-serious)", request_data["id"]
-                        )
-                        db.execute(
-                            "UPDATE coaching_requests SET status='invalid', updated_at=? WHERE id=?",
-                            (int(time.time()), request_data["id"]),
-                        )
-                        continue
-                    try:
-                        ai_summary = await self._analyze_with_ai(request_data)
-                        if not ai_summary:
-                            log.info("Coaching request %s aborted (invalid/non-serious)", request_id)
-                            db.execute(
-                                "UPDATE coaching_requests SET status='invalid', updated_at=? WHERE id=?",
-                                (int(time.time()), request_id),
-                            )
-                            continue
-
-                        # Post to channel
-                        message_id = await self._post_request_to_channel(request_data, ai_summary)
-                        if message_id:
-                            await self._assign_request_role(request_data)
-                        else:
-                            db.execute(
-                                "UPDATE coaching_requests SET status='pending', updated_at=? WHERE id=?",
-                                (int(time.time()), request_id),
-                            )
-                    except Exception:
-                        log.exception("Background coaching analysis failed for request %s", request_id)
-                        db.execute(
-                            """UPDATE coaching_requests
-                               SET status='pending', updated_at=?
-                               WHERE id=? AND status='analyzing'""",
-                            (int(time.time()), request_id),
-                        )
-
-                    # Small delay between requests
-                    await asyncio.sleep(2)
-
-            except Exception as e:
-                log.error(f"Analyze loop error: {e}")
-
-            await asyncio.sleep(30)  # Check every 30 seconds
+            # Small delay between requests
+            await asyncio.sleep(2)
+        return len(rows)
 
     @app_commands.command(
         name="coaching-analysieren", description="Analysiere Request manuell (Admin)"
@@ -1,104 +1,118 @@
 """
 Coaching Role Manager - Automatische Rollen-Verwaltung
-- Entfernt die Coaching-Rolle nach Ablauf der Request-Frist.
+- Entfernt die Coaching-Rolle nach Ablauf der Request-Frist (Job im
+  Deadline-Scheduler pro Request statt Minuten-Poll).
 - Reminder sind bewusst deaktiviert.
 """
 
-import asyncio
 import logging
 import time
 
 import discord
 from discord.ext import commands
 
-from service import db
+from service import db, deadline_scheduler
 from service.config import settings
 
 log = logging.getLogger(__name__)
 
+ROLE_EXPIRY_JOB = "coaching.role_expiry"
+
+
+async def schedule_role_expiry(bot: commands.Bot, request_id: int, expires_at: int) -> None:
+    """Plant das Entfernen der Coaching-Rolle für ``request_id`` zum Zeitpunkt ``expires_at``."""
+    await deadline_scheduler.get_scheduler(bot).schedule(
+        ROLE_EXPIRY_JOB, request_id, float(expires_at)
+    )
+
 
 class CoachingRoleManagerCog(commands.Cog):
     """Coaching Role Manager - Handles automatic role assignment and removal"""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self._role_check_task: asyncio.Task | None = None
 
     async def cog_load(self):
-        if self._role_check_task is None or self._role_check_task.done():
-            self._role_check_task = asyncio.create_task(self._role_check_loop())
+        scheduler = deadline_scheduler.get_scheduler(self.bot)
+        scheduler.register(ROLE_EXPIRY_JOB, self._on_role_expiry_job)
+        await self._schedule_open_expiries()
 
     async def cog_unload(self):
-        if self._role_check_task:
-            self._role_check_task.cancel()
-            self._role_check_task = None
-
-    async def _role_check_loop(self):
-        """Background loop to check and manage coaching roles"""
-        await self.bot.wait_until_ready()
-        while True:
-            try:
-                await self._check_expired_roles()
-            except Exception as e:
-                log.error(f"Role check loop error: {e}")
-            await asyncio.sleep(60)  # Check every minute
-
-    async def _check_expired_roles(self):
-        """Remove expired coaching active roles."""
-        now = int(time.time())
-
-        rows = db.query_all(
-            """SELECT * FROM coaching_requests
+        deadline_scheduler.get_scheduler(self.bot).unregister(ROLE_EXPIRY_JOB)
+
+    async def _schedule_open_expiries(self) -> None:
+        """Einmaliger Abgleich beim Laden: offene Fristen ohne Job nachtragen."""
+        scheduler = deadline_scheduler.get_scheduler(self.bot)
+        await scheduler.load()
+        rows = await db.query_all_async(
+            """SELECT id, role_expires_at FROM coaching_requests
                WHERE role_removed_at IS NULL
-               AND role_expires_at IS NOT NULL
-               AND role_expires_at < ?""",
-            (now,),
+               AND role_expires_at IS NOT NULL"""
         )
+        for row in rows:
+            if scheduler.get(ROLE_EXPIRY_JOB, row["id"]) is None:
+                await scheduler.schedule(ROLE_EXPIRY_JOB, row["id"], float(row["role_expires_at"]))
 
-        for request in rows:
-            guild = self.bot.guilds[0] if self.bot.guilds else None
-            if not guild:
-                continue
-
-            member = guild.get_member(request["discord_user_id"])
-            if not member:
-                db.execute(
-                    "UPDATE coaching_requests SET role_removed_at=?, updated_at=? WHERE id=?",
-                    (now, now, request["id"]),
-                )
-                continue
-
-            role = guild.get_role(settings.coaching_active_role_id)
-            if role and role in member.roles:
-                await member.remove_roles(role, reason="Coaching-Rolle abgelaufen (48h)")
-                log.info(f"Removed coaching role from {member.display_name}")
+    async def _on_role_expiry_job(self, job: deadline_scheduler.ScheduledJob) -> None:
+        await self.bot.wait_until_ready()
+        request = db.query_one("SELECT * FROM coaching_requests WHERE id=?", (int(job.key),))
+        if not request or request["role_removed_at"] is not None:
+            return
+        expires_at = request["role_expires_at"]
+        if expires_at is None:
+            return
+        if int(expires_at) > time.time():
+            # Frist wurde verlängert
+            await schedule_role_expiry(self.bot, request["id"], int(expires_at))
+            return
+        await self._expire_request_role(request)
+
+    async def _expire_request_role(self, request) -> None:
+        """Remove the expired coaching active role of one request."""
+        now = int(time.time())
+        guild = self.bot.guilds[0] if self.bot.guilds else None
+        if not guild:
+            return
 
+        member = guild.get_member(request["discord_user_id"])
+        if not member:
             db.execute(
                 "UPDATE coaching_requests SET role_removed_at=?, updated_at=? WHERE id=?",
                 (now, now, request["id"]),
             )
+            return
+
+        role = guild.get_role(settings.coaching_active_role_id)
+        if role and role in member.roles:
+            await member.remove_roles(role, reason="Coaching-Rolle abgelaufen (48h)")
+            log.info(f"Removed coaching role from {member.display_name}")
 
-            session = db.query_one(
-                """SELECT * FROM coaching_sessions
-                   WHERE request_id=? AND status IN ('active', 'waiting_survey')
-                   ORDER BY created_at DESC LIMIT 1""",
-                (request["id"],),
+        db.execute(
+            "UPDATE coaching_requests SET role_removed_at=?, updated_at=? WHERE id=?",
+            (now, now, request["id"]),
+        )
+
+        session = db.query_one(
+            """SELECT * FROM coaching_sessions
+               WHERE request_id=? AND status IN ('active', 'waiting_survey')
+               ORDER BY created_at DESC LIMIT 1""",
+            (request["id"],),
+        )
+        if not session:
+            return
+        try:
+            thread_id = session["discord_thread_id"]
+        except Exception as e:
+            log.error(f"Could not read session thread id: {e}")
+            return
+        if not thread_id:
+            return
+        thread = guild.get_channel_or_thread(thread_id)
+        if thread:
+            await thread.send(
+                "⏰ Die 48h Coaching-Phase ist abgelaufen. Falls ihr noch keine Voice-Session hattet, "
+                "müsst ihr eine neue Anfrage stellen."
             )
-            if not session:
-                continue
-            try:
-                thread_id = session["discord_thread_id"]
-            except Exception as e:
-                log.error(f"Could not read session thread id: {e}")
-                continue
-            if not thread_id:
-                continue
-            thread = guild.get_channel_or_thread(thread_id)
-            if thread:
-                await thread.send(
-                    "⏰ Die 48h Coaching-Phase ist abgelaufen. Falls ihr noch keine Voice-Session hattet, "
-                    "müsst ihr eine neue Anfrage stellen."
-                )
 
     async def assign_coaching_role(self, user_id: int, guild: discord.Guild, thread_id: int):
         """Assign the coaching active role to user"""
@@ -2,7 +2,6 @@
 Coaching Survey - Post-Coaching Feedback via DM
 """
 
-import asyncio
 import logging
 import time
 import uuid
@@ -11,11 +10,25 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-from service import db
+from cogs import voice_events
+from service import db, deadline_scheduler
 from service.config import settings
 
 log = logging.getLogger(__name__)
 
+SURVEY_CHECK_JOB = "coaching.survey_check"
+SURVEY_RETRY_SECONDS = 60
+# Solange Coach und User im selben Channel sind, wird voice_last_seen_at in
+# diesem Abstand aufgefrischt (Voice-Events kommen nur bei Channel-Wechseln).
+SURVEY_HEARTBEAT_SECONDS = 60
+
+
+async def schedule_survey_check(bot: commands.Bot, session_id: str, delay: float = 0.0) -> None:
+    """Plant eine Voice-Prüfung der Session (z.B. direkt nach dem Claim)."""
+    await deadline_scheduler.get_scheduler(bot).schedule(
+        SURVEY_CHECK_JOB, session_id, time.time() + delay, persist=False, keep_earlier=True
+    )
+
 
 class SurveyModal(discord.ui.Modal, title="Coaching Session Feedback"):
     def __init__(self, session_id: str):
@@ -138,21 +151,28 @@ class CoachingSurveyCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self._survey_dispatching: set[str] = set()
-        self._survey_check_task: asyncio.Task | None = None
 
     async def cog_load(self):
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_voice_event,
+            include_bots=False,
+            channel_change_only=True,
+        )
         sessions = db.query_all("SELECT id FROM coaching_sessions WHERE status='waiting_survey'")
         for s in sessions:
             self.bot.add_view(SurveyView(s["id"]))
         if sessions:
             log.info("Re-registered %d persistent SurveyView(s) after restart", len(sessions))
-        if self._survey_check_task is None or self._survey_check_task.done():
-            self._survey_check_task = asyncio.create_task(self._run_survey_checks())
+        # Zur Laufzeit treiben Voice-Events die Prüfung; nach dem Start einmal
+        # alle aktiven Sessions abgleichen (Events während der Downtime fehlen).
+        scheduler = deadline_scheduler.get_scheduler(self.bot)
+        scheduler.register(SURVEY_CHECK_JOB, self._on_survey_check_job)
+        await scheduler.schedule(SURVEY_CHECK_JOB, "all", time.time(), persist=False)
 
     async def cog_unload(self):
-        if self._survey_check_task:
-            self._survey_check_task.cancel()
-            self._survey_check_task = None
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+        deadline_scheduler.get_scheduler(self.bot).unregister(SURVEY_CHECK_JOB)
 
     def _get_primary_guild(self) -> discord.Guild | None:
         return self.bot.guilds[0] if self.bot.guilds else None
@@ -180,14 +200,19 @@ class CoachingSurveyCog(commands.Cog):
             return user_channel
         return None
 
-    async def _run_survey_checks(self):
+    async def _on_survey_check_job(self, job: deadline_scheduler.ScheduledJob) -> None:
         await self.bot.wait_until_ready()
-        while True:
-            try:
-                await self._scan_active_sessions()
-            except Exception:
-                log.exception("Coaching survey check loop failed")
-            await asyncio.sleep(60)
+        if job.key == "all":
+            await self._scan_active_sessions()
+            return
+        guild = self._get_primary_guild()
+        session = db.query_one(
+            """SELECT * FROM coaching_sessions
+               WHERE id=? AND status='active' AND survey_sent_at IS NULL""",
+            (job.key,),
+        )
+        if guild and session:
+            await self._process_session_voice_state(guild, session)
 
     async def _scan_active_sessions(self):
         guild = self._get_primary_guild()
@@ -224,6 +249,7 @@ class CoachingSurveyCog(commands.Cog):
                    WHERE id=?""",
                 (shared_channel.id, now, now, session["id"]),
             )
+            await schedule_survey_check(self.bot, session_id, SURVEY_HEARTBEAT_SECONDS)
             return
 
         if not session["voice_started_at"]:
@@ -234,6 +260,9 @@ class CoachingSurveyCog(commands.Cog):
             coach_name = coach_member.display_name if coach_member else f"Coach {coach_id}"
             success = await self.send_survey_dm(session["discord_user_id"], session_id, coach_name)
             if not success:
+                await deadline_scheduler.get_scheduler(self.bot).schedule(
+                    SURVEY_CHECK_JOB, session_id, time.time() + SURVEY_RETRY_SECONDS, persist=False
+                )
                 return
 
             db.execute(
@@ -292,22 +321,20 @@ class CoachingSurveyCog(commands.Cog):
             log.error(f"Failed to send survey DM to {user_id}: {e}")
             return False
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
-        guild = member.guild
-        sessions = db.query_all(
-            """SELECT * FROM coaching_sessions
-               WHERE status='active' AND survey_sent_at IS NULL
-               AND (discord_user_id=? OR coach_id=?)""",
-            (member.id, member.id),
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        # Gemeinsamer Kanal ändert sich nur bei Kanalwechseln (Abo-Filter)
+        member = event.member
+        sessions = await event.shared_async(
+            "coaching_survey:active_sessions",
+            lambda: db.query_all_async(
+                """SELECT * FROM coaching_sessions
+                   WHERE status='active' AND survey_sent_at IS NULL
+                   AND (discord_user_id=? OR coach_id=?)""",
+                (member.id, member.id),
+            ),
         )
         for session in sessions:
-            await self._process_session_voice_state(guild, session)
+            await self._process_session_voice_state(member.guild, session)
 
     @app_commands.command(name="coaching-survey-senden", description="Survey DM senden (Admin)")
     @app_commands.describe(
@@ -0,0 +1,195 @@
+"""
+Team-Split-Engine für den DeadlockTeamBalancer.
+
+Arbeitet nur auf Rangwerten und liefert Indizes zweier gleich großer Teams.
+Ziel ist dieselbe Kennzahl wie ``_balance_score`` (Summen-/Ø-Differenz +
+Varianz), allerdings aus laufenden Summen (Σr, Σr²) in O(1) pro Split:
+
+- exakt per Tiefensuche, solange die Zahl der Splits <= EXACT_MAX_SPLITS ist.
+  Spiegelsymmetrie (A/B == B/A) wird ausgeschlossen, indem der erste
+  eingeteilte Spieler immer in Team A landet;
+- darüber Heuristik: je Rangfenster (zusammenhängender Roster in
+  Rangreihenfolge) Karmarkar-Karp-Differencing auf Paaren (gleiche Teamgröße)
+  als Start, danach lokale Suche mit 1:1-Tausch zwischen A, B und der Bank.
+
+Bei mehr Spielern als Plätzen wählt die Engine auch aus, wer spielt.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from collections.abc import Sequence
+
+EXACT_MAX_SPLITS = 10_000
+LOCAL_SEARCH_MAX_ROUNDS = 200
+
+
+def split_score(sum_a: float, sq_a: float, sum_b: float, sq_b: float, size: int) -> float:
+    """Entspricht ``_balance_score`` für zwei Teams der Größe ``size``."""
+    avg_a = sum_a / size
+    avg_b = sum_b / size
+    var_a = sq_a / size - avg_a * avg_a
+    var_b = sq_b / size - avg_b * avg_b
+    diff_sum = abs(sum_a - sum_b)
+    return diff_sum * 1.0 + (diff_sum / size) * 2.0 + (var_a + var_b) * 0.5
+
+
+def count_splits(n: int, team_size: int) -> int:
+    """Anzahl verschiedener (ungeordneter) Team-Paare aus ``n`` Spielern."""
+    if team_size <= 0 or n < 2 * team_size:
+        return 0
+    return math.comb(n, team_size) * math.comb(n - team_size, team_size) // 2
+
+
+def best_split(ranks: Sequence[int], team_size: int) -> tuple[list[int], list[int]]:
+    n = len(ranks)
+    if team_size <= 0 or n < 2 * team_size:
+        raise ValueError("not enough players for two teams")
+    if count_splits(n, team_size) <= EXACT_MAX_SPLITS:
+        return exact_split(ranks, team_size)
+    return heuristic_split(ranks, team_size)
+
+
+def exact_split(ranks: Sequence[int], team_size: int) -> tuple[list[int], list[int]]:
+    n = len(ranks)
+    k = team_size
+    values = [float(r) for r in ranks]
+    squares = [v * v for v in values]
+    team_a: list[int] = []
+    team_b: list[int] = []
+    best_score = math.inf
+    best: tuple[list[int], list[int]] = ([], [])
+
+    def visit(i: int, sa: float, qa: float, sb: float, qb: float) -> None:
+        nonlocal best_score, best
+        la, lb = len(team_a), len(team_b)
+        if la == k and lb == k:
+            score = split_score(sa, qa, sb, qb, k)
+            if score < best_score:
+                best_score = score
+                best = (list(team_a), list(team_b))
+            return
+        open_slots = 2 * k - la - lb
+        if n - i < open_slots:
+            return
+        v, q = values[i], squares[i]
+        if la < k:
+            team_a.append(i)
+            visit(i + 1, sa + v, qa + q, sb, qb)
+            team_a.pop()
+        if lb < k and la > 0:
+            team_b.append(i)
+            visit(i + 1, sa, qa, sb + v, qb + q)
+            team_b.pop()
+        if n - i - 1 >= open_slots:
+            visit(i + 1, sa, qa, sb, qb)
+
+    visit(0, 0.0, 0.0, 0.0, 0.0)
+    return sorted(best[0]), sorted(best[1])
+
+
+def _differencing_start(ranks: Sequence[int], roster: list[int]) -> tuple[list[int], list[int]]:
+    """Karmarkar-Karp auf Paar-Differenzen: jedes Paar gibt je einen Spieler an A und B."""
+    ordered = sorted(roster, key=lambda i: ranks[i], reverse=True)
+    pairs = [(ordered[j], ordered[j + 1]) for j in range(0, len(ordered), 2)]
+    # Heap-Knoten: (-Differenz, Tie-Breaker, [(pair_idx, Vorzeichen)])
+    heap: list[tuple[float, int, list[tuple[int, int]]]] = [
+        (-float(ranks[hi] - ranks[lo]), idx, [(idx, 1)]) for idx, (hi, lo) in enumerate(pairs)
+    ]
+    heapq.heapify(heap)
+    tie = len(heap)
+    while len(heap) > 1:
+        big_val, _, big = heapq.heappop(heap)
+        small_val, _, small = heapq.heappop(heap)
+        merged = big + [(idx, -sign) for idx, sign in small]
+        heapq.heappush(heap, (big_val - small_val, tie, merged))
+        tie += 1
+    team_a: list[int] = []
+    team_b: list[int] = []
+    for idx, sign in heap[0][2] if heap else []:
+        hi, lo = pairs[idx]
+        if sign > 0:
+            team_a.append(hi)
+            team_b.append(lo)
+        else:
+            team_a.append(lo)
+            team_b.append(hi)
+    return team_a, team_b
+
+
+def heuristic_split(ranks: Sequence[int], team_size: int) -> tuple[list[int], list[int]]:
+    """Mehrere Starts (je ein zusammenhängendes Rangfenster als Roster), jeweils lokal verbessert."""
+    k = team_size
+    values = [float(r) for r in ranks]
+    ordered = sorted(range(len(ranks)), key=lambda i: values[i], reverse=True)
+    best_score = math.inf
+    best: tuple[list[int], list[int]] = ([], [])
+    for start in range(len(ranks) - 2 * k + 1):
+        roster = ordered[start : start + 2 * k]
+        bench = ordered[:start] + ordered[start + 2 * k :]
+        team_a, team_b = _differencing_start(ranks, roster)
+        score = _local_search(values, team_a, team_b, bench, k)
+        if score < best_score:
+            best_score = score
+            best = (team_a, team_b)
+    return sorted(best[0]), sorted(best[1])
+
+
+def _local_search(
+    values: list[float], team_a: list[int], team_b: list[int], bench: list[int], k: int
+) -> float:
+    """Best-Improvement mit 1:1-Tausch A<->B und A/B<->Bank; ändert die Listen in-place."""
+    sa = sum(values[i] for i in team_a)
+    sb = sum(values[i] for i in team_b)
+    qa = sum(values[i] ** 2 for i in team_a)
+    qb = sum(values[i] ** 2 for i in team_b)
+    score = split_score(sa, qa, sb, qb, k)
+
+    for _ in range(LOCAL_SEARCH_MAX_ROUNDS):
+        best_move: tuple[str, int, int] | None = None
+        best_score = score
+        for x, i in enumerate(team_a):
+            vi = values[i]
+            for y, j in enumerate(team_b):
+                d = values[j] - vi
+                dq = values[j] ** 2 - vi * vi
+                cand = split_score(sa + d, qa + dq, sb - d, qb - dq, k)
+                if cand < best_score - 1e-12:
+                    best_score, best_move = cand, ("ab", x, y)
+        for y, j in enumerate(bench):
+            vj = values[j]
+            for x, i in enumerate(team_a):
+                d = vj - values[i]
+                dq = vj * vj - values[i] ** 2
+                cand = split_score(sa + d, qa + dq, sb, qb, k)
+                if cand < best_score - 1e-12:
+                    best_score, best_move = cand, ("a_bench", x, y)
+            for x, i in enumerate(team_b):
+                d = vj - values[i]
+                dq = vj * vj - values[i] ** 2
+                cand = split_score(sa, qa, sb + d, qb + dq, k)
+                if cand < best_score - 1e-12:
+                    best_score, best_move = cand, ("b_bench", x, y)
+        if best_move is None:
+            break
+
+        kind, x, y = best_move
+        if kind == "ab":
+            i, j = team_a[x], team_b[y]
+            team_a[x], team_b[y] = j, i
+            d, dq = values[j] - values[i], values[j] ** 2 - values[i] ** 2
+            sa, qa, sb, qb = sa + d, qa + dq, sb - d, qb - dq
+        elif kind == "a_bench":
+            i, j = team_a[x], bench[y]
+            team_a[x], bench[y] = j, i
+            sa += values[j] - values[i]
+            qa += values[j] ** 2 - values[i] ** 2
+        else:
+            i, j = team_b[x], bench[y]
+            team_b[x], bench[y] = j, i
+            sb += values[j] - values[i]
+            qb += values[j] ** 2 - values[i] ** 2
+        score = best_score
+
+    return score
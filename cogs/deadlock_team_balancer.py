@@ -11,20 +11,19 @@ import random
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from functools import lru_cache
-from itertools import combinations
 
 import discord
 from discord.ext import commands
 
+from cogs.customgames import team_split
 from cogs.customgames import tournament_store as tstore
-from service import db
+from service import db, voice_moves
 
 logger = logging.getLogger(__name__)
 
 # --------- KONFIG ---------
 MATCH_CATEGORY_ID = 1289721245281292290  # Pflichtkategorie für die zwei Team-VCs
 TEAM_SIZE_CAP = 6  # max 6 pro Team => 6v6
-MOVE_SLEEP = 0.35  # Rate-Limit-Schoner beim Move
 SELECTION_TIMEOUT = 90.0  # Sekunden für interaktive Auswahl
 TOURNAMENT_UI_TIMEOUT = 240.0  # Timeout fuer Turnier-Menues
 # --------------------------
@@ -115,28 +114,27 @@ def _best_split(
     """
     players: [(member, rank_value)]
     -> zwei Teams (gleiche Größe, max TEAM_SIZE_CAP) mit bester Balance
+    (Kennzahl wie _balance_score; bei mehr Spielern wählt die Engine auch die Bank)
     """
     n = len(players)
     team_size = min(TEAM_SIZE_CAP, n // 2)
     team_size = max(2, team_size)  # Safety
 
-    best = None
-    best_score = float("inf")
-    idx = list(range(n))
+    if n < team_size * 2:
+        return players[:team_size], players[team_size : team_size * 2]
 
-    for comb in combinations(idx, team_size):
-        a_idx = set(comb)
-        team_a = [players[i] for i in a_idx]
-        rest = [players[i] for i in idx if i not in a_idx]
-        if len(rest) < team_size:
-            continue
-        team_b = rest[:team_size]
-        score = _balance_score([r for _, r in team_a], [r for _, r in team_b])
-        if score < best_score:
-            best_score = score
-            best = (team_a, team_b)
+    a_idx, b_idx = team_split.best_split([r for _, r in players], team_size)
+    return [players[i] for i in a_idx], [players[i] for i in b_idx]
 
-    return best if best else (players[:team_size], players[team_size : team_size * 2])
+
+def _move_failure_text(result: voice_moves.VoiceMoveResult) -> str:
+    if result.status == voice_moves.NOT_IN_VOICE:
+        return "nicht in Voice"
+    if result.status == voice_moves.FORBIDDEN:
+        return "keine Berechtigung"
+    if result.status in (voice_moves.HTTP_ERROR, voice_moves.RATE_LIMITED):
+        return f"HTTP: {result.error}"
+    return f"Fehler: {result.error}"
 
 
 def _team_embed(
@@ -956,26 +954,20 @@ class DeadlockTeamBalancer(commands.Cog):
                     logger.warning(f"Debrief-VC create failed: {e}")
 
             if debrief_ch:
+                team_channel_ids = (info.team1_channel_id, info.team2_channel_id)
+                debrief_moves = []
                 for uid in info.players:
-                    try:
-                        m = ctx.guild.get_member(uid)
-                        if (
-                            m
-                            and m.voice
-                            and m.voice.channel
-                            and m.voice.channel.id in (info.team1_channel_id, info.team2_channel_id)
-                        ):
-                            await m.move_to(
-                                debrief_ch, reason=f"Match {match_id} beendet – Debrief"
-                            )
-                            moved += 1
-                            await asyncio.sleep(0.3)
-                    except discord.Forbidden:
-                        move_fail.append(f"<@{uid}> (keine Berechtigung)")
-                    except discord.HTTPException as e:
-                        move_fail.append(f"<@{uid}> (HTTP: {e})")
-                    except Exception as e:
-                        move_fail.append(f"<@{uid}> (Fehler: {e})")
+                    m = ctx.guild.get_member(uid)
+                    if m and m.voice and m.voice.channel and m.voice.channel.id in team_channel_ids:
+                        debrief_moves.append((m, debrief_ch))
+                results = await voice_moves.move_members(
+                    debrief_moves, reason=f"Match {match_id} beendet – Debrief"
+                )
+                for res in results:
+                    if res.ok:
+                        moved += 1
+                    else:
+                        move_fail.append(f"<@{res.member.id}> ({_move_failure_text(res)})")
 
         # 2) Team-Channels löschen
         deleted = []
@@ -1111,26 +1103,16 @@ class DeadlockTeamBalancer(commands.Cog):
         moved_a = moved_b = 0
         failed: list[str] = []
 
-        order = [(team_a[i], ch1) for i in range(len(team_a))] + [
-            (team_b[i], ch2) for i in range(len(team_b))
-        ]
-        for (m, _), target in order:
-            try:
-                if m.voice and m.voice.channel:
-                    await m.move_to(target, reason="Deadlock Team Balance")
-                    if target.id == ch1.id:
-                        moved_a += 1
-                    else:
-                        moved_b += 1
+        order = [(m, ch1) for m, _ in team_a] + [(m, ch2) for m, _ in team_b]
+        results = await voice_moves.move_members(order, reason="Deadlock Team Balance")
+        for res in results:
+            if res.ok:
+                if res.target.id == ch1.id:
+                    moved_a += 1
                 else:
-                    failed.append(f"{m.display_name} (nicht in Voice)")
-            except discord.Forbidden:
-                failed.append(f"{m.display_name} (keine Berechtigung)")
-            except discord.HTTPException as e:
-                failed.append(f"{m.display_name} (HTTP: {e})")
-            except Exception as e:
-                failed.append(f"{m.display_name} (Fehler: {e})")
-            await asyncio.sleep(MOVE_SLEEP)
+                    moved_b += 1
+            else:
+                failed.append(f"{res.member.display_name} ({_move_failure_text(res)})")
 
         return moved_a, moved_b, failed
 
@@ -7,14 +7,16 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
-from datetime import datetime, timedelta
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from cogs import message_events
 from service import db as service_db
+from service import deadline_scheduler, faq_docs_index
 
 log = logging.getLogger(__name__)
 
@@ -24,6 +26,7 @@ PANEL_CHANNEL_ID = int(os.getenv("FAQ_PANEL_CHANNEL", "1491953161747955853"))
 FAQ_CATEGORY_ID = int(os.getenv("FAQ_CATEGORY_ID", "1310153243795390475"))
 LOG_CHANNEL_ID = int(os.getenv("FAQ_LOG_CHANNEL", "1374364800817303632"))
 SESSION_TIMEOUT_HOURS = int(os.getenv("FAQ_SESSION_HOURS", "24"))
+SESSION_EXPIRY_JOB = "faq.session_expiry"
 
 PRIMARY_MODEL = os.getenv("MINIMAX_MODEL", "MiniMax-Text-01")
 PRIMARY_PROVIDER = "minimax"
@@ -34,34 +37,17 @@ DOCS_PATH = Path(os.getenv("FAQ_DOCS_PATH", str(DEFAULT_DOCS_PATH)))
 
 PANEL_KV_NS = "faq_chat:panel"
 
-# --- Doku-Loader ---
+# --- Doku-Index ---
 
 
-def _load_docs() -> str:
-    if not DOCS_PATH.is_dir():
-        log.warning("Docs-Pfad nicht gefunden: %s", DOCS_PATH)
-        return ""
+DOCS_INDEX = faq_docs_index.DocsIndex(
+    DOCS_PATH,
+    top_k=int(os.getenv("FAQ_DOCS_TOP_K", "6") or "6"),
+    max_chars=int(os.getenv("FAQ_DOCS_MAX_CHARS", "8000") or "8000"),
+)
 
-    context_parts = []
-    for md_file in sorted(DOCS_PATH.glob("*.md")):
-        try:
-            content = md_file.read_text(encoding="utf-8")
-            rel_path = md_file.relative_to(DOCS_PATH)
-            context_parts.append(f"\n\n=== Dokument: {rel_path} ===\n{content}")
-        except Exception as exc:
-            log.warning("Konnte %s nicht lesen: %s", md_file, exc)
-
-    if not context_parts:
-        return ""
-
-    header = (
-        "Du hast Zugriff auf folgende Server-Dokumentation. "
-        "Nutze diese als Wissensbasis. Erfinde keine Informationen.\n"
-    )
-    return header + "\n".join(context_parts)
-
-
-DOCS_CONTEXT = _load_docs()
+# Wie viele frühere User-Fragen in die Doku-Suche einfließen
+RETRIEVAL_HISTORY_TURNS = int(os.getenv("FAQ_RETRIEVAL_HISTORY_TURNS", "3") or "3")
 
 # --- System Prompt ---
 
@@ -150,7 +136,7 @@ async def _create_session(
     user_name: str,
     channel_id: int,
     guild_id: int,
-) -> None:
+) -> datetime:
     expires_at = datetime.utcnow() + timedelta(hours=SESSION_TIMEOUT_HOURS)
     async with service_db.transaction() as tx:
         tx.execute(
@@ -161,6 +147,7 @@ async def _create_session(
         """,
             (session_id, user_id, user_name, channel_id, guild_id, expires_at.isoformat()),
         )
+    return expires_at
 
 
 async def _add_message(session_id: str, role: str, content: str) -> None:
@@ -182,14 +169,19 @@ async def _get_session_messages(session_id: str) -> list[dict[str, str]]:
     return [{"role": r["role"], "content": r["content"]} for r in rows]
 
 
-async def _get_expired_sessions() -> list:
+async def _get_active_sessions() -> list:
     return await service_db.query_all_async(
-        "SELECT session_id, channel_id, guild_id FROM faq_chat_sessions "
-        "WHERE expires_at < ? AND status = 'active'",
-        (datetime.utcnow().isoformat(),),
+        "SELECT session_id, expires_at FROM faq_chat_sessions WHERE status = 'active'"
     )
 
 
+def _expires_ts(value: datetime | str) -> float:
+    """``expires_at`` ist naive UTC (ISO) gespeichert."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=UTC).timestamp()
+
+
 async def _close_session(session_id: str) -> None:
     await service_db.execute_async(
         "UPDATE faq_chat_sessions SET status = 'closed' WHERE session_id = ?",
@@ -240,14 +232,22 @@ class FAQChat(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
         self._panel_message_id: int | None = None
-        self._cleanup_task: asyncio.Task | None = None
 
     async def cog_load(self) -> None:
         log.info("FAQ Chat cog_load start")
         await _ensure_db_tables()
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            scope=message_events.SCOPE_GUILD,
+            intent=lambda event: isinstance(event.message.channel, discord.TextChannel),
+        )
         # Channel-Daten erst verfügbar wenn bot ready ist
         asyncio.ensure_future(self._delayed_setup())
-        self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        deadline_scheduler.get_scheduler(self.bot).register(
+            SESSION_EXPIRY_JOB, self._on_session_expiry_job
+        )
+        await self._schedule_session_expiries()
         log.info("FAQ Chat gestartet (setup verzögert bis ready)")
 
     async def _delayed_setup(self) -> None:
@@ -259,8 +259,8 @@ class FAQChat(commands.Cog):
         log.info("FAQ: Setup complete (panel_msg=%s)", self._panel_message_id)
 
     async def cog_unload(self) -> None:
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+        deadline_scheduler.get_scheduler(self.bot).unregister(SESSION_EXPIRY_JOB)
 
     async def _restore_panel_view(self) -> None:
         """Versucht gespeichertes Panel wiederherzustellen."""
@@ -377,13 +377,16 @@ class FAQChat(commands.Cog):
             log.error("FAQ: keine rechte channel zu erstellen in guild %s", guild.id)
             raise
 
-        await _create_session(
+        expires_at = await _create_session(
             session_id=session_id,
             user_id=user.id,
             user_name=str(user),
             channel_id=channel.id,
             guild_id=guild.id,
         )
+        await deadline_scheduler.get_scheduler(self.bot).schedule(
+            SESSION_EXPIRY_JOB, session_id, _expires_ts(expires_at)
+        )
         return session_id, channel
 
     async def _on_panel_click(self, interaction: discord.Interaction) -> None:
@@ -490,6 +493,7 @@ class FAQChat(commands.Cog):
             return
 
         await _close_session(session_id)
+        await deadline_scheduler.get_scheduler(self.bot).cancel(SESSION_EXPIRY_JOB, session_id)
 
         channel_id = row[1] if not isinstance(row, dict) else row.get("channel_id")
         channel = interaction.guild.get_channel(channel_id)
@@ -539,11 +543,8 @@ class FAQChat(commands.Cog):
         except discord.HTTPException:
             await message.channel.send(f"{message.author.mention}: {answer}", suppress_embeds=True)
 
-    @commands.Cog.listener("on_message")
-    async def on_message(self, message: discord.Message) -> None:
-        if message.guild is None:
-            return
-        await self._handle_chat_message(message)
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        await self._handle_chat_message(event.message)
 
     async def _generate_answer(self, session_id: str, new_question: str) -> tuple[str, str | None]:
         ai = getattr(self.bot, "get_cog", lambda n: None)("AIConnector")
@@ -558,16 +559,22 @@ class FAQChat(commands.Cog):
                 role_label = "User" if msg["role"] == "user" else "Assistent"
                 lines.append(f"{role_label}: {msg['content']}")
             conversation_context = "\n".join(lines)
+        retrieval_query = faq_docs_index.conversation_query(
+            messages, new_question, turns=RETRIEVAL_HISTORY_TURNS
+        )
 
         patchnote_context = ""
         try:
             from service import changelogs
 
-            patchnote_context = changelogs.get_context_for_question(new_question)
+            patchnote_context = faq_docs_index.rank_text_sections(
+                changelogs.get_context_for_question(new_question),
+                retrieval_query,
+            )
         except Exception:
             pass
 
-        context_parts = [DOCS_CONTEXT]
+        context_parts = [DOCS_INDEX.build_context(retrieval_query)]
         if patchnote_context:
             context_parts.append(f"Patchnotes:\n{patchnote_context}")
         if conversation_context:
@@ -609,35 +616,44 @@ class FAQChat(commands.Cog):
         except Exception:
             pass
 
-    async def _cleanup_loop(self) -> None:
-        while True:
+    async def _schedule_session_expiries(self) -> None:
+        """Einmaliger Abgleich beim Laden: aktive Sessions ohne Ablauf-Job nachtragen."""
+        scheduler = deadline_scheduler.get_scheduler(self.bot)
+        await scheduler.load()
+        for row in await _get_active_sessions():
+            session_id = row[0] if not isinstance(row, dict) else row.get("session_id")
+            expires_at = row[1] if not isinstance(row, dict) else row.get("expires_at")
+            if scheduler.get(SESSION_EXPIRY_JOB, session_id) is not None:
+                continue
             try:
-                await asyncio.sleep(3600)
-                await self._cleanup_expired()
-            except asyncio.CancelledError:
-                break
-            except Exception:
-                log.exception("Fehler beim FAQ Cleanup")
-
-    async def _cleanup_expired(self) -> None:
-        expired = await _get_expired_sessions()
-        if not expired:
+                due_at = _expires_ts(expires_at)
+            except (TypeError, ValueError):
+                log.warning("FAQ: ungültiges expires_at für Session %s", session_id)
+                continue
+            await scheduler.schedule(SESSION_EXPIRY_JOB, session_id, due_at)
+
+    async def _on_session_expiry_job(self, job: deadline_scheduler.ScheduledJob) -> None:
+        await self.bot.wait_until_ready()
+        row = await service_db.query_one_async(
+            "SELECT channel_id, guild_id FROM faq_chat_sessions "
+            "WHERE session_id = ? AND status = 'active'",
+            (job.key,),
+        )
+        if not row:
             return
-        log.info("FAQ: %d abgelaufene Sessions", len(expired))
-        for row in expired:
-            session_id = row[0] if not isinstance(row, dict) else row.get("session_id")
-            channel_id = row[1] if not isinstance(row, dict) else row.get("channel_id")
-            guild_id = row[2] if not isinstance(row, dict) else row.get("guild_id")
-            await _close_session(session_id)
-            guild = self.bot.get_guild(guild_id)
-            if guild:
-                channel = guild.get_channel(channel_id)
-                if channel and isinstance(channel, discord.TextChannel):
-                    try:
-                        await channel.send("⏱️ Chat wurde automatisch geschlossen (24h Timeout).")
-                        await channel.edit(archived=True)
-                    except discord.Forbidden:
-                        pass
+        channel_id = row[0] if not isinstance(row, dict) else row.get("channel_id")
+        guild_id = row[1] if not isinstance(row, dict) else row.get("guild_id")
+        log.info("FAQ: Session %s abgelaufen", job.key)
+        await _close_session(job.key)
+        guild = self.bot.get_guild(guild_id)
+        if guild:
+            channel = guild.get_channel(channel_id)
+            if channel and isinstance(channel, discord.TextChannel):
+                try:
+                    await channel.send("⏱️ Chat wurde automatisch geschlossen (24h Timeout).")
+                    await channel.edit(archived=True)
+                except discord.Forbidden:
+                    pass
 
     @app_commands.command(name="faqpanel", description="Erstellt das FAQ Panel (Admin)")
     @app_commands.default_permissions(administrator=True)
@@ -16,6 +16,8 @@ from datetime import datetime, timedelta
 import discord
 from discord.ext import commands
 
+from cogs import message_events
+from cogs.lfg_presence_index import SteamPresenceIndex
 from service import db
 
 log = logging.getLogger("SmartLFG")
@@ -218,8 +220,15 @@ class SmartLFGAgent(commands.Cog):
         self.bot = bot
         self.lfg_cooldowns: dict[int, float] = {}
         self.cooldown_seconds = 60  # Kurzer Cooldown gegen Spam
+        self.presence_index = SteamPresenceIndex(PRESENCE_STALE_SECONDS)
 
     async def cog_load(self) -> None:
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            channel_ids={LFG_CHANNEL_ID},
+            intent=lambda event: self._keyword_lfg_intent(event.text_lower),
+        )
         log.info(
             "SmartLFGAgent geladen - LFG Channel: %s | Output Channel: %s",
             LFG_CHANNEL_ID,
@@ -227,6 +236,7 @@ class SmartLFGAgent(commands.Cog):
         )
 
     async def cog_unload(self) -> None:
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         log.info("SmartLFGAgent entladen")
 
     def _parse_subrank_role_name(self, role_name: str) -> tuple[str, int, int] | None:
@@ -840,84 +850,16 @@ class SmartLFGAgent(commands.Cog):
 
     async def _get_all_steam_links(self) -> dict[int, list[str]]:
         """
-        Holt alle Discord User -> Steam ID Mappings.
+        Holt alle Discord User -> Steam ID Mappings (aus dem Presence-Index, nur lesen).
         Returns: {discord_user_id: [steam_id1, steam_id2, ...]}
         """
-        query = """
-            SELECT user_id, steam_id
-            FROM steam_links
-            WHERE steam_id IS NOT NULL AND steam_id != ''
-            AND verified = 1
-            ORDER BY primary_account DESC, updated_at DESC
-        """
-        rows = await db.query_all_async(query)
-
-        mapping: dict[int, list[str]] = {}
-        for row in rows:
-            uid = int(row["user_id"])
-            sid = str(row["steam_id"])
-            mapping.setdefault(uid, []).append(sid)
-
-        return mapping
+        await self.presence_index.refresh()
+        return {uid: list(ids) for uid, ids in self.presence_index.links.items()}
 
     async def _get_steam_friend_ids(self) -> set[int]:
         """Gibt Discord-User-IDs zurück die den Bot als Steam-Freund haben."""
-        rows = await db.query_all_async(
-            """
-            SELECT DISTINCT user_id FROM steam_links
-            WHERE verified = 1 AND is_steam_friend = 1 AND user_id > 0
-            """
-        )
-        return {int(r["user_id"]) for r in rows}
-
-    async def _get_online_steam_users(
-        self, steam_ids: set[str]
-    ) -> dict[str, tuple[str, int | None]]:
-        """
-        Filtert Steam-IDs nach Online-Status (in Deadlock).
-        Returns: {steam_id: (stage, minutes)}
-        stage: 'lobby' oder 'match'
-        minutes: Spielminuten bei 'match', None bei 'lobby'
-        """
-        if not steam_ids:
-            return {}
-
-        now = int(time.time())
-        steam_ids_json = json.dumps(sorted(steam_ids))
-        rows = await db.query_all_async(
-            """
-            SELECT steam_id, deadlock_stage, deadlock_minutes, deadlock_updated_at, last_seen_ts
-            FROM live_player_state
-            WHERE steam_id IN (SELECT value FROM json_each(?))
-            AND (in_deadlock_now = 1 OR deadlock_stage IS NOT NULL)
-            """,
-            (steam_ids_json,),
-        )
-
-        online_map: dict[str, tuple[str, int | None]] = {}
-
-        for row in rows:
-            updated_at = row["deadlock_updated_at"] or row["last_seen_ts"]
-            if not updated_at:
-                continue
-
-            # Zu alte Daten überspringen
-            if now - int(updated_at) > PRESENCE_STALE_SECONDS:
-                continue
-
-            stage = row["deadlock_stage"]
-            if stage not in {"lobby", "match"}:
-                continue
-
-            minutes = row["deadlock_minutes"]
-            # Snapshot-Korrektur: deadlock_minutes war der Stand beim letzten Update.
-            # Wir addieren die seitdem vergangene Zeit für eine genauere Anzeige.
-            if stage == "match" and minutes is not None:
-                seconds_since_update = now - int(updated_at)
-                minutes = int(minutes) + (seconds_since_update // 60)
-            online_map[str(row["steam_id"])] = (stage, minutes)
-
-        return online_map
+        await self.presence_index.refresh()
+        return set(self.presence_index.friend_ids)
 
     def _get_deadlock_active_discord_ids(
         self,
@@ -939,8 +881,8 @@ class SmartLFGAgent(commands.Cog):
         if not steam_links:
             return {}, {}, set()
 
-        all_steam_ids = {sid for sids in steam_links.values() for sid in sids}
-        online_users = await self._get_online_steam_users(all_steam_ids)
+        # Alle online Steam-IDs gehören zu verifizierten Links: kein Filter-Set nötig.
+        online_users = self.presence_index.online()
         steam_online_ids = self._get_deadlock_active_discord_ids(steam_links, online_users)
         return steam_links, online_users, steam_online_ids
 
@@ -1072,25 +1014,8 @@ class SmartLFGAgent(commands.Cog):
     ) -> dict[int, tuple[list[int], list[int], int]]:
         if not user_ids:
             return {}
-
-        patterns: dict[int, tuple[list[int], list[int], int]] = {}
-        for chunk in self._chunked(user_ids):
-            chunk_json = json.dumps([int(uid) for uid in chunk])
-            rows = await db.query_all_async(
-                """
-                SELECT user_id, typical_hours, typical_days, activity_score_2w
-                FROM user_activity_patterns
-                WHERE user_id IN (SELECT CAST(value AS INTEGER) FROM json_each(?))
-                """,
-                (chunk_json,),
-            )
-            for row in rows:
-                uid = int(row[0])
-                hours = self._parse_json_list(row[1])
-                days = self._parse_json_list(row[2])
-                score = int(row[3] or 0)
-                patterns[uid] = (hours, days, score)
-        return patterns
+        await self.presence_index.refresh()
+        return self.presence_index.patterns(user_ids)
 
     async def _fetch_co_player_stats(self, user_id: int) -> dict[int, tuple[int, int]]:
         rows = await db.query_all_async(
@@ -1299,15 +1224,17 @@ class SmartLFGAgent(commands.Cog):
         )
 
         if online_users is None:
-            all_steam_ids = {sid for sids in steam_links.values() for sid in sids}
-            online_users = await self._get_online_steam_users(all_steam_ids)
-
-        user_presence: dict[int, tuple[str, int | None]] = {}
-        for discord_id, steam_ids in steam_links.items():
-            for sid in steam_ids:
-                if sid in online_users:
-                    user_presence[discord_id] = online_users[sid]
-                    break
+            user_presence = self.presence_index.online_discord_ids()
+        else:
+            user_presence = {}
+            for sid in online_users:
+                discord_id = self.presence_index.owner_by_steam.get(sid)
+                if discord_id is None or discord_id in user_presence:
+                    continue
+                for candidate in steam_links.get(discord_id, ()):
+                    if candidate in online_users:
+                        user_presence[discord_id] = online_users[candidate]
+                        break
 
         now = datetime.utcnow()
         candidates: list[dict[str, object]] = []
@@ -2135,23 +2062,14 @@ class SmartLFGAgent(commands.Cog):
             except Exception as exc:
                 log.warning("Decision Log senden fehlgeschlagen: %s", exc)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        if message.author.bot:
-            return
-
-        # Nur im LFG-Channel lauschen
-        if message.channel.id != LFG_CHANNEL_ID:
-            return
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        # Bots, LFG-Channel und Keyword-Intent (kein AI) filtert die Message-Pipeline
+        message = event.message
 
         # Lobby-Suche: User darf nicht bereits in einer Lane sitzen — das übernimmt player_finder.py
         if message.author.voice and message.author.voice.channel:
             return
 
-        # Keyword-only Intent Check (kein AI)
-        if not self._keyword_lfg_intent(message.content):
-            return
-
         # Cooldown Check
         now = time.time()
         if now - self.lfg_cooldowns.get(message.author.id, 0) < self.cooldown_seconds:
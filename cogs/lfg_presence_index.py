@@ -0,0 +1,226 @@
+"""
+In-Memory-Presence-Index für den SmartLFGAgent.
+
+Hält discord_id <-> steam_ids, Steam-Freund-Flag, Deadlock-Presence (Stage,
+Minuten, Zeitstempel) und Aktivitätsmuster im Speicher. Aufgefrischt wird
+lazy beim Zugriff und gedrosselt, damit ein Schwall LFG-Posts höchstens einen
+Refresh auslöst:
+
+- live_player_state inkrementell über last_seen_ts/deadlock_updated_at
+  (alle PRESENCE_REFRESH_SECONDS),
+- user_activity_patterns inkrementell über last_analyzed_at,
+- steam_links (verifiziert) inkl. Freund-Flag sowie die Muster komplett alle
+  LINKS_REFRESH_SECONDS.
+
+Frische (PRESENCE_STALE_SECONDS) wird erst beim Lesen geprüft.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections.abc import Iterable
+
+from service import db
+
+PRESENCE_REFRESH_SECONDS = float(os.getenv("LFG_PRESENCE_REFRESH_SECONDS", "5"))
+PATTERN_REFRESH_SECONDS = float(os.getenv("LFG_PATTERN_REFRESH_SECONDS", "60"))
+LINKS_REFRESH_SECONDS = float(os.getenv("LFG_LINKS_REFRESH_SECONDS", "300"))
+# Puffer für Writer, deren Zeitstempel leicht hinter dem Watermark liegen.
+PRESENCE_OVERLAP_SECONDS = 10
+
+ONLINE_STAGES = frozenset({"lobby", "match"})
+
+Pattern = tuple[list[int], list[int], int]
+
+
+def _parse_json_list(raw: str | None) -> list[int]:
+    if not raw:
+        return []
+    try:
+        parsed = json.loads(raw)
+        if isinstance(parsed, list):
+            return [int(x) for x in parsed if str(x).isdigit() or isinstance(x, int)]
+    except Exception:
+        return []
+    return []
+
+
+class SteamPresenceIndex:
+    def __init__(self, stale_seconds: float) -> None:
+        self.stale_seconds = float(stale_seconds)
+        # Dicts/Sets werden beim Full-Reload ersetzt, nicht mutiert: ausgegebene
+        # Referenzen bleiben in sich konsistent.
+        self.links: dict[int, list[str]] = {}
+        self.owner_by_steam: dict[str, int] = {}
+        self.friend_ids: frozenset[int] = frozenset()
+        self._presence: dict[str, tuple[str, int | None, int]] = {}
+        self._patterns: dict[int, Pattern] = {}
+        self._presence_hwm = 0
+        self._pattern_hwm = ""
+        self._links_loaded_at = 0.0
+        self._presence_loaded_at = 0.0
+        self._patterns_loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.stats: dict[str, int] = {"refreshes": 0, "presence_rows": 0, "pattern_rows": 0}
+
+    def invalidate_links(self) -> None:
+        self._links_loaded_at = 0.0
+
+    async def refresh(self, *, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and not self._is_due(now):
+            return
+        async with self._lock:
+            # Wer auf den Lock gewartet hat, bekommt das Ergebnis des Vorgängers.
+            now = time.monotonic()
+            if not force and not self._is_due(now):
+                return
+            self.stats["refreshes"] += 1
+            full_reload = force or now - self._links_loaded_at >= LINKS_REFRESH_SECONDS
+            if full_reload:
+                await self._reload_links()
+                self._links_loaded_at = now
+                # Muster mit neu aufbauen, damit gelöschte Zeilen (Opt-out) verschwinden.
+                self._patterns = {}
+                self._pattern_hwm = ""
+            if force or now - self._presence_loaded_at >= PRESENCE_REFRESH_SECONDS:
+                await self._refresh_presence()
+                self._presence_loaded_at = now
+            if full_reload or now - self._patterns_loaded_at >= PATTERN_REFRESH_SECONDS:
+                await self._refresh_patterns()
+                self._patterns_loaded_at = now
+
+    def _is_due(self, now: float) -> bool:
+        return (
+            now - self._links_loaded_at >= LINKS_REFRESH_SECONDS
+            or now - self._presence_loaded_at >= PRESENCE_REFRESH_SECONDS
+            or now - self._patterns_loaded_at >= PATTERN_REFRESH_SECONDS
+        )
+
+    async def _reload_links(self) -> None:
+        rows = await db.query_all_async(
+            """
+            SELECT user_id, steam_id, COALESCE(is_steam_friend, 0) AS is_steam_friend
+            FROM steam_links
+            WHERE steam_id IS NOT NULL AND steam_id != ''
+            AND verified = 1
+            ORDER BY primary_account DESC, updated_at DESC
+            """
+        )
+        links: dict[int, list[str]] = {}
+        owners: dict[str, int] = {}
+        friends: set[int] = set()
+        for row in rows:
+            uid = int(row["user_id"])
+            sid = str(row["steam_id"])
+            links.setdefault(uid, []).append(sid)
+            owners.setdefault(sid, uid)
+            if uid > 0 and int(row["is_steam_friend"] or 0) == 1:
+                friends.add(uid)
+        self.links = links
+        self.owner_by_steam = owners
+        self.friend_ids = frozenset(friends)
+
+    async def _refresh_presence(self) -> None:
+        now = int(time.time())
+        since = (
+            min(self._presence_hwm, now) - PRESENCE_OVERLAP_SECONDS
+            if self._presence_hwm
+            else now - int(self.stale_seconds)
+        )
+        rows = await db.query_all_async(
+            """
+            SELECT steam_id, deadlock_stage, deadlock_minutes, deadlock_updated_at, last_seen_ts
+            FROM live_player_state
+            WHERE MAX(COALESCE(deadlock_updated_at, 0), COALESCE(last_seen_ts, 0)) >= ?
+            """,
+            (since,),
+        )
+        for row in rows:
+            sid = str(row["steam_id"])
+            touched = max(int(row["deadlock_updated_at"] or 0), int(row["last_seen_ts"] or 0))
+            self._presence_hwm = max(self._presence_hwm, touched)
+            updated_at = row["deadlock_updated_at"] or row["last_seen_ts"]
+            stage = row["deadlock_stage"]
+            if stage in ONLINE_STAGES and updated_at:
+                minutes = row["deadlock_minutes"]
+                self._presence[sid] = (
+                    stage,
+                    int(minutes) if minutes is not None else None,
+                    int(updated_at),
+                )
+            else:
+                self._presence.pop(sid, None)
+        self.stats["presence_rows"] += len(rows)
+
+        cutoff = now - self.stale_seconds
+        for sid in [sid for sid, entry in self._presence.items() if entry[2] < cutoff]:
+            del self._presence[sid]
+
+    async def _refresh_patterns(self) -> None:
+        rows = await db.query_all_async(
+            """
+            SELECT user_id, typical_hours, typical_days, activity_score_2w, last_analyzed_at
+            FROM user_activity_patterns
+            WHERE COALESCE(last_analyzed_at, '') >= ?
+            """,
+            (self._pattern_hwm,),
+        )
+        for row in rows:
+            self._patterns[int(row["user_id"])] = (
+                _parse_json_list(row["typical_hours"]),
+                _parse_json_list(row["typical_days"]),
+                int(row["activity_score_2w"] or 0),
+            )
+            analyzed = str(row["last_analyzed_at"] or "")
+            if analyzed > self._pattern_hwm:
+                self._pattern_hwm = analyzed
+        self.stats["pattern_rows"] += len(rows)
+
+    # ----- Lookups (nur Speicher) -----
+
+    def online(self, steam_ids: Iterable[str] | None = None) -> dict[str, tuple[str, int | None]]:
+        """{steam_id: (stage, minutes)} für frische Lobby/Match-Presence."""
+        now = int(time.time())
+        if steam_ids is None:
+            items = self._presence.items()
+        else:
+            items = ((sid, self._presence.get(sid)) for sid in steam_ids)
+        online_map: dict[str, tuple[str, int | None]] = {}
+        for sid, entry in items:
+            if entry is None:
+                continue
+            stage, minutes, updated_at = entry
+            age = now - updated_at
+            if age > self.stale_seconds:
+                continue
+            # Snapshot-Korrektur: deadlock_minutes war der Stand beim letzten Update.
+            if stage == "match" and minutes is not None:
+                minutes = minutes + (age // 60)
+            online_map[sid] = (stage, minutes)
+        return online_map
+
+    def online_discord_ids(self) -> dict[int, tuple[str, int | None]]:
+        """{discord_id: (stage, minutes)} – erster online Account in Link-Reihenfolge."""
+        presence: dict[int, tuple[str, int | None]] = {}
+        online = self.online()
+        for sid in online:
+            uid = self.owner_by_steam.get(sid)
+            if uid is None or uid in presence:
+                continue
+            for candidate in self.links.get(uid, ()):
+                if candidate in online:
+                    presence[uid] = online[candidate]
+                    break
+        return presence
+
+    def patterns(self, user_ids: Iterable[int]) -> dict[int, Pattern]:
+        result: dict[int, Pattern] = {}
+        for uid in user_ids:
+            pattern = self._patterns.get(int(uid))
+            if pattern is not None:
+                result[int(uid)] = pattern
+        return result
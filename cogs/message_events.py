@@ -0,0 +1,285 @@
+"""
+Gemeinsame Message-Ingest-Pipeline für alle on_message-Listener.
+
+Jede Nachricht wird genau einmal klassifiziert (Guild/DM/Thread, Kanal +
+Thread-Parent, normalisierter Text in Kleinbuchstaben, Text ohne Mentions,
+Autor-Flags) und dann nur an interessierte Handler geroutet:
+
+- Handler mit ``channel_ids`` landen in einem Kanal-Index (dict-Lookup über
+  die Kanal-ID) und sehen fremde Kanäle gar nicht erst;
+- alle anderen hängen an einem Scope (``guild`` / ``thread`` / ``dm`` / ``any``);
+- Bot-/Webhook-/Opt-out-Filter und ein optionales ``intent``-Prädikat laufen
+  vor dem Handler-Aufruf.
+
+Pro Handler wird ein Latenz-Histogramm geführt (``stats()``, Dashboard-Status).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable, Collection
+from dataclasses import dataclass, field
+from typing import Any
+
+import discord
+
+from cogs import privacy_core as privacy
+
+log = logging.getLogger(__name__)
+
+SLOW_HANDLER_MS = float(os.getenv("MESSAGE_EVENT_SLOW_HANDLER_MS", "1000"))
+# Obergrenzen der Histogramm-Buckets in ms; letzter Bucket = darüber.
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+SCOPE_GUILD = "guild"
+SCOPE_THREAD = "thread"
+SCOPE_DM = "dm"
+SCOPE_ANY = "any"
+_SCOPES = (SCOPE_GUILD, SCOPE_THREAD, SCOPE_DM, SCOPE_ANY)
+
+_MENTION_RE = re.compile(r"<[@#][!&]?\d+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+@dataclass(slots=True)
+class MessageEvent:
+    message: Any
+    author_id: int
+    guild_id: int | None
+    channel_id: int
+    parent_id: int | None
+    is_dm: bool
+    is_thread: bool
+    is_bot: bool
+    is_webhook: bool
+    is_system: bool
+    is_member: bool
+    opted_out: bool
+    text: str
+    text_lower: str
+    text_plain: str
+    has_attachments: bool
+    received_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_guild(self) -> bool:
+        return self.guild_id is not None
+
+    @property
+    def is_staff(self) -> bool:
+        perms = getattr(self.message.author, "guild_permissions", None)
+        return bool(perms and (perms.manage_messages or perms.manage_guild))
+
+
+def build_event(message: Any) -> MessageEvent:
+    author = message.author
+    channel = message.channel
+    guild = getattr(message, "guild", None)
+    is_bot = bool(getattr(author, "bot", False))
+    is_thread = isinstance(channel, discord.Thread)
+    text = message.content or ""
+    author_id = int(author.id)
+    is_system = getattr(message, "is_system", None)
+    return MessageEvent(
+        message=message,
+        author_id=author_id,
+        guild_id=int(guild.id) if guild is not None else None,
+        channel_id=int(channel.id),
+        parent_id=int(channel.parent_id) if is_thread and channel.parent_id else None,
+        is_dm=isinstance(channel, discord.DMChannel),
+        is_thread=is_thread,
+        is_bot=is_bot,
+        is_webhook=getattr(message, "webhook_id", None) is not None,
+        is_system=bool(is_system()) if callable(is_system) else False,
+        is_member=isinstance(author, discord.Member),
+        opted_out=(not is_bot) and privacy.is_opted_out(author_id),
+        text=text,
+        text_lower=_WHITESPACE_RE.sub(" ", text).strip().lower(),
+        text_plain=_WHITESPACE_RE.sub(" ", _MENTION_RE.sub("", text)).strip(),
+        has_attachments=bool(getattr(message, "attachments", None)),
+    )
+
+
+@dataclass(slots=True)
+class _Subscription:
+    name: str
+    handler: Callable[[MessageEvent], Awaitable[Any]]
+    scope: str = SCOPE_ANY
+    channel_ids: frozenset[int] | None = None
+    include_bots: bool = False
+    include_opted_out: bool = True
+    include_webhooks: bool = True
+    intent: Callable[[MessageEvent], bool] | None = None
+    calls: int = 0
+    skipped: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def accepts(self, event: MessageEvent) -> bool:
+        if event.is_bot and not self.include_bots:
+            return False
+        if event.opted_out and not self.include_opted_out:
+            return False
+        if (event.is_webhook or event.is_system) and not self.include_webhooks:
+            return False
+        if self.intent is not None:
+            try:
+                return bool(self.intent(event))
+            except Exception:
+                log.debug("intent filter of %s failed", self.name, exc_info=True)
+                return False
+        return True
+
+    def record(self, elapsed_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+
+class MessageEventDispatcher:
+    """Klassifiziert Nachrichten einmal und routet sie über Kanal-/Scope-Index."""
+
+    def __init__(self) -> None:
+        self._subscriptions: dict[str, _Subscription] = {}
+        self._by_channel: dict[int, list[_Subscription]] = {}
+        self._by_scope: dict[str, list[_Subscription]] = {scope: [] for scope in _SCOPES}
+        self.messages = 0
+        self.unrouted = 0
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable[[MessageEvent], Awaitable[Any]],
+        *,
+        scope: str = SCOPE_ANY,
+        channel_ids: Collection[int] | None = None,
+        include_bots: bool = False,
+        include_opted_out: bool = True,
+        include_webhooks: bool = True,
+        intent: Callable[[MessageEvent], bool] | None = None,
+    ) -> None:
+        """
+        Registriert (oder ersetzt) den Handler ``name``.
+
+        ``channel_ids`` hat Vorrang vor ``scope`` und gilt nur für genau diese
+        Kanäle (Threads darunter haben eigene IDs).
+        """
+        if scope not in _SCOPES:
+            raise ValueError(f"unknown scope {scope!r}")
+        self._subscriptions[name] = _Subscription(
+            name=name,
+            handler=handler,
+            scope=scope,
+            channel_ids=frozenset(int(cid) for cid in channel_ids)
+            if channel_ids is not None
+            else None,
+            include_bots=include_bots,
+            include_opted_out=include_opted_out,
+            include_webhooks=include_webhooks,
+            intent=intent,
+        )
+        self._rebuild_index()
+
+    def unsubscribe(self, name: str) -> None:
+        if self._subscriptions.pop(name, None) is not None:
+            self._rebuild_index()
+
+    def _rebuild_index(self) -> None:
+        by_channel: dict[int, list[_Subscription]] = {}
+        by_scope: dict[str, list[_Subscription]] = {scope: [] for scope in _SCOPES}
+        for sub in self._subscriptions.values():
+            if sub.channel_ids is not None:
+                for channel_id in sub.channel_ids:
+                    by_channel.setdefault(channel_id, []).append(sub)
+            else:
+                by_scope[sub.scope].append(sub)
+        self._by_channel = by_channel
+        self._by_scope = by_scope
+
+    def candidates(self, event: MessageEvent) -> list[_Subscription]:
+        """Handler, die laut Index für Kanal/Scope der Nachricht in Frage kommen."""
+        found = list(self._by_scope[SCOPE_ANY])
+        if event.is_dm:
+            found += self._by_scope[SCOPE_DM]
+        elif event.is_guild:
+            found += self._by_scope[SCOPE_GUILD]
+            if event.is_thread:
+                found += self._by_scope[SCOPE_THREAD]
+        found += self._by_channel.get(event.channel_id, ())
+        return found
+
+    async def _run(self, sub: _Subscription, event: MessageEvent) -> None:
+        started = time.perf_counter()
+        try:
+            await sub.handler(event)
+        except Exception as exc:
+            sub.errors += 1
+            log.error("Message handler error in %s: %s", sub.name, exc, exc_info=exc)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            sub.record(elapsed_ms)
+            if elapsed_ms >= SLOW_HANDLER_MS:
+                log.warning(
+                    "Langsamer Message-Handler %s: %.0f ms (channel=%s)",
+                    sub.name,
+                    elapsed_ms,
+                    event.channel_id,
+                )
+
+    async def dispatch_event(self, event: MessageEvent) -> int:
+        self.messages += 1
+        runs = []
+        for sub in self.candidates(event):
+            if sub.accepts(event):
+                runs.append(self._run(sub, event))
+            else:
+                sub.skipped += 1
+        if not runs:
+            self.unrouted += 1
+            return 0
+        await asyncio.gather(*runs)
+        return len(runs)
+
+    async def on_message(self, message: Any) -> None:
+        if not self._subscriptions:
+            return
+        await self.dispatch_event(build_event(message))
+
+    def stats(self) -> dict[str, Any]:
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "messages": self.messages,
+            "unrouted": self.unrouted,
+            "handlers": {
+                sub.name: {
+                    "scope": "channels" if sub.channel_ids is not None else sub.scope,
+                    "calls": sub.calls,
+                    "skipped": sub.skipped,
+                    "errors": sub.errors,
+                    "avg_ms": round(sub.total_ms / sub.calls, 3) if sub.calls else 0.0,
+                    "max_ms": round(sub.max_ms, 3),
+                    "histogram": dict(zip(labels, sub.histogram, strict=True)),
+                }
+                for sub in self._subscriptions.values()
+            },
+        }
+
+
+def get_dispatcher(bot: Any) -> MessageEventDispatcher:
+    """Dispatcher des Bots; registriert sich beim ersten Zugriff als on_message-Listener."""
+    dispatcher = getattr(bot, "message_events", None)
+    if not isinstance(dispatcher, MessageEventDispatcher):
+        dispatcher = MessageEventDispatcher()
+        bot.message_events = dispatcher
+        add_listener = getattr(bot, "add_listener", None)
+        if callable(add_listener):
+            add_listener(dispatcher.on_message, "on_message")
+    return dispatcher
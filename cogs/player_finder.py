@@ -22,6 +22,7 @@ from datetime import datetime, timedelta
 import discord
 from discord.ext import commands
 
+from cogs import message_events
 from service import db
 
 log = logging.getLogger("PlayerFinder")
@@ -123,9 +124,16 @@ class PlayerFinder(commands.Cog):
         self.lfg_cooldowns: dict[int, float] = {}
 
     async def cog_load(self) -> None:
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            channel_ids={LFG_CHANNEL_ID},
+            intent=lambda event: self._keyword_lfg_intent(event.text_lower),
+        )
         log.info("PlayerFinder geladen (reaktiv) – Cooldown: %ss", COOLDOWN_SECONDS)
 
     async def cog_unload(self) -> None:
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         log.info("PlayerFinder entladen")
 
     # --- LFG Intent Erkennung ---
@@ -758,24 +766,13 @@ class PlayerFinder(commands.Cog):
 
     # --- Event Listener ---
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        if message.author.bot:
-            return
-
-        # Nur im LFG-Channel lauschen
-        if message.channel.id != LFG_CHANNEL_ID:
-            return
-
-        # Intent-Check
-        if not self._keyword_lfg_intent(message.content):
-            return
-
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        # Bots, LFG-Channel und Intent filtert die Message-Pipeline
         # Cooldown-Check (per User)
-        if not self._check_cooldown(message.author.id):
+        if not self._check_cooldown(event.author_id):
             return
 
-        await self._handle_lfg_request(message)
+        await self._handle_lfg_request(event.message)
 
     # Cache für steam friend ids (wird pro request aktualisiert)
     _steam_friend_cache: set[int] = set()
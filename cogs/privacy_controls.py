@@ -102,7 +102,7 @@ class PrivacyConfirmView(discord.ui.View):
 
         try:
             summary = await privacy.delete_user_data(self.user_id, reason="slash_datenschutz")
-            self.cog._clear_runtime_state(self.user_id)
+            await self.cog._clear_runtime_state(self.user_id)
             msg = self.cog._format_summary(self.user_id, summary)
         except Exception as exc:
             log.exception("Datenschutz-Löschung fehlgeschlagen")
@@ -129,7 +129,7 @@ class PrivacyControls(commands.Cog):
         except Exception:
             return 0
 
-    def _clear_runtime_state(self, user_id: int) -> None:
+    async def _clear_runtime_state(self, user_id: int) -> None:
         """Stop ongoing runtime tracking for the user (in-memory only)."""
         try:
             vat = self.bot.get_cog("VoiceActivityTrackerCog")
@@ -140,13 +140,10 @@ class PrivacyControls(commands.Cog):
 
         try:
             nudge = self.bot.get_cog("SteamLinkVoiceNudge")
-            tasks = getattr(nudge, "_tasks", {}) if nudge else None
-            if tasks is not None:
-                task = tasks.pop(int(user_id), None)
-                if task and not task.done():
-                    task.cancel()
+            if nudge and hasattr(nudge, "_cancel_voice_nudge"):
+                await nudge._cancel_voice_nudge(int(user_id))
         except Exception:
-            log.debug("Konnte Nudge-Tasks nicht bereinigen", exc_info=True)
+            log.debug("Konnte Nudge-Job nicht abbrechen", exc_info=True)
 
     def _format_summary(self, user_id: int, summary: dict[str, int]) -> str:
         voice_sessions = self._summary_value(summary, "voice_session_log.user_id")
@@ -171,7 +168,7 @@ class PrivacyControls(commands.Cog):
         claims_rows = (
             self._summary_value(summary, "claimed_threads.assigned_user_id")
             + self._summary_value(summary, "claimed_threads.claimed_by_id")
-            + self._summary_value(summary, "coaching_sessions.user_id")
+            + self._summary_value(summary, "coaching_sessions.discord_user_id")
             + self._summary_value(summary, "voice_channel_anchors.user_id")
         )
         partner_rows = self._summary_value(
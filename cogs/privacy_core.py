@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import sqlite3
+import threading
 import time
 from collections.abc import Iterable
 
@@ -15,10 +17,17 @@ AI_ONBOARDING_SESSIONS_NS = "ai_onboarding:sessions"
 AI_ONBOARDING_VIEWS_NS = "ai_onboarding:persistent_views"
 VOICE_NUDGE_NAMESPACES = ("voice_nudge_first_seen", "voice_nudge_done")
 
+# Opt-out-Set im Prozess; Versionszähler in kv_store, damit andere Prozesse
+# (Standalone-Bots) Änderungen nach spätestens OPT_OUT_RECHECK_SECONDS sehen.
+OPT_OUT_VERSION_NS = "privacy"
+OPT_OUT_VERSION_KEY = "opt_out_version"
+OPT_OUT_RECHECK_SECONDS = float(os.environ.get("PRIVACY_OPT_OUT_RECHECK_SECONDS", "30"))
+
 # Tables keyed by a single user column
 _USER_TABLES: tuple[tuple[str, str], ...] = (
     ("voice_stats", "user_id"),
     ("voice_session_log", "user_id"),
+    ("voice_rollup_hourly", "user_id"),
     ("voice_feedback_requests", "user_id"),
     ("voice_feedback_responses", "user_id"),
     ("user_activity_patterns", "user_id"),
@@ -36,7 +45,7 @@ _USER_TABLES: tuple[tuple[str, str], ...] = (
     ("user_retention_tracking", "user_id"),
     ("user_retention_messages", "user_id"),
     ("voice_channel_anchors", "user_id"),
-    ("coaching_sessions", "user_id"),
+    ("coaching_sessions", "discord_user_id"),
     ("claimed_threads", "assigned_user_id"),
     ("claimed_threads", "claimed_by_id"),
     ("steam_nudge_state", "user_id"),
@@ -70,6 +79,7 @@ _STEAM_SIDE_TABLES: tuple[tuple[str, str], ...] = (
 _DELETE_SQL_BY_TARGET: dict[tuple[str, str], str] = {
     ("voice_stats", "user_id"): "DELETE FROM voice_stats WHERE user_id=?",
     ("voice_session_log", "user_id"): "DELETE FROM voice_session_log WHERE user_id=?",
+    ("voice_rollup_hourly", "user_id"): "DELETE FROM voice_rollup_hourly WHERE user_id=?",
     ("voice_feedback_requests", "user_id"): "DELETE FROM voice_feedback_requests WHERE user_id=?",
     ("voice_feedback_responses", "user_id"): "DELETE FROM voice_feedback_responses WHERE user_id=?",
     ("user_activity_patterns", "user_id"): "DELETE FROM user_activity_patterns WHERE user_id=?",
@@ -93,7 +103,10 @@ _DELETE_SQL_BY_TARGET: dict[tuple[str, str], str] = {
     ("user_retention_tracking", "user_id"): "DELETE FROM user_retention_tracking WHERE user_id=?",
     ("user_retention_messages", "user_id"): "DELETE FROM user_retention_messages WHERE user_id=?",
     ("voice_channel_anchors", "user_id"): "DELETE FROM voice_channel_anchors WHERE user_id=?",
-    ("coaching_sessions", "user_id"): "DELETE FROM coaching_sessions WHERE user_id=?",
+    (
+        "coaching_sessions",
+        "discord_user_id",
+    ): "DELETE FROM coaching_sessions WHERE discord_user_id=?",
     ("claimed_threads", "assigned_user_id"): "DELETE FROM claimed_threads WHERE assigned_user_id=?",
     ("claimed_threads", "claimed_by_id"): "DELETE FROM claimed_threads WHERE claimed_by_id=?",
     ("steam_nudge_state", "user_id"): "DELETE FROM steam_nudge_state WHERE user_id=?",
@@ -162,7 +175,10 @@ _SELECT_SQL_BY_TARGET: dict[tuple[str, str], str] = {
     ("user_retention_tracking", "user_id"): "SELECT * FROM user_retention_tracking WHERE user_id=?",
     ("user_retention_messages", "user_id"): "SELECT * FROM user_retention_messages WHERE user_id=?",
     ("voice_channel_anchors", "user_id"): "SELECT * FROM voice_channel_anchors WHERE user_id=?",
-    ("coaching_sessions", "user_id"): "SELECT * FROM coaching_sessions WHERE user_id=?",
+    (
+        "coaching_sessions",
+        "discord_user_id",
+    ): "SELECT * FROM coaching_sessions WHERE discord_user_id=?",
     (
         "claimed_threads",
         "assigned_user_id",
@@ -216,14 +232,109 @@ def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
         return False
 
 
+_opt_out_ids: frozenset[int] | None = None
+_opt_out_version = -1
+_opt_out_checked_at = 0.0
+_opt_out_lock = threading.Lock()
+
+
+def _version_from_rows(rows: list) -> int:
+    try:
+        return int(rows[0][0]) if rows else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def _load_opt_outs(now: float) -> frozenset[int]:
+    """Lädt Opt-out-IDs und Version aus einem gemeinsamen Snapshot (Lock gehalten)."""
+    global _opt_out_ids, _opt_out_version, _opt_out_checked_at
+    id_rows, version_rows = db.query_batch(
+        [
+            ("SELECT user_id FROM user_privacy WHERE opted_out = 1", ()),
+            (
+                "SELECT v FROM kv_store WHERE ns=? AND k=?",
+                (OPT_OUT_VERSION_NS, OPT_OUT_VERSION_KEY),
+            ),
+        ]
+    )
+    _opt_out_ids = frozenset(int(row[0]) for row in id_rows)
+    _opt_out_version = _version_from_rows(version_rows)
+    _opt_out_checked_at = now
+    return _opt_out_ids
+
+
+def _opt_out_snapshot() -> frozenset[int]:
+    global _opt_out_checked_at
+    ids = _opt_out_ids
+    now = time.monotonic()
+    if ids is not None and now - _opt_out_checked_at < OPT_OUT_RECHECK_SECONDS:
+        return ids
+    with _opt_out_lock:
+        if _opt_out_ids is not None:
+            if now - _opt_out_checked_at < OPT_OUT_RECHECK_SECONDS:
+                return _opt_out_ids
+            row = db.query_one(
+                "SELECT v FROM kv_store WHERE ns=? AND k=?",
+                (OPT_OUT_VERSION_NS, OPT_OUT_VERSION_KEY),
+            )
+            if _version_from_rows([row] if row else []) == _opt_out_version:
+                _opt_out_checked_at = now
+                return _opt_out_ids
+        return _load_opt_outs(now)
+
+
+def _bump_opt_out_version(conn: sqlite3.Connection) -> int:
+    conn.execute(
+        """
+        INSERT INTO kv_store(ns, k, v) VALUES (?, ?, '1')
+        ON CONFLICT(ns, k) DO UPDATE SET v = CAST(v AS INTEGER) + 1
+        """,
+        (OPT_OUT_VERSION_NS, OPT_OUT_VERSION_KEY),
+    )
+    row = conn.execute(
+        "SELECT v FROM kv_store WHERE ns=? AND k=?",
+        (OPT_OUT_VERSION_NS, OPT_OUT_VERSION_KEY),
+    ).fetchone()
+    return _version_from_rows([row] if row else [])
+
+
+def _apply_opt_out(user_id: int, opted_out: bool, version: int) -> None:
+    """Übernimmt eine eigene, bereits committete Änderung ins Set."""
+    global _opt_out_ids, _opt_out_version, _opt_out_checked_at
+    with _opt_out_lock:
+        if _opt_out_ids is None:
+            return
+        if _opt_out_version != version - 1:
+            # Fremde Änderung dazwischen: beim nächsten Zugriff komplett neu laden.
+            _opt_out_checked_at = 0.0
+            _opt_out_ids = None
+            return
+        ids = set(_opt_out_ids)
+        if opted_out:
+            ids.add(user_id)
+        else:
+            ids.discard(user_id)
+        _opt_out_ids = frozenset(ids)
+        _opt_out_version = version
+
+
+def opt_out_version() -> int:
+    """Aktuell geladene Version des Opt-out-Sets (-1 = noch nicht geladen)."""
+    return _opt_out_version
+
+
+def reset_opt_out_cache() -> None:
+    global _opt_out_ids, _opt_out_version, _opt_out_checked_at
+    with _opt_out_lock:
+        _opt_out_ids = None
+        _opt_out_version = -1
+        _opt_out_checked_at = 0.0
+
+
 def is_opted_out(user_id: int) -> bool:
-    """Synchronously check whether the user is opted out."""
+    """Synchronously check whether the user is opted out (in-memory set)."""
     try:
-        row = db.query_one(
-            "SELECT opted_out FROM user_privacy WHERE user_id=?",
-            (int(user_id),),
-        )
-        return bool(row and row[0])
+        return int(user_id) in _opt_out_snapshot()
     except Exception:
         log.debug("privacy check failed for user %s", user_id, exc_info=True)
         return False
@@ -231,6 +342,7 @@ def is_opted_out(user_id: int) -> bool:
 
 async def set_opt_in(user_id: int) -> None:
     """Remove opt-out flag (user opt-in)."""
+    uid = int(user_id)
     ts = int(time.time())
     async with db.transaction() as conn:
         conn.execute(
@@ -243,8 +355,10 @@ async def set_opt_in(user_id: int) -> None:
               reason = excluded.reason,
               updated_at = excluded.updated_at
             """,
-            (int(user_id), ts),
+            (uid, ts),
         )
+        version = _bump_opt_out_version(conn)
+    _apply_opt_out(uid, False, version)
 
 
 def _delete_where(conn: sqlite3.Connection, table: str, column: str, value: object) -> int:
@@ -537,8 +651,10 @@ async def delete_user_data(user_id: int, *, reason: str = "user_request") -> dic
             """,
             (uid, ts, reason, ts),
         )
+        version = _bump_opt_out_version(conn)
         summary["user_privacy_updated"] = 1
         summary["steam_ids_removed"] = len(steam_ids)
         summary["steam_ids"] = steam_ids
 
+    _apply_opt_out(uid, True, version)
     return summary
@@ -9,7 +9,8 @@ from typing import Any
 import discord
 from discord.ext import commands
 
-from service import db
+from cogs import voice_events
+from service import db, overwrite_planner
 from service.config import settings
 from service.db import db_path
 from service.deadlock_voice_cohort import (
@@ -488,6 +489,10 @@ class RolePermissionVoiceManager(commands.Cog):
             # Schema sicherstellen
             await self._db_ensure_schema()
 
+            voice_events.get_dispatcher(self.bot).subscribe(
+                self.qualified_name, self._on_voice_event
+            )
+
             # Bei Start für alle bekannten Guilds laden
             for guild in self.bot.guilds:
                 await self._db_load_state_for_guild(guild)
@@ -503,6 +508,7 @@ class RolePermissionVoiceManager(commands.Cog):
             raise
 
     async def cog_unload(self):
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         try:
             self.user_rank_cache.clear()
             self.guild_roles_cache.clear()
@@ -705,15 +711,15 @@ class RolePermissionVoiceManager(commands.Cog):
                 f"Update Permissions (Batch) für {channel.name}: Score {score_min}-{score_max}"
             )
 
-            # 1. Aktuelle Overwrites kopieren
-            new_overwrites = dict(channel.overwrites)
+            # 1. Gewünschte Änderungen sammeln (Rest der Overwrites bleibt unangetastet)
+            updates: dict[Any, discord.PermissionOverwrite | None] = {}
 
             # 2. @everyone Deny setzen
             everyone_role = channel.guild.default_role
-            everyone_ow = new_overwrites.get(everyone_role, discord.PermissionOverwrite())
+            everyone_ow = channel.overwrites_for(everyone_role)
             everyone_ow.connect = False
             everyone_ow.view_channel = True
-            new_overwrites[everyone_role] = everyone_ow
+            updates[everyone_role] = everyone_ow
 
             # 3. Alle Rollen der Gilde prüfen, welche in den Score-Bereich fallen
             allowed_role_ids = set()
@@ -727,28 +733,27 @@ class RolePermissionVoiceManager(commands.Cog):
                     score = rv * 6 + rs
                     if score_min <= score <= score_max:
                         allowed_role_ids.add(role.id)
-                        # Zu Overwrites hinzufügen
-                        new_overwrites[role] = discord.PermissionOverwrite(
+                        updates[role] = discord.PermissionOverwrite(
                             connect=True, speak=True, view_channel=True
                         )
 
-            # 4. Alte/Nicht erlaubte Rollen aus dem Batch entfernen
-            # Wir prüfen die existierenden Overwrites und werfen raus was nicht mehr erlaubt ist
-            for target in list(new_overwrites.keys()):
-                if isinstance(target, discord.Role) and target.id != everyone_role.id:
-                    is_major = target.id in major_role_ids
-                    is_subrank = self._parse_subrank_role_name(target.name) is not None
-
-                    if (is_major or is_subrank) and target.id not in allowed_role_ids:
-                        # Aus den Overwrites entfernen
-                        new_overwrites.pop(target)
+            # 4. Nicht mehr erlaubte Rang-Rollen entfernen
+            updates.update(
+                overwrite_planner.drop_targets(
+                    channel.overwrites,
+                    lambda target: (
+                        self._is_rank_role_target(channel, target, major_role_ids)
+                        and target.id not in allowed_role_ids
+                    ),
+                )
+            )
 
-            # 5. Alles in EINEM Call an Discord senden
+            # 5. Diff gegen den Ist-Zustand, höchstens EIN Call an Discord
             try:
-                await channel.edit(
-                    overwrites=new_overwrites, reason="Rank System: Batch Permission Update"
-                )
-                self._mark_permission_write(channel.id)
+                if await overwrite_planner.apply_overwrites(
+                    channel, updates, reason="Rank System: Batch Permission Update"
+                ):
+                    self._mark_permission_write(channel.id)
             except discord.HTTPException as e:
                 logger.error(
                     "Batch Permission Update fehlgeschlagen für %s: %s",
@@ -787,35 +792,45 @@ class RolePermissionVoiceManager(commands.Cog):
                     await channel.set_permissions(target, overwrite=None)
                     await asyncio.sleep(0.2)
 
+    def _is_rank_role_target(
+        self, channel: discord.VoiceChannel, target: Any, major_role_ids: set[int]
+    ) -> bool:
+        """Rollen-Overwrite eines Haupt- oder Sub-Rangs (ohne @everyone)."""
+        if not isinstance(target, discord.Role) or target.id == channel.guild.default_role.id:
+            return False
+        return target.id in major_role_ids or self._parse_subrank_role_name(target.name) is not None
+
     async def remove_disallowed_role_permissions(
         self, channel: discord.VoiceChannel, allowed_role_ids: set[int]
     ):
         try:
-            for target, _ow in list(channel.overwrites.items()):
-                if (
+            updates = overwrite_planner.drop_targets(
+                channel.overwrites,
+                lambda target: (
                     isinstance(target, discord.Role)
                     and target.id != channel.guild.default_role.id
                     and target.id in self.discord_rank_roles
                     and target.id not in allowed_role_ids
-                ):
-                    await channel.set_permissions(target, overwrite=None)
-                    self._mark_permission_write(channel.id)
-                    await asyncio.sleep(0.3)
+                ),
+            )
+            if await overwrite_planner.apply_overwrites(
+                channel, updates, reason="Rank System: nicht erlaubte Ränge entfernen"
+            ):
+                self._mark_permission_write(channel.id)
         except Exception as e:
             logger.error(f"remove_disallowed_role_permissions Fehler: {e}")
 
     async def clear_role_permissions(self, channel: discord.VoiceChannel):
         try:
             major_role_ids = set(self.discord_rank_roles.keys())
-            for target, _ow in list(channel.overwrites.items()):
-                if isinstance(target, discord.Role) and target.id != channel.guild.default_role.id:
-                    is_major = target.id in major_role_ids
-                    is_subrank = self._parse_subrank_role_name(target.name) is not None
-
-                    if is_major or is_subrank:
-                        await channel.set_permissions(target, overwrite=None)
-                        self._mark_permission_write(channel.id)
-                        await asyncio.sleep(0.3)
+            updates = overwrite_planner.drop_targets(
+                channel.overwrites,
+                lambda target: self._is_rank_role_target(channel, target, major_role_ids),
+            )
+            if await overwrite_planner.apply_overwrites(
+                channel, updates, reason="Rank System: Rang-Overwrites entfernen"
+            ):
+                self._mark_permission_write(channel.id)
         except Exception as e:
             logger.error(f"clear_role_permissions Fehler: {e}")
 
@@ -1168,13 +1183,8 @@ class RolePermissionVoiceManager(commands.Cog):
             except Exception as e:
                 logger.warning("on_ready reconcile failed for guild %s: %s", guild.id, e)
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        member, before, after = event.member, event.before, event.after
         try:
             # Cache invalidieren
             cache_key = f"{member.id}:{member.guild.id}"
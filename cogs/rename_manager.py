@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import heapq
 import logging
 import sqlite3
 import time
@@ -15,7 +16,6 @@ from service.config import settings
 
 logger = logging.getLogger("RenameManagerCog")
 
-QUEUE_CHECK_INTERVAL_SECONDS = 1.0
 ERROR_BACKOFF_SECONDS = 10.0
 # Discord allows channel renames only very sparsely in practice.
 RENAME_THROTTLE_SECONDS = 360
@@ -31,6 +31,12 @@ class RenameManagerCog(commands.Cog):
         self.bot = bot
         self._rename_task: asyncio.Task[None] | None = None
         self._last_rename_attempt_by_channel: dict[int, float] = {}
+        # In-Memory-Scheduler: Min-Heap (fällig_ab, channel_id) mit Lazy-Deletion,
+        # die DB (rename_requests) dient nur als dauerhafte Ablage.
+        self._rename_heap: list[tuple[float, int]] = []
+        self._due_by_channel: dict[int, float] = {}
+        self._pending_request_by_channel: dict[int, int] = {}
+        self._rename_wakeup = asyncio.Event()
 
     async def cog_load(self):
         await self._ensure_db_schema()
@@ -39,6 +45,7 @@ class RenameManagerCog(commands.Cog):
             logger.info("RenameManagerCog loaded in enqueue-only mode (USE_DB_RENAME_WORKER=1).")
             return
         logger.info("RenameManagerCog loaded. Starting rename queue processor.")
+        await self._load_pending_requests()
         self._start_rename_processor()
 
     async def cog_unload(self):
@@ -109,6 +116,63 @@ class RenameManagerCog(commands.Cog):
             """
         )
 
+    async def _load_pending_requests(self) -> None:
+        rows = await db.query_all_async(
+            """
+            SELECT channel_id, MAX(id) AS id
+            FROM rename_requests
+            WHERE status='PENDING'
+            GROUP BY channel_id
+            """
+        )
+        for row in rows:
+            self._schedule_channel(int(row["channel_id"]), int(row["id"]))
+        if rows:
+            logger.info("Rename queue: %s pending request(s) restored from DB.", len(rows))
+
+    def _schedule_channel(
+        self, channel_id: int, request_id: int, *, not_before: float = 0.0
+    ) -> None:
+        """Merkt den neuesten Wunsch pro Channel vor; fällig frühestens nach Ablauf des Throttles."""
+        self._pending_request_by_channel[channel_id] = request_id
+        last_attempt = self._last_rename_attempt_by_channel.get(channel_id)
+        due = max(time.monotonic(), not_before)
+        if last_attempt is not None:
+            due = max(due, last_attempt + RENAME_THROTTLE_SECONDS)
+        current = self._due_by_channel.get(channel_id)
+        if current is not None and current >= due:
+            return
+        self._due_by_channel[channel_id] = due
+        heapq.heappush(self._rename_heap, (due, channel_id))
+        self._rename_wakeup.set()
+
+    async def _next_due_channel(self) -> int:
+        """Schläft ohne DB-Zugriff, bis der früheste Channel-Throttle abläuft oder neue Arbeit kommt."""
+        while True:
+            self._rename_wakeup.clear()
+            timeout: float | None = None
+            while self._rename_heap:
+                due, channel_id = self._rename_heap[0]
+                if self._due_by_channel.get(channel_id) != due:
+                    heapq.heappop(self._rename_heap)
+                    continue
+                now = time.monotonic()
+                if due > now:
+                    timeout = due - now
+                    break
+                heapq.heappop(self._rename_heap)
+                del self._due_by_channel[channel_id]
+                last_attempt = self._last_rename_attempt_by_channel.get(channel_id)
+                if last_attempt is not None and last_attempt + RENAME_THROTTLE_SECONDS > now:
+                    # Während der letzten Umbenennung eingereiht: Throttle nachziehen.
+                    throttle_due = last_attempt + RENAME_THROTTLE_SECONDS
+                    self._due_by_channel[channel_id] = throttle_due
+                    heapq.heappush(self._rename_heap, (throttle_due, channel_id))
+                    continue
+                return channel_id
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._rename_wakeup.wait(), timeout=timeout)
+
     async def _enqueue_request(self, channel_id: int, new_name: str, reason: str) -> None:
         channel_id = int(channel_id)
         new_name = str(new_name).strip()
@@ -122,7 +186,7 @@ class RenameManagerCog(commands.Cog):
                 "DELETE FROM rename_requests WHERE channel_id=? AND status='PENDING'",
                 (channel_id,),
             )
-            conn.execute(
+            cur = conn.execute(
                 """
                 INSERT INTO rename_requests(
                     channel_id, new_name, reason, status, created_at, processed_at, retry_count, last_error, assigned_worker_id
@@ -131,16 +195,19 @@ class RenameManagerCog(commands.Cog):
                 """,
                 (channel_id, new_name, reason),
             )
+            request_id = int(cur.lastrowid or 0)
+        if self._rename_task is not None and not self._rename_task.done():
+            self._schedule_channel(channel_id, request_id)
 
-    async def _claim_next_request_with_retry(self) -> dict[str, object] | None:
+    async def _claim_request_with_retry(self, request_id: int) -> dict[str, object] | None:
         """
-        Wraps _claim_next_request with retries on transient SQLite lock errors.
+        Wraps _claim_request with retries on transient SQLite lock errors.
         Prevents the worker from crashing when another process briefly holds the DB write lock.
         """
         last_error: sqlite3.OperationalError | None = None
         for attempt in range(1, DB_LOCK_MAX_RETRIES + 1):
             try:
-                return await self._claim_next_request()
+                return await self._claim_request(request_id)
             except sqlite3.OperationalError as e:
                 if "locked" not in str(e).lower():
                     raise
@@ -160,20 +227,8 @@ class RenameManagerCog(commands.Cog):
             raise last_error
         return None
 
-    async def _claim_next_request(self) -> dict[str, object] | None:
+    async def _claim_request(self, request_id: int) -> dict[str, object] | None:
         async with db.transaction() as conn:
-            row = conn.execute(
-                """
-                SELECT id, channel_id, new_name, COALESCE(reason, 'Automated Rename') AS reason, retry_count
-                FROM rename_requests
-                WHERE status='PENDING'
-                ORDER BY created_at ASC, id ASC
-                LIMIT 1
-                """
-            ).fetchone()
-            if not row:
-                return None
-
             upd = conn.execute(
                 """
                 UPDATE rename_requests
@@ -182,9 +237,21 @@ class RenameManagerCog(commands.Cog):
                     processed_at=CURRENT_TIMESTAMP
                 WHERE id=? AND status='PENDING'
                 """,
-                (self._worker_id(), int(row["id"])),
+                (self._worker_id(), int(request_id)),
             )
             if upd.rowcount != 1:
+                # Inzwischen ersetzt oder von einem anderen Worker übernommen.
+                return None
+
+            row = conn.execute(
+                """
+                SELECT id, channel_id, new_name, COALESCE(reason, 'Automated Rename') AS reason, retry_count
+                FROM rename_requests
+                WHERE id=?
+                """,
+                (int(request_id),),
+            ).fetchone()
+            if not row:
                 return None
 
             return {
@@ -195,38 +262,33 @@ class RenameManagerCog(commands.Cog):
                 "retry_count": int(row["retry_count"] or 0),
             }
 
-    async def _set_request_pending(
-        self, request_id: int, *, last_error: str | None, increment_retry: bool
-    ) -> None:
-        if increment_retry:
-            await db.execute_async(
-                """
-                UPDATE rename_requests
-                SET status='PENDING',
-                    created_at=CURRENT_TIMESTAMP,
-                    processed_at=NULL,
-                    assigned_worker_id=0,
-                    retry_count=retry_count+1,
-                    last_error=?
-                WHERE id=?
-                """,
-                (last_error, int(request_id)),
-            )
-            return
-
+    async def _set_request_pending(self, request_id: int, *, last_error: str | None) -> None:
+        # created_at bleibt: die Reihenfolge bestimmt der In-Memory-Scheduler.
         await db.execute_async(
             """
             UPDATE rename_requests
             SET status='PENDING',
-                created_at=CURRENT_TIMESTAMP,
                 processed_at=NULL,
                 assigned_worker_id=0,
+                retry_count=retry_count+1,
                 last_error=?
             WHERE id=?
             """,
             (last_error, int(request_id)),
         )
 
+    async def _retry_later(
+        self, request_id: int, channel_id: int, *, last_error: str, delay: float
+    ) -> None:
+        newer = self._pending_request_by_channel.get(channel_id)
+        if newer is not None and newer != request_id:
+            await self._set_request_failed(
+                request_id, last_error=f"Superseded by request {newer} ({last_error})"
+            )
+            return
+        await self._set_request_pending(request_id, last_error=last_error)
+        self._schedule_channel(channel_id, request_id, not_before=time.monotonic() + delay)
+
     async def _set_request_done(self, request_id: int) -> None:
         await db.execute_async(
             """
@@ -256,93 +318,14 @@ class RenameManagerCog(commands.Cog):
     async def _process_rename_queue(self):
         while not self.bot.is_closed():
             try:
-                await asyncio.sleep(QUEUE_CHECK_INTERVAL_SECONDS)
-                request = await self._claim_next_request_with_retry()
-                if not request:
-                    continue
-
-                req_id = int(request["id"])  # type: ignore[index]
-                channel_id = int(request["channel_id"])  # type: ignore[index]
-                new_name = str(request["new_name"])  # type: ignore[index]
-                reason = str(request["reason"])  # type: ignore[index]
-                retry_count = int(request["retry_count"])  # type: ignore[index]
-
-                last_attempt = self._last_rename_attempt_by_channel.get(channel_id, 0.0)
-                elapsed = time.monotonic() - last_attempt
-                if elapsed < RENAME_THROTTLE_SECONDS:
-                    remaining = RENAME_THROTTLE_SECONDS - elapsed
-                    await self._set_request_pending(
-                        req_id,
-                        last_error=f"Channel throttle active ({remaining:.1f}s remaining)",
-                        increment_retry=False,
-                    )
-                    await asyncio.sleep(min(5.0, max(0.5, remaining)))
-                    continue
-
-                channel = self.bot.get_channel(channel_id)
-                if not isinstance(channel, discord.VoiceChannel):
-                    logger.warning(
-                        "Rename Queue (DB): Channel %s not found or not a voice channel. Marking FAILED.",
-                        channel_id,
-                    )
-                    await self._set_request_failed(
-                        req_id, last_error="Channel not found or not voice"
-                    )
+                channel_id = await self._next_due_channel()
+                request_id = self._pending_request_by_channel.pop(channel_id, None)
+                if request_id is None:
                     continue
-
-                if channel.name == new_name:
-                    logger.debug(
-                        "Rename Queue (DB): Channel %s already has desired name. Marking DONE.",
-                        channel.name,
-                    )
-                    await self._set_request_done(req_id)
+                request = await self._claim_request_with_retry(request_id)
+                if not request:
                     continue
-
-                try:
-                    await channel.edit(name=new_name, reason=reason)
-                    logger.debug(
-                        "Channel renamed (DB queue): %s -> %s (Reason: %s)",
-                        channel.name,
-                        new_name,
-                        reason,
-                    )
-                    self._last_rename_attempt_by_channel[channel_id] = time.monotonic()
-                    await self._set_request_done(req_id)
-                except discord.HTTPException as e:
-                    if e.status == 429:
-                        retry_after = float(e.headers.get("Retry-After", 1.0))
-                        logger.warning(
-                            "Rename Queue (DB): Rate limit hit for channel %s. Retrying in %.1fs.",
-                            channel.name,
-                            retry_after,
-                        )
-                        self._last_rename_attempt_by_channel[channel_id] = time.monotonic()
-                        await self._set_request_pending(
-                            req_id,
-                            last_error=f"HTTP 429 (retry_after={retry_after})",
-                            increment_retry=True,
-                        )
-                        await asyncio.sleep(retry_after)
-                    else:
-                        if retry_count + 1 >= MAX_RETRIES:
-                            await self._set_request_failed(
-                                req_id, last_error=f"HTTP {e.status}: {e}"
-                            )
-                        else:
-                            await self._set_request_pending(
-                                req_id,
-                                last_error=f"HTTP {e.status}: {e}",
-                                increment_retry=True,
-                            )
-                except Exception as e:
-                    if retry_count + 1 >= MAX_RETRIES:
-                        await self._set_request_failed(req_id, last_error=f"Unexpected error: {e}")
-                    else:
-                        await self._set_request_pending(
-                            req_id,
-                            last_error=f"Unexpected error: {e}",
-                            increment_retry=True,
-                        )
+                await self._execute_request(request)
             except asyncio.CancelledError:
                 logger.info("Rename queue processor (DB) cancelled.")
                 break
@@ -352,6 +335,75 @@ class RenameManagerCog(commands.Cog):
 
         logger.info("Rename queue processor (DB) stopped.")
 
+    async def _execute_request(self, request: dict[str, object]) -> None:
+        req_id = int(request["id"])  # type: ignore[arg-type]
+        channel_id = int(request["channel_id"])  # type: ignore[arg-type]
+        new_name = str(request["new_name"])
+        reason = str(request["reason"])
+        retry_count = int(request["retry_count"])  # type: ignore[arg-type]
+
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.VoiceChannel):
+            logger.warning(
+                "Rename Queue (DB): Channel %s not found or not a voice channel. Marking FAILED.",
+                channel_id,
+            )
+            await self._set_request_failed(req_id, last_error="Channel not found or not voice")
+            return
+
+        if channel.name == new_name:
+            logger.debug(
+                "Rename Queue (DB): Channel %s already has desired name. Marking DONE.",
+                channel.name,
+            )
+            await self._set_request_done(req_id)
+            return
+
+        try:
+            await channel.edit(name=new_name, reason=reason)
+            logger.debug(
+                "Channel renamed (DB queue): %s -> %s (Reason: %s)",
+                channel.name,
+                new_name,
+                reason,
+            )
+            self._last_rename_attempt_by_channel[channel_id] = time.monotonic()
+            await self._set_request_done(req_id)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                retry_after = float(e.headers.get("Retry-After", 1.0))
+                logger.warning(
+                    "Rename Queue (DB): Rate limit hit for channel %s. Retrying in %.1fs.",
+                    channel.name,
+                    retry_after,
+                )
+                self._last_rename_attempt_by_channel[channel_id] = time.monotonic()
+                await self._retry_later(
+                    req_id,
+                    channel_id,
+                    last_error=f"HTTP 429 (retry_after={retry_after})",
+                    delay=retry_after,
+                )
+            elif retry_count + 1 >= MAX_RETRIES:
+                await self._set_request_failed(req_id, last_error=f"HTTP {e.status}: {e}")
+            else:
+                await self._retry_later(
+                    req_id,
+                    channel_id,
+                    last_error=f"HTTP {e.status}: {e}",
+                    delay=ERROR_BACKOFF_SECONDS,
+                )
+        except Exception as e:
+            if retry_count + 1 >= MAX_RETRIES:
+                await self._set_request_failed(req_id, last_error=f"Unexpected error: {e}")
+            else:
+                await self._retry_later(
+                    req_id,
+                    channel_id,
+                    last_error=f"Unexpected error: {e}",
+                    delay=ERROR_BACKOFF_SECONDS,
+                )
+
     def queue_local_rename_request(
         self, channel_id: int, new_name: str, reason: str = "Automated Rename"
     ):
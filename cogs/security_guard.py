@@ -9,6 +9,8 @@ from typing import Any
 import discord
 from discord.ext import commands
 
+from cogs import message_events
+
 log = logging.getLogger(__name__)
 
 
@@ -215,19 +217,28 @@ class SecurityGuard(commands.Cog):
                     kws.add(item.lower())
         self.suspicious_keywords = kws
 
+    async def cog_load(self) -> None:
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            scope=message_events.SCOPE_GUILD,
+            intent=self._should_inspect,
+        )
+
+    async def cog_unload(self) -> None:
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+
     # ---------------- Events ----------------
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.guild is None or message.author.bot:
-            return
-        if not isinstance(message.author, discord.Member):
-            return
-        member = message.author
+    def _should_inspect(self, event: message_events.MessageEvent) -> bool:
+        if not event.is_member:
+            return False
+        if self.allowed_guild_ids and event.guild_id not in self.allowed_guild_ids:
+            return False
+        return not event.is_staff  # do not police staff
 
-        if self.allowed_guild_ids and message.guild.id not in self.allowed_guild_ids:
-            return
-        if member.guild_permissions.manage_messages or member.guild_permissions.manage_guild:
-            return  # do not police staff
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        message = event.message
+        member = message.author
 
         now = discord.utils.utcnow()
         if not self._is_new_account(member, now) or not self._is_recent_join(member, now):
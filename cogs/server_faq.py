@@ -21,6 +21,9 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+from cogs import message_events
+from service import faq_docs_index
+
 log = logging.getLogger(__name__)
 
 # --- Konfiguration ------------------------------------------------------------
@@ -40,35 +43,14 @@ DOCS_PATH = Path(os.getenv("DEADLOCK_FAQ_DOCS_PATH", str(DEFAULT_DOCS_PATH)))
 # Session-Cookie in ms - wie lange ein Thread aktiv bleibt
 SESSION_TIMEOUT_HOURS = int(os.getenv("DEADLOCK_FAQ_SESSION_HOURS", "24"))
 
-# --- Doku-Loader --------------------------------------------------------------
-
-
-def _load_docs() -> str:
-    """Lädt alle .md Dateien aus dem Docs-Verzeichnis als Kontext."""
-    if not DOCS_PATH.is_dir():
-        log.warning("Docs-Pfad nicht gefunden: %s", DOCS_PATH)
-        return ""
-
-    context_parts = []
-    for md_file in sorted(DOCS_PATH.glob("*.md")):
-        try:
-            content = md_file.read_text(encoding="utf-8")
-            rel_path = md_file.relative_to(DOCS_PATH)
-            context_parts.append(f"\n\n=== Dokument: {rel_path} ===\n{content}")
-        except Exception as exc:
-            log.warning("Konnte %s nicht lesen: %s", md_file, exc)
-
-    if not context_parts:
-        return ""
-
-    header = (
-        "Du hast Zugriff auf folgende Server-Dokumentation. "
-        "Nutze diese als Wissensbasis. Erfinde keine Informationen - wenn du dir unsicher bist, sage es.\n"
-    )
-    return header + "\n".join(context_parts)
+# --- Doku-Index ---------------------------------------------------------------
 
 
-DOCS_CONTEXT = _load_docs()
+DOCS_INDEX = faq_docs_index.DocsIndex(
+    DOCS_PATH,
+    top_k=int(os.getenv("DEADLOCK_FAQ_DOCS_TOP_K", "6") or "6"),
+    max_chars=int(os.getenv("DEADLOCK_FAQ_DOCS_MAX_CHARS", "8000") or "8000"),
+)
 
 # --- System Prompt (Security!) ------------------------------------------------
 
@@ -147,6 +129,14 @@ class ServerFAQ(commands.Cog):
         self._user_to_session: dict[int, int] = {}
         self._lock = asyncio.Lock()
 
+    async def cog_load(self) -> None:
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name, self._on_message_event, scope=message_events.SCOPE_THREAD
+        )
+
+    async def cog_unload(self) -> None:
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+
     # ---- Session Management ----
 
     async def _get_or_create_session(
@@ -237,18 +227,22 @@ class ServerFAQ(commands.Cog):
             )
 
         conversation_context = session.get_conversation_context()
+        retrieval_query = faq_docs_index.conversation_query(session.messages, new_question)
 
         # Patchnotes-Kontext falls relevant
         patchnote_context = ""
         try:
             from service import changelogs
 
-            patchnote_context = changelogs.get_context_for_question(new_question)
+            patchnote_context = faq_docs_index.rank_text_sections(
+                changelogs.get_context_for_question(new_question),
+                retrieval_query,
+            )
         except Exception:
             pass
 
         # Prompt zusammensetzen
-        context_parts = [DOCS_CONTEXT]
+        context_parts = [DOCS_INDEX.build_context(retrieval_query)]
         if patchnote_context:
             context_parts.append(f"Patchnotes-Kontext:\n{patchnote_context}")
 
@@ -364,15 +358,9 @@ class ServerFAQ(commands.Cog):
 
     # ---- Discord Event ----
 
-    @commands.Cog.listener("on_message")
-    async def on_message(self, message: discord.Message) -> None:
-        """Reagiert auf Nachrichten in FAQ-Threads."""
-        if message.guild is None:
-            return
-        if not isinstance(message.channel, discord.Thread):
-            return
-        if message.author.bot:
-            return
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        """Reagiert auf Nachrichten in FAQ-Threads (Guild-Threads, keine Bots)."""
+        message = event.message
 
         # Periodic cleanup
         if message.id % 50 == 0:  # Alle 50 Nachrichten aufräumen
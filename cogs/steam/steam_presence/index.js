@@ -14,6 +14,18 @@ const DB_PATH =
 const POLL_INTERVAL_MS = Number.parseInt(process.env.STEAM_TASK_POLL_MS || "2000", 10);
 const HEARTBEAT_INTERVAL_MS = Number.parseInt(process.env.STEAM_HEARTBEAT_MS || "5000", 10);
 const TASK_DELAY_MS = Number.parseInt(process.env.STEAM_TASK_DELAY_MS || "500", 10);
+const MASTER_BROKER_TOKEN = (
+  process.env.MASTER_BROKER_TOKEN ||
+  process.env.MAIN_BOT_INTERNAL_TOKEN ||
+  process.env.TWITCH_INTERNAL_API_TOKEN ||
+  ""
+).trim();
+const TASK_CALLBACK_URL =
+  process.env.STEAM_TASK_CALLBACK_URL ||
+  (MASTER_BROKER_TOKEN
+    ? `http://127.0.0.1:${process.env.MASTER_BROKER_PORT || "8770"}/internal/master/v1/steam/task-finished`
+    : "");
+const TASK_CALLBACK_TIMEOUT_MS = Number.parseInt(process.env.STEAM_TASK_CALLBACK_TIMEOUT_MS || "2000", 10);
 const DEFAULT_TIMEOUT_MS = Number.parseInt(process.env.STEAM_GC_RESPONSE_TIMEOUT_MS || "20000", 10);
 const REFRESH_TOKEN_PATH =
   process.env.STEAM_REFRESH_TOKEN_PATH ||
@@ -58,6 +70,31 @@ function sleep(ms) {
   return new Promise((resolve) => setTimeout(resolve, ms));
 }
 
+// Meldet DONE/FAILED an den MasterBroker, damit wartende Dashboards sofort
+// aufwachen. Best effort: ohne Callback bleibt der langsame DB-Poll als Fallback.
+async function notifyTaskFinished(taskId, status) {
+  if (!TASK_CALLBACK_URL) {
+    return;
+  }
+  try {
+    const response = await fetch(TASK_CALLBACK_URL, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "X-Internal-Token": MASTER_BROKER_TOKEN,
+      },
+      body: JSON.stringify({ task_id: taskId, status }),
+      signal: AbortSignal.timeout(TASK_CALLBACK_TIMEOUT_MS),
+    });
+    if (!response.ok) {
+      log("warn", "Task-Callback abgelehnt", { id: taskId, status: response.status });
+    }
+  } catch (error) {
+    const message = error instanceof Error ? error.message : String(error);
+    log("warn", "Task-Callback fehlgeschlagen", { id: taskId, error: message });
+  }
+}
+
 function log(level, message, extra) {
   const stamp = new Date().toISOString();
   const suffix = extra ? ` ${JSON.stringify(extra)}` : "";
@@ -225,6 +262,7 @@ class TaskStore {
       WHERE id = ?
       `
     ).run(JSON.stringify(result), now, now, taskId);
+    void notifyTaskFinished(taskId, "DONE");
   }
 
   failTask(taskId, errorMessage) {
@@ -239,6 +277,7 @@ class TaskStore {
       WHERE id = ?
       `
     ).run(String(errorMessage || "Unknown error"), now, now, taskId);
+    void notifyTaskFinished(taskId, "FAILED");
   }
 
   writeHeartbeat(payload) {
@@ -4,6 +4,7 @@ import asyncio
 import logging
 import os
 import sqlite3
+import time
 from collections.abc import Iterable
 from datetime import datetime
 
@@ -11,16 +12,17 @@ import discord
 from discord.ext import commands
 
 from cogs import privacy_core as privacy
+from cogs import voice_events
 from cogs.steam.friend_requests import queue_friend_request
 from cogs.steam.logging_utils import safe_log_extra
 from cogs.welcome_dm.step_steam_link import steam_link_detailed_description
-from service import db
+from service import db, deadline_scheduler
 
 log = logging.getLogger("SteamVoiceNudge")
 
 # ---------- Einstellungen ----------
 MIN_VOICE_MINUTES = 30  # Mindest-Verweildauer im Voice (einmalig)
-POLL_INTERVAL = 15  # Sekunden – Voice-Alive-Check
+VOICE_MINUTES_JOB = "nudge.voice_minutes"  # Deadline-Job pro Member (Abbruch beim Verlassen)
 DEFAULT_TEST_TARGET_ID = int(os.getenv("NUDGE_TEST_DEFAULT_ID", "0"))
 LOG_CHANNEL_ID = 1374364800817303632  # Meldungen in diesen Kanal posten
 NUDGE_VIEW_VERSION = 2  # Version der persistierten DM-View
@@ -188,29 +190,6 @@ def _log_chan(bot: commands.Bot) -> discord.TextChannel | None:
     return ch if isinstance(ch, discord.TextChannel) else None
 
 
-# ---------- Voice-Monitor ----------
-async def _count_voice_minutes(member: discord.Member, minutes: int) -> bool:
-    """
-    Wartet bis zu `minutes` Minuten, während der Member (irgendeinem) Voice-Channel angehört.
-    Gibt True zurück, wenn er die gesamte Zeit im Voice war (abzügl. kurzer Poll-Gaps),
-    sonst False, wenn er vorher abhaut.
-    """
-    seen = 0
-    try:
-        while seen < minutes * 60:
-            await asyncio.sleep(POLL_INTERVAL)
-            vc = getattr(member, "voice", None)
-            if not vc or not vc.channel:
-                return False
-            seen += POLL_INTERVAL
-        return True
-    except asyncio.CancelledError:
-        raise
-    except Exception:
-        log.exception("voice wait failed for member=%s", getattr(member, "id", "?"))
-        return False
-
-
 # ---------- OAuth/OpenID Hilfen ----------
 def _find_steamlink_cog(bot: commands.Bot):
     # 1) explizit
@@ -339,10 +318,18 @@ class SteamLinkVoiceNudge(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self._tasks: dict[int, asyncio.Task] = {}
         self._restore_task: asyncio.Task | None = None
 
     async def cog_load(self):
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_voice_event,
+            include_bots=False,
+            include_opted_out=False,
+        )
+        deadline_scheduler.get_scheduler(self.bot).register(
+            VOICE_MINUTES_JOB, self._on_voice_minutes_job
+        )
         # Schema einmalig beim Start sicherstellen (Performance & Spam-Vermeidung)
         try:
             _ensure_schema()
@@ -356,12 +343,11 @@ class SteamLinkVoiceNudge(commands.Cog):
             log.exception("[nudge] Konnte Persistenz-Wiederherstellung nicht starten")
 
     async def cog_unload(self):
-        for uid, t in list(self._tasks.items()):
-            try:
-                t.cancel()
-            except Exception as exc:
-                log.debug("[nudge] Konnte Task %s nicht canceln: %s", uid, exc)
-        self._tasks.clear()
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+        scheduler = deadline_scheduler.get_scheduler(self.bot)
+        scheduler.unregister(VOICE_MINUTES_JOB)
+        for job in scheduler.pending(VOICE_MINUTES_JOB):
+            await scheduler.cancel(VOICE_MINUTES_JOB, job.key)
         if self._restore_task:
             try:
                 self._restore_task.cancel()
@@ -530,17 +516,17 @@ class SteamLinkVoiceNudge(commands.Cog):
 
         return True
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
+    async def _cancel_voice_nudge(self, user_id: int) -> None:
+        """Bricht den geplanten Voice-Minuten-Job des Members ab (falls vorhanden)."""
+        await deadline_scheduler.get_scheduler(self.bot).cancel(VOICE_MINUTES_JOB, user_id)
+
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        member = event.member
         try:
-            if (before.channel is None) and (after.channel is not None):
-                if privacy.is_opted_out(member.id):
-                    return
+            if event.left:
+                await self._cancel_voice_nudge(member.id)
+                return
+            if event.joined:
                 if _member_has_exempt_role(member):
                     log.debug("[nudge] skip exempt member id=%s", member.id)
                     return
@@ -564,16 +550,7 @@ class SteamLinkVoiceNudge(commands.Cog):
                 if first_seen == today:
                     log.debug("[nudge] same-day join, nudge postponed id=%s", member.id)
                     return
-                if member.id in self._tasks and not self._tasks[member.id].done():
-                    try:
-                        self._tasks[member.id].cancel()
-                    except Exception as exc:
-                        log.debug(
-                            "[nudge] Bestehenden Task für %s konnte nicht abgebrochen werden: %s",
-                            member.id,
-                            exc,
-                        )
-                self._tasks[member.id] = asyncio.create_task(self._wait_and_notify(member))
+                await self._arm_voice_nudge(member)
         except Exception:
             log.exception("on_voice_state_update error")
 
@@ -656,20 +633,35 @@ class SteamLinkVoiceNudge(commands.Cog):
                 await ch.send(f"❌ Nudge-DM an **{user}** ({uid}) fehlgeschlagen: `{e}`")
             return False
 
-    async def _wait_and_notify(self, member: discord.Member):
+    async def _arm_voice_nudge(self, member: discord.Member) -> None:
+        """Plant den Nudge für MIN_VOICE_MINUTES ab jetzt; Verlassen des Voice bricht ab."""
+        if _member_has_exempt_role(member):
+            ch = _log_chan(self.bot)
+            if ch:
+                await ch.send(f"ℹ️ Übersprungen (Exempt): **{member}** ({member.id})")
+            return
+        if privacy.is_opted_out(member.id):
+            return
+        await deadline_scheduler.get_scheduler(self.bot).schedule(
+            VOICE_MINUTES_JOB,
+            member.id,
+            time.time() + MIN_VOICE_MINUTES * 60,
+            {"guild_id": member.guild.id},
+            persist=False,
+        )
+
+    async def _on_voice_minutes_job(self, job: deadline_scheduler.ScheduledJob) -> None:
         try:
-            if _member_has_exempt_role(member):
-                ch = _log_chan(self.bot)
-                if ch:
-                    await ch.send(f"ℹ️ Übersprungen (Exempt): **{member}** ({member.id})")
-                return
-            if privacy.is_opted_out(member.id):
+            guild = self.bot.get_guild(int(job.payload.get("guild_id") or 0))
+            member = guild.get_member(int(job.key)) if guild else None
+            if member is None:
                 return
-
-            ok = await _count_voice_minutes(member, MIN_VOICE_MINUTES)
-            if not ok:
+            vc = getattr(member, "voice", None)
+            if not vc or not vc.channel:
                 log.debug("[nudge] %s left voice early – abort", member.id)
                 return
+            if privacy.is_opted_out(member.id):
+                return
 
             if _has_any_steam_link(member.id):
                 log.debug("[nudge] already linked after wait, skip")
@@ -680,7 +672,7 @@ class SteamLinkVoiceNudge(commands.Cog):
         except asyncio.CancelledError:
             raise
         except Exception:
-            log.exception("wait_and_notify failed")
+            log.exception("voice nudge job failed")
 
     @commands.hybrid_command(
         name="nudgesend",
@@ -4,11 +4,13 @@
 import asyncio
 import logging
 import os
+import time
 
 import discord
 from discord.ext import commands, tasks
 
 from service import db as central_db
+from service import role_reconciler
 from service.config import settings
 
 log = logging.getLogger(__name__)
@@ -56,6 +58,10 @@ class SteamVerifiedRole(commands.Cog):
         # Fast-Lane capped to avoid bursty fetch_member calls
         self._fast_lane_max = 30
         self._post_assign_delay = 0.2
+        # Delta-Abgleich: nur neue/geänderte IDs kosten API-Calls; Rate passt sich an 429 an
+        self._reconciler = role_reconciler.RoleReconciler()
+        self._role_bucket = role_reconciler.TokenBucket(4.0, burst=2, min_rate=0.5, max_rate=6.0)
+        self._last_run_started_at: float | None = None
         log.info(
             "SteamVerifiedRole init: guild=%s role=%s db=%s every=%ss dry_run=%s log_ch=%s fetch_delay=%ss missing_retry=%ss transient_retry=%ss assign_conc=%s fast_lane_max=%s",
             self.guild_id,
@@ -128,6 +134,30 @@ class SteamVerifiedRole(commands.Cog):
                 continue
         return ids
 
+    def _fetch_touched_ids(self, since_epoch: float) -> set[int]:
+        """Discord-IDs, deren steam_links seit ``since_epoch`` geändert wurden."""
+        try:
+            with central_db.get_conn() as con:
+                cur = con.execute(
+                    """
+                    SELECT DISTINCT user_id FROM steam_links
+                    WHERE user_id IS NOT NULL
+                      AND updated_at >= datetime(?, 'unixepoch')
+                    """,
+                    (int(since_epoch),),
+                )
+                rows = cur.fetchall()
+        except Exception as e:
+            log.warning("DB-Fehler beim Lesen geänderter steam_links: %s", e)
+            return set()
+        ids: set[int] = set()
+        for r in rows:
+            try:
+                ids.add(int(r["user_id"]))
+            except (TypeError, ValueError):
+                continue
+        return ids
+
     # ---------- Helpers ----------
     def _http_session_closed(self) -> bool:
         http = getattr(self.bot, "http", None)
@@ -562,142 +592,130 @@ class SteamVerifiedRole(commands.Cog):
             )
             return 0
 
+        run_started_at = time.time()
         verified_ids = self._fetch_verified_discord_ids()
+        # Safety: leere Menge nie abgleichen – schützt vor Cold-Start (alle is_steam_friend=0 nach Migration)
         if not verified_ids:
             return 0
 
-        if self._use_member_chunks and verified_ids:
+        touched: set[int] = set()
+        if self._last_run_started_at is not None:
+            touched = self._fetch_touched_ids(self._last_run_started_at - 60)
+        holders = {m.id for m in role.members if not m.bot}
+        cached = {uid for uid in verified_ids if guild.get_member(uid) is not None}
+        delta = self._reconciler.plan(verified_ids, holders=holders, cached=cached, touched=touched)
+
+        if self._use_member_chunks and delta.fetch_add:
             try:
                 prefetch_ids = (
-                    list(verified_ids)
+                    delta.fetch_add
                     if self._prefetch_limit == 0
-                    else list(verified_ids)[: self._prefetch_limit]
+                    else delta.fetch_add[: self._prefetch_limit]
                 )
                 await self._prefetch_members(guild, prefetch_ids)
             except Exception as exc:  # noqa: PERF203
                 log.debug("Prefetch (chunk) übersprungen: %s", exc)
 
+        if self.dry_run:
+            for uid, action in delta.changes:
+                log.info(
+                    "[DRY] Würde Rolle %s: %s", "vergeben" if action == "add" else "entfernen", uid
+                )
+            return len(delta.add) + len(delta.fetch_add)
+
         self._prune_retry_caches()
-        changes, lines = 0, []
-        not_found = 0
         skipped_cached_retry = 0
-        for uid in verified_ids:
-            if self.bot.is_closed() or self._http_session_closed():
-                log.info("HTTP-Session oder Bot geschlossen waehrend Lauf -> Abbruch.")
-                break
+
+        async def _resolve(uid: int) -> discord.Member | None:
+            nonlocal skipped_cached_retry
             member = guild.get_member(uid)
-            if member is None:
-                if not self._can_attempt_member_fetch(uid):
-                    skipped_cached_retry += 1
-                    continue
-                try:
-                    member = await self._fetch_member_rate_limited(guild, uid)
-                except discord.NotFound:
-                    self._mark_member_missing(uid)
-                    not_found += 1
-                    continue
-                except TimeoutError:
-                    self._mark_member_transient_error(uid)
-                    log.warning("Timeout beim fetch_member im Verified-Lauf (uid=%s).", uid)
-                    continue
-                except RuntimeError as exc:
-                    if self._is_session_closed_error(exc):
-                        log.info(
-                            "HTTP-Session geschlossen beim fetch_member (%s) -> Abbruch Lauf.",
-                            uid,
-                        )
-                        break
-                    raise
-                except discord.HTTPException as exc:
-                    self._mark_member_transient_error(uid)
-                    if exc.status == 429:
-                        log.warning(
-                            "Rate-Limit beim fetch_member (uid=%s). Nächster Versuch später.",
-                            uid,
-                        )
-                    continue
-            else:
-                self._clear_member_retry_state(uid)
-            if role in member.roles:
-                continue
-            if self.dry_run:
-                log.info("[DRY] Würde Rolle vergeben an %s (%s)", uid, member.display_name)
-                changes += 1
-                continue
+            if member is not None:
+                return member
+            if not self._can_attempt_member_fetch(uid):
+                skipped_cached_retry += 1
+                return None
             try:
-                await member.add_roles(role, reason="Steam verified = 1 (automatisch)")
-                self._clear_member_retry_state(uid)
-                asyncio.create_task(self._trigger_rank_check(uid))
-                changes += 1
-                lines.append(
-                    f"✅ <@{uid}> ({member.display_name}) ist jetzt **Verified** - Rolle zugewiesen."
-                )
-                await asyncio.sleep(0.25)
-            except RuntimeError as exc:
-                if self._is_session_closed_error(exc):
-                    log.info("HTTP-Session geschlossen beim add_roles -> Abbruch Lauf.")
-                    break
+                return await self._fetch_member_rate_limited(guild, uid)
+            except discord.NotFound:
+                self._mark_member_missing(uid)
                 raise
-            except discord.Forbidden:
+            except (TimeoutError, discord.HTTPException):
+                self._mark_member_transient_error(uid)
+                return None
+
+        results = await role_reconciler.apply_role_changes(
+            delta.changes,
+            role=role,
+            resolve_member=_resolve,
+            bucket=self._role_bucket,
+            reasons={
+                role_reconciler.ADD: "Steam verified = 1 (automatisch)",
+                role_reconciler.REMOVE: "Steam-Freundschaft beendet (is_steam_friend=0)",
+            },
+            should_stop=lambda: self.bot.is_closed() or self._http_session_closed(),
+        )
+        if len(results) == len(delta.changes):
+            self._reconciler.commit(verified_ids, results)
+            self._last_run_started_at = run_started_at
+
+        changes, removed_count, not_found = 0, 0, 0
+        lines: list[str] = []
+        removal_lines: list[str] = []
+        for result in results:
+            member = result.member
+            if result.status == role_reconciler.NOT_FOUND:
+                not_found += 1
+                continue
+            if result.status == role_reconciler.FORBIDDEN:
                 log.error(
-                    "Forbidden: Rolle %s an %s (%s) - Hierarchie/Berechtigung?",
+                    "Forbidden: Rolle %s bei %s (%s) - Hierarchie/Berechtigung?",
                     role.id,
-                    uid,
+                    result.user_id,
                     getattr(member, "display_name", "?"),
                 )
-            except TimeoutError:
-                self._mark_member_transient_error(uid)
-                log.warning("Timeout beim Rollen-Assign im Verified-Lauf (uid=%s).", uid)
-            except discord.HTTPException as e:
-                self._mark_member_transient_error(uid)
-                log.warning("HTTP-Fehler bei %s: %s", uid, e)
+                continue
+            if result.status == role_reconciler.UNCHANGED:
+                # Inhaber war nur nicht im Cache: kein API-Call, keine Ankündigung
+                self._clear_member_retry_state(result.user_id)
+                continue
+            if not result.ok:
+                if result.status != role_reconciler.SKIPPED:
+                    self._mark_member_transient_error(result.user_id)
+                    log.warning(
+                        "Rollen-Änderung fehlgeschlagen bei %s (%s): %s",
+                        result.user_id,
+                        result.status,
+                        result.error,
+                    )
+                continue
+            self._clear_member_retry_state(result.user_id)
+            if result.action == role_reconciler.ADD:
+                changes += 1
+                asyncio.create_task(self._trigger_rank_check(result.user_id))
+                lines.append(
+                    f"✅ <@{result.user_id}> ({member.display_name}) ist jetzt **Verified** - Rolle zugewiesen."
+                )
+            else:
+                removed_count += 1
+                log.info("Verified-Rolle entfernt: %s (%s)", member.id, member.display_name)
+                removal_lines.append(
+                    f"❌ <@{member.id}> ({member.display_name}) – Verified-Rolle entfernt (Steam-Freundschaft beendet)."
+                )
 
         if lines and not self._http_session_closed():
             await self._announce_assignments(guild, lines)
-
-        # Rolle entfernen wenn Freundschaft beendet (is_steam_friend=0)
-        # Safety: nur wenn verified_ids nicht leer ist – schützt vor Cold-Start (alle is_steam_friend=0 nach Migration)
-        removed_count = 0
-        if verified_ids and not self.bot.is_closed() and not self._http_session_closed():
-            removal_lines = []
-            for member in list(role.members):
-                if member.bot:
-                    continue
-                if member.id in verified_ids:
-                    continue
-                if self.dry_run:
-                    log.info(
-                        "[DRY] Würde Rolle entfernen bei %s (%s)", member.id, member.display_name
-                    )
-                    removed_count += 1
-                    continue
-                try:
-                    await member.remove_roles(
-                        role, reason="Steam-Freundschaft beendet (is_steam_friend=0)"
-                    )
-                    removed_count += 1
-                    removal_lines.append(
-                        f"❌ <@{member.id}> ({member.display_name}) – Verified-Rolle entfernt (Steam-Freundschaft beendet)."
-                    )
-                    log.info("Verified-Rolle entfernt: %s (%s)", member.id, member.display_name)
-                    await asyncio.sleep(0.25)
-                except discord.Forbidden:
-                    log.error(
-                        "Forbidden: Konnte Rolle nicht entfernen bei %s (%s)",
-                        member.id,
-                        member.display_name,
-                    )
-                except discord.HTTPException as exc:
-                    log.warning("HTTP-Fehler beim Entfernen der Rolle bei %s: %s", member.id, exc)
-            if removal_lines and not self._http_session_closed():
-                await self._announce_assignments(guild, removal_lines)
+        if removal_lines and not self._http_session_closed():
+            await self._announce_assignments(guild, removal_lines)
 
         log.info(
-            "Verified-Check: %s Rollen vergeben, %s entfernt, %s IDs nicht auf Server, %s IDs per Retry-Cache übersprungen.",
+            "Verified-Check: %s Rollen vergeben, %s entfernt, %s IDs nicht auf Server, %s IDs per Retry-Cache übersprungen (Delta: %s Cache, %s Fetch, %s Entfernen).",
             changes,
             removed_count,
             not_found,
             skipped_cached_retry,
+            len(delta.add),
+            len(delta.fetch_add),
+            len(delta.remove),
         )
         return changes
 
@@ -808,6 +826,8 @@ class SteamVerifiedRole(commands.Cog):
     @commands.command(name="verifyrole_run", help="Manueller Lauf (loggt nur Zuweisungen).")
     @commands.has_permissions(administrator=True)
     async def verifyrole_run(self, ctx: commands.Context):
+        # Manueller Lauf prüft wieder alle IDs, nicht nur das Delta
+        self._reconciler.reset()
         changes = await self._run_once()
         await ctx.reply(
             f"Fertig. {changes} Nutzer(n) die Verified-Rolle vergeben.",
@@ -12,7 +12,8 @@ from typing import Any
 import discord
 from discord.ext import commands
 
-from service import db
+from cogs import voice_events
+from service import db, overwrite_planner
 from service.guild_config import get_guild_config
 
 log = logging.getLogger("TempVoiceCore")
@@ -567,9 +568,11 @@ class TempVoiceCore(commands.Cog):
     # --------- Lifecycle ---------
     async def cog_load(self):
         # DB Verbindung ist bereits global da
+        voice_events.get_dispatcher(self.bot).subscribe(self.qualified_name, self._on_voice_event)
         self._track(self._startup())
 
     async def cog_unload(self):
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         self._shutting_down = True
         for t in list(self._bg_tasks):
             t.cancel()
@@ -1054,19 +1057,21 @@ class TempVoiceCore(commands.Cog):
             log.debug("get_region_pref failed for %s: %r", owner_id, e)
         return "EU"
 
-    async def apply_region(self, lane: discord.VoiceChannel, region: str):
+    def _region_updates(self, lane: discord.VoiceChannel, region: str) -> dict[Any, Any]:
         role = lane.guild.get_role(ENGLISH_ONLY_ROLE_ID)
         if not role:
-            return
+            return {}
+        if region == "DE":
+            ow = lane.overwrites_for(role)
+            ow.connect = False
+            return {role: ow}
+        return {role: None}
+
+    async def apply_region(self, lane: discord.VoiceChannel, region: str):
+        updates = self._region_updates(lane, region)
+        reason = "TempVoice: Deutsch-Only" if region == "DE" else "TempVoice: Sprachfilter frei"
         try:
-            if region == "DE":
-                ow = lane.overwrites_for(role)
-                ow.connect = False
-                await lane.set_permissions(role, overwrite=ow, reason="TempVoice: Deutsch-Only")
-            else:
-                await lane.set_permissions(
-                    role, overwrite=None, reason="TempVoice: Sprachfilter frei"
-                )
+            await overwrite_planner.apply_overwrites(lane, updates, reason=reason)
         except Exception as e:
             log.debug("apply_region failed for lane %s: %r", lane.id, e)
 
@@ -1647,24 +1652,26 @@ class TempVoiceCore(commands.Cog):
             desired_limit,
         )
 
-    async def _apply_owner_bans(self, lane: discord.VoiceChannel, owner_id: int):
+    async def _owner_ban_updates(self, lane: discord.VoiceChannel, owner_id: int) -> dict[Any, Any]:
+        updates: dict[Any, Any] = {}
         banned = await self.bans.list_bans(owner_id)
         for uid in banned:
             try:
                 member = await self.resolve_member(lane.guild, uid)
-                if not member:
-                    log.debug(
-                        "apply_owner_bans: member %s not found in guild %s",
-                        uid,
-                        lane.guild.id,
-                    )
-                    continue
-                ow = lane.overwrites_for(member)
-                ow.connect = False
-                await lane.set_permissions(member, overwrite=ow, reason="Owner-Ban (persistent)")
-                await asyncio.sleep(0.02)
             except Exception as e:
-                log.debug("apply_owner_bans: failed for %s in lane %s: %r", uid, lane.id, e)
+                log.debug("apply_owner_bans: resolve failed for %s in lane %s: %r", uid, lane.id, e)
+                continue
+            if not member:
+                log.debug(
+                    "apply_owner_bans: member %s not found in guild %s",
+                    uid,
+                    lane.guild.id,
+                )
+                continue
+            ow = lane.overwrites_for(member)
+            ow.connect = False
+            updates[member] = ow
+        return updates
 
     async def _clear_owner_bans(self, lane: discord.VoiceChannel, owner_id: int | None):
         if not owner_id:
@@ -1674,32 +1681,33 @@ class TempVoiceCore(commands.Cog):
         except Exception as e:
             log.debug("clear_owner_bans: list_bans failed for owner %s: %r", owner_id, e)
             return
-        for uid in banned:
-            try:
-                member = await self.resolve_member(lane.guild, uid)
-                if not member:
-                    log.debug(
-                        "clear_owner_bans: member %s not found in guild %s",
-                        uid,
-                        lane.guild.id,
-                    )
-                    continue
-                await lane.set_permissions(
-                    member, overwrite=None, reason="TempVoice: Ownerwechsel Ban-Reset"
-                )
-            except Exception as e:
-                log.debug(
-                    "clear_owner_bans: reset failed for target %s in lane %s: %r",
-                    uid,
-                    lane.id,
-                    e,
-                )
-            await asyncio.sleep(0.02)
+        # Abgleich über die Target-ID, kein Member-Fetch pro Ban nötig.
+        banned_ids = {int(uid) for uid in banned}
+        updates = overwrite_planner.drop_targets(
+            lane.overwrites,
+            lambda target: (
+                isinstance(target, (discord.Member, discord.User, discord.Object))
+                and int(target.id) in banned_ids
+            ),
+        )
+        try:
+            await overwrite_planner.apply_overwrites(
+                lane, updates, reason="TempVoice: Ownerwechsel Ban-Reset"
+            )
+        except Exception as e:
+            log.debug("clear_owner_bans: reset failed in lane %s: %r", lane.id, e)
 
     async def _apply_owner_settings(self, lane: discord.VoiceChannel, owner_id: int):
+        # Sprachfilter + Owner-Bans in einem Overwrite-Edit
         region = await self.get_region_pref(owner_id)
-        await self.apply_region(lane, region)
-        await self._apply_owner_bans(lane, owner_id)
+        updates = self._region_updates(lane, region)
+        try:
+            updates.update(await self._owner_ban_updates(lane, owner_id))
+            await overwrite_planner.apply_overwrites(
+                lane, updates, reason="TempVoice: Owner-Einstellungen"
+            )
+        except Exception as e:
+            log.debug("apply_owner_settings failed for lane %s: %r", lane.id, e)
 
     async def _apply_owner_settings_background(self, lane: discord.VoiceChannel, owner_id: int):
         try:
@@ -1736,41 +1744,24 @@ class TempVoiceCore(commands.Cog):
         guild = lane.guild
         ranks = self._rank_roles_cached(guild)  # Nutze gecachte Version!
 
-        # Sammle alle Permission-Updates zuerst, dann parallel ausführen
-        async def _set_perm_safe(role, overwrite, reason):
-            try:
-                await lane.set_permissions(role, overwrite=overwrite, reason=reason)
-            except Exception as e:
-                log.debug("apply_min_rank %s failed for role %s: %r", reason, role.id, e)
-
-        if min_rank == "unknown":
-            # Reset alle Permissions parallel
-            tasks = []
-            for role in ranks.values():
-                ow = lane.overwrites_for(role)
-                if ow.connect is not None:
-                    tasks.append(_set_perm_safe(role, None, "TempVoice: MinRank reset"))
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
-            return
-
-        # Apply MinRank parallel
-        min_score = _rank_score(min_rank)
-        tasks = []
+        # Alle Rollen-Overwrites sammeln und in einem Edit anwenden
+        min_score = 0 if min_rank == "unknown" else _rank_score(min_rank)
+        updates: dict[Any, Any] = {}
         for name, role in ranks.items():
             score = _rank_score(name)
-            if score == 0:
+            if min_rank != "unknown" and score == 0:
                 continue
+            ow = lane.overwrites_for(role)
             if score < min_score:
-                ow = lane.overwrites_for(role)
                 ow.connect = False
-                tasks.append(_set_perm_safe(role, ow, "TempVoice: MinRank deny"))
-            else:
-                ow = lane.overwrites_for(role)
-                if ow.connect is not None:
-                    tasks.append(_set_perm_safe(role, None, "TempVoice: MinRank clear"))
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+                updates[role] = ow
+            elif ow.connect is not None:
+                updates[role] = None
+        reason = "TempVoice: MinRank reset" if min_rank == "unknown" else "TempVoice: MinRank"
+        try:
+            await overwrite_planner.apply_overwrites(lane, updates, reason=reason)
+        except Exception as e:
+            log.debug("apply_min_rank failed for lane %s: %r", lane.id, e)
 
     # --------- Lane-Erstellung ---------
     async def _create_lane(self, member: discord.Member, staging: discord.VoiceChannel):
@@ -2028,19 +2019,10 @@ class TempVoiceCore(commands.Cog):
                 e,
             )
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
-        before_channel: discord.VoiceChannel | None = (
-            before.channel if before and isinstance(before.channel, discord.VoiceChannel) else None
-        )
-        after_channel: discord.VoiceChannel | None = (
-            after.channel if after and isinstance(after.channel, discord.VoiceChannel) else None
-        )
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        member = event.member
+        before_channel = event.before_voice
+        after_channel = event.after_voice
         left_previous_channel = bool(
             before_channel and (not after_channel or before_channel.id != after_channel.id)
         )
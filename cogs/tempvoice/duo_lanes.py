@@ -9,6 +9,7 @@ import re
 import discord
 from discord.ext import commands
 
+from cogs import voice_events
 from service.guild_config import get_guild_config
 
 log = logging.getLogger("DuoLane")
@@ -90,9 +91,13 @@ class DuoLanes(commands.Cog):
         self._startup_task: asyncio.Task | None = None
 
     async def cog_load(self) -> None:
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name, self._on_voice_event, channel_change_only=True
+        )
         self._startup_task = asyncio.create_task(self._schedule_startup_syncs())
 
     async def cog_unload(self) -> None:
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         if self._startup_task and not self._startup_task.done():
             self._startup_task.cancel()
         for task in list(self._sync_tasks.values()):
@@ -288,21 +293,11 @@ class DuoLanes(commands.Cog):
         )
         return True
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ) -> None:
-        before_channel = before.channel if before else None
-        after_channel = after.channel if after else None
-        if before_channel == after_channel:
-            return
-        if self._is_relevant_voice_channel(before_channel) or self._is_relevant_voice_channel(
-            after_channel
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        if self._is_relevant_voice_channel(event.before_channel) or self._is_relevant_voice_channel(
+            event.after_channel
         ):
-            self.schedule_sync(member.guild.id)
+            self.schedule_sync(event.member.guild.id)
 
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING
 import discord
 from discord.ext import commands
 
+from cogs import voice_events
 from service.guild_config import get_guild_config
 
 from .core import FIXED_LANE_IDS, MINRANK_CATEGORY_IDS, RANK_ORDER, _member_rank_index, _rank_index
@@ -89,9 +90,17 @@ class TempVoiceLaneSorting(commands.Cog):
         self._startup_task: asyncio.Task | None = None
 
     async def cog_load(self) -> None:
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_voice_event,
+            include_bots=False,
+            channel_change_only=True,
+            category_ids=SUPPORTED_CATEGORY_IDS,
+        )
         self._startup_task = asyncio.create_task(self._schedule_startup_reorders())
 
     async def cog_unload(self) -> None:
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         if self._startup_task and not self._startup_task.done():
             self._startup_task.cancel()
         for task in list(self._category_tasks.values()):
@@ -259,7 +268,9 @@ class TempVoiceLaneSorting(commands.Cog):
                 return None
         return int(anchor.position) + 2
 
-    def _should_sort_lane(self, lane: discord.VoiceChannel | None) -> bool:
+    def _should_sort_lane(
+        self, lane: discord.VoiceChannel | None, *, managed: bool | None = None
+    ) -> bool:
         if not isinstance(lane, discord.VoiceChannel):
             return False
         if lane.id in FIXED_LANE_IDS:
@@ -269,6 +280,8 @@ class TempVoiceLaneSorting(commands.Cog):
         # Neue Spieler Lanes und 1411391356278018245 vom Sorting ausschließen
         if lane.id == 1411391356278018245:
             return False
+        if managed is not None:
+            return managed
         return self.core.is_managed_lane(lane)
 
     async def _resolve_lane_rank(self, lane: discord.VoiceChannel) -> tuple[int, int]:
@@ -372,28 +385,12 @@ class TempVoiceLaneSorting(commands.Cog):
     ) -> None:
         self.schedule_category_reorder(lane.guild.id, category_id)
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ) -> None:
-        if member.bot:
-            return
-        before_channel = (
-            before.channel if before and isinstance(before.channel, discord.VoiceChannel) else None
-        )
-        after_channel = (
-            after.channel if after and isinstance(after.channel, discord.VoiceChannel) else None
-        )
-        before_id = getattr(before_channel, "id", None)
-        after_id = getattr(after_channel, "id", None)
-        if before_id == after_id:
-            return
-        if self._should_sort_lane(before_channel):
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        before_channel = event.before_voice
+        after_channel = event.after_voice
+        if self._should_sort_lane(before_channel, managed=event.managed_before):
             self.schedule_category_reorder(before_channel.guild.id, before_channel.category_id)
-        if self._should_sort_lane(after_channel):
+        if self._should_sort_lane(after_channel, managed=event.managed_after):
             self.schedule_category_reorder(after_channel.guild.id, after_channel.category_id)
 
     @commands.Cog.listener()
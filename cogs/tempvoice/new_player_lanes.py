@@ -9,6 +9,7 @@ from dataclasses import dataclass
 import discord
 from discord.ext import commands
 
+from cogs import voice_events
 from service.guild_config import get_guild_config
 
 log = logging.getLogger("NewPlayerAdaptiveLanes")
@@ -191,9 +192,13 @@ class NewPlayerAdaptiveLanes(commands.Cog):
         self._routed_at: dict[int, float] = {}
 
     async def cog_load(self) -> None:
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name, self._on_voice_event, channel_change_only=True
+        )
         self._startup_task = asyncio.create_task(self._schedule_startup_syncs())
 
     async def cog_unload(self) -> None:
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         if self._startup_task and not self._startup_task.done():
             self._startup_task.cancel()
         for task in list(self._sync_tasks.values()):
@@ -503,17 +508,10 @@ class NewPlayerAdaptiveLanes(commands.Cog):
         )
         return True
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ) -> None:
-        before_channel = before.channel if before else None
-        after_channel = after.channel if after else None
-        if before_channel == after_channel:
-            return
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        member = event.member
+        before_channel = event.before_channel
+        after_channel = event.after_channel
         if (
             self._is_eligible_staging(after_channel)
             and int(member.id) in self._routed_at
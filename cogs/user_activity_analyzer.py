@@ -23,11 +23,50 @@ from typing import Any
 import discord
 from discord.ext import commands, tasks
 
+from cogs import message_events
 from cogs import privacy_core as privacy
 from service import db as central_db
+from service import display_names, join_attribution
 
 logger = logging.getLogger(__name__)
 TEXT_SESSION_WINDOW_SECONDS = 600
+CO_PLAYER_KV_NS = "user_activity_analyzer"
+CO_PLAYER_HWM_KEY = "co_player_log_hwm"
+CO_PLAYER_SYNC_BATCH = 2000
+CO_PLAYER_SWEEP_MINUTES = 10
+CO_PLAYER_SWEEP_STATS_KEY = "realtime_sweep_stats"
+
+_CO_PLAYER_EDGE_UPSERT_SQL = """
+    INSERT INTO user_co_players(
+        user_id, co_player_id, sessions_together,
+        total_minutes_together, last_played_together,
+        user_display_name, co_player_display_name
+    )
+    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+    ON CONFLICT(user_id, co_player_id) DO UPDATE SET
+        sessions_together = sessions_together + excluded.sessions_together,
+        total_minutes_together = total_minutes_together + excluded.total_minutes_together,
+        last_played_together = MAX(
+            COALESCE(last_played_together, ''), excluded.last_played_together
+        ),
+        user_display_name = COALESCE(excluded.user_display_name, user_display_name),
+        co_player_display_name = COALESCE(excluded.co_player_display_name, co_player_display_name)
+"""
+
+_CO_PLAYER_SWEEP_UPSERT_SQL = """
+    INSERT INTO user_co_players(
+        user_id, co_player_id, sessions_together,
+        total_minutes_together, last_played_together,
+        user_display_name, co_player_display_name
+    )
+    VALUES (?, ?, 1, ?, CURRENT_TIMESTAMP, ?, ?)
+    ON CONFLICT(user_id, co_player_id) DO UPDATE SET
+        sessions_together = sessions_together + 1,
+        total_minutes_together = total_minutes_together + excluded.total_minutes_together,
+        last_played_together = CURRENT_TIMESTAMP,
+        user_display_name = COALESCE(excluded.user_display_name, user_display_name),
+        co_player_display_name = COALESCE(excluded.co_player_display_name, co_player_display_name)
+"""
 
 
 def _safe_log_value(value: Any) -> str:
@@ -51,13 +90,18 @@ class UserActivityAnalyzer(commands.Cog):
         # Cache für Co-Spieler-Daten (wird alle 30 Min refreshed)
         self._co_player_cache: dict[int, list[tuple[int, int]]] = {}
         self._cache_timestamp = datetime.utcnow()
-        # Namens-Cache für Co-Player, damit Display-Namen auch nach Neustarts verfügbar bleiben
-        self._display_name_cache: dict[int, tuple[str, float]] = {}
-        self._display_name_cache_ttl = 3600.0  # Sekunden
+        self.co_player_sweep_stats: dict[str, Any] = {
+            "sweeps": 0,
+            "rows_total": 0,
+            "last_rows": 0,
+            "last_duration_ms": 0.0,
+            "last_run": None,
+        }
         # Invite-Snapshots pro Guild zur Join-Quellen-Erkennung
         self._join_invite_snapshot: dict[int, dict[str, dict[str, Any]]] = {}
         self._join_vanity_snapshot: dict[int, dict[str, Any]] = {}
         self._join_source_locks: dict[int, asyncio.Lock] = {}
+        self._join_batcher = join_attribution.JoinAttributionBatcher(self._flush_join_batch)
         self._invite_warmup_task: asyncio.Task | None = None
         self._twitch_invite_table_available: bool | None = None
         self._open_text_sessions: dict[tuple[int, int], dict[str, Any]] = {}
@@ -68,10 +112,18 @@ class UserActivityAnalyzer(commands.Cog):
         """Startet Background-Tasks für Analyse und Tracking."""
         # Starte Background-Tasks
         self.analyze_user_activity.start()
+        self.sync_co_player_graph.start()
         self.track_co_players_realtime.start()
         self.cleanup_old_pings.start()
         self.flush_text_sessions.start()
 
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            scope=message_events.SCOPE_GUILD,
+            include_opted_out=False,
+        )
+
         logger.info("User Activity Analyzer loaded - Background tasks started")
 
         # Initialisiere neue DB-Tabellen (falls nicht vorhanden)
@@ -87,12 +139,15 @@ class UserActivityAnalyzer(commands.Cog):
 
     async def cog_unload(self):
         """Stoppt Background-Tasks sauber."""
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         if self._invite_warmup_task and not self._invite_warmup_task.done():
             self._invite_warmup_task.cancel()
             await asyncio.gather(self._invite_warmup_task, return_exceptions=True)
+        await self._join_batcher.close()
 
         tasks_to_cancel = [
             self.analyze_user_activity,
+            self.sync_co_player_graph,
             self.track_co_players_realtime,
             self.cleanup_old_pings,
             self.flush_text_sessions,
@@ -176,69 +231,25 @@ class UserActivityAnalyzer(commands.Cog):
     async def before_analyze(self):
         await self.bot.wait_until_ready()
 
-    def _display_name_from_db(self, user_id: int) -> str | None:
-        """
-        Liefert den zuletzt bekannten Anzeigenamen aus der DB (falls vorhanden).
-        Nutzt co-player- sowie voice_session_log-Daten als Fallback.
-        """
-        try:
-            row = central_db.query_one(
-                """
-                SELECT name FROM (
-                  SELECT user_display_name AS name, last_played_together AS ts
-                  FROM user_co_players
-                  WHERE user_id = ? AND user_display_name IS NOT NULL
-                  UNION ALL
-                  SELECT co_player_display_name AS name, last_played_together AS ts
-                  FROM user_co_players
-                  WHERE co_player_id = ? AND co_player_display_name IS NOT NULL
-                  UNION ALL
-                  SELECT display_name AS name, ended_at AS ts
-                  FROM voice_session_log
-                  WHERE user_id = ? AND display_name IS NOT NULL
-                )
-                WHERE name IS NOT NULL AND name != ''
-                ORDER BY ts DESC
-                LIMIT 1
-                """,
-                (user_id, user_id, user_id),
-            )
-            if row and row[0]:
-                return str(row[0])
-        except Exception as exc:
-            logger.debug("Display name lookup failed for %s: %s", user_id, exc, exc_info=True)
-        return None
-
-    async def _display_name_for(self, user_id: int) -> str:
-        """Resolve a display name and persist it in a short-lived cache."""
-        now = time.time()
-        cached = self._display_name_cache.get(user_id)
-        if cached and now - cached[1] < self._display_name_cache_ttl:
-            return cached[0]
-
-        name = self._display_name_from_db(user_id)
-
-        if not name:
-            user_obj = self.bot.get_user(user_id)
-            if user_obj:
-                name = getattr(user_obj, "display_name", None) or getattr(user_obj, "name", None)
-
-        if not name:
+    async def _display_names_for(self, user_ids: list[int]) -> dict[int, str]:
+        """Löst Namen gesammelt über service.display_names auf; fetch_user nur für Unbekannte."""
+        names = await display_names.lookup_async(user_ids, bot=self.bot)
+        for user_id in user_ids:
+            if user_id in names:
+                continue
+            name = None
             try:
                 user_obj = await self.bot.fetch_user(user_id)
                 name = getattr(user_obj, "display_name", None) or getattr(user_obj, "name", None)
             except (discord.HTTPException, discord.NotFound, discord.Forbidden):
                 name = None
+            if name:
+                display_names.remember(user_id, name)
+            names[user_id] = name or f"User {user_id}"
+        return names
 
-        resolved = name or f"User {user_id}"
-        self._display_name_cache[user_id] = (resolved, now)
-
-        if len(self._display_name_cache) > 512:
-            oldest = sorted(self._display_name_cache.items(), key=lambda item: item[1][1])[:128]
-            for uid, _ in oldest:
-                self._display_name_cache.pop(uid, None)
-
-        return resolved
+    async def _display_name_for(self, user_id: int) -> str:
+        return (await self._display_names_for([user_id]))[user_id]
 
     async def _analyze_single_user(self, user_id: int, sessions: list[dict]):
         """Analysiert einen einzelnen User und speichert die Patterns."""
@@ -318,107 +329,128 @@ class UserActivityAnalyzer(commands.Cog):
                 ),
             )
 
-            # === Co-Spieler aus Session-Logs analysieren (falls vorhanden) ===
-            await self._analyze_co_players_from_sessions(user_id)
-
         except Exception as e:
             logger.error(f"Error analyzing user {user_id}: {e}", exc_info=True)
 
-    async def _analyze_co_players_from_sessions(self, user_id: int):
-        """
-        Analysiert Co-Spieler aus voice_session_log.co_player_ids
-        und aktualisiert die user_co_players Tabelle.
-        """
+    # ========== CO-PLAYER GRAPH (inkrementell) ==========
+
+    @tasks.loop(minutes=5)
+    async def sync_co_player_graph(self):
+        """Überträgt neu finalisierte Voice-Sessions in user_co_players."""
         try:
-            cutoff = datetime.utcnow() - timedelta(days=14)
-            cutoff_str = cutoff.strftime("%Y-%m-%d %H:%M:%S")
+            written = await self._sync_co_player_graph()
+            if written:
+                logger.debug("Co-player graph: %s edges updated", written)
+        except Exception as e:
+            logger.error(f"Error syncing co-player graph: {e}", exc_info=True)
 
-            # Hole alle Sessions mit co_player_ids
-            rows = central_db.query_all(
+    @sync_co_player_graph.before_loop
+    async def before_sync_co_player_graph(self):
+        await self.bot.wait_until_ready()
+
+    @staticmethod
+    def _aggregate_co_player_edges(
+        rows: list[Any],
+    ) -> dict[tuple[int, int], list[Any]]:
+        """(user_id, co_player_id) -> [sessions, minutes, last_played] für einen Batch."""
+        edges: dict[tuple[int, int], list[Any]] = {}
+        for row in rows:
+            raw_ids = row["co_player_ids"]
+            if not raw_ids:
+                continue
+            try:
+                co_player_ids = json.loads(raw_ids)
+            except (TypeError, json.JSONDecodeError):
+                continue
+            user_id = int(row["user_id"])
+            minutes = int(row["duration_seconds"] or 0) // 60
+            ended_at = row["ended_at"]
+            seen: set[int] = set()
+            for co_id in co_player_ids or ():
+                try:
+                    co_int = int(co_id)
+                except (TypeError, ValueError):
+                    continue
+                if co_int == user_id or co_int in seen:
+                    continue
+                seen.add(co_int)
+                edge = edges.get((user_id, co_int))
+                if edge is None:
+                    edges[(user_id, co_int)] = [1, minutes, ended_at]
+                    continue
+                edge[0] += 1
+                edge[1] += minutes
+                if ended_at and (edge[2] is None or ended_at > edge[2]):
+                    edge[2] = ended_at
+        return edges
+
+    async def _sync_co_player_graph(self) -> int:
+        """
+        Verarbeitet voice_session_log-Zeilen oberhalb der High-Water-Mark (kv_store)
+        batchweise: ein executemany pro Batch, HWM im selben Commit. Beim ersten Lauf
+        wird nur die HWM gesetzt, die bestehenden Kanten gelten als Ausgangsstand.
+        """
+        raw_hwm = central_db.get_kv(CO_PLAYER_KV_NS, CO_PLAYER_HWM_KEY)
+        if raw_hwm is None:
+            row = await central_db.query_one_async("SELECT MAX(id) FROM voice_session_log")
+            central_db.set_kv(CO_PLAYER_KV_NS, CO_PLAYER_HWM_KEY, str(int(row[0] or 0)))
+            return 0
+
+        hwm = int(raw_hwm)
+        written = 0
+        while True:
+            rows = await central_db.query_all_async(
                 """
-                SELECT co_player_ids, duration_seconds
+                SELECT id, user_id, duration_seconds, ended_at, co_player_ids
                 FROM voice_session_log
-                WHERE user_id = ? AND started_at >= ? AND co_player_ids IS NOT NULL
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
                 """,
-                (user_id, cutoff_str),
+                (hwm, CO_PLAYER_SYNC_BATCH),
             )
-
             if not rows:
-                return
-
-            # Aggregiere Co-Spieler-Daten
-            co_player_stats = defaultdict(lambda: {"sessions": 0, "minutes": 0})
-
-            for row in rows:
-                co_player_ids_json = row[0]
-                duration_seconds = row[1] or 0
-                duration_minutes = duration_seconds // 60
-
-                if not co_player_ids_json:
-                    continue
+                break
 
-                try:
-                    co_player_ids = json.loads(co_player_ids_json)
-                    for co_id in co_player_ids:
-                        try:
-                            co_int = int(co_id)
-                        except Exception:
-                            continue
-                        if co_int == user_id:
-                            continue
-                        co_player_stats[co_int]["sessions"] += 1
-                        co_player_stats[co_int]["minutes"] += duration_minutes
-                except json.JSONDecodeError:
-                    continue
-
-            base_display_name = await self._display_name_for(user_id)
-
-            # Speichere/Update in DB (mit persistenten Anzeigenamen)
-            for co_id, stats in co_player_stats.items():
-                co_display_name = await self._display_name_for(co_id)
-                central_db.execute(
+            edges = self._aggregate_co_player_edges(rows)
+            names = await display_names.lookup_async(
+                {uid for pair in edges for uid in pair}, bot=self.bot
+            )
+            params = [
+                (uid, co_id, sessions, minutes, last_played, names.get(uid), names.get(co_id))
+                for (uid, co_id), (sessions, minutes, last_played) in edges.items()
+            ]
+            hwm = int(rows[-1]["id"])
+            async with central_db.transaction() as conn:
+                if params:
+                    conn.executemany(_CO_PLAYER_EDGE_UPSERT_SQL, params)
+                conn.execute(
                     """
-                    INSERT INTO user_co_players(
-                        user_id, co_player_id, sessions_together,
-                        total_minutes_together, last_played_together,
-                        user_display_name, co_player_display_name
-                    )
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)
-                    ON CONFLICT(user_id, co_player_id) DO UPDATE SET
-                        sessions_together = sessions_together + excluded.sessions_together,
-                        total_minutes_together = total_minutes_together + excluded.total_minutes_together,
-                        last_played_together = CURRENT_TIMESTAMP,
-                        user_display_name = COALESCE(excluded.user_display_name, user_display_name),
-                        co_player_display_name = COALESCE(excluded.co_player_display_name, co_player_display_name)
+                    INSERT INTO kv_store(ns, k, v) VALUES(?, ?, ?)
+                    ON CONFLICT(ns, k) DO UPDATE SET v = excluded.v
                     """,
-                    (
-                        user_id,
-                        co_id,
-                        stats["sessions"],
-                        stats["minutes"],
-                        base_display_name,
-                        co_display_name,
-                    ),
+                    (CO_PLAYER_KV_NS, CO_PLAYER_HWM_KEY, str(hwm)),
                 )
-
-        except Exception as e:
-            logger.error(f"Error analyzing co-players for {user_id}: {e}", exc_info=True)
+            written += len(params)
+            if len(rows) < CO_PLAYER_SYNC_BATCH:
+                break
+        return written
 
     # ========== CO-PLAYER TRACKING ==========
 
-    @tasks.loop(minutes=10)
+    @tasks.loop(minutes=CO_PLAYER_SWEEP_MINUTES)
     async def track_co_players_realtime(self):
         """
         Trackt wer aktuell mit wem in Voice-Channels ist.
-        Läuft alle 10 Minuten.
+        Sammelt alle Paare über alle Guilds und schreibt sie in einer Transaktion.
         """
         try:
             logger.debug("Tracking co-players in voice channels...")
-
-            # Durchlaufe alle Guilds
+            started = time.perf_counter()
+            rows: list[tuple[int, int, int, str | None, str | None]] = []
             for guild in self.bot.guilds:
-                await self._track_guild_co_players(guild)
-
+                rows.extend(self._collect_guild_co_player_rows(guild))
+            await self._write_co_player_sweep(rows, started)
         except Exception as e:
             logger.error(f"Error tracking co-players: {e}", exc_info=True)
 
@@ -426,81 +458,62 @@ class UserActivityAnalyzer(commands.Cog):
     async def before_track_co_players(self):
         await self.bot.wait_until_ready()
 
-    async def _track_guild_co_players(self, guild: discord.Guild):
-        """Trackt Co-Spieler für eine einzelne Guild."""
+    def _collect_guild_co_player_rows(
+        self, guild: discord.Guild
+    ) -> list[tuple[int, int, int, str | None, str | None]]:
+        """Alle Paarungen (beide Richtungen) der Voice-Channels einer Guild."""
+        rows: list[tuple[int, int, int, str | None, str | None]] = []
         try:
-            # Durchlaufe alle Voice-Channels
             for channel in guild.voice_channels:
-                if not channel.members or len(channel.members) < 2:
-                    continue
-
                 # Filter: Nur echte User (keine Bots)
                 real_members = [m for m in channel.members if not m.bot]
-
                 if len(real_members) < 2:
                     continue
 
-                # Alle Paarungen speichern
                 for i, member1 in enumerate(real_members):
+                    name1 = getattr(member1, "display_name", None)
                     for member2 in real_members[i + 1 :]:
-                        await self._record_co_player_session(
-                            member1.id,
-                            member2.id,
-                            duration_minutes=10,  # 10 Min pro Loop-Interval
-                            user_name=getattr(member1, "display_name", None),
-                            co_player_name=getattr(member2, "display_name", None),
-                        )
-
+                        if member1.id == member2.id:
+                            continue
+                        name2 = getattr(member2, "display_name", None)
+                        rows.append((member1.id, member2.id, CO_PLAYER_SWEEP_MINUTES, name1, name2))
+                        rows.append((member2.id, member1.id, CO_PLAYER_SWEEP_MINUTES, name2, name1))
         except Exception as e:
             logger.error(f"Error tracking co-players in guild {guild.id}: {e}", exc_info=True)
+        return rows
 
-    async def _record_co_player_session(
+    async def _write_co_player_sweep(
         self,
-        user_id: int,
-        co_player_id: int,
-        duration_minutes: int = 10,
-        user_name: str | None = None,
-        co_player_name: str | None = None,
-    ):
-        """Speichert eine Co-Player-Session (bidirektional) und persistiert Namen."""
-        if user_id == co_player_id:
-            return
-        try:
-            base_user_name = user_name or await self._display_name_for(user_id)
-            base_co_name = co_player_name or await self._display_name_for(co_player_id)
-
-            # Beide Richtungen speichern (A->B und B->A)
-            pairs = [
-                (user_id, co_player_id, base_user_name, base_co_name),
-                (co_player_id, user_id, base_co_name, base_user_name),
-            ]
-            for uid, co_uid, uid_name, co_name in pairs:
-                central_db.execute(
-                    """
-                    INSERT INTO user_co_players(
-                        user_id, co_player_id, sessions_together,
-                        total_minutes_together, last_played_together,
-                        user_display_name, co_player_display_name
-                    )
-                    VALUES (?, ?, 1, ?, CURRENT_TIMESTAMP, ?, ?)
-                    ON CONFLICT(user_id, co_player_id) DO UPDATE SET
-                        sessions_together = sessions_together + 1,
-                        total_minutes_together = total_minutes_together + excluded.total_minutes_together,
-                        last_played_together = CURRENT_TIMESTAMP,
-                        user_display_name = COALESCE(excluded.user_display_name, user_display_name),
-                        co_player_display_name = COALESCE(excluded.co_player_display_name, co_player_display_name)
-                    """,
-                    (uid, co_uid, duration_minutes, uid_name, co_name),
-                )
-
-            # Invalidiere Cache
-            if user_id in self._co_player_cache:
-                del self._co_player_cache[user_id]
-            if co_player_id in self._co_player_cache:
-                del self._co_player_cache[co_player_id]
+        rows: list[tuple[int, int, int, str | None, str | None]],
+        started: float,
+    ) -> int:
+        """Ein executemany + Sweep-Metrik (kv_store) in einer einzigen Transaktion."""
+        stats = self.co_player_sweep_stats
+        async with central_db.transaction() as conn:
+            if rows:
+                conn.executemany(_CO_PLAYER_SWEEP_UPSERT_SQL, rows)
+            duration_ms = (time.perf_counter() - started) * 1000
+            stats["sweeps"] += 1
+            stats["rows_total"] += len(rows)
+            stats["last_rows"] = len(rows)
+            stats["last_duration_ms"] = round(duration_ms, 2)
+            stats["last_run"] = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+            conn.execute(
+                """
+                INSERT INTO kv_store(ns, k, v) VALUES(?, ?, ?)
+                ON CONFLICT(ns, k) DO UPDATE SET v = excluded.v
+                """,
+                (CO_PLAYER_KV_NS, CO_PLAYER_SWEEP_STATS_KEY, json.dumps(stats)),
+            )
 
-        except Exception as e:
-            logger.error(f"Error recording co-player session: {e}", exc_info=True)
+        for uid, *_ in rows:
+            self._co_player_cache.pop(uid, None)
+        logger.debug(
+            "Co-player sweep: %s rows in %.1f ms",
+            stats["last_rows"],
+            stats["last_duration_ms"],
+        )
+        return len(rows)
 
     async def get_top_co_players(self, user_id: int, limit: int = 5) -> list[tuple[int, int]]:
         """
@@ -1026,8 +1039,9 @@ class UserActivityAnalyzer(commands.Cog):
         self._twitch_invite_table_available = True
         return {r[0]: r[1] for r in rows if r[0]}
 
-    def _classify_join_source(
+    def _classify_join_batch(
         self,
+        count: int,
         *,
         guild_id: int,
         before_invites: dict[str, dict[str, Any]] | None,
@@ -1035,110 +1049,116 @@ class UserActivityAnalyzer(commands.Cog):
         before_vanity: dict[str, Any] | None,
         after_vanity: dict[str, Any],
         invites_ok: bool,
-    ) -> dict[str, Any]:
+    ) -> list[dict[str, Any]]:
+        """Klassifiziert ``count`` Joins gegen EIN Snapshot-Paar (Ankunftsreihenfolge)."""
         detected_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-        payload: dict[str, Any] = {
-            "join_source_bucket": "unknown",
-            "join_source_kind": "unknown",
-            "join_source_label": "Unbekannt",
-            "join_source_confidence": "low",
-            "join_source_detected_at": detected_at,
-        }
 
-        increased_codes: list[tuple[int, str, dict[str, Any]]] = []
-        if before_invites is not None:
-            for code, invite_info in after_invites.items():
-                after_uses = self._to_int(invite_info.get("uses"), 0) or 0
-                before_uses = self._to_int((before_invites.get(code) or {}).get("uses"), 0) or 0
-                delta = after_uses - before_uses
-                if delta > 0:
-                    increased_codes.append((delta, code, invite_info))
-
-        if increased_codes:
-            increased_codes.sort(key=lambda item: (-item[0], item[1].lower()))
-            _, code, invite_info = increased_codes[0]
-            twitch_login = self._lookup_twitch_streamer_for_code(guild_id, code)
-
-            payload.update(
-                {
-                    "invite_code": code,
-                    "invite_url": invite_info.get("url") or f"https://discord.gg/{code}",
-                    "inviter_id": invite_info.get("inviter_id"),
-                    "inviter_name": invite_info.get("inviter_name"),
-                    "invite_channel_id": invite_info.get("channel_id"),
-                    "invite_channel_name": invite_info.get("channel_name"),
-                    "join_source_confidence": "high",
-                }
-            )
+        invite_deltas = (
+            join_attribution.invite_use_deltas(before_invites, after_invites)
+            if before_invites is not None
+            else []
+        )
+        before_vanity_uses = self._to_int((before_vanity or {}).get("uses"), None)
+        after_vanity_uses = self._to_int((after_vanity or {}).get("uses"), None)
+        vanity_delta: int | None = None
+        if before_vanity_uses is not None and after_vanity_uses is not None:
+            vanity_delta = after_vanity_uses - before_vanity_uses
+        has_baseline = before_invites is not None or before_vanity is not None
+
+        payloads: list[dict[str, Any]] = []
+        for attribution in join_attribution.attribute_joins(count, invite_deltas, vanity_delta):
+            payload: dict[str, Any] = {
+                "join_source_bucket": "unknown",
+                "join_source_kind": "unknown",
+                "join_source_label": "Unbekannt",
+                "join_source_confidence": "low",
+                "join_source_detected_at": detected_at,
+            }
+            confidence = "medium" if attribution.ambiguous else "high"
+
+            if attribution.kind == join_attribution.INVITE and attribution.code:
+                code = attribution.code
+                invite_info = after_invites.get(code) or {}
+                twitch_login = self._lookup_twitch_streamer_for_code(guild_id, code)
 
-            if twitch_login:
                 payload.update(
                     {
-                        "join_source_bucket": "twitch",
-                        "join_source_kind": "twitch_streamer",
-                        "join_source_label": f"Twitch: {twitch_login}",
-                        "twitch_streamer_login": twitch_login,
+                        "invite_code": code,
+                        "invite_url": invite_info.get("url") or f"https://discord.gg/{code}",
+                        "inviter_id": invite_info.get("inviter_id"),
+                        "inviter_name": invite_info.get("inviter_name"),
+                        "invite_channel_id": invite_info.get("channel_id"),
+                        "invite_channel_name": invite_info.get("channel_name"),
+                        "join_source_confidence": confidence,
                     }
                 )
-            elif invite_info.get("inviter_bot"):
-                inviter_name = invite_info.get("inviter_name") or "Bot"
+
+                if twitch_login:
+                    payload.update(
+                        {
+                            "join_source_bucket": "twitch",
+                            "join_source_kind": "twitch_streamer",
+                            "join_source_label": f"Twitch: {twitch_login}",
+                            "twitch_streamer_login": twitch_login,
+                        }
+                    )
+                elif invite_info.get("inviter_bot"):
+                    inviter_name = invite_info.get("inviter_name") or "Bot"
+                    payload.update(
+                        {
+                            "join_source_bucket": "bot_invite",
+                            "join_source_kind": "bot_invite",
+                            "join_source_label": f"Bot Invite: {inviter_name}",
+                            "inviter_bot": True,
+                        }
+                    )
+                else:
+                    payload.update(
+                        {
+                            "join_source_bucket": "personal",
+                            "join_source_kind": "invite_link",
+                            "join_source_label": "Persoenliche Einladung",
+                        }
+                    )
+            elif attribution.kind == join_attribution.VANITY:
+                vanity_code = str(after_vanity.get("code") or "").strip() or None
                 payload.update(
                     {
-                        "join_source_bucket": "bot_invite",
-                        "join_source_kind": "bot_invite",
-                        "join_source_label": f"Bot Invite: {inviter_name}",
-                        "inviter_bot": True,
+                        "join_source_bucket": "public",
+                        "join_source_kind": "vanity",
+                        "join_source_label": "Public: Vanity-Link",
+                        "join_source_confidence": confidence,
+                        "vanity_code": vanity_code,
+                        "vanity_url": f"https://discord.gg/{vanity_code}" if vanity_code else None,
                     }
                 )
-            else:
+            elif has_baseline and invites_ok:
                 payload.update(
                     {
-                        "join_source_bucket": "personal",
-                        "join_source_kind": "invite_link",
-                        "join_source_label": "Persoenliche Einladung",
+                        "join_source_bucket": "public",
+                        "join_source_kind": "server_discovery",
+                        "join_source_label": "Public: Server entdecken",
+                        "join_source_confidence": "medium",
                     }
                 )
-            return payload
-
-        before_vanity_uses = self._to_int((before_vanity or {}).get("uses"), None)
-        after_vanity_uses = self._to_int((after_vanity or {}).get("uses"), None)
-        vanity_delta: int | None = None
-        if before_vanity_uses is not None and after_vanity_uses is not None:
-            vanity_delta = after_vanity_uses - before_vanity_uses
-
-        if vanity_delta and vanity_delta > 0:
-            vanity_code = str(after_vanity.get("code") or "").strip() or None
-            payload.update(
-                {
-                    "join_source_bucket": "public",
-                    "join_source_kind": "vanity",
-                    "join_source_label": "Public: Vanity-Link",
-                    "join_source_confidence": "high",
-                    "vanity_code": vanity_code,
-                    "vanity_url": f"https://discord.gg/{vanity_code}" if vanity_code else None,
-                }
-            )
-            return payload
-
-        has_baseline = before_invites is not None or before_vanity is not None
-        if has_baseline and invites_ok:
-            payload.update(
-                {
-                    "join_source_bucket": "public",
-                    "join_source_kind": "server_discovery",
-                    "join_source_label": "Public: Server entdecken",
-                    "join_source_confidence": "medium",
-                }
-            )
-            return payload
-
-        payload["join_source_reason"] = (
-            "baseline_missing" if not has_baseline else "invite_snapshot_unavailable"
-        )
-        return payload
+            else:
+                payload["join_source_reason"] = (
+                    "baseline_missing" if not has_baseline else "invite_snapshot_unavailable"
+                )
+            if count > 1:
+                payload["join_source_batch_size"] = count
+            payloads.append(payload)
+        return payloads
 
     async def _detect_join_source(self, guild: discord.Guild) -> dict[str, Any]:
-        guild_id = guild.id
+        """Join-Quelle über den Batcher: Joins im selben Fenster teilen sich einen Fetch."""
+        return await self._join_batcher.submit(guild.id, guild)
+
+    async def _flush_join_batch(
+        self, guild_id: int, guilds: list[discord.Guild]
+    ) -> list[dict[str, Any]]:
+        guild = guilds[-1]
+        count = len(guilds)
         lock = self._invite_lock_for_guild(guild_id)
         async with lock:
             baseline_invites = self._join_invite_snapshot.get(guild_id)
@@ -1146,11 +1166,12 @@ class UserActivityAnalyzer(commands.Cog):
 
             attempts = 2 if (baseline_invites is not None or baseline_vanity is not None) else 1
             latest_snapshot: dict[str, Any] | None = None
-            detected: dict[str, Any] | None = None
+            detected: list[dict[str, Any]] = []
 
             for attempt in range(attempts):
                 latest_snapshot = await self._collect_join_invite_snapshot(guild)
-                detected = self._classify_join_source(
+                detected = self._classify_join_batch(
+                    count,
                     guild_id=guild_id,
                     before_invites=baseline_invites,
                     after_invites=latest_snapshot.get("invites", {}),
@@ -1158,8 +1179,13 @@ class UserActivityAnalyzer(commands.Cog):
                     after_vanity=latest_snapshot.get("vanity", {}),
                     invites_ok=bool(latest_snapshot.get("invites_ok")),
                 )
-                kind = str(detected.get("join_source_kind") or "").lower()
-                if kind not in {"server_discovery", "unknown"}:
+                # Uses-Zähler hängen teils nach: einmal pro Batch nachfassen,
+                # solange noch Joins ohne Invite/Vanity-Zuordnung übrig sind.
+                if not any(
+                    str(item.get("join_source_kind") or "").lower()
+                    in {"server_discovery", "unknown"}
+                    for item in detected
+                ):
                     break
                 if attempt < attempts - 1:
                     await asyncio.sleep(1.0)
@@ -1172,13 +1198,9 @@ class UserActivityAnalyzer(commands.Cog):
                     self._save_invite_snapshot_to_db(guild_id, invites, vanity)
                 self._join_vanity_snapshot[guild_id] = latest_snapshot.get("vanity", {})
 
-            return detected or {
-                "join_source_bucket": "unknown",
-                "join_source_kind": "unknown",
-                "join_source_label": "Unbekannt",
-                "join_source_confidence": "low",
-                "join_source_detected_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
-            }
+        if count > 1:
+            logger.debug("Join source: %d Joins in einem Batch (guild=%s)", count, guild_id)
+        return detected
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -1337,6 +1359,17 @@ class UserActivityAnalyzer(commands.Cog):
         except Exception as e:
             logger.error(f"Error tracking member unban: {e}", exc_info=True)
 
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Namens-Cache verwerfen, sobald sich der Anzeigename ändert."""
+        if before.display_name != after.display_name:
+            display_names.invalidate(after.id)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        if before.display_name != after.display_name or before.name != after.name:
+            display_names.invalidate(after.id)
+
     @commands.Cog.listener()
     async def on_invite_create(self, invite: discord.Invite) -> None:
         """Neuen Invite sofort in den Cache aufnehmen ohne API-Refetch."""
@@ -1447,16 +1480,10 @@ class UserActivityAnalyzer(commands.Cog):
         except Exception as e:
             logger.error(f"Error tracking member leave (raw): {e}", exc_info=True)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Trackt Message-Aktivität von Usern."""
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        """Trackt Message-Aktivität von Usern (Guild, ohne Bots/Opt-out)."""
+        message = event.message
         try:
-            # Ignore Bots & DMs
-            if not message.guild or message.author.bot:
-                return
-            if privacy.is_opted_out(message.author.id):
-                return
-
             # Update/Insert Message Activity
             central_db.execute(
                 """
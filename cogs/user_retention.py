@@ -12,6 +12,7 @@ Funktionsweise:
 5. Opt-out Möglichkeit für User die keine DMs wollen
 """
 
+import json
 import logging
 import re
 import time
@@ -24,6 +25,7 @@ from discord import app_commands
 from discord.ext import commands, tasks
 
 from cogs import privacy_core as privacy
+from cogs import voice_events
 from service import db as central_db
 
 logger = logging.getLogger(__name__)
@@ -184,6 +186,60 @@ class MissYouView(discord.ui.View):
     #     logger.info(f"User {interaction.user.id} hat sich per Button abgemeldet")
 
 
+# Sync voice_session_log -> user_retention_tracking
+RETENTION_SYNC_WINDOW_SECONDS = 60 * 24 * 60 * 60
+RETENTION_FULL_SYNC_INTERVAL_SECONDS = 24 * 60 * 60
+_SYNC_CHUNK_SIZE = 500
+_SYNC_KV_NS = "user_retention"
+_SYNC_KV_LAST_ID = "sync_last_session_id"
+_SYNC_KV_FULL_AT = "sync_full_at"
+
+# started_at ist als 'YYYY-MM-DD HH:MM:SS' (UTC) gespeichert; der Vergleich mit
+# datetime(?, 'unixepoch') bleibt sargable und nutzt idx_voice_log_started.
+# "+user_id": sonst wählt SQLite für das GROUP BY einen Voll-Scan über
+# idx_voice_log_user statt der Range-Suche auf started_at.
+_RETENTION_AGGREGATE_SQL = """
+    SELECT
+        user_id,
+        guild_id,
+        COUNT(DISTINCT date(started_at)) AS active_days,
+        COUNT(*) AS total_sessions,
+        strftime('%s', MIN(started_at)) AS first_session,
+        strftime('%s', MAX(started_at)) AS last_session
+    FROM voice_session_log
+    WHERE started_at > datetime(?, 'unixepoch')
+    GROUP BY +user_id
+"""
+# Inkrementell: nur die User mit neuen Sessions (JSON-Liste als ein Parameter).
+_RETENTION_AGGREGATE_USERS_SQL = """
+    SELECT
+        user_id,
+        guild_id,
+        COUNT(DISTINCT date(started_at)) AS active_days,
+        COUNT(*) AS total_sessions,
+        strftime('%s', MIN(started_at)) AS first_session,
+        strftime('%s', MAX(started_at)) AS last_session
+    FROM voice_session_log
+    WHERE started_at > datetime(?, 'unixepoch')
+      AND user_id IN (SELECT value FROM json_each(?))
+    GROUP BY user_id
+"""
+_RETENTION_UPSERT_SQL = """
+    INSERT INTO user_retention_tracking
+    (user_id, guild_id, first_seen_at, last_active_at, total_active_days, avg_weekly_sessions, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET
+        last_active_at = MAX(user_retention_tracking.last_active_at, excluded.last_active_at),
+        total_active_days = MAX(user_retention_tracking.total_active_days, excluded.total_active_days),
+        avg_weekly_sessions = excluded.avg_weekly_sessions,
+        updated_at = excluded.updated_at
+"""
+_KV_UPSERT_SQL = """
+    INSERT INTO kv_store(ns, k, v) VALUES(?, ?, ?)
+    ON CONFLICT(ns, k) DO UPDATE SET v = excluded.v
+"""
+
+
 class UserRetentionCog(commands.Cog):
     """
     Erkennt inaktive User und sendet freundliche "Wir vermissen dich"-Nachrichten.
@@ -204,6 +260,14 @@ class UserRetentionCog(commands.Cog):
             logger.error(f"DB nicht verfügbar: {e}")
             raise
 
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_voice_event,
+            include_bots=False,
+            include_opted_out=False,
+            channel_change_only=True,
+        )
+
         # Registriere persistent View für Buttons (funktioniert nach Bot-Restart)
         self.bot.add_view(MissYouView(0, "", None, self.config.server_link, self.config.voice_link))
 
@@ -214,31 +278,21 @@ class UserRetentionCog(commands.Cog):
 
     async def cog_unload(self):
         """Stoppt Background-Tasks beim Entladen."""
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         self.daily_retention_check.cancel()
         self.sync_activity_data.cancel()
         logger.info("UserRetention Cog entladen")
 
     # ========= Activity Tracking =========
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
         """
         Trackt Voice-Aktivität für Retention-Analyse.
         Wird parallel zum voice_activity_tracker ausgeführt.
         """
-        if member.bot:
-            return
-        if privacy.is_opted_out(member.id):
-            return
-
-        # User ist einem Voice-Channel beigetreten (nicht nur gewechselt)
-        if after.channel and (not before.channel or before.channel != after.channel):
-            await self._update_user_activity(member)
+        # User ist einem Voice-Channel beigetreten oder hat gewechselt
+        if event.after_channel:
+            await self._update_user_activity(event.member)
 
     async def _update_user_activity(self, member: discord.Member):
         """Aktualisiert die Aktivitätsdaten eines Users."""
@@ -290,69 +344,80 @@ class UserRetentionCog(commands.Cog):
     async def sync_activity_data(self):
         """
         Synchronisiert Daten aus voice_session_log in user_retention_tracking.
-        Berechnet avg_weekly_sessions für alle User.
+        Berechnet avg_weekly_sessions inkrementell: nur User mit Sessions seit der
+        zuletzt synchronisierten Session-ID; einmal täglich ein voller Abgleich.
         """
         try:
-            # Hole alle User mit Voice-Aktivität der letzten 60 Tage
-            sixty_days_ago = int(time.time()) - (60 * 24 * 60 * 60)
-
-            rows = central_db.query_all(
-                """
-                SELECT
-                    user_id,
-                    guild_id,
-                    COUNT(DISTINCT date(started_at)) as active_days,
-                    COUNT(*) as total_sessions,
-                    MIN(strftime('%s', started_at)) as first_session,
-                    MAX(strftime('%s', started_at)) as last_session
-                FROM voice_session_log
-                WHERE strftime('%s', started_at) > ?
-                GROUP BY user_id
-                """,
-                (sixty_days_ago,),
-            )
-
-            now = int(time.time())
-
-            for row in rows:
-                user_id = row[0]
-                guild_id = row[1]
-                active_days = row[2]
-                total_sessions = row[3]
-                first_session = int(row[4]) if row[4] else now
-                last_session = int(row[5]) if row[5] else now
+            await self._sync_activity_data_once()
+        except Exception as e:
+            logger.error(f"Fehler beim Sync der Aktivitätsdaten: {e}")
 
-                # Berechne Wochen seit erstem Auftauchen
-                weeks_active = max(1, (now - first_session) / (7 * 24 * 60 * 60))
-                avg_weekly = total_sessions / weeks_active
+    async def _sync_activity_data_once(self, *, full: bool = False) -> int:
+        now = int(time.time())
+        window_start = now - RETENTION_SYNC_WINDOW_SECONDS
+
+        row = await central_db.query_one_async("SELECT MAX(id) FROM voice_session_log")
+        max_id = int(row[0] or 0) if row else 0
+        last_id = int(central_db.get_kv(_SYNC_KV_NS, _SYNC_KV_LAST_ID) or 0)
+        last_full = int(central_db.get_kv(_SYNC_KV_NS, _SYNC_KV_FULL_AT) or 0)
+        full = (
+            full
+            or last_id <= 0
+            or last_id > max_id
+            or now - last_full >= RETENTION_FULL_SYNC_INTERVAL_SECONDS
+        )
 
-                # Upsert in retention_tracking
-                central_db.execute(
-                    """
-                    INSERT INTO user_retention_tracking
-                    (user_id, guild_id, first_seen_at, last_active_at, total_active_days, avg_weekly_sessions, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(user_id) DO UPDATE SET
-                        last_active_at = MAX(user_retention_tracking.last_active_at, excluded.last_active_at),
-                        total_active_days = MAX(user_retention_tracking.total_active_days, excluded.total_active_days),
-                        avg_weekly_sessions = excluded.avg_weekly_sessions,
-                        updated_at = excluded.updated_at
-                    """,
-                    (
-                        user_id,
-                        guild_id,
-                        first_session,
-                        last_session,
-                        active_days,
-                        avg_weekly,
-                        now,
-                    ),
+        if full:
+            rows = await central_db.query_all_async(_RETENTION_AGGREGATE_SQL, (window_start,))
+        elif max_id == last_id:
+            return 0
+        else:
+            dirty = await central_db.query_all_async(
+                "SELECT DISTINCT user_id FROM voice_session_log WHERE id > ? AND id <= ?",
+                (last_id, max_id),
+            )
+            user_ids = [int(r[0]) for r in dirty]
+            rows = []
+            for start in range(0, len(user_ids), _SYNC_CHUNK_SIZE):
+                chunk = user_ids[start : start + _SYNC_CHUNK_SIZE]
+                rows.extend(
+                    await central_db.query_all_async(
+                        _RETENTION_AGGREGATE_USERS_SQL, (window_start, json.dumps(chunk))
+                    )
                 )
 
-            logger.debug(f"Synced retention data for {len(rows)} users")
+        params = []
+        for row in rows:
+            first_session = int(row["first_session"]) if row["first_session"] else now
+            last_session = int(row["last_session"]) if row["last_session"] else now
+            # Berechne Wochen seit erstem Auftauchen
+            weeks_active = max(1, (now - first_session) / (7 * 24 * 60 * 60))
+            params.append(
+                (
+                    row["user_id"],
+                    row["guild_id"],
+                    first_session,
+                    last_session,
+                    row["active_days"],
+                    row["total_sessions"] / weeks_active,
+                    now,
+                )
+            )
 
-        except Exception as e:
-            logger.error(f"Fehler beim Sync der Aktivitätsdaten: {e}")
+        async with central_db.transaction() as tx:
+            if params:
+                tx.executemany(_RETENTION_UPSERT_SQL, params)
+            tx.execute(_KV_UPSERT_SQL, (_SYNC_KV_NS, _SYNC_KV_LAST_ID, str(max_id)))
+            if full:
+                tx.execute(_KV_UPSERT_SQL, (_SYNC_KV_NS, _SYNC_KV_FULL_AT, str(now)))
+
+        logger.debug(
+            "Synced retention data for %s users (%s, sessions bis id=%s)",
+            len(params),
+            "voll" if full else "inkrementell",
+            max_id,
+        )
+        return len(params)
 
     @sync_activity_data.before_loop
     async def before_sync(self):
@@ -10,7 +10,8 @@ from datetime import datetime, timedelta
 import discord
 from discord.ext import commands, tasks
 
-from cogs import privacy_core as privacy
+from cogs import message_events, voice_events
+from cogs.voice_session_buffer import VoiceSessionWriteBuffer
 
 # zentrale DB-API (synchron, mit internem Lock), KEINE eigenen Tabellen-Anlagen hier!
 from service import db as central_db
@@ -252,6 +253,52 @@ class RateLimiter:
         return max(0, int(self.time_window - (now - oldest_request)))
 
 
+# ========= Laufende Statistik der Channel-Belegung pro Session =========
+class UserCountStats:
+    """
+    Konstant großer Ersatz für die frühere user_counts-Liste: Anzahl, Summe,
+    Min/Max und ein Histogramm der Belegung (Index = Useranzahl, letzter Bucket = "≥ Max").
+    """
+
+    HIST_BUCKETS = 16
+    __slots__ = ("count", "total", "min", "max", "hist")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max: int | None = None
+        self.hist = [0] * (self.HIST_BUCKETS + 1)
+
+    def add(self, value: int) -> None:
+        value = max(0, int(value))
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.hist[min(value, self.HIST_BUCKETS)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_json(self) -> str:
+        hist = list(self.hist)
+        while hist and hist[-1] == 0:
+            hist.pop()
+        return json.dumps(
+            {
+                "n": self.count,
+                "sum": self.total,
+                "min": self.min,
+                "max": self.max,
+                "mean": round(self.mean, 2),
+                "hist": hist,
+            },
+            separators=(",", ":"),
+        )
+
+
 # ========= Config Manager (per Guild in kv_store) =========
 class ConfigManager:
     """
@@ -342,6 +389,8 @@ class VoiceActivityTrackerCog(commands.Cog):
         self._display_name_cache: dict[int, tuple[str, float]] = {}  # user_id -> (name, timestamp)
         self._display_name_cache_ttl = 300  # 5 minutes
 
+        self.session_buffer = VoiceSessionWriteBuffer()
+
         self.session_stats = {
             "total_sessions_created": 0,
             "total_grace_periods": 0,
@@ -351,7 +400,7 @@ class VoiceActivityTrackerCog(commands.Cog):
         logger.info("Enhanced Voice Activity Tracker initializing (DB-centralized)")
 
     def _drop_runtime_state(self, user_id: int) -> None:
-        """Remove in-memory tracking state for an opted-out user."""
+        """Remove in-memory tracking state (incl. buffered sessions) for an opted-out user."""
         key_prefix = f"{int(user_id)}:"
         for key in list(self.voice_sessions.keys()):
             if key.startswith(key_prefix):
@@ -360,6 +409,8 @@ class VoiceActivityTrackerCog(commands.Cog):
             if key.startswith(key_prefix):
                 self.grace_period_users.pop(key, None)
         self._display_name_cache.pop(int(user_id), None)
+        # beendete, noch nicht geschriebene Sessions dürfen nicht nachträglich landen
+        self.session_buffer.discard_user(user_id)
 
     async def cog_load(self):
         # shared.db initialisiert Schema beim connect() selbst - hier nur Smoke-Test:
@@ -369,6 +420,8 @@ class VoiceActivityTrackerCog(commands.Cog):
             logger.error(f"Central DB not available: {e}")
             raise
 
+        await self.session_buffer.start()
+
         # Background tasks (keine Backups/Migrationen hier)
         self.cleanup_sessions.start()
         self.update_sessions.start()
@@ -381,10 +434,25 @@ class VoiceActivityTrackerCog(commands.Cog):
                 f"Voice feedback buttons re-registered: restored={restored}, resent={resent}"
             )
 
+        # Erst abonnieren, wenn Buffer und Tasks laufen - frühe Events träfen
+        # sonst auf halb initialisierten State
+        voice_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name, self._on_voice_event, include_bots=False
+        )
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            scope=message_events.SCOPE_DM,
+            include_opted_out=False,
+            intent=lambda event: VOICE_FEEDBACK_ENABLED and bool(event.text.strip()),
+        )
+
         logger.info("Voice Activity Tracker initialized (DB-centralized)")
 
     async def cog_unload(self):
         """Cleanup: Cancel background tasks und warte auf sauberen Shutdown."""
+        voice_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
         tasks_to_cancel = [
             self.cleanup_sessions,
             self.update_sessions,
@@ -405,6 +473,12 @@ class VoiceActivityTrackerCog(commands.Cog):
             return_exceptions=True,
         )
 
+        # Gepufferte Sessions schreiben (bei Fehler bleiben sie im Journal)
+        try:
+            await self.session_buffer.close()
+        except Exception as e:
+            logger.error(f"Voice session buffer flush on unload failed: {e}", exc_info=True)
+
         # Invalidate Caches (verhindert stale data bei reload)
         self.config_manager._cache.clear()
         self._display_name_cache.clear()
@@ -586,38 +660,33 @@ class VoiceActivityTrackerCog(commands.Cog):
                 base_points += max(1, base_points // 20)
         return max(0, base_points)
 
-    def _finalize_session(self, session: dict, end_time: datetime):
-        seconds = max(0, int((end_time - session["start_time"]).total_seconds()))
-        if seconds <= 0:
-            return 0, 0, False
-        points = self.calculate_points(seconds, session.get("peak_users") or 1)
+    async def _is_first_voice_session(self, user_id: int) -> bool:
+        if self.session_buffer.has_pending(user_id):
+            return False
         try:
-            was_first_session = not bool(
-                central_db.query_one(
-                    "SELECT total_seconds FROM voice_stats WHERE user_id=? LIMIT 1",
-                    (session["user_id"],),
-                )
+            row = await central_db.query_one_async(
+                "SELECT total_seconds FROM voice_stats WHERE user_id=? LIMIT 1",
+                (user_id,),
             )
         except Exception as e:
             logger.debug(
-                f"DB read failed on voice_stats presence for {session.get('user_id')}: {e}",
+                f"DB read failed on voice_stats presence for {user_id}: {e}",
                 exc_info=True,
             )
-            was_first_session = False
-        try:
-            central_db.execute(
-                """
-                INSERT INTO voice_stats(user_id, total_seconds, total_points, last_update)
-                VALUES(?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(user_id) DO UPDATE SET
-                  total_seconds = total_seconds + excluded.total_seconds,
-                  total_points  = total_points  + excluded.total_points,
-                  last_update   = CURRENT_TIMESTAMP
-                """,
-                (session["user_id"], seconds, points),
-            )
-        except Exception as e:
-            logger.error(f"DB write failed on session finalize: {e}")
+            return False
+        return not bool(row)
+
+    @staticmethod
+    def _user_counts_json(stats: UserCountStats | None) -> str:
+        return (stats or UserCountStats()).to_json()
+
+    async def _finalize_session(self, session: dict, end_time: datetime):
+        """Berechnet Dauer/Punkte und übergibt die Session an den Write-Behind-Puffer."""
+        seconds = max(0, int((end_time - session["start_time"]).total_seconds()))
+        if seconds <= 0:
+            return 0, 0, False
+        points = self.calculate_points(seconds, session.get("peak_users") or 1)
+        was_first_session = await self._is_first_voice_session(session["user_id"])
 
         # Historische Session protokollieren (f\u00fcr Verlauf im Dashboard)
         try:
@@ -626,42 +695,29 @@ class VoiceActivityTrackerCog(commands.Cog):
                 started_iso = started_at.strftime("%Y-%m-%d %H:%M:%S")
             else:
                 started_iso = None
-            ended_iso = end_time.strftime("%Y-%m-%d %H:%M:%S")
-            user_counts_json = json.dumps(session.get("user_counts") or [])
-            # Co-Spieler IDs: Set zu Liste für JSON
-            co_player_ids_set = session.get("co_player_ids") or set()
-            co_player_ids_json = json.dumps(list(co_player_ids_set))
             display_name = session.get("display_name")
             if not display_name:
                 user_obj = self.bot.get_user(session.get("user_id"))
                 display_name = getattr(user_obj, "display_name", None) if user_obj else None
-            display_name = display_name or f"User {session.get('user_id')}"
-            central_db.execute(
-                """
-                INSERT INTO voice_session_log(
-                  user_id, display_name, guild_id, channel_id, channel_name,
-                  started_at, ended_at, duration_seconds, points, peak_users, user_counts_json,
-                  co_player_ids
-                )
-                VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
-                """,
-                (
-                    session.get("user_id"),
-                    display_name,
-                    session.get("guild_id"),
-                    session.get("channel_id"),
-                    session.get("channel_name"),
-                    started_iso,
-                    ended_iso,
-                    seconds,
-                    points,
-                    session.get("peak_users"),
-                    user_counts_json,
-                    co_player_ids_json,
-                ),
+            self.session_buffer.add(
+                {
+                    "user_id": session.get("user_id"),
+                    "display_name": display_name or f"User {session.get('user_id')}",
+                    "guild_id": session.get("guild_id"),
+                    "channel_id": session.get("channel_id"),
+                    "channel_name": session.get("channel_name"),
+                    "started_at": started_iso,
+                    "ended_at": end_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "seconds": seconds,
+                    "points": points,
+                    "peak_users": session.get("peak_users"),
+                    "user_counts_json": self._user_counts_json(session.get("user_counts")),
+                    # Co-Spieler IDs: Set zu Liste für JSON
+                    "co_player_ids_json": json.dumps(list(session.get("co_player_ids") or set())),
+                }
             )
         except Exception as e:
-            logger.error(f"Failed to log voice session history: {e}")
+            logger.error(f"Failed to buffer voice session: {e}")
         return seconds, points, was_first_session
 
     async def _resolve_co_player_names(
@@ -1132,7 +1188,7 @@ class VoiceActivityTrackerCog(commands.Cog):
                 "last_update": datetime.utcnow(),
                 "total_time": 0,  # Sekunden seit Start
                 "peak_users": 1,
-                "user_counts": [],
+                "user_counts": UserCountStats(),
                 "co_player_ids": set(),  # Set von User-IDs die zusammen gespielt haben
             }
             self.session_stats["total_sessions_created"] += 1
@@ -1147,44 +1203,35 @@ class VoiceActivityTrackerCog(commands.Cog):
 
         # finalisieren & persistieren
         end_time = datetime.utcnow()
-        seconds, points, was_first_session = self._finalize_session(session, end_time)
+        seconds, points, was_first_session = await self._finalize_session(session, end_time)
         await self.end_grace_period(member.id, guild_id, "voice_leave")
         if VOICE_FEEDBACK_ENABLED and was_first_session and seconds >= VOICE_FEEDBACK_MIN_SECONDS:
             asyncio.create_task(self._send_voice_feedback(dict(session), seconds, "first"))
         asyncio.create_task(self._maybe_send_second_feedback(dict(session), seconds))
 
     # ===== Discord Events =====
-    @commands.Cog.listener()
-    async def on_voice_state_update(
-        self,
-        member: discord.Member,
-        before: discord.VoiceState,
-        after: discord.VoiceState,
-    ):
+    async def _on_voice_event(self, event: voice_events.VoiceStateEvent) -> None:
+        member = event.member
         try:
-            if member.bot:
-                return
-            if privacy.is_opted_out(member.id):
+            # Opt-out-Events kommen an, damit Laufzeit-State verworfen wird
+            if event.opted_out:
                 self._drop_runtime_state(member.id)
                 return
 
             # Logik für Grace-Start/-Ende bei (Un)Mute
-            if before.channel and after.channel and before.channel == after.channel:
-                was_muted = before.mute or before.self_mute or before.deaf or before.self_deaf
-                is_muted = after.mute or after.self_mute or after.deaf or after.self_deaf
-                if not was_muted and is_muted and await self.has_grace_period_role(member):
-                    await self.start_grace_period(member)
-                elif was_muted and not is_muted:
-                    await self.end_grace_period(member.id, member.guild.id, "unmuted")
+            if event.kind == voice_events.MUTE and await self.has_grace_period_role(member):
+                await self.start_grace_period(member)
+            elif event.kind == voice_events.UNMUTE:
+                await self.end_grace_period(member.id, member.guild.id, "unmuted")
 
             # Channel-Wechsel
-            if before.channel != after.channel:
-                if before.channel:
-                    await self.handle_voice_leave(member, before.channel)
-                if after.channel:
-                    await self.handle_voice_join(member, after.channel)
-            elif after.channel:
-                await self.update_channel_sessions(after.channel)
+            if event.channel_changed:
+                if event.before_channel:
+                    await self.handle_voice_leave(member, event.before_channel)
+                if event.after_channel:
+                    await self.handle_voice_join(member, event.after_channel)
+            elif event.after_channel:
+                await self.update_channel_sessions(event.after_channel)
 
         except Exception as e:
             logger.error(f"Error in voice state update: {e}")
@@ -1216,7 +1263,7 @@ class VoiceActivityTrackerCog(commands.Cog):
             k = f"{member.id}:{channel.guild.id}"
             if k in self.voice_sessions:
                 s = self.voice_sessions[k]
-                s["user_counts"].append(user_count)
+                s["user_counts"].add(user_count)
                 s["peak_users"] = max(s["peak_users"], user_count)
 
                 # Track Co-Spieler (alle anderen aktiven User im Channel)
@@ -1240,17 +1287,10 @@ class VoiceActivityTrackerCog(commands.Cog):
             if k in self.voice_sessions and member not in active_users:
                 await self.end_voice_session(member, channel.guild.id)
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        if message.author.bot or not VOICE_FEEDBACK_ENABLED:
-            return
-        if not isinstance(message.channel, discord.DMChannel):
-            return
-        if privacy.is_opted_out(message.author.id):
-            return
-        content = (message.content or "").strip()
-        if not content:
-            return
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        # Nur DMs mit Text, ohne Bots/Opt-out (Filter der Message-Pipeline)
+        message = event.message
+        content = event.text.strip()
         try:
             row = central_db.query_one(
                 """
@@ -1368,7 +1408,7 @@ class VoiceActivityTrackerCog(commands.Cog):
             if not s:
                 continue
             end_time = s["last_update"]
-            seconds, points, was_first_session = self._finalize_session(s, end_time)
+            seconds, points, was_first_session = await self._finalize_session(s, end_time)
             session_copy = dict(s)
             user = self.bot.get_user(s["user_id"])
             if seconds > 0:
@@ -1659,6 +1699,26 @@ class VoiceActivityTrackerCog(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Fehler beim Abrufen des Status: {e}")
 
+    @commands.command(name="voice_rollup_backfill")
+    @commands.has_permissions(administrator=True)
+    async def voice_rollup_backfill_command(self, ctx, days: int | None = None):
+        """Baut voice_rollup_hourly aus voice_session_log neu auf (optional nur N Tage)."""
+        if days is not None and days <= 0:
+            await ctx.send("❌ Tage müssen positiv sein (leer = kompletter Neuaufbau)")
+            return
+        started = time.perf_counter()
+        try:
+            written = await asyncio.to_thread(central_db.rebuild_voice_rollup, days)
+        except Exception as e:
+            logger.error(f"Voice rollup backfill failed: {e}", exc_info=True)
+            await ctx.send(f"❌ Backfill fehlgeschlagen: {e}")
+            return
+        scope = f"letzte {days} Tage" if days else "komplett"
+        await ctx.send(
+            f"✅ voice_rollup_hourly neu aufgebaut ({scope}): {written} Zeilen "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
     @commands.command(name="voice_config")
     @commands.has_permissions(administrator=True)
     async def voice_config_command(self, ctx, setting=None, value=None):
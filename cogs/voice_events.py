@@ -0,0 +1,333 @@
+"""
+Zentrale Voice-State-Pipeline für alle Voice-Listener.
+
+``PresenceMixin.on_voice_state_update`` normalisiert jedes Discord-Event genau
+einmal zu einem ``VoiceStateEvent`` und verteilt es parallel an die
+abonnierten Handler. Bot-/Opt-out-Filter, "nur Kanalwechsel" und
+Kategorie-Regeln sind Abo-Optionen statt Kopien in jedem Cog. Teure
+Anreicherungen (TempVoice-Lane-Flag, DB-Lookups) werden lazy über
+``event.shared`` / ``event.shared_async`` berechnet und zwischen Handlern
+geteilt. Pro Handler werden Aufrufe, Laufzeit und Fehler gezählt.
+
+Nutzung im Cog::
+
+    async def cog_load(self):
+        voice_events.get_dispatcher(self.bot).subscribe(
+            "MeinCog", self._on_voice_event, include_bots=False, channel_change_only=True
+        )
+
+    async def cog_unload(self):
+        voice_events.get_dispatcher(self.bot).unsubscribe("MeinCog")
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable, Collection
+from dataclasses import dataclass, field
+from typing import Any
+
+import discord
+
+from cogs import privacy_core as privacy
+
+log = logging.getLogger(__name__)
+
+SLOW_HANDLER_MS = float(os.getenv("VOICE_EVENT_SLOW_HANDLER_MS", "500"))
+
+JOIN = "join"
+LEAVE = "leave"
+MOVE = "move"
+MUTE = "mute"
+UNMUTE = "unmute"
+UPDATE = "update"
+
+_MISSING = object()
+
+
+def _is_muted(state: Any) -> bool:
+    if state is None:
+        return False
+    return bool(
+        getattr(state, "mute", False)
+        or getattr(state, "self_mute", False)
+        or getattr(state, "deaf", False)
+        or getattr(state, "self_deaf", False)
+    )
+
+
+@dataclass(slots=True)
+class VoiceStateEvent:
+    member: Any
+    before: Any
+    after: Any
+    member_id: int
+    guild_id: int
+    is_bot: bool
+    opted_out: bool
+    before_channel: Any
+    after_channel: Any
+    was_muted: bool
+    is_muted: bool
+    received_at: float = field(default_factory=time.monotonic)
+    managed_lane_check: Callable[[Any], bool] | None = None
+    _shared: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def before_id(self) -> int | None:
+        return getattr(self.before_channel, "id", None)
+
+    @property
+    def after_id(self) -> int | None:
+        return getattr(self.after_channel, "id", None)
+
+    @property
+    def channel_changed(self) -> bool:
+        return self.before_id != self.after_id
+
+    @property
+    def joined(self) -> bool:
+        """Neu in Voice (vorher in keinem Kanal)."""
+        return self.before_channel is None and self.after_channel is not None
+
+    @property
+    def left(self) -> bool:
+        """Voice komplett verlassen."""
+        return self.before_channel is not None and self.after_channel is None
+
+    @property
+    def moved(self) -> bool:
+        return (
+            self.before_channel is not None
+            and self.after_channel is not None
+            and self.before_id != self.after_id
+        )
+
+    @property
+    def mute_changed(self) -> bool:
+        return (
+            not self.channel_changed
+            and self.after_channel is not None
+            and self.was_muted != self.is_muted
+        )
+
+    @property
+    def kind(self) -> str:
+        if self.joined:
+            return JOIN
+        if self.left:
+            return LEAVE
+        if self.moved:
+            return MOVE
+        if self.mute_changed:
+            return MUTE if self.is_muted else UNMUTE
+        return UPDATE
+
+    @property
+    def before_voice(self) -> discord.VoiceChannel | None:
+        """``before_channel``, aber nur echte VoiceChannels (keine Stages)."""
+        ch = self.before_channel
+        return ch if isinstance(ch, discord.VoiceChannel) else None
+
+    @property
+    def after_voice(self) -> discord.VoiceChannel | None:
+        ch = self.after_channel
+        return ch if isinstance(ch, discord.VoiceChannel) else None
+
+    @property
+    def category_ids(self) -> set[int]:
+        ids = set()
+        for ch in (self.before_channel, self.after_channel):
+            category_id = getattr(ch, "category_id", None)
+            if category_id is not None:
+                ids.add(int(category_id))
+        return ids
+
+    @property
+    def managed_before(self) -> bool:
+        """Vorheriger Kanal ist eine von TempVoice verwaltete Lane (lazy, geteilt)."""
+        return self.shared("managed_before", lambda: self._is_managed(self.before_voice))
+
+    @property
+    def managed_after(self) -> bool:
+        return self.shared("managed_after", lambda: self._is_managed(self.after_voice))
+
+    def _is_managed(self, channel: Any) -> bool:
+        if channel is None or self.managed_lane_check is None:
+            return False
+        try:
+            return bool(self.managed_lane_check(channel))
+        except Exception:
+            log.debug("managed lane check failed for %s", channel, exc_info=True)
+            return False
+
+    def shared(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Berechnet ``factory()`` einmal pro Event; weitere Handler bekommen den Cache."""
+        value = self._shared.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self._shared[key] = value
+        return value
+
+    async def shared_async(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Wie ``shared``, parallel laufende Handler warten auf dieselbe Berechnung."""
+        task = self._shared.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._shared[key] = task
+        return await asyncio.shield(task)
+
+
+@dataclass(slots=True)
+class _Subscription:
+    name: str
+    handler: Callable[[VoiceStateEvent], Awaitable[Any]]
+    include_bots: bool = True
+    include_opted_out: bool = True
+    channel_change_only: bool = False
+    category_ids: Collection[int] | None = None
+    calls: int = 0
+    skipped: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def accepts(self, event: VoiceStateEvent) -> bool:
+        if event.is_bot and not self.include_bots:
+            return False
+        if event.opted_out and not self.include_opted_out:
+            return False
+        if self.channel_change_only and not event.channel_changed:
+            return False
+        if self.category_ids is not None and not any(
+            cid in self.category_ids for cid in event.category_ids
+        ):
+            return False
+        return True
+
+
+class VoiceEventDispatcher:
+    """Verteilt normalisierte Voice-Events an abonnierte Handler."""
+
+    def __init__(self, bot: Any) -> None:
+        self.bot = bot
+        self._subscriptions: dict[str, _Subscription] = {}
+        self.events = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    def subscribe(
+        self,
+        name: str,
+        handler: Callable[[VoiceStateEvent], Awaitable[Any]],
+        *,
+        include_bots: bool = True,
+        include_opted_out: bool = True,
+        channel_change_only: bool = False,
+        category_ids: Collection[int] | None = None,
+    ) -> None:
+        """Registriert (oder ersetzt beim Cog-Reload) den Handler unter ``name``."""
+        self._subscriptions[name] = _Subscription(
+            name=name,
+            handler=handler,
+            include_bots=include_bots,
+            include_opted_out=include_opted_out,
+            channel_change_only=channel_change_only,
+            category_ids=category_ids,
+        )
+
+    def unsubscribe(self, name: str) -> None:
+        self._subscriptions.pop(name, None)
+
+    def _managed_lane_check(self, channel: Any) -> bool:
+        get_cog = getattr(self.bot, "get_cog", None)
+        core = get_cog("TempVoiceCore") if callable(get_cog) else None
+        check = getattr(core, "is_managed_lane", None)
+        return bool(check(channel)) if callable(check) else False
+
+    def build_event(self, member: Any, before: Any, after: Any) -> VoiceStateEvent:
+        member_id = int(getattr(member, "id", 0) or 0)
+        is_bot = bool(getattr(member, "bot", False))
+        guild = getattr(member, "guild", None)
+        return VoiceStateEvent(
+            member=member,
+            before=before,
+            after=after,
+            member_id=member_id,
+            guild_id=int(getattr(guild, "id", 0) or 0),
+            is_bot=is_bot,
+            opted_out=(not is_bot) and privacy.is_opted_out(member_id),
+            before_channel=getattr(before, "channel", None),
+            after_channel=getattr(after, "channel", None),
+            was_muted=_is_muted(before),
+            is_muted=_is_muted(after),
+            managed_lane_check=self._managed_lane_check,
+        )
+
+    async def _run(self, sub: _Subscription, event: VoiceStateEvent) -> None:
+        started = time.perf_counter()
+        try:
+            await sub.handler(event)
+        except Exception as exc:
+            sub.errors += 1
+            log.error("Voice handler error in %s: %s", sub.name, exc, exc_info=exc)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            sub.calls += 1
+            sub.total_ms += elapsed_ms
+            sub.max_ms = max(sub.max_ms, elapsed_ms)
+            if elapsed_ms >= SLOW_HANDLER_MS:
+                log.warning(
+                    "Langsamer Voice-Handler %s: %.0f ms (%s, member=%s)",
+                    sub.name,
+                    elapsed_ms,
+                    event.kind,
+                    event.member_id,
+                )
+
+    async def dispatch_event(self, event: VoiceStateEvent) -> None:
+        self.events += 1
+        runs = []
+        for sub in list(self._subscriptions.values()):
+            if sub.accepts(event):
+                runs.append(self._run(sub, event))
+            else:
+                sub.skipped += 1
+        if runs:
+            await asyncio.gather(*runs)
+
+    async def dispatch(self, member: Any, before: Any, after: Any) -> VoiceStateEvent | None:
+        if not self._subscriptions:
+            return None
+        event = self.build_event(member, before, after)
+        await self.dispatch_event(event)
+        return event
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "events": self.events,
+            "handlers": {
+                sub.name: {
+                    "calls": sub.calls,
+                    "skipped": sub.skipped,
+                    "errors": sub.errors,
+                    "avg_ms": round(sub.total_ms / sub.calls, 3) if sub.calls else 0.0,
+                    "max_ms": round(sub.max_ms, 3),
+                }
+                for sub in self._subscriptions.values()
+            },
+        }
+
+
+def get_dispatcher(bot: Any) -> VoiceEventDispatcher:
+    """Dispatcher des Bots (wird beim ersten Zugriff angelegt)."""
+    dispatcher = getattr(bot, "voice_events", None)
+    if not isinstance(dispatcher, VoiceEventDispatcher):
+        dispatcher = VoiceEventDispatcher(bot)
+        bot.voice_events = dispatcher
+    return dispatcher
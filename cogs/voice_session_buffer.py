@@ -0,0 +1,332 @@
+"""
+Write-behind-Puffer für finalisierte Voice-Sessions.
+
+Sessions landen zuerst im Speicher und in einem JSONL-Journal und werden dann
+gesammelt in EINER Transaktion geschrieben (voice_stats + voice_session_log):
+alle FLUSH_SECONDS oder sobald FLUSH_BATCH Einträge anstehen, sowie beim Entladen.
+Jeder Eintrag trägt eine fortlaufende Sequenznummer; die höchste geschriebene
+Nummer wird in derselben Transaktion in kv_store abgelegt. Nach einem Absturz
+spielt ``replay()`` nur noch nicht committete Journal-Einträge ein.
+
+Scheitert der Batch MAX_FLUSH_ATTEMPTS Mal in Folge, wird jeder Eintrag in einem
+eigenen Savepoint geschrieben: fehlerhafte Einträge werden geloggt und in
+``<journal>.rejected.jsonl`` beiseitegelegt, der Rest wird committet.
+
+Datenschutz: ``discard_user()`` entfernt die Einträge eines Users aus Puffer und
+Journal (Opt-out/Löschung); Einträge von Opt-out-Usern werden zusätzlich beim
+Flush und Replay verworfen.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from cogs import privacy_core as privacy
+from service import db as central_db
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = float(os.getenv("VOICE_SESSION_FLUSH_SECONDS", "5"))
+FLUSH_BATCH = int(os.getenv("VOICE_SESSION_FLUSH_BATCH", "50"))
+MAX_FLUSH_ATTEMPTS = int(os.getenv("VOICE_SESSION_MAX_FLUSH_ATTEMPTS", "3"))
+KV_NS = "voice_session_buffer"
+KV_FLUSHED_SEQ = "flushed_seq"
+
+_STATS_UPSERT_SQL = """
+    INSERT INTO voice_stats(user_id, total_seconds, total_points, last_update)
+    VALUES(?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(user_id) DO UPDATE SET
+      total_seconds = total_seconds + excluded.total_seconds,
+      total_points  = total_points  + excluded.total_points,
+      last_update   = CURRENT_TIMESTAMP
+"""
+
+_LOG_INSERT_SQL = """
+    INSERT INTO voice_session_log(
+      user_id, display_name, guild_id, channel_id, channel_name,
+      started_at, ended_at, duration_seconds, points, peak_users, user_counts_json,
+      co_player_ids
+    )
+    VALUES(?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+_LOG_FIELDS = (
+    "user_id",
+    "display_name",
+    "guild_id",
+    "channel_id",
+    "channel_name",
+    "started_at",
+    "ended_at",
+    "seconds",
+    "points",
+    "peak_users",
+    "user_counts_json",
+    "co_player_ids_json",
+)
+
+
+def default_journal_path() -> Path:
+    override = os.getenv("VOICE_SESSION_JOURNAL_PATH")
+    if override:
+        return Path(override)
+    return Path(central_db.db_path()).with_name("voice_session_journal.jsonl")
+
+
+class VoiceSessionWriteBuffer:
+    def __init__(
+        self,
+        journal_path: Path | None = None,
+        *,
+        flush_seconds: float = FLUSH_SECONDS,
+        flush_batch: int = FLUSH_BATCH,
+        max_flush_attempts: int = MAX_FLUSH_ATTEMPTS,
+    ) -> None:
+        self.journal_path = journal_path or default_journal_path()
+        self.rejected_path = self.journal_path.with_suffix(".rejected.jsonl")
+        self.flush_seconds = max(0.1, float(flush_seconds))
+        self.flush_batch = max(1, int(flush_batch))
+        self.max_flush_attempts = max(1, int(max_flush_attempts))
+        self._failed_flushes = 0
+        self._pending: list[dict[str, Any]] = []
+        self._seq = 0
+        self._seq_loaded = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self.stats: dict[str, Any] = {
+            "flushes": 0,
+            "sessions_written": 0,
+            "last_batch": 0,
+            "last_flush_ms": 0.0,
+            "replayed": 0,
+            "set_aside": 0,
+            "discarded": 0,
+        }
+
+    # ----- Lebenszyklus -----
+
+    async def start(self) -> None:
+        await self.replay()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="voice-session-write-behind")
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                # Einträge bleiben in Puffer + Journal, nächster Versuch im nächsten Takt.
+                logger.error("Voice session flush failed: %s", exc, exc_info=True)
+
+    # ----- Puffer -----
+
+    def _flushed_seq(self) -> int:
+        raw = central_db.get_kv(KV_NS, KV_FLUSHED_SEQ)
+        return int(raw) if raw else 0
+
+    def add(self, record: dict[str, Any]) -> None:
+        if not self._seq_loaded:
+            self._seq = max(self._seq, self._flushed_seq())
+            self._seq_loaded = True
+        self._seq += 1
+        entry = dict(record, seq=self._seq)
+        self._append_journal([entry])
+        self._pending.append(entry)
+        if len(self._pending) >= self.flush_batch:
+            self._wakeup.set()
+
+    def has_pending(self, user_id: int) -> bool:
+        return any(entry["user_id"] == user_id for entry in self._pending)
+
+    def discard_user(self, user_id: int) -> int:
+        """Verwirft alle noch nicht geschriebenen Sessions des Users (Puffer + Journal)."""
+        uid = int(user_id)
+        before = len(self._pending)
+        self._pending[:] = [e for e in self._pending if int(e["user_id"]) != uid]
+        removed = before - len(self._pending)
+        journal = self._read_journal()
+        kept = [e for e in journal if int(e.get("user_id") or 0) != uid]
+        if len(kept) != len(journal):
+            self._rewrite_journal(kept)
+        self.stats["discarded"] += removed
+        return removed
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            batch = list(self._pending)
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            # Backstop: Opt-out während die Session im Puffer lag
+            entries = [e for e in batch if not privacy.is_opted_out(e["user_id"])]
+            skipped = len(batch) - len(entries)
+            isolate = self._failed_flushes >= self.max_flush_attempts
+            rejected: list[dict[str, Any]] = []
+
+            try:
+                async with central_db.transaction() as conn:
+                    if isolate:
+                        rejected = self._write_isolated(conn, entries)
+                        # vor dem COMMIT sichern: nach einem Absturz liegt der Eintrag
+                        # höchstens doppelt in der Ablage, geht aber nicht verloren
+                        self._set_aside(rejected)
+                    else:
+                        self._write_entries(conn, entries)
+                    conn.execute(
+                        """
+                        INSERT INTO kv_store(ns, k, v) VALUES(?, ?, ?)
+                        ON CONFLICT(ns, k) DO UPDATE SET v = excluded.v
+                        """,
+                        (KV_NS, KV_FLUSHED_SEQ, str(batch[-1]["seq"])),
+                    )
+            except Exception:
+                self._failed_flushes += 1
+                raise
+            self._failed_flushes = 0
+
+            # per seq entfernen: discard_user() kann den Puffer währenddessen verkleinern
+            done = {entry["seq"] for entry in batch}
+            self._pending[:] = [e for e in self._pending if e["seq"] not in done]
+            self._rewrite_journal(self._pending)
+            flushed = len(entries) - len(rejected)
+            self.stats["flushes"] += 1
+            self.stats["sessions_written"] += flushed
+            self.stats["set_aside"] += len(rejected)
+            self.stats["discarded"] += skipped
+            self.stats["last_batch"] = flushed
+            self.stats["last_flush_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            return flushed
+
+    @staticmethod
+    def _write_entries(conn: Any, entries: list[dict[str, Any]]) -> None:
+        totals: dict[int, list[int]] = {}
+        for entry in entries:
+            agg = totals.setdefault(int(entry["user_id"]), [0, 0])
+            agg[0] += int(entry["seconds"])
+            agg[1] += int(entry["points"])
+        conn.executemany(
+            _STATS_UPSERT_SQL,
+            [(uid, secs, pts) for uid, (secs, pts) in totals.items()],
+        )
+        conn.executemany(
+            _LOG_INSERT_SQL,
+            [tuple(entry.get(field) for field in _LOG_FIELDS) for entry in entries],
+        )
+
+    def _write_isolated(self, conn: Any, batch: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Schreibt jeden Eintrag in einem eigenen Savepoint; liefert die fehlerhaften."""
+        rejected: list[dict[str, Any]] = []
+        for entry in batch:
+            conn.execute("SAVEPOINT voice_session_entry")
+            try:
+                self._write_entries(conn, [entry])
+            except Exception as exc:
+                conn.execute("ROLLBACK TO voice_session_entry")
+                logger.error(
+                    "Voice session seq=%s set aside after %s failed flushes: %s | %r",
+                    entry.get("seq"),
+                    self._failed_flushes,
+                    exc,
+                    entry,
+                )
+                rejected.append(entry)
+            conn.execute("RELEASE voice_session_entry")
+        return rejected
+
+    # ----- Journal -----
+
+    def _append_journal(self, entries: list[dict[str, Any]]) -> None:
+        try:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.journal_path.open("a", encoding="utf-8") as fh:
+                for entry in entries:
+                    fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                fh.flush()
+        except OSError as exc:
+            logger.warning("Voice session journal write failed: %s", exc)
+
+    def _set_aside(self, entries: list[dict[str, Any]]) -> None:
+        if not entries:
+            return
+        try:
+            with self.rejected_path.open("a", encoding="utf-8") as fh:
+                for entry in entries:
+                    fh.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        except OSError as exc:
+            logger.warning("Voice session rejected-journal write failed: %s", exc)
+
+    def _rewrite_journal(self, entries: list[dict[str, Any]]) -> None:
+        try:
+            if not entries:
+                self.journal_path.unlink(missing_ok=True)
+                return
+            tmp = self.journal_path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as fh:
+                for entry in entries:
+                    fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp, self.journal_path)
+        except OSError as exc:
+            logger.warning("Voice session journal rewrite failed: %s", exc)
+
+    def _read_journal(self) -> list[dict[str, Any]]:
+        entries: list[dict[str, Any]] = []
+        try:
+            with self.journal_path.open(encoding="utf-8") as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Abgeschnittene letzte Zeile nach hartem Abbruch
+                        logger.warning("Skipping corrupt voice session journal line")
+        except FileNotFoundError:
+            pass
+        return entries
+
+    async def replay(self) -> int:
+        """Übernimmt nicht committete Journal-Einträge (seq > flushed_seq) und schreibt sie."""
+        flushed_seq = self._flushed_seq()
+        entries = self._read_journal()
+        self._seq = max([flushed_seq, self._seq] + [int(e.get("seq") or 0) for e in entries])
+        self._seq_loaded = True
+        known = {entry["seq"] for entry in self._pending}
+        recovered = [
+            entry
+            for entry in entries
+            if int(entry.get("seq") or 0) > flushed_seq and entry.get("seq") not in known
+        ]
+        if not recovered:
+            if entries and not self._pending:
+                self._rewrite_journal([])
+            return 0
+        self._pending[:0] = recovered
+        self.stats["replayed"] += len(recovered)
+        logger.warning("Replaying %s voice sessions from journal", len(recovered))
+        await self.flush()
+        return len(recovered)
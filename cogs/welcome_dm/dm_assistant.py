@@ -15,6 +15,8 @@ import time
 import discord
 from discord.ext import commands
 
+from cogs import message_events
+
 log = logging.getLogger(__name__)
 
 # ---------- Cooldown-Konfiguration ----------
@@ -161,23 +163,27 @@ class BotDMAssistant(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+    async def cog_load(self) -> None:
+        # Nur DMs, keine Bots; leere Nachrichten / nur Attachments überspringen
+        message_events.get_dispatcher(self.bot).subscribe(
+            self.qualified_name,
+            self._on_message_event,
+            scope=message_events.SCOPE_DM,
+            intent=lambda event: bool(event.text.strip()),
+        )
+
+    async def cog_unload(self) -> None:
+        message_events.get_dispatcher(self.bot).unsubscribe(self.qualified_name)
+
     def _ai(self):
         return self.bot.get_cog("AIConnector")
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        # Nur DMs, keine Bots, nicht vom Bot selbst
-        if message.author.bot:
-            return
-        if not isinstance(message.channel, discord.DMChannel):
-            return
+    async def _on_message_event(self, event: message_events.MessageEvent) -> None:
+        message = event.message
+        # Nicht vom Bot selbst
         if message.author.id == self.bot.user.id:
             return
 
-        # Leere Nachrichten / nur Attachments überspringen
-        if not message.content.strip():
-            return
-
         # Rate-Limit prüfen
         cooldown_msg = _check_cooldown(message.author.id)
         if cooldown_msg:
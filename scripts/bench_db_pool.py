@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Reader-Pool vs. Single-Connection in service/db.py.
+
+Simuliert Dashboard-Aggregationen über voice_session_log (Leser-Threads)
+parallel zu Voice-Session-Inserts (Writer-Thread) und vergleicht Durchsatz
+und Schreib-Latenz für DEADLOCK_DB_READ_POOL_SIZE=0 gegen den Pool.
+
+    python scripts/bench_db_pool.py --rows 200000 --readers 4 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from service import db  # noqa: E402
+
+AGGREGATION_SQL = """
+    SELECT user_id, COUNT(*) AS sessions, SUM(duration_seconds) AS total
+    FROM voice_session_log
+    WHERE started_at >= datetime('now', '-90 days')
+    GROUP BY user_id
+    ORDER BY total DESC
+    LIMIT 50
+"""
+
+INSERT_SQL = """
+    INSERT INTO voice_session_log(
+      user_id, guild_id, channel_id, started_at, ended_at, duration_seconds, points
+    ) VALUES (?, 1, 2, datetime('now', '-1 hour'), datetime('now'), 3600, 10)
+"""
+
+
+def _seed(rows: int) -> None:
+    batch = [
+        (
+            i % 2000,
+            f"-{i % (90 * 24)} hours",
+            f"-{i % (90 * 24)} hours",
+        )
+        for i in range(rows)
+    ]
+    db.executemany(
+        """
+        INSERT INTO voice_session_log(
+          user_id, guild_id, channel_id, started_at, ended_at, duration_seconds, points
+        ) VALUES (?, 1, 2, datetime('now', ?), datetime('now', ?), 1800, 5)
+        """,
+        batch,
+    )
+
+
+def _run(pool_size: int, readers: int, seconds: float) -> dict[str, float]:
+    db.close_connection()
+    db.DB_READ_POOL_SIZE = pool_size
+    db.connect()
+
+    stop = threading.Event()
+    reads = [0] * readers
+    write_latencies: list[float] = []
+
+    def _reader(idx: int) -> None:
+        while not stop.is_set():
+            db.query_all(AGGREGATION_SQL)
+            reads[idx] += 1
+
+    def _writer() -> None:
+        uid = 0
+        while not stop.is_set():
+            started = time.perf_counter()
+            db.execute(INSERT_SQL, (uid,))
+            write_latencies.append(time.perf_counter() - started)
+            uid += 1
+
+    threads = [threading.Thread(target=_reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=_writer))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    lat_ms = sorted(x * 1000 for x in write_latencies) or [0.0]
+    stats = db.pool_stats()
+    return {
+        "reads_per_s": sum(reads) / seconds,
+        "writes_per_s": len(write_latencies) / seconds,
+        "write_p50_ms": statistics.median(lat_ms),
+        "write_p95_ms": lat_ms[int(len(lat_ms) * 0.95) - 1] if len(lat_ms) > 1 else lat_ms[0],
+        "write_max_ms": lat_ms[-1],
+        "pool_wait_avg_ms": float(stats.get("wait_avg_ms", 0.0)),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--pool-size", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[db.ENV_DB_PATH] = str(Path(tmp) / "bench.sqlite3")
+        db.connect()
+        _seed(args.rows)
+
+        results = {
+            "single-connection": _run(0, args.readers, args.seconds),
+            f"reader-pool({args.pool_size})": _run(args.pool_size, args.readers, args.seconds),
+        }
+        db.close_connection()
+
+    keys = list(next(iter(results.values())).keys())
+    print(f"{'mode':<20}" + "".join(f"{k:>18}" for k in keys))
+    for mode, row in results.items():
+        print(f"{mode:<20}" + "".join(f"{row[k]:>18.2f}" for k in keys))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
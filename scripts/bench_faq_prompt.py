@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: FAQ-Prompt mit komplettem Doku-Korpus gegen den BM25-Docs-Index.
+
+Vergleicht pro Frage Prompt-Größe (Zeichen, grob ~4 Zeichen/Token) und die
+daraus modellierte Antwortlatenz (``--base-ms`` + ``--prefill-ms-per-1k`` je
+1000 Input-Tokens). Die Retrieval-Zeit wird echt gemessen; der Provider wird
+nicht aufgerufen, daher ist die Latenz ein Modell und offline reproduzierbar.
+
+    python scripts/bench_faq_prompt.py --docs docs --prefill-ms-per-1k 150
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from service import faq_docs_index  # noqa: E402
+
+DEFAULT_QUESTIONS = [
+    "Wie erstelle ich einen eigenen TempVoice Kanal?",
+    "Wie verknüpfe ich meinen Steam Account?",
+    "Wo finde ich Mitspieler für heute Abend?",
+    "Wie funktioniert das Match-Coaching?",
+    "Wie kann ich anonymes Feedback abgeben?",
+    "Was macht die Patchnotes Ping Rolle?",
+    "Wie bekomme ich die Verified-Rolle?",
+    "Kann ich mein Rank-Limit im Voice-Kanal einstellen?",
+]
+CHARS_PER_TOKEN = 4.0
+
+
+def _prompt(docs_block: str, question: str) -> str:
+    return f"Dokumentation:\n{docs_block}\n\nNeue Frage:\n{question}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--docs", type=Path, default=Path(__file__).resolve().parents[1] / "docs")
+    parser.add_argument("--top-k", type=int, default=faq_docs_index.DEFAULT_TOP_K)
+    parser.add_argument("--max-chars", type=int, default=faq_docs_index.DEFAULT_MAX_CHARS)
+    parser.add_argument("--base-ms", type=float, default=800.0)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=150.0)
+    parser.add_argument("--question", action="append", dest="questions")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = faq_docs_index.DocsIndex(args.docs, top_k=args.top_k, max_chars=args.max_chars)
+    build_ms = (time.perf_counter() - started) * 1000
+    full_block = index.full_context()
+    print(f"Index: {len(index.chunks)} Abschnitte, Build {build_ms:.1f} ms")
+
+    def latency(chars: int) -> float:
+        return args.base_ms + args.prefill_ms_per_1k * chars / CHARS_PER_TOKEN / 1000
+
+    header = ("full_tok", "index_tok", "ratio", "retr_ms", "full_lat_ms", "index_lat_ms")
+    print(f"{'question':<52}" + "".join(f"{h:>13}" for h in header))
+    full_lat, index_lat, ratios = [], [], []
+    for question in args.questions or DEFAULT_QUESTIONS:
+        full_chars = len(_prompt(full_block, question))
+        t0 = time.perf_counter()
+        index_chars = len(_prompt(index.build_context(question), question))
+        retr_ms = (time.perf_counter() - t0) * 1000
+        ratio = full_chars / max(index_chars, 1)
+        full_lat.append(latency(full_chars))
+        index_lat.append(latency(index_chars))
+        ratios.append(ratio)
+        print(
+            f"{question[:50]:<52}{full_chars / CHARS_PER_TOKEN:>13.0f}"
+            f"{index_chars / CHARS_PER_TOKEN:>13.0f}{ratio:>12.1f}x{retr_ms:>13.2f}"
+            f"{full_lat[-1]:>13.0f}{index_lat[-1]:>13.0f}"
+        )
+    print(
+        f"\nMittel: Prompt {statistics.mean(ratios):.1f}x kleiner, "
+        f"modellierte Latenz {statistics.mean(full_lat):.0f} ms -> {statistics.mean(index_lat):.0f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Round-Trip-Latenz von steam_tasks (Hero-Build-Sync) mit Callback vs. DB-Poll.
+
+Ein simulierter Steam-Consumer (eigener Thread + eigene SQLite-Verbindung, wie
+die Node-Bridge) übernimmt MAINTAIN_BUILD_CATALOG-Tasks, "arbeitet" --work-ms
+und setzt DONE. Verglichen werden das alte 0.5-s-Polling und die
+Benachrichtigung über steam_task_waiters.notify() mit langsamem Fallback-Poll.
+
+    python scripts/bench_steam_task_latency.py --tasks 40 --work-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from service import db, steam_task_waiters  # noqa: E402
+
+TASK_TYPE = "MAINTAIN_BUILD_CATALOG"
+
+
+def _consumer(stop: threading.Event, poll_s: float, work_s: float, notify: bool) -> None:
+    conn = sqlite3.connect(db.db_path(), timeout=5)
+    conn.execute("PRAGMA busy_timeout = 5000")
+    try:
+        while not stop.is_set():
+            row = conn.execute(
+                "SELECT id FROM steam_tasks WHERE status = 'PENDING' AND type = ? "
+                "ORDER BY id LIMIT 1",
+                (TASK_TYPE,),
+            ).fetchone()
+            if row is None:
+                time.sleep(poll_s)
+                continue
+            task_id = int(row[0])
+            conn.execute("UPDATE steam_tasks SET status = 'RUNNING' WHERE id = ?", (task_id,))
+            conn.commit()
+            time.sleep(work_s)
+            conn.execute(
+                "UPDATE steam_tasks SET status = 'DONE', result = ? WHERE id = ?",
+                (json.dumps({"ok": True, "data": {"builds": 12}}), task_id),
+            )
+            conn.commit()
+            if notify:
+                steam_task_waiters.notify(task_id)
+    finally:
+        conn.close()
+
+
+async def _round_trips(tasks: int, fallback_interval: float) -> list[float]:
+    latencies: list[float] = []
+    for hero_id in range(tasks):
+        started = time.perf_counter()
+        async with db.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO steam_tasks(type, payload, status) VALUES(?, ?, 'PENDING')",
+                (TASK_TYPE, json.dumps({"hero_id": hero_id})),
+            )
+            task_id = int(cur.lastrowid or 0)
+        outcome = await steam_task_waiters.wait_for_task(
+            task_id, timeout=30.0, fallback_interval=fallback_interval, task_type=TASK_TYPE
+        )
+        if not outcome["ok"]:
+            raise RuntimeError(f"task {task_id} failed: {outcome}")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _run(tasks: int, poll_s: float, work_s: float, *, notify: bool, fallback: float) -> dict:
+    stop = threading.Event()
+    worker = threading.Thread(target=_consumer, args=(stop, poll_s, work_s, notify))
+    worker.start()
+    try:
+        latencies = asyncio.run(_round_trips(tasks, fallback))
+    finally:
+        stop.set()
+        worker.join()
+
+    lat_ms = sorted(x * 1000 for x in latencies)
+    return {
+        "p50_ms": statistics.median(lat_ms),
+        "p95_ms": lat_ms[int(len(lat_ms) * 0.95) - 1] if len(lat_ms) > 1 else lat_ms[0],
+        "max_ms": lat_ms[-1],
+        "overhead_ms": statistics.mean(lat_ms) - work_s * 1000,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tasks", type=int, default=40)
+    parser.add_argument("--work-ms", type=float, default=20.0)
+    parser.add_argument("--consumer-poll-ms", type=float, default=10.0)
+    parser.add_argument("--legacy-poll", type=float, default=0.5)
+    args = parser.parse_args()
+
+    poll_s = args.consumer_poll_ms / 1000
+    work_s = args.work_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ[db.ENV_DB_PATH] = str(Path(tmp) / "bench.sqlite3")
+        db.connect()
+        results = {
+            f"db-poll({args.legacy_poll}s)": _run(
+                args.tasks, poll_s, work_s, notify=False, fallback=args.legacy_poll
+            ),
+            "callback": _run(
+                args.tasks,
+                poll_s,
+                work_s,
+                notify=True,
+                fallback=steam_task_waiters.FALLBACK_POLL_SECONDS,
+            ),
+        }
+        db.close_connection()
+
+    keys = list(next(iter(results.values())).keys())
+    print(f"{'mode':<20}" + "".join(f"{k:>14}" for k in keys))
+    for mode, row in results.items():
+        print(f"{mode:<20}" + "".join(f"{row[k]:>14.2f}" for k in keys))
+    print(f"waiter stats: {steam_task_waiters.stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Team-Split-Engine gegen den bisherigen Brute-Force in _best_split.
+
+Der Brute-Force zählt alle combinations(n, team_size) auf, baut beide Teams neu
+und bewertet jeden Split per _balance_score (Team B = erste team_size Rest-Spieler).
+Die Engine wertet dieselbe Kennzahl aus laufenden Summen aus (exakt bis
+EXACT_MAX_SPLITS, darüber Karmarkar-Karp + lokale Suche).
+
+    python scripts/bench_team_split.py --sizes 8 12 16 20 24 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from cogs.customgames import team_split  # noqa: E402
+from cogs.deadlock_team_balancer import TEAM_SIZE_CAP, _balance_score  # noqa: E402
+
+
+def _brute_force(ranks: list[int], team_size: int) -> float:
+    best_score = float("inf")
+    idx = list(range(len(ranks)))
+    for comb in combinations(idx, team_size):
+        a_idx = set(comb)
+        team_a = [ranks[i] for i in a_idx]
+        rest = [ranks[i] for i in idx if i not in a_idx]
+        score = _balance_score(team_a, rest[:team_size])
+        best_score = min(best_score, score)
+    return best_score
+
+
+def _engine(ranks: list[int], team_size: int) -> float:
+    a_idx, b_idx = team_split.best_split(ranks, team_size)
+    return _balance_score([ranks[i] for i in a_idx], [ranks[i] for i in b_idx])
+
+
+def _measure(fn, ranks: list[int], team_size: int) -> tuple[float, float]:
+    started = time.perf_counter()
+    score = fn(ranks, team_size)
+    return (time.perf_counter() - started) * 1000, score
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 10, 12, 14, 16, 20, 24])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    header = ("players", "mode", "brute_ms", "engine_ms", "speedup", "brute_score", "engine_score")
+    print("".join(f"{h:>13}" for h in header))
+    for n in args.sizes:
+        team_size = min(TEAM_SIZE_CAP, n // 2)
+        mode = (
+            "exact"
+            if team_split.count_splits(n, team_size) <= team_split.EXACT_MAX_SPLITS
+            else "heuristic"
+        )
+        brute_ms, engine_ms, brute_scores, engine_scores = [], [], [], []
+        for _ in range(args.rounds):
+            ranks = sorted((rng.randint(0, 11) for _ in range(n)), reverse=True)
+            ms, score = _measure(_brute_force, ranks, team_size)
+            brute_ms.append(ms)
+            brute_scores.append(score)
+            ms, score = _measure(_engine, ranks, team_size)
+            engine_ms.append(ms)
+            engine_scores.append(score)
+        b_ms, e_ms = statistics.mean(brute_ms), statistics.mean(engine_ms)
+        row = (
+            f"{n:>13}{mode:>13}{b_ms:>13.2f}{e_ms:>13.2f}{b_ms / max(e_ms, 1e-9):>12.1f}x"
+            f"{statistics.mean(brute_scores):>13.3f}{statistics.mean(engine_scores):>13.3f}"
+        )
+        print(row)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -20,7 +20,7 @@ from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 from aiohttp import ClientSession, ClientTimeout, web
 
-from service import db
+from service import db, display_names, steam_task_waiters
 
 logger = logging.getLogger(__name__)
 
@@ -84,6 +84,8 @@ except Exception:
 
 
 _DASHBOARD_HTML_PATH = Path(__file__).resolve().parent / "static" / "dashboard.html"
+# Handler, die den Event-Loop länger am Stück belegen, werden geloggt (Gateway-Heartbeats!)
+LOOP_HOLD_WARN_SECONDS = float(os.getenv("DASHBOARD_LOOP_HOLD_WARN_MS", "50")) / 1000
 _TURNIER_HTML_PATH = Path(__file__).resolve().parent / "static" / "turnier.html"
 
 
@@ -104,6 +106,71 @@ def _load_index_html() -> str:
         raise
 
 
+class _LoopHoldTimer:
+    """
+    Awaitable-Wrapper, der jeden synchronen Schritt einer Koroutine misst –
+    also die Zeit, in der ein Handler den Event-Loop ohne await belegt.
+    """
+
+    __slots__ = ("_coro", "max_step", "steps", "total")
+
+    def __init__(self, coro: Any) -> None:
+        self._coro = coro
+        self.max_step = 0.0
+        self.steps = 0
+        self.total = 0.0
+
+    def _record(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self.steps += 1
+        self.total += elapsed
+        if elapsed > self.max_step:
+            self.max_step = elapsed
+
+    def __await__(self):
+        inner = self._coro.__await__()
+        send_value: Any = None
+        error: BaseException | None = None
+        while True:
+            started = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = inner.throw(error)
+                else:
+                    yielded = inner.send(send_value)
+            except StopIteration as stop:
+                self._record(started)
+                return stop.value
+            except BaseException:
+                self._record(started)
+                raise
+            self._record(started)
+            error = None
+            try:
+                send_value = yield yielded
+            except BaseException as exc:  # an die Koroutine weiterreichen (z. B. Cancel)
+                send_value = None
+                error = exc
+
+
+@web.middleware
+async def _loop_hold_watchdog(request: web.Request, handler: Any) -> web.StreamResponse:
+    timer = _LoopHoldTimer(handler(request))
+    try:
+        return await timer
+    finally:
+        if timer.max_step > LOOP_HOLD_WARN_SECONDS:
+            logger.warning(
+                "Dashboard handler %s %s blocked the event loop for %.0f ms "
+                "(%d steps, %.0f ms on-loop total)",
+                request.method,
+                DashboardServer._safe_log_value(request.path),
+                timer.max_step * 1000,
+                timer.steps,
+                timer.total * 1000,
+            )
+
+
 class DashboardServer:
     """Simple aiohttp based dashboard for managing the master bot."""
 
@@ -350,7 +417,7 @@ class DashboardServer:
                 )
                 return response
 
-            app = web.Application(middlewares=[_security_headers])
+            app = web.Application(middlewares=[_loop_hold_watchdog, _security_headers])
             app["dashboard"] = self
             app.add_routes(
                 [
@@ -2810,28 +2877,8 @@ class DashboardServer:
                 return cog
         return None
 
-    def _resolve_display_names(self, user_ids: Iterable[int]) -> dict[int, str]:
-        names: dict[int, str] = {}
-        for uid in {u for u in user_ids if u}:
-            display_name: str | None = None
-            for guild in self.bot.guilds:
-                try:
-                    member = guild.get_member(uid)
-                except Exception:
-                    member = None
-                if member:
-                    display_name = getattr(member, "display_name", None) or getattr(
-                        member, "name", None
-                    )
-                    break
-            if not display_name:
-                user = self.bot.get_user(uid)
-                if user:
-                    display_name = getattr(user, "display_name", None) or getattr(
-                        user, "name", None
-                    )
-            names[uid] = display_name or f"User {uid}"
-        return names
+    async def _resolve_display_names(self, user_ids: Iterable[int]) -> dict[int, str]:
+        return await display_names.resolve_async(user_ids, bot=self.bot)
 
     def _retention_excluded_roles(self) -> set[int]:
         try:
@@ -2938,33 +2985,39 @@ class DashboardServer:
             raise web.HTTPBadRequest(text="limit must be a positive integer (max 50)")
 
         try:
-            summary_row = db.query_one(
-                """
-                SELECT COUNT(*) AS user_count,
-                       SUM(total_seconds) AS total_seconds,
-                       SUM(total_points) AS total_points,
-                       MAX(last_update) AS last_update
-                FROM voice_stats
-                """
-            )
-            top_time_rows = db.query_all(
-                """
-                SELECT user_id, total_seconds, total_points, last_update
-                FROM voice_stats
-                ORDER BY total_seconds DESC, total_points DESC
-                LIMIT ?
-                """,
-                (limit,),
-            )
-            top_point_rows = db.query_all(
-                """
-                SELECT user_id, total_seconds, total_points, last_update
-                FROM voice_stats
-                ORDER BY total_points DESC, total_seconds DESC
-                LIMIT ?
-                """,
-                (limit,),
+            summary_rows, top_time_rows, top_point_rows = await db.query_batch_async(
+                [
+                    (
+                        """
+                        SELECT COUNT(*) AS user_count,
+                               SUM(total_seconds) AS total_seconds,
+                               SUM(total_points) AS total_points,
+                               MAX(last_update) AS last_update
+                        FROM voice_stats
+                        """,
+                        (),
+                    ),
+                    (
+                        """
+                        SELECT user_id, total_seconds, total_points, last_update
+                        FROM voice_stats
+                        ORDER BY total_seconds DESC, total_points DESC
+                        LIMIT ?
+                        """,
+                        (limit,),
+                    ),
+                    (
+                        """
+                        SELECT user_id, total_seconds, total_points, last_update
+                        FROM voice_stats
+                        ORDER BY total_points DESC, total_seconds DESC
+                        LIMIT ?
+                        """,
+                        (limit,),
+                    ),
+                ]
             )
+            summary_row = summary_rows[0] if summary_rows else None
         except Exception as exc:  # noqa: BLE001
             logging.exception("Failed to load voice stats: %s", exc)
             raise web.HTTPInternalServerError(text="Voice stats unavailable")
@@ -2982,7 +3035,7 @@ class DashboardServer:
             uid = sess.get("user_id")
             if uid:
                 user_ids.add(uid)
-        name_map = self._resolve_display_names(user_ids)
+        name_map = await self._resolve_display_names(user_ids)
 
         def _map_row(row: Any) -> dict[str, Any]:
             uid = row["user_id"]
@@ -3067,60 +3120,64 @@ class DashboardServer:
         user_filter = user_id
 
         try:
-            daily_rows = db.query_all(
-                """
-                SELECT date(started_at) AS day,
-                       SUM(duration_seconds) AS total_seconds,
-                       COUNT(*) AS sessions,
-                       COUNT(DISTINCT user_id) AS users
-                FROM voice_session_log
-                WHERE started_at >= datetime('now', ?)
-                GROUP BY date(started_at)
-                ORDER BY day DESC
-                """,
-                (cutoff,),
-            )
-            top_users_rows = db.query_all(
-                """
-                SELECT user_id,
-                       MAX(display_name) AS display_name,
-                       SUM(duration_seconds) AS total_seconds,
-                       SUM(points) AS total_points,
-                       COUNT(*) AS sessions
-                FROM voice_session_log
-                WHERE started_at >= datetime('now', ?)
-                  AND (? IS NULL OR user_id = ?)
-                GROUP BY user_id
-                ORDER BY total_seconds DESC, total_points DESC
-                LIMIT ?
-                """,
-                (cutoff, user_filter, user_filter, top_limit),
-            )
-            hourly_rows = db.query_all(
-                """
-                WITH grouped AS (
-                    SELECT
-                        CASE
-                            WHEN ? = 'hour' THEN strftime('%H', started_at)
-                            WHEN ? = 'day' THEN strftime('%w', started_at)
-                            WHEN ? = 'week' THEN strftime('%Y-%W', started_at)
-                            ELSE strftime('%Y-%m', started_at)
-                        END AS bucket,
-                        duration_seconds,
-                        COALESCE(peak_users, 0) AS peak_users
-                    FROM voice_session_log
-                    WHERE started_at >= datetime('now', ?)
-                      AND (? IS NULL OR user_id = ?)
-                )
-                SELECT bucket,
-                       SUM(duration_seconds) AS total_seconds,
-                       COUNT(*) AS sessions,
-                       SUM(peak_users) AS sum_peak
-                FROM grouped
-                GROUP BY bucket
-                ORDER BY bucket
-                """,
-                (mode, mode, mode, cutoff, user_filter, user_filter),
+            daily_rows, top_users_rows, hourly_rows = await db.query_batch_async(
+                [
+                    (
+                        """
+                        SELECT date(hour) AS day,
+                               SUM(total_seconds) AS total_seconds,
+                               SUM(sessions) AS sessions,
+                               COUNT(DISTINCT user_id) AS users
+                        FROM voice_rollup_hourly
+                        WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+                        GROUP BY date(hour)
+                        ORDER BY day DESC
+                        """,
+                        (cutoff,),
+                    ),
+                    (
+                        """
+                        SELECT user_id,
+                               SUM(total_seconds) AS total_seconds,
+                               SUM(total_points) AS total_points,
+                               SUM(sessions) AS sessions
+                        FROM voice_rollup_hourly
+                        WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+                          AND (? IS NULL OR user_id = ?)
+                        GROUP BY user_id
+                        ORDER BY total_seconds DESC, total_points DESC
+                        LIMIT ?
+                        """,
+                        (cutoff, user_filter, user_filter, top_limit),
+                    ),
+                    (
+                        """
+                        WITH grouped AS (
+                            SELECT
+                                CASE
+                                    WHEN ? = 'hour' THEN strftime('%H', hour)
+                                    WHEN ? = 'day' THEN strftime('%w', hour)
+                                    WHEN ? = 'week' THEN strftime('%Y-%W', hour)
+                                    ELSE strftime('%Y-%m', hour)
+                                END AS bucket,
+                                total_seconds,
+                                sessions,
+                                sum_peak
+                            FROM voice_rollup_hourly
+                            WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+                              AND (? IS NULL OR user_id = ?)
+                        )
+                        SELECT bucket,
+                               SUM(total_seconds) AS total_seconds,
+                               SUM(sessions) AS sessions,
+                               SUM(sum_peak) AS sum_peak
+                        FROM grouped
+                        GROUP BY bucket
+                        ORDER BY bucket
+                        """,
+                        (mode, mode, mode, cutoff, user_filter, user_filter),
+                    ),
+                ]
             )
         except Exception as exc:  # noqa: BLE001
             logging.exception("Failed to load voice history: %s", exc)
@@ -3136,13 +3193,13 @@ class DashboardServer:
                 user_ids.add(uid)
         if user_id:
             user_ids.add(user_id)
-        name_map = self._resolve_display_names(user_ids)
+        name_map = await self._resolve_display_names(user_ids)
 
         def _map_top_user(row: Any) -> dict[str, Any]:
             uid = row["user_id"]
             return {
                 "user_id": uid,
-                "display_name": row["display_name"] or name_map.get(uid, f"User {uid}"),
+                "display_name": name_map.get(uid, f"User {uid}"),
                 "total_seconds": int(row["total_seconds"] or 0),
                 "total_points": int(row["total_points"] or 0),
                 "sessions": int(row["sessions"] or 0),
@@ -3217,46 +3274,60 @@ class DashboardServer:
         recent_sessions: list[dict[str, Any]] = []
         if user_id is not None:
             try:
-                range_stats = db.query_one(
-                    """
-                    SELECT SUM(duration_seconds) AS total_seconds,
-                           SUM(points) AS total_points,
-                           COUNT(*) AS sessions,
-                           SUM(COALESCE(peak_users, 0)) AS sum_peak,
-                           COUNT(DISTINCT date(started_at)) AS active_days,
-                           MAX(ended_at) AS last_session
-                    FROM voice_session_log
-                    WHERE started_at >= datetime('now', ?)
-                      AND (? IS NULL OR user_id = ?)
-                    """,
-                    (cutoff, user_filter, user_filter),
-                )
-                lifetime_stats = db.query_one(
-                    """
-                    SELECT total_seconds, total_points, last_update
-                    FROM voice_stats
-                    WHERE user_id = ?
-                    """,
-                    (user_id,),
-                )
-                lifetime_sessions_row = db.query_one(
-                    """
-                    SELECT COUNT(*) AS sessions, MAX(ended_at) AS last_session
-                    FROM voice_session_log
-                    WHERE user_id = ?
-                    """,
-                    (user_id,),
+                (
+                    range_stats_rows,
+                    lifetime_stats_rows,
+                    lifetime_sessions_rows,
+                    recent_rows,
+                ) = await db.query_batch_async(
+                    [
+                        (
+                            """
+                            SELECT SUM(duration_seconds) AS total_seconds,
+                                   SUM(points) AS total_points,
+                                   COUNT(*) AS sessions,
+                                   SUM(COALESCE(peak_users, 0)) AS sum_peak,
+                                   COUNT(DISTINCT date(started_at)) AS active_days,
+                                   MAX(ended_at) AS last_session
+                            FROM voice_session_log
+                            WHERE started_at >= datetime('now', ?)
+                              AND (? IS NULL OR user_id = ?)
+                            """,
+                            (cutoff, user_filter, user_filter),
+                        ),
+                        (
+                            """
+                            SELECT total_seconds, total_points, last_update
+                            FROM voice_stats
+                            WHERE user_id = ?
+                            """,
+                            (user_id,),
+                        ),
+                        (
+                            """
+                            SELECT COUNT(*) AS sessions, MAX(ended_at) AS last_session
+                            FROM voice_session_log
+                            WHERE user_id = ?
+                            """,
+                            (user_id,),
+                        ),
+                        (
+                            """
+                            SELECT id, guild_id, channel_id, channel_name, started_at, ended_at,
+                                   duration_seconds, points, peak_users, co_player_ids
+                            FROM voice_session_log
+                            WHERE user_id = ?
+                            ORDER BY datetime(ended_at) DESC, id DESC
+                            LIMIT ?
+                            """,
+                            (user_id, recent_limit),
+                        ),
+                    ]
                 )
-                recent_rows = db.query_all(
-                    """
-                    SELECT id, guild_id, channel_id, channel_name, started_at, ended_at,
-                           duration_seconds, points, peak_users, co_player_ids
-                    FROM voice_session_log
-                    WHERE user_id = ?
-                    ORDER BY datetime(ended_at) DESC, id DESC
-                    LIMIT ?
-                    """,
-                    (user_id, recent_limit),
+                range_stats = range_stats_rows[0] if range_stats_rows else None
+                lifetime_stats = lifetime_stats_rows[0] if lifetime_stats_rows else None
+                lifetime_sessions_row = (
+                    lifetime_sessions_rows[0] if lifetime_sessions_rows else None
                 )
             except Exception as exc:  # noqa: BLE001
                 logging.exception("Failed to build user voice summary: %s", exc)
@@ -3308,7 +3379,7 @@ class DashboardServer:
                         co_ids_all.add(co_id)
                 co_ids_per_session.append(parsed_ids)
 
-            co_name_map = self._resolve_display_names(co_ids_all) if co_ids_all else {}
+            co_name_map = await self._resolve_display_names(co_ids_all) if co_ids_all else {}
             for idx, row in enumerate(recent_rows):
                 co_player_ids = co_ids_per_session[idx] if idx < len(co_ids_per_session) else []
                 recent_sessions.append(
@@ -3388,7 +3459,7 @@ class DashboardServer:
             # Ermittele vorhandene Spalten, um kompatibel mit evtl. aelterem Schema zu sein
             retention_columns = set()
             try:
-                rows = db.query_all("PRAGMA table_info(user_retention_tracking)")
+                rows = await db.query_all_async("PRAGMA table_info(user_retention_tracking)")
                 for r in rows:
                     # sqlite3.Row oder tuple
                     name = r["name"] if hasattr(r, "__getitem__") else r[1]
@@ -3396,15 +3467,17 @@ class DashboardServer:
             except Exception:  # pragma: no cover - defensive
                 retention_columns = set()
 
-            total_tracked_row = db.query_one("SELECT COUNT(*) FROM user_retention_tracking")
+            total_tracked_row = await db.query_one_async(
+                "SELECT COUNT(*) FROM user_retention_tracking"
+            )
             total_tracked = total_tracked_row[0] if total_tracked_row else 0
 
-            opted_out_row = db.query_one(
+            opted_out_row = await db.query_one_async(
                 "SELECT COUNT(*) FROM user_retention_tracking WHERE opted_out = 1"
             )
             opted_out = opted_out_row[0] if opted_out_row else 0
 
-            regular_active_row = db.query_one(
+            regular_active_row = await db.query_one_async(
                 """
                 SELECT COUNT(*)
                 FROM user_retention_tracking
@@ -3414,16 +3487,19 @@ class DashboardServer:
             )
             regular_active = regular_active_row[0] if regular_active_row else 0
 
+            # Schwellen als Zeitstempel vorberechnen, damit die Spalten nackt
+            # verglichen werden (indexfähig statt Berechnung pro Zeile).
+            now_ts = int(time.time())
             candidate_where = [
                 "avg_weekly_sessions >= ?",
                 "total_active_days >= ?",
-                "(strftime('%s','now') - last_active_at) / 86400 >= ?",
+                "last_active_at <= ?",
                 "opted_out = 0",
             ]
             candidate_params: list[Any] = [
                 min_weekly_sessions,
                 min_total_active_days,
-                inactivity_threshold_days,
+                now_ts - inactivity_threshold_days * 86400,
             ]
 
             has_last_sent = (
@@ -3436,11 +3512,11 @@ class DashboardServer:
 
             if has_last_sent:
                 candidate_where.append(
-                    "(last_miss_you_sent_at IS NULL OR (strftime('%s','now') - last_miss_you_sent_at) / 86400 >= ?)"
+                    "(last_miss_you_sent_at IS NULL OR last_miss_you_sent_at <= ?)"
                     if "last_miss_you_sent_at" in retention_columns
-                    else "(last_miss_you_at IS NULL OR (strftime('%s','now') - last_miss_you_at) / 86400 >= ?)"
+                    else "(last_miss_you_at IS NULL OR last_miss_you_at <= ?)"
                 )
-                candidate_params.append(min_days_between_messages)
+                candidate_params.append(now_ts - min_days_between_messages * 86400)
             if has_miss_count:
                 candidate_where.append(
                     "(miss_you_count IS NULL OR miss_you_count < ?)"
@@ -3451,12 +3527,12 @@ class DashboardServer:
 
             candidate_where_sql = " AND ".join(candidate_where)
 
-            miss_you_row = db.query_one(
+            miss_you_row = await db.query_one_async(
                 "SELECT COUNT(*) FROM user_retention_messages WHERE message_type = 'miss_you'"
             )
             miss_you_sent = miss_you_row[0] if miss_you_row else 0
 
-            feedback_row = db.query_one(
+            feedback_row = await db.query_one_async(
                 "SELECT COUNT(*) FROM user_retention_messages WHERE message_type = 'feedback'"
             )
             feedback_received = feedback_row[0] if feedback_row else 0
@@ -3507,9 +3583,9 @@ class DashboardServer:
                 "SELECT " + candidate_select_sql + "\n"  # nosec B608
                 "FROM user_retention_tracking urt\n"
                 "WHERE " + candidate_where_sql + "\n"
-                "ORDER BY days_inactive DESC"
+                "ORDER BY urt.last_active_at ASC"
             )
-            candidate_rows_raw = db.query_all(candidate_sql, tuple(candidate_params))
+            candidate_rows_raw = await db.query_all_async(candidate_sql, tuple(candidate_params))
 
             filtered_rows = [
                 row
@@ -3524,7 +3600,7 @@ class DashboardServer:
             candidate_rows = filtered_rows[:50]
 
             user_ids = [row["user_id"] for row in candidate_rows if row and row["user_id"]]
-            name_map = self._resolve_display_names(user_ids)
+            name_map = await self._resolve_display_names(user_ids)
 
             payload = {
                 "summary": {
@@ -3611,7 +3687,7 @@ class DashboardServer:
             event_filter = (event_type or "").strip() or None
 
             # Hole Events
-            events = db.query_all(
+            events = await db.query_all_async(
                 """
                 SELECT id, user_id, guild_id, event_type, timestamp,
                        display_name, account_created_at, join_position, metadata
@@ -3625,7 +3701,7 @@ class DashboardServer:
             )
 
             # Event-Type Counts
-            event_counts = db.query_all(
+            event_counts = await db.query_all_async(
                 """
                 SELECT event_type, COUNT(*) as count
                 FROM member_events
@@ -3638,7 +3714,7 @@ class DashboardServer:
             )
 
             # Recent Joins (letzten 7 Tage)
-            recent_joins = db.query_one(
+            recent_joins = await db.query_one_async(
                 """
                 SELECT COUNT(*) as count
                 FROM member_events
@@ -3650,7 +3726,7 @@ class DashboardServer:
             )
 
             # Recent Leaves (letzten 7 Tage)
-            recent_leaves = db.query_one(
+            recent_leaves = await db.query_one_async(
                 """
                 SELECT COUNT(*) as count
                 FROM member_events
@@ -3720,7 +3796,7 @@ class DashboardServer:
             guild_filter = guild_id if guild_id else None
 
             # Top Users by Message Count
-            top_users = db.query_all(
+            top_users = await db.query_all_async(
                 """
                 SELECT user_id, guild_id, channel_id, message_count,
                        last_message_at, first_message_at
@@ -3733,7 +3809,7 @@ class DashboardServer:
             )
 
             # Summary
-            summary = db.query_one(
+            summary = await db.query_one_async(
                 """
                 SELECT
                     COUNT(*) as total_users,
@@ -3747,7 +3823,7 @@ class DashboardServer:
 
             # Resolve display names
             user_ids = {row[0] for row in top_users}
-            name_map = self._resolve_display_names(user_ids)
+            name_map = await self._resolve_display_names(user_ids)
 
             users_list = []
             for row in top_users:
@@ -3802,7 +3878,7 @@ class DashboardServer:
             raise web.HTTPBadRequest(text="min_sessions must be a positive integer")
 
         try:
-            rows = db.query_all(
+            rows = await db.query_all_async(
                 """
                 SELECT user_id, co_player_id, sessions_together, total_minutes_together,
                        last_played_together, user_display_name, co_player_display_name
@@ -3874,7 +3950,7 @@ class DashboardServer:
                 missing_names.add(coid)
 
         if missing_names:
-            resolved = self._resolve_display_names(missing_names)
+            resolved = await self._resolve_display_names(missing_names)
             for uid, name in resolved.items():
                 if name:
                     name_map[uid] = name
@@ -3895,7 +3971,7 @@ class DashboardServer:
 
         if updates:
             try:
-                db.executemany(
+                await db.executemany_async(
                     """
                     UPDATE user_co_players
                     SET user_display_name = COALESCE(?, user_display_name),
@@ -3980,7 +4056,7 @@ class DashboardServer:
         links.sort(key=lambda item: str(item.get("guild_name") or "").lower())
         return links
 
-    def _build_member_source_analytics(
+    async def _build_member_source_analytics(
         self,
         guild_filter: int | None,
         *,
@@ -3990,7 +4066,7 @@ class DashboardServer:
         window_days: int | None = None if all_time else max(1, min(int(days), 365))
 
         if all_time:
-            join_rows = db.query_all(
+            join_rows = await db.query_all_async(
                 """
                 SELECT id, user_id, guild_id, timestamp, display_name, metadata
                 FROM member_events
@@ -4002,7 +4078,7 @@ class DashboardServer:
             )
         else:
             cutoff_expr = f"-{window_days} days"
-            join_rows = db.query_all(
+            join_rows = await db.query_all_async(
                 """
                 SELECT id, user_id, guild_id, timestamp, display_name, metadata
                 FROM member_events
@@ -4017,7 +4093,7 @@ class DashboardServer:
         twitch_invite_lookup: dict[str, str] = {}
         twitch_assigned_links: list[dict[str, Any]] = []
         try:
-            twitch_rows = db.query_all(
+            twitch_rows = await db.query_all_async(
                 """
                 SELECT streamer_login, invite_code, invite_url, created_at, last_sent_at
                 FROM twitch_streamer_invites
@@ -4323,7 +4399,7 @@ class DashboardServer:
 
         if backfill_updates:
             try:
-                db.executemany(
+                await db.executemany_async(
                     "UPDATE member_events SET metadata = ? WHERE id = ?",
                     backfill_updates,
                 )
@@ -4411,7 +4487,7 @@ class DashboardServer:
             guild_filter = guild_id if guild_id else None
 
             # Member Events Summary
-            member_events_summary = db.query_all(
+            member_events_summary = await db.query_all_async(
                 """
                 SELECT event_type, COUNT(*) as count
                 FROM member_events
@@ -4422,7 +4498,7 @@ class DashboardServer:
             )
 
             # Message Activity Summary
-            message_summary = db.query_one(
+            message_summary = await db.query_one_async(
                 """
                 SELECT SUM(message_count) as total
                 FROM message_activity
@@ -4432,7 +4508,7 @@ class DashboardServer:
             )
 
             # Voice Activity Summary
-            voice_summary = db.query_one(
+            voice_summary = await db.query_one_async(
                 """
                 SELECT SUM(duration_seconds) as total_seconds
                 FROM voice_session_log
@@ -4442,7 +4518,7 @@ class DashboardServer:
             )
 
             # Active Users (last 7 days)
-            active_users_7d = db.query_one(
+            active_users_7d = await db.query_one_async(
                 """
                 SELECT COUNT(DISTINCT user_id) as count
                 FROM message_activity
@@ -4453,7 +4529,7 @@ class DashboardServer:
             )
 
             # Growth (Joins vs Leaves last 30 days)
-            growth = db.query_one(
+            growth = await db.query_one_async(
                 """
                 SELECT
                     SUM(CASE WHEN event_type = 'join' THEN 1 ELSE 0 END) as joins,
@@ -4465,7 +4541,7 @@ class DashboardServer:
                 (guild_filter, guild_filter),
             )
 
-            member_sources_30d = self._build_member_source_analytics(guild_filter, days=0)
+            member_sources_30d = await self._build_member_source_analytics(guild_filter, days=0)
 
             payload = {
                 "member_events": {row[0]: row[1] for row in member_events_summary},
@@ -4755,7 +4831,7 @@ class DashboardServer:
         payload: dict[str, Any] | None = None,
         *,
         timeout: float = 45.0,
-        poll_interval: float = 0.5,
+        fallback_interval: float | None = None,
     ) -> dict[str, Any]:
         payload_json = json.dumps(payload) if payload is not None else None
         async with db.transaction() as conn:
@@ -4765,53 +4841,13 @@ class DashboardServer:
             )
             task_id = int(cur.lastrowid or 0)
 
-        deadline = time.monotonic() + max(float(timeout), float(poll_interval))
-        while True:
-            row = await db.query_one_async(
-                "SELECT status, result, error FROM steam_tasks WHERE id = ?",
-                (task_id,),
-            )
-            if row is None:
-                return {
-                    "task_id": task_id,
-                    "status": "MISSING",
-                    "ok": False,
-                    "timed_out": False,
-                    "result": None,
-                    "error": "Steam task disappeared",
-                }
-
-            status = str(row["status"] or "UNKNOWN").upper()
-            raw_result = row["result"]
-            result: Any = raw_result
-            if isinstance(raw_result, str):
-                try:
-                    result = json.loads(raw_result)
-                except json.JSONDecodeError:
-                    result = raw_result
-            error = str(row["error"]) if row["error"] is not None else None
-
-            if status in {"DONE", "FAILED"}:
-                return {
-                    "task_id": task_id,
-                    "status": status,
-                    "ok": status == "DONE",
-                    "timed_out": False,
-                    "result": result,
-                    "error": error,
-                }
-
-            if time.monotonic() >= deadline:
-                return {
-                    "task_id": task_id,
-                    "status": status,
-                    "ok": False,
-                    "timed_out": True,
-                    "result": result,
-                    "error": error or f"Timed out waiting for {task_type}",
-                }
-
-            await asyncio.sleep(max(0.1, float(poll_interval)))
+        # Abschluss kommt per Broker-Callback; DB-Poll nur noch als langsamer Fallback.
+        return await steam_task_waiters.wait_for_task(
+            task_id,
+            timeout=timeout,
+            fallback_interval=fallback_interval,
+            task_type=task_type,
+        )
 
     async def _deadlock_missing_build_alert_loop(self) -> None:
         await self.bot.wait_until_ready()
@@ -4828,7 +4864,7 @@ class DashboardServer:
         claim_ts = int(time.time())
         claim_marker = -claim_ts
         stale_cutoff = -(claim_ts - 900)
-        db.execute(
+        await db.execute_async(
             """
             UPDATE deadlock_hero_builds
                SET last_alerted_at = NULL
@@ -4865,7 +4901,7 @@ class DashboardServer:
                 channel = await self.bot.fetch_channel(DEADLOCK_MISSING_BUILD_ALERT_CHANNEL_ID)
             except Exception as exc:  # noqa: BLE001
                 logger.warning("Failed to fetch Deadlock alert channel: %s", exc)
-                db.execute(
+                await db.execute_async(
                     """
                     UPDATE deadlock_hero_builds
                        SET last_alerted_at = NULL
@@ -4876,7 +4912,7 @@ class DashboardServer:
                 return 0
 
         for row in rows:
-            hero_row = db.query_one(
+            hero_row = await db.query_one_async(
                 "SELECT name FROM deadlock_heroes WHERE hero_id = ? LIMIT 1",
                 (int(row["hero_id"]),),
             )
@@ -4889,7 +4925,7 @@ class DashboardServer:
             )
             try:
                 await channel.send(message)
-                db.execute(
+                await db.execute_async(
                     """
                     UPDATE deadlock_hero_builds
                        SET last_alerted_at = ?
@@ -4901,7 +4937,7 @@ class DashboardServer:
                 )
                 sent += 1
             except Exception as exc:  # noqa: BLE001
-                db.execute(
+                await db.execute_async(
                     """
                     UPDATE deadlock_hero_builds
                        SET last_alerted_at = NULL
@@ -4972,7 +5008,6 @@ class DashboardServer:
             "GC_SEARCH_BUILDS",
             {"hero_id": int(hero_id)},
             timeout=45.0,
-            poll_interval=0.5,
         )
         task_payload = task_result.get("result")
         task_data = task_payload.get("data") if isinstance(task_payload, dict) else None
@@ -5281,7 +5316,6 @@ class DashboardServer:
             "MAINTAIN_BUILD_CATALOG",
             {"hero_id": int(hero_id)},
             timeout=180.0,
-            poll_interval=1.0,
         )
         result_payload = task_result.get("result")
         result_data = result_payload.get("data") if isinstance(result_payload, dict) else {}
@@ -5323,7 +5357,7 @@ class DashboardServer:
         self._check_auth(request, required=True, require_full_access=True)
         try:
             global_target_build_name = db.get_kv("deadlock", "global_target_build_name") or ""
-            hero_rows = db.query_all(
+            hero_rows = await db.query_all_async(
                 """
                 SELECT
                     id, hero_id, name, origin_build_id, target_build_name_override,
@@ -5332,7 +5366,7 @@ class DashboardServer:
                  ORDER BY hero_id
                 """
             )
-            build_rows = db.query_all(
+            build_rows = await db.query_all_async(
                 """
                 SELECT
                     id, hero_id, build_id, build_name, author_name, is_active, sort_order,
@@ -5605,7 +5639,9 @@ class DashboardServer:
         except ValueError:
             raise web.HTTPBadRequest(text="hero_id must be integer")
 
-        hero_exists = db.query_one("SELECT 1 FROM deadlock_heroes WHERE hero_id = ?", (hero_id,))
+        hero_exists = await db.query_one_async(
+            "SELECT 1 FROM deadlock_heroes WHERE hero_id = ?", (hero_id,)
+        )
         if hero_exists is None:
             raise web.HTTPNotFound(text="Hero not found")
 
@@ -6240,6 +6276,19 @@ class DashboardServer:
             },
             "health": await self._collect_health_checks(),
             "standalone": await self._collect_standalone_snapshot(),
+            "db": db.pool_stats(),
+            "display_names": display_names.cache_stats(),
+            "steam_task_waiters": steam_task_waiters.stats(),
+            "voice_events": (
+                voice_dispatcher.stats()
+                if (voice_dispatcher := getattr(bot, "voice_events", None)) is not None
+                else None
+            ),
+            "message_events": (
+                message_dispatcher.stats()
+                if (message_dispatcher := getattr(bot, "message_events", None)) is not None
+                else None
+            ),
         }
         return self._json(payload)
 
@@ -7029,13 +7078,13 @@ class DashboardServer:
         except (TypeError, ValueError):
             raise web.HTTPBadRequest(text="payload must be JSON-serializable")
 
-        db.execute(
-            "INSERT INTO standalone_commands(bot, command, payload, status, created_at) "
-            "VALUES(?, ?, ?, 'pending', CURRENT_TIMESTAMP)",
-            (key, command, payload_json),
-        )
-        row = db.query_one("SELECT last_insert_rowid()")
-        command_id = row[0] if row else None
+        async with db.transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO standalone_commands(bot, command, payload, status, created_at) "
+                "VALUES(?, ?, ?, 'pending', CURRENT_TIMESTAMP)",
+                (key, command, payload_json),
+            )
+            command_id = cur.lastrowid
 
         try:
             await manager.ensure_running(key)
@@ -14,13 +14,17 @@ from __future__ import annotations
 
 import asyncio
 import contextvars
+import functools
 import json
 import logging
 import os
+import queue
+import re
 import sqlite3
 import threading
 import time
-from collections.abc import AsyncIterator, Iterable, Iterator
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
 from typing import Any
@@ -31,6 +35,8 @@ log = logging.getLogger(__name__)
 # Default: wait up to 15s on busy locks; override with ENV if needed.
 DB_BUSY_TIMEOUT_MS = int(os.environ.get("DEADLOCK_DB_BUSY_TIMEOUT_MS", "15000"))
 DB_CONNECT_TIMEOUT = float(os.environ.get("DEADLOCK_DB_TIMEOUT", str(DB_BUSY_TIMEOUT_MS / 1000)))
+# Anzahl read-only Verbindungen für query_*(); 0 = alles über die Writer-Verbindung (Altverhalten)
+DB_READ_POOL_SIZE = int(os.environ.get("DEADLOCK_DB_READ_POOL_SIZE", "4"))
 
 # ---- Env-Keys (nur diese beiden werden unterstützt) ----
 ENV_DB_PATH = "DEADLOCK_DB_PATH"  # kompletter Pfad zur DB-Datei (höchste Prio)
@@ -60,6 +66,9 @@ _CONN: sqlite3.Connection | None = None
 _LOCK = threading.RLock()
 _ASYNC_LOCK = asyncio.Lock()
 _DB_PATH_CACHED: str | None = None
+_READ_POOL: _ReaderPool | None = None
+_READ_EXECUTOR: ThreadPoolExecutor | None = None
+_READ_POOL_INIT_LOCK = threading.Lock()
 
 logger = logging.getLogger(__name__)
 Row = sqlite3.Row  # Typalias für Konsumenten
@@ -264,6 +273,141 @@ class DBConnectionProxy:
         return self._run(lambda: self._conn.total_changes)
 
 
+class _ReaderPool:
+    """
+    Feste Menge read-only Verbindungen (``mode=ro``) auf dieselbe DB-Datei.
+    Dank WAL laufen Leser parallel zum Writer und blockieren ihn nicht.
+    Jede Verbindung wird exklusiv an genau einen Thread ausgeliehen.
+    """
+
+    def __init__(self, path: str, size: int) -> None:
+        self._path = path
+        self._size = max(1, int(size))
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._state_lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._acquired = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _open(self) -> sqlite3.Connection:
+        uri = f"{Path(self._path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=DB_CONNECT_TIMEOUT,
+        )
+        conn.row_factory = sqlite3.Row
+        # journal_mode=WAL ist in der Datei persistiert; Leser brauchen nur die Cache-PRAGMAs.
+        conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+        conn.execute("PRAGMA query_only=ON")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._state_lock:
+            can_create = self._created < self._size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._open()
+            except Exception:
+                with self._state_lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=DB_CONNECT_TIMEOUT)
+        except queue.Empty as exc:
+            raise sqlite3.OperationalError(
+                f"read pool exhausted ({self._size} connections busy)"
+            ) from exc
+
+    def _release(self, conn: sqlite3.Connection, *, discard: bool) -> None:
+        with self._state_lock:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._created -= 1
+        if discard or self._closed:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        if self._closed:
+            raise sqlite3.ProgrammingError("read pool is closed")
+        started = time.perf_counter()
+        conn = self._checkout()
+        waited = time.perf_counter() - started
+        with self._state_lock:
+            self._in_use += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._acquired += 1
+            if waited >= 0.001:
+                self._waited += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        discard = False
+        try:
+            yield conn
+        except (sqlite3.ProgrammingError, sqlite3.DatabaseError) as exc:
+            # Defekte Verbindung verwerfen; normale SQL-Fehler (OperationalError) behalten sie.
+            discard = not isinstance(exc, sqlite3.OperationalError)
+            raise
+        finally:
+            self._release(conn, discard=discard)
+
+    def stats(self) -> dict[str, Any]:
+        with self._state_lock:
+            acquired = self._acquired
+            return {
+                "size": self._size,
+                "open": self._created,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "acquired": acquired,
+                "waited": self._waited,
+                "wait_total_ms": round(self._wait_total * 1000, 3),
+                "wait_avg_ms": round(self._wait_total * 1000 / acquired, 3) if acquired else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3),
+            }
+
+    def close(self) -> None:
+        with self._state_lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._state_lock:
+                self._created -= 1
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                log.debug("Fehler beim Schliessen einer Reader-Verbindung: %s", e)
+
+
 # ---------- Pfad-Auflösung ----------
 
 
@@ -396,6 +540,7 @@ def close_connection() -> None:
     Wird genutzt, um den DB-Layer als Cog neu zu laden.
     """
     global _CONN
+    _close_read_pool()
     with _LOCK:
         if _CONN is None:
             return
@@ -459,6 +604,170 @@ def _ensure_steam_tasks_cap_trigger(conn: sqlite3.Connection, max_rows: int) ->
     )
 
 
+_USER_RANK_SNAPSHOT_REFRESH_SQL = """
+  DELETE FROM user_rank_snapshot WHERE user_id = {uid};
+  INSERT INTO user_rank_snapshot(user_id, rank_name, subrank, rank_updated_at)
+    SELECT user_id, deadlock_rank_name, deadlock_subrank, deadlock_rank_updated_at
+    FROM steam_links
+    WHERE user_id = {uid} AND verified = 1
+    ORDER BY primary_account DESC, deadlock_rank_updated_at DESC
+    LIMIT 1;
+"""
+
+
+def _ensure_user_rank_snapshot(conn: sqlite3.Connection) -> None:
+    """
+    Materialisiert den Rang pro User (bestes verifiziertes steam_links-Konto, gleiche
+    Auswahl wie bisher per Einzel-Query) und hält ihn per Trigger aktuell.
+    Beim Start wird die Tabelle einmal komplett neu aufgebaut (selbstheilend).
+    """
+    conn.executescript(
+        f"""
+        CREATE TABLE IF NOT EXISTS user_rank_snapshot(
+          user_id INTEGER PRIMARY KEY,
+          rank_name TEXT,
+          subrank INTEGER,
+          rank_updated_at INTEGER
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_user_rank_snapshot_ins
+        AFTER INSERT ON steam_links
+        BEGIN
+          {_USER_RANK_SNAPSHOT_REFRESH_SQL.format(uid="NEW.user_id")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_user_rank_snapshot_upd
+        AFTER UPDATE OF user_id, verified, primary_account, deadlock_rank_name,
+                        deadlock_subrank, deadlock_rank_updated_at
+        ON steam_links
+        BEGIN
+          {_USER_RANK_SNAPSHOT_REFRESH_SQL.format(uid="OLD.user_id")}
+          {_USER_RANK_SNAPSHOT_REFRESH_SQL.format(uid="NEW.user_id")}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_user_rank_snapshot_del
+        AFTER DELETE ON steam_links
+        BEGIN
+          {_USER_RANK_SNAPSHOT_REFRESH_SQL.format(uid="OLD.user_id")}
+        END;
+        """
+    )
+    conn.execute("SAVEPOINT user_rank_snapshot_rebuild")
+    conn.execute("DELETE FROM user_rank_snapshot")
+    conn.execute(
+        """
+        INSERT INTO user_rank_snapshot(user_id, rank_name, subrank, rank_updated_at)
+        SELECT user_id, deadlock_rank_name, deadlock_subrank, deadlock_rank_updated_at
+        FROM (
+          SELECT user_id, deadlock_rank_name, deadlock_subrank, deadlock_rank_updated_at,
+                 ROW_NUMBER() OVER (
+                   PARTITION BY user_id
+                   ORDER BY primary_account DESC, deadlock_rank_updated_at DESC
+                 ) AS rn
+          FROM steam_links
+          WHERE verified = 1
+        )
+        WHERE rn = 1
+        """
+    )
+    conn.execute("RELEASE user_rank_snapshot_rebuild")
+
+
+def _ensure_voice_rollup_hourly(conn: sqlite3.Connection) -> None:
+    """
+    Stündliche Voice-Rollups je (Guild, Stunde, User) für die Verlaufs-Endpunkte.
+    Jeder neue voice_session_log-Eintrag wird per Trigger in derselben Transaktion
+    aufaddiert (Bucket = Startstunde). Bei leerer Tabelle einmaliger Backfill.
+    """
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS voice_rollup_hourly(
+          guild_id INTEGER NOT NULL,
+          hour TEXT NOT NULL,
+          user_id INTEGER NOT NULL,
+          sessions INTEGER NOT NULL DEFAULT 0,
+          total_seconds INTEGER NOT NULL DEFAULT 0,
+          total_points INTEGER NOT NULL DEFAULT 0,
+          sum_peak INTEGER NOT NULL DEFAULT 0,
+          PRIMARY KEY (guild_id, hour, user_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_voice_rollup_hour ON voice_rollup_hourly(hour, user_id);
+        CREATE INDEX IF NOT EXISTS idx_voice_rollup_user ON voice_rollup_hourly(user_id, hour);
+
+        CREATE TRIGGER IF NOT EXISTS trg_voice_rollup_hourly_ins
+        AFTER INSERT ON voice_session_log
+        WHEN strftime('%Y-%m-%d %H:00:00', NEW.started_at) IS NOT NULL
+        BEGIN
+          INSERT INTO voice_rollup_hourly(
+            guild_id, hour, user_id, sessions, total_seconds, total_points, sum_peak
+          ) VALUES (
+            COALESCE(NEW.guild_id, 0), strftime('%Y-%m-%d %H:00:00', NEW.started_at),
+            NEW.user_id, 1, COALESCE(NEW.duration_seconds, 0), COALESCE(NEW.points, 0),
+            COALESCE(NEW.peak_users, 0)
+          )
+          ON CONFLICT(guild_id, hour, user_id) DO UPDATE SET
+            sessions      = sessions + excluded.sessions,
+            total_seconds = total_seconds + excluded.total_seconds,
+            total_points  = total_points + excluded.total_points,
+            sum_peak      = sum_peak + excluded.sum_peak;
+        END;
+        """
+    )
+    if conn.execute("SELECT 1 FROM voice_rollup_hourly LIMIT 1").fetchone() is None:
+        _rebuild_voice_rollup(conn, None)
+
+
+def _rebuild_voice_rollup(conn: sqlite3.Connection, days: int | None) -> int:
+    modifier = f"-{int(days)} day" if days is not None else None
+    conn.execute("SAVEPOINT voice_rollup_rebuild")
+    try:
+        conn.execute(
+            """
+            DELETE FROM voice_rollup_hourly
+            WHERE ? IS NULL OR hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+            """,
+            (modifier, modifier),
+        )
+        cur = conn.execute(
+            """
+            INSERT INTO voice_rollup_hourly(
+              guild_id, hour, user_id, sessions, total_seconds, total_points, sum_peak
+            )
+            SELECT guild_id, hour, user_id, COUNT(*), SUM(secs), SUM(pts), SUM(peak)
+            FROM (
+              SELECT COALESCE(guild_id, 0) AS guild_id,
+                     strftime('%Y-%m-%d %H:00:00', started_at) AS hour,
+                     user_id,
+                     COALESCE(duration_seconds, 0) AS secs,
+                     COALESCE(points, 0) AS pts,
+                     COALESCE(peak_users, 0) AS peak
+              FROM voice_session_log
+            )
+            WHERE hour IS NOT NULL
+              AND (? IS NULL OR hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?))
+            GROUP BY guild_id, hour, user_id
+            """,
+            (modifier, modifier),
+        )
+        written = cur.rowcount
+        conn.execute("RELEASE voice_rollup_rebuild")
+    except Exception:
+        conn.execute("ROLLBACK TO voice_rollup_rebuild")
+        conn.execute("RELEASE voice_rollup_rebuild")
+        raise
+    return max(0, int(written))
+
+
+def rebuild_voice_rollup(days: int | None = None) -> int:
+    """
+    Baut voice_rollup_hourly aus voice_session_log neu auf (Backfill).
+    ``days`` begrenzt den Neuaufbau auf die letzten N Tage, ``None`` = komplett.
+    Gibt die Anzahl geschriebener Rollup-Zeilen zurück.
+    """
+    with _LOCK:
+        return _rebuild_voice_rollup(connect(), days)
+
+
 def prune_steam_tasks(limit: int | None = None, *, conn: sqlite3.Connection | None = None) -> int:
     """
     Trims the steam_tasks table to the newest ``limit`` rows (defaults to STEAM_TASKS_MAX_ROWS).
@@ -832,6 +1141,29 @@ def init_schema(conn: sqlite3.Connection | None = None) -> None:
               finished_at INTEGER
             );
 
+            -- Idempotency-Antworten des MasterBrokers (überlebt Restarts)
+            CREATE TABLE IF NOT EXISTS master_broker_idempotency(
+              cache_key TEXT PRIMARY KEY,
+              payload_hash TEXT NOT NULL,
+              response_status INTEGER NOT NULL,
+              response_body TEXT NOT NULL,
+              expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_master_broker_idempotency_expires
+              ON master_broker_idempotency(expires_at);
+
+            -- Persistente Jobs des Deadline-Schedulers (service/deadline_scheduler.py)
+            CREATE TABLE IF NOT EXISTS scheduled_jobs(
+              kind TEXT NOT NULL,
+              job_key TEXT NOT NULL,
+              due_at REAL NOT NULL,
+              payload TEXT,
+              attempts INTEGER NOT NULL DEFAULT 0,
+              created_at REAL NOT NULL,
+              PRIMARY KEY(kind, job_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_due ON scheduled_jobs(due_at);
+
             -- Protokollierte Fragen & Antworten des Server-FAQ-Bots
             CREATE TABLE IF NOT EXISTS server_faq_logs(
               id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -1112,6 +1444,7 @@ def init_schema(conn: sqlite3.Connection | None = None) -> None:
         except sqlite3.OperationalError as exc:
             if "duplicate column name" not in str(exc).lower():
                 raise
+        _ensure_voice_rollup_hourly(c)
         for alter_sql in (
             "ALTER TABLE user_co_players ADD COLUMN user_display_name TEXT",
             "ALTER TABLE user_co_players ADD COLUMN co_player_display_name TEXT",
@@ -1154,6 +1487,7 @@ def init_schema(conn: sqlite3.Connection | None = None) -> None:
             except sqlite3.OperationalError as exc:
                 if "duplicate column name" not in str(exc).lower():
                     raise
+        _ensure_user_rank_snapshot(c)
         for alter_sql in (
             "ALTER TABLE deadlock_hero_builds ADD COLUMN sync_status TEXT",
             "ALTER TABLE deadlock_hero_builds ADD COLUMN sync_message TEXT",
@@ -1454,6 +1788,89 @@ def _in_transaction_context() -> bool:
         return False
 
 
+def _writer_lock_held() -> bool:
+    """True, wenn der aktuelle Thread _LOCK hält (z. B. innerhalb get_conn()/transaction())."""
+    is_owned = getattr(_LOCK, "_is_owned", None)
+    return bool(is_owned and is_owned())
+
+
+_WRITE_KEYWORD_RE = re.compile(r"\b(?:insert|update|delete|replace)\b")
+
+
+def _is_reader_safe(sql: str) -> bool:
+    text = sql.lstrip().lower()
+    if not text.startswith(("select", "with")):
+        return False
+    # CTE-Präfix vor INSERT/UPDATE ... RETURNING: mode=ro würde scheitern.
+    if text.startswith("with") and _WRITE_KEYWORD_RE.search(text):
+        return False
+    # Verbindungs-lokale Funktionen müssen auf dem Writer laufen.
+    return "last_insert_rowid" not in text and "changes()" not in text
+
+
+def _reader_pool() -> _ReaderPool | None:
+    """
+    Liefert den Reader-Pool oder None, wenn über den Writer gelesen werden muss
+    (Pool deaktiviert, offene Transaktion oder _LOCK bereits im aktuellen Thread).
+    """
+    global _READ_POOL
+    if DB_READ_POOL_SIZE <= 0 or _in_transaction_context() or _writer_lock_held():
+        return None
+    pool = _READ_POOL
+    if pool is not None:
+        return pool
+    connect()  # Datei + Schema müssen existieren, bevor mode=ro öffnen kann
+    with _READ_POOL_INIT_LOCK:
+        if _READ_POOL is None:
+            _READ_POOL = _ReaderPool(_DB_PATH_CACHED or db_path(), DB_READ_POOL_SIZE)
+        return _READ_POOL
+
+
+def _read_executor() -> ThreadPoolExecutor:
+    """Eigener Thread-Pool für Lese-Offloading (statt des Default-Executors von to_thread)."""
+    global _READ_EXECUTOR
+    with _READ_POOL_INIT_LOCK:
+        if _READ_EXECUTOR is None:
+            _READ_EXECUTOR = ThreadPoolExecutor(
+                max_workers=max(1, DB_READ_POOL_SIZE),
+                thread_name_prefix="deadlock-db-read",
+            )
+        return _READ_EXECUTOR
+
+
+def _close_read_pool() -> None:
+    global _READ_POOL
+    with _READ_POOL_INIT_LOCK:
+        pool, _READ_POOL = _READ_POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def pool_stats() -> dict[str, Any]:
+    """Metriken des Reader-Pools (Wartezeiten, belegte Verbindungen) für Dashboard/Benchmarks."""
+    pool = _READ_POOL
+    if pool is None:
+        return {"enabled": DB_READ_POOL_SIZE > 0, "size": max(0, DB_READ_POOL_SIZE), "open": 0}
+    return {"enabled": True, **pool.stats()}
+
+
+def _query(sql: str, params: Iterable[Any], fetch: Callable[[sqlite3.Cursor], Any]):
+    pool = _reader_pool() if _is_reader_safe(sql) else None
+    if pool is not None:
+        with pool.connection() as conn:
+            cur = conn.execute(sql, params)
+            try:
+                return fetch(cur)
+            finally:
+                cur.close()
+    with _LOCK:
+        cur = connect().execute(sql, params)
+        try:
+            return fetch(cur)
+        finally:
+            cur.close()
+
+
 def execute(sql: str, params: Iterable[Any] = ()) -> None:
     with _LOCK:
         connect().execute(sql, params)
@@ -1465,21 +1882,19 @@ def executemany(sql: str, seq_of_params: Iterable[Iterable[Any]]) -> None:
 
 
 def query_one(sql: str, params: Iterable[Any] = ()):  # -> sqlite3.Row | None
-    with _LOCK:
-        cur = connect().execute(sql, params)
-        try:
-            return cur.fetchone()
-        finally:
-            cur.close()
+    return _query(sql, params, sqlite3.Cursor.fetchone)
 
 
 def query_all(sql: str, params: Iterable[Any] = ()):  # -> list[sqlite3.Row]
-    with _LOCK:
-        cur = connect().execute(sql, params)
-        try:
-            return cur.fetchall()
-        finally:
-            cur.close()
+    return _query(sql, params, sqlite3.Cursor.fetchall)
+
+
+async def _run_read(fn: Callable[..., Any], *args: Any) -> Any:
+    if DB_READ_POOL_SIZE <= 0:
+        return await asyncio.to_thread(fn, *args)
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(_read_executor(), functools.partial(ctx.run, fn, *args))
 
 
 async def execute_async(sql: str, params: Iterable[Any] = ()) -> None:
@@ -1506,14 +1921,52 @@ async def query_one_async(sql: str, params: Iterable[Any] = ()):
     """Async Wrapper f�r query_one(); thread-offloaded au�erhalb von Transaktionen."""
     if _in_transaction_context():
         return query_one(sql, params)
-    return await asyncio.to_thread(query_one, sql, params)
+    return await _run_read(query_one, sql, params)
 
 
 async def query_all_async(sql: str, params: Iterable[Any] = ()):
     """Async Wrapper f�r query_all(); thread-offloaded au�erhalb von Transaktionen."""
     if _in_transaction_context():
         return query_all(sql, params)
-    return await asyncio.to_thread(query_all, sql, params)
+    return await _run_read(query_all, sql, params)
+
+
+def query_batch(statements: Iterable[tuple[str, Iterable[Any]]]) -> list[list[sqlite3.Row]]:
+    """
+    Führt mehrere Lese-Queries auf einer Verbindung aus und liefert pro Statement
+    die Ergebnis-Zeilen (query_all-Semantik). Über den Reader-Pool laufen alle
+    Statements in einer Lese-Transaktion und sehen damit denselben Snapshot.
+    """
+    batch = [(sql, tuple(params)) for sql, params in statements]
+    pool = _reader_pool() if all(_is_reader_safe(sql) for sql, _ in batch) else None
+    if pool is None:
+        with _LOCK:
+            conn = connect()
+            return [_fetch_all(conn, sql, params) for sql, params in batch]
+    with pool.connection() as conn:
+        conn.execute("BEGIN")
+        try:
+            return [_fetch_all(conn, sql, params) for sql, params in batch]
+        finally:
+            conn.execute("COMMIT")
+
+
+def _fetch_all(conn: sqlite3.Connection, sql: str, params: Iterable[Any]) -> list[sqlite3.Row]:
+    cur = conn.execute(sql, params)
+    try:
+        return cur.fetchall()
+    finally:
+        cur.close()
+
+
+async def query_batch_async(
+    statements: Iterable[tuple[str, Iterable[Any]]],
+) -> list[list[sqlite3.Row]]:
+    """Async Wrapper für query_batch(); alle Statements in einem einzigen Offload."""
+    batch = [(sql, tuple(params)) for sql, params in statements]
+    if _in_transaction_context():
+        return query_batch(batch)
+    return await _run_read(query_batch, batch)
 
 
 # ---------- KV (namespaced) ----------
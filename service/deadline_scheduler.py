@@ -0,0 +1,363 @@
+"""
+Deadline-Scheduler statt Poll-Schleifen pro Cog.
+
+Cogs registrieren pro Job-Art (``kind``) einen async Handler und planen Jobs
+mit ``schedule(kind, key, due_at, payload)`` ein, z.B. "Coaching-Rolle von
+Request 17 um T entfernen". Der Scheduler hält alle Jobs in einem Min-Heap
+und schläft genau bis zum nächsten fälligen Job (höchstens MAX_SLEEP_SECONDS,
+damit Uhrsprünge auffallen); ohne Jobs wacht er gar nicht auf.
+
+``(kind, key)`` ist eindeutig: erneutes ``schedule`` ersetzt den Job (mit
+``keep_earlier=True`` nur, wenn der neue Termin früher liegt). Persistente Jobs
+stehen zusätzlich in ``scheduled_jobs`` und werden nach einem Neustart geladen;
+ist für ``kind`` noch kein Handler registriert, wartet der Job, bis der Cog
+geladen ist. Schlägt ein Handler fehl, wird der Job mit Backoff bis zu
+MAX_ATTEMPTS Mal wiederholt.
+
+Zugriff über ``get_scheduler(bot)`` (ein Scheduler pro Bot); gestartet wird er
+einmalig im ``setup_hook`` des Bots.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from service import db
+
+log = logging.getLogger(__name__)
+
+MAX_SLEEP_SECONDS = float(os.getenv("SCHEDULER_MAX_SLEEP_SECONDS", "3600"))
+MAX_ATTEMPTS = max(1, int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "5")))
+RETRY_DELAYS = (30.0, 120.0, 600.0, 1800.0)
+
+_UPSERT_SQL = """
+    INSERT INTO scheduled_jobs(kind, job_key, due_at, payload, attempts, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(kind, job_key) DO UPDATE SET
+        due_at = excluded.due_at,
+        payload = excluded.payload,
+        attempts = excluded.attempts
+"""
+
+
+@dataclass(slots=True)
+class ScheduledJob:
+    kind: str
+    key: str
+    due_at: float
+    payload: dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    persist: bool = True
+    seq: int = 0
+
+
+Handler = Callable[[ScheduledJob], Awaitable[Any]]
+
+
+class DeadlineScheduler:
+    def __init__(
+        self,
+        *,
+        persist: bool = True,
+        clock: Callable[[], float] = time.time,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> None:
+        self._persist = persist
+        self._clock = clock
+        self.max_attempts = max(1, int(max_attempts))
+        self._handlers: dict[str, Handler] = {}
+        self._jobs: dict[tuple[str, str], ScheduledJob] = {}
+        self._heap: list[tuple[float, int, str, str]] = []
+        self._parked: dict[str, list[ScheduledJob]] = {}
+        self._seq = 0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._running: set[asyncio.Task[None]] = set()
+        self._firing: set[int] = set()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self.stats: dict[str, int] = {"wakeups": 0, "fired": 0, "failed": 0, "dropped": 0}
+
+    # ---------- Registrierung ----------
+
+    def register(self, kind: str, handler: Handler) -> None:
+        """Registriert (oder ersetzt beim Cog-Reload) den Handler für ``kind``."""
+        self._handlers[kind] = handler
+        parked = self._parked.pop(kind, [])
+        for job in parked:
+            if self._jobs.get((job.kind, job.key)) is job:
+                self._push(job)
+        if parked:
+            self._wake.set()
+
+    def unregister(self, kind: str) -> None:
+        self._handlers.pop(kind, None)
+
+    # ---------- Jobs ----------
+
+    def _push(self, job: ScheduledJob) -> None:
+        self._seq += 1
+        job.seq = self._seq
+        heapq.heappush(self._heap, (job.due_at, job.seq, job.kind, job.key))
+
+    async def schedule(
+        self,
+        kind: str,
+        key: Any,
+        due_at: float,
+        payload: dict[str, Any] | None = None,
+        *,
+        persist: bool = True,
+        keep_earlier: bool = False,
+    ) -> ScheduledJob:
+        key = str(key)
+        existing = self._jobs.get((kind, key))
+        if (
+            keep_earlier
+            and existing is not None
+            and existing.seq not in self._firing
+            and existing.due_at <= due_at
+        ):
+            return existing
+        job = ScheduledJob(
+            kind=kind,
+            key=key,
+            due_at=float(due_at),
+            payload=dict(payload or {}),
+            persist=persist and self._persist,
+        )
+        await self._add(job, existing)
+        return job
+
+    async def _add(self, job: ScheduledJob, existing: ScheduledJob | None) -> None:
+        self._jobs[(job.kind, job.key)] = job
+        self._push(job)
+        if job.persist:
+            await self._write(job)
+        elif existing is not None and existing.persist:
+            await self._delete(job.kind, job.key)
+        if self.next_due() is not None and self._heap[0][1] == job.seq:
+            self._wake.set()
+
+    async def cancel(self, kind: str, key: Any) -> bool:
+        """Entfernt den Job; der Heap-Eintrag verfällt beim nächsten Pop."""
+        job = self._jobs.pop((kind, str(key)), None)
+        if job is None:
+            return False
+        if job.persist:
+            await self._delete(kind, job.key)
+        return True
+
+    def get(self, kind: str, key: Any) -> ScheduledJob | None:
+        return self._jobs.get((kind, str(key)))
+
+    def pending(self, kind: str | None = None) -> list[ScheduledJob]:
+        jobs = [job for job in self._jobs.values() if kind is None or job.kind == kind]
+        return sorted(jobs, key=lambda job: (job.due_at, job.seq))
+
+    def next_due(self) -> float | None:
+        while self._heap:
+            due_at, seq, kind, key = self._heap[0]
+            job = self._jobs.get((kind, key))
+            if job is not None and job.seq == seq:
+                return due_at
+            heapq.heappop(self._heap)
+        return None
+
+    # ---------- Ausführung ----------
+
+    async def run_due(self) -> int:
+        """Startet alle fälligen Jobs; liefert deren Anzahl."""
+        now = self._clock()
+        started = 0
+        while (due_at := self.next_due()) is not None and due_at <= now:
+            _due, _seq, kind, key = heapq.heappop(self._heap)
+            job = self._jobs[(kind, key)]
+            handler = self._handlers.get(kind)
+            if handler is None:
+                self._parked.setdefault(kind, []).append(job)
+                continue
+            task = asyncio.create_task(self._fire(job, handler), name=f"scheduler.{kind}.{key}")
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            started += 1
+        return started
+
+    async def _fire(self, job: ScheduledJob, handler: Handler) -> None:
+        seq = job.seq
+        self._firing.add(seq)
+        try:
+            await handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.stats["failed"] += 1
+            await self._retry(job, seq, exc)
+            return
+        finally:
+            self._firing.discard(seq)
+        self.stats["fired"] += 1
+        current = self._jobs.get((job.kind, job.key))
+        # Handler hat den Job ggf. selbst neu eingeplant
+        if current is job and job.seq == seq:
+            del self._jobs[(job.kind, job.key)]
+            if job.persist:
+                # nur die gefeuerte Zeile löschen, nicht einen inzwischen neu geplanten Job
+                await self._delete(job.kind, job.key, due_at=job.due_at)
+
+    async def _retry(self, job: ScheduledJob, seq: int, exc: Exception) -> None:
+        if self._jobs.get((job.kind, job.key)) is not job or job.seq != seq:
+            log.error(
+                "Scheduler-Job %s/%s fehlgeschlagen (bereits neu geplant)",
+                job.kind,
+                job.key,
+                exc_info=exc,
+            )
+            return
+        attempts = job.attempts + 1
+        if attempts >= self.max_attempts:
+            self.stats["dropped"] += 1
+            log.error(
+                "Scheduler-Job %s/%s nach %s Versuchen verworfen",
+                job.kind,
+                job.key,
+                attempts,
+                exc_info=exc,
+            )
+            await self.cancel(job.kind, job.key)
+            return
+        delay = RETRY_DELAYS[min(attempts, len(RETRY_DELAYS)) - 1]
+        log.error(
+            "Scheduler-Job %s/%s fehlgeschlagen, neuer Versuch in %.0fs",
+            job.kind,
+            job.key,
+            delay,
+            exc_info=exc,
+        )
+        retry = ScheduledJob(
+            kind=job.kind,
+            key=job.key,
+            due_at=self._clock() + delay,
+            payload=job.payload,
+            attempts=attempts,
+            persist=job.persist,
+        )
+        await self._add(retry, job)
+
+    async def _run(self) -> None:
+        await self.load()
+        while True:
+            self._wake.clear()
+            await self.run_due()
+            due_at = self.next_due()
+            timeout = MAX_SLEEP_SECONDS
+            if due_at is not None:
+                timeout = min(timeout, max(0.0, due_at - self._clock()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
+            self.stats["wakeups"] += 1
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="deadline-scheduler")
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._task, *self._running) if t is not None]
+        self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------- Persistenz ----------
+
+    async def load(self) -> int:
+        """Lädt persistierte Jobs (einmalig); im Speicher geplante Jobs haben Vorrang.
+
+        Cogs rufen das vor ihrem Abgleich auf, damit sie wiederhergestellte Jobs
+        (inkl. Retry-Zustand) sehen statt sie neu anzulegen.
+        """
+        async with self._load_lock:
+            if self._loaded:
+                return 0
+            self._loaded = True
+            if not self._persist:
+                return 0
+            try:
+                rows = await db.query_all_async(
+                    "SELECT kind, job_key, due_at, payload, attempts FROM scheduled_jobs"
+                )
+            except Exception:
+                log.exception("scheduled_jobs konnten nicht geladen werden")
+                return 0
+            restored = 0
+            for row in rows:
+                kind, key = str(row["kind"]), str(row["job_key"])
+                if (kind, key) in self._jobs:
+                    continue
+                try:
+                    payload = json.loads(row["payload"]) if row["payload"] else {}
+                except (TypeError, ValueError):
+                    payload = {}
+                job = ScheduledJob(
+                    kind=kind,
+                    key=key,
+                    due_at=float(row["due_at"]),
+                    payload=payload,
+                    attempts=int(row["attempts"] or 0),
+                )
+                self._jobs[(kind, key)] = job
+                self._push(job)
+                restored += 1
+            if restored:
+                log.info("Scheduler: %d Job(s) aus scheduled_jobs wiederhergestellt", restored)
+                self._wake.set()
+            return restored
+
+    async def _write(self, job: ScheduledJob) -> None:
+        try:
+            await db.execute_async(
+                _UPSERT_SQL,
+                (
+                    job.kind,
+                    job.key,
+                    job.due_at,
+                    json.dumps(job.payload, separators=(",", ":")),
+                    job.attempts,
+                    self._clock(),
+                ),
+            )
+        except Exception:
+            log.exception("Scheduler-Job %s/%s konnte nicht gespeichert werden", job.kind, job.key)
+
+    async def _delete(self, kind: str, key: str, *, due_at: float | None = None) -> None:
+        try:
+            if due_at is None:
+                await db.execute_async(
+                    "DELETE FROM scheduled_jobs WHERE kind = ? AND job_key = ?", (kind, key)
+                )
+            else:
+                await db.execute_async(
+                    "DELETE FROM scheduled_jobs WHERE kind = ? AND job_key = ? AND due_at = ?",
+                    (kind, key, due_at),
+                )
+        except Exception:
+            log.exception("Scheduler-Job %s/%s konnte nicht gelöscht werden", kind, key)
+
+
+def get_scheduler(bot: Any) -> DeadlineScheduler:
+    """Scheduler des Bots (wird beim ersten Zugriff angelegt, aber nicht gestartet)."""
+    scheduler = getattr(bot, "deadline_scheduler", None)
+    if not isinstance(scheduler, DeadlineScheduler):
+        scheduler = DeadlineScheduler()
+        bot.deadline_scheduler = scheduler
+    return scheduler
@@ -0,0 +1,258 @@
+"""
+Zentrale Auflösung von Anzeigenamen für Dashboard, Public Stats und Cogs.
+
+Reihenfolge: TTL/LRU-Cache -> Guild-Member-Cache des Bots -> eine einzige
+set-basierte Abfrage über member_events, voice_session_log und
+user_co_players (jüngster bekannter Name gewinnt). Einträge werden über
+``invalidate()`` verworfen, sobald sich ein Member umbenennt.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from service import db
+
+log = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = float(os.environ.get("DISPLAY_NAME_CACHE_TTL", "900"))
+CACHE_MAX_ENTRIES = int(os.environ.get("DISPLAY_NAME_CACHE_MAX", "8192"))
+
+_BULK_NAME_SQL = """
+    WITH ids(uid) AS (
+      SELECT DISTINCT CAST(value AS INTEGER) FROM json_each(?)
+    ),
+    candidates(uid, name, ts) AS (
+      SELECT me.user_id, me.display_name, me.timestamp
+      FROM member_events me
+      JOIN ids ON ids.uid = me.user_id
+      UNION ALL
+      SELECT vsl.user_id, vsl.display_name, vsl.ended_at
+      FROM voice_session_log vsl
+      JOIN ids ON ids.uid = vsl.user_id
+      UNION ALL
+      SELECT cp.user_id, cp.user_display_name, cp.last_played_together
+      FROM user_co_players cp
+      JOIN ids ON ids.uid = cp.user_id
+      UNION ALL
+      SELECT cp.co_player_id, cp.co_player_display_name, cp.last_played_together
+      FROM user_co_players cp
+      JOIN ids ON ids.uid = cp.co_player_id
+    ),
+    ranked AS (
+      SELECT uid, name,
+             ROW_NUMBER() OVER (PARTITION BY uid ORDER BY datetime(ts) DESC) AS rn
+      FROM candidates
+      WHERE name IS NOT NULL AND TRIM(name) != ''
+    )
+    SELECT uid, name FROM ranked WHERE rn = 1
+"""
+
+
+class _NameCache:
+    """Thread-sicherer LRU-Cache mit Ablaufzeit; ``None`` = bekannter Fehltreffer."""
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._data: OrderedDict[int, tuple[str | None, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, user_ids: Iterable[int]) -> tuple[dict[int, str | None], list[int]]:
+        found: dict[int, str | None] = {}
+        missing: list[int] = []
+        now = time.monotonic()
+        with self._lock:
+            for uid in user_ids:
+                entry = self._data.get(uid)
+                if entry is None or entry[1] <= now:
+                    if entry is not None:
+                        self._data.pop(uid, None)
+                    missing.append(uid)
+                    continue
+                self._data.move_to_end(uid)
+                found[uid] = entry[0]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, items: dict[int, str | None]) -> None:
+        if not items:
+            return
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for uid, name in items.items():
+                self._data[uid] = (name, expires)
+                self._data.move_to_end(uid)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_CACHE = _NameCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+def _normalize_ids(user_ids: Iterable[Any]) -> list[int]:
+    out: list[int] = []
+    seen: set[int] = set()
+    for raw in user_ids:
+        try:
+            uid = int(raw)
+        except (TypeError, ValueError):
+            continue
+        if uid and uid not in seen:
+            seen.add(uid)
+            out.append(uid)
+    return out
+
+
+def _from_bot(bot: Any, user_ids: list[int]) -> dict[int, str]:
+    """Namen aus dem Member-/User-Cache des Bots (kein API-Call)."""
+    names: dict[int, str] = {}
+    if bot is None:
+        return names
+    guilds = list(getattr(bot, "guilds", None) or [])
+    for uid in user_ids:
+        obj = None
+        for guild in guilds:
+            try:
+                obj = guild.get_member(uid)
+            except Exception:
+                obj = None
+            if obj is not None:
+                break
+        if obj is None:
+            try:
+                obj = bot.get_user(uid)
+            except Exception:
+                obj = None
+        if obj is None:
+            continue
+        name = getattr(obj, "display_name", None) or getattr(obj, "name", None)
+        if name:
+            names[uid] = str(name)
+    return names
+
+
+def _rows_to_names(rows: Iterable[Any]) -> dict[int, str]:
+    return {int(row["uid"]): str(row["name"]) for row in rows if row["name"]}
+
+
+def _query_names(user_ids: list[int]) -> dict[int, str]:
+    try:
+        return _rows_to_names(db.query_all(_BULK_NAME_SQL, (json.dumps(user_ids),)))
+    except sqlite3.OperationalError as exc:
+        log.warning("Bulk-Namensauflösung fehlgeschlagen: %s", exc)
+        return {}
+
+
+async def _query_names_async(user_ids: list[int]) -> dict[int, str]:
+    try:
+        rows = await db.query_all_async(_BULK_NAME_SQL, (json.dumps(user_ids),))
+    except sqlite3.OperationalError as exc:
+        log.warning("Bulk-Namensauflösung fehlgeschlagen: %s", exc)
+        return {}
+    return _rows_to_names(rows)
+
+
+def _split_cached(bot: Any, ids: list[int]) -> tuple[dict[int, str | None], list[int]]:
+    found, missing = _CACHE.get_many(ids)
+    if bot is not None:
+        # Negativ-Einträge trotzdem live prüfen: der Member kann inzwischen im Cache sein.
+        unknown = missing + [uid for uid, name in found.items() if name is None]
+        live = _from_bot(bot, unknown) if unknown else {}
+        if live:
+            _CACHE.put_many(dict(live))
+            found.update(live)
+            missing = [uid for uid in missing if uid not in live]
+    return found, missing
+
+
+def _store_db_result(missing: list[int], resolved: dict[int, str]) -> dict[int, str | None]:
+    batch: dict[int, str | None] = {uid: resolved.get(uid) for uid in missing}
+    _CACHE.put_many(batch)
+    return batch
+
+
+def lookup(user_ids: Iterable[Any], *, bot: Any = None) -> dict[int, str]:
+    """Liefert nur tatsächlich bekannte Namen (ohne ``User <id>``-Fallback)."""
+    ids = _normalize_ids(user_ids)
+    if not ids:
+        return {}
+    found, missing = _split_cached(bot, ids)
+    if missing:
+        found.update(_store_db_result(missing, _query_names(missing)))
+    return {uid: name for uid, name in found.items() if name}
+
+
+async def lookup_async(user_ids: Iterable[Any], *, bot: Any = None) -> dict[int, str]:
+    """Wie ``lookup``, die DB-Abfrage läuft aber im Reader-Executor."""
+    ids = _normalize_ids(user_ids)
+    if not ids:
+        return {}
+    found, missing = _split_cached(bot, ids)
+    if missing:
+        found.update(_store_db_result(missing, await _query_names_async(missing)))
+    return {uid: name for uid, name in found.items() if name}
+
+
+def _with_fallback(ids: list[int], names: dict[int, str]) -> dict[int, str]:
+    return {uid: names.get(uid) or f"User {uid}" for uid in ids}
+
+
+def resolve(user_ids: Iterable[Any], *, bot: Any = None) -> dict[int, str]:
+    """Name für jede ID; Unbekannte erhalten ``User <id>``."""
+    ids = _normalize_ids(user_ids)
+    return _with_fallback(ids, lookup(ids, bot=bot))
+
+
+async def resolve_async(user_ids: Iterable[Any], *, bot: Any = None) -> dict[int, str]:
+    ids = _normalize_ids(user_ids)
+    return _with_fallback(ids, await lookup_async(ids, bot=bot))
+
+
+def remember(user_id: int, name: str | None) -> None:
+    """Extern ermittelten Namen (z.B. via fetch_user) in den Cache legen."""
+    if user_id and name:
+        _CACHE.put_many({int(user_id): str(name)})
+
+
+def invalidate(user_id: int) -> None:
+    _CACHE.invalidate(int(user_id))
+
+
+def clear_cache() -> None:
+    _CACHE.clear()
+
+
+def cache_stats() -> dict[str, Any]:
+    return _CACHE.stats()
@@ -0,0 +1,297 @@
+"""
+Lokaler Retrieval-Index über docs/*.md für die FAQ-Prompts.
+
+Statt den kompletten Doku-Korpus in jeden Prompt zu kopieren, wird jede Datei
+an ihren Markdown-Überschriften in Abschnitte zerlegt und per BM25 bewertet.
+Pro Frage gehen nur die ``top_k`` besten Abschnitte (bis ``max_chars``) an den
+Provider. Der Index wird beim Import gebaut und bei geänderter mtime/Größe
+einer Datei (oder neuen/gelöschten Dateien) beim nächsten Zugriff neu gebaut.
+
+``rank_text_sections`` wendet dasselbe Verfahren auf freien Text an
+(Patchnotes-Kontext), damit auch dort nur passende Ausschnitte landen.
+``conversation_query`` baut die Suchanfrage für Folgefragen aus den letzten
+User-Fragen der Session mit.
+
+Genutzt von: cogs/faq_chat.py, cogs/server_faq.py.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TOP_K = 6
+DEFAULT_MAX_CHARS = 8000
+MAX_CHUNK_CHARS = 2000
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Überschriften sind kurz und treffend - doppelt gewichten.
+TITLE_WEIGHT = 2
+# Folgefragen ("und wie lösche ich ihn?") enthalten oft keine Suchbegriffe.
+HISTORY_TURNS = 3
+
+CONTEXT_HEADER = (
+    "Du hast Zugriff auf folgende Auszüge aus der Server-Dokumentation "
+    "(nach Relevanz zur Frage ausgewählt). Nutze diese als Wissensbasis. "
+    "Erfinde keine Informationen - wenn du dir unsicher bist, sage es.\n"
+)
+NO_MATCH_TEXT = "Keine passenden Abschnitte in der Dokumentation gefunden."
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = frozenset(
+    """
+    aber alle als also am an auch auf aus bei bin bis bist da damit dann das dass
+    dein deine dem den der des dich die dir doch du ein eine einem einen einer es
+    für gibt hab habe hat hier ich ihr im in ist ja kann kein man mein mich mir mit
+    muss nach nicht noch nur ob oder sich sie sind so über um und uns von vom was
+    wer wie wir wird wo zu zum zur the and for how what is are to of in on a an
+    """.split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        tok
+        for tok in _TOKEN_RE.findall(text.lower())
+        if len(tok) > 1 and tok not in _STOPWORDS and not tok.isdigit()
+    ]
+
+
+@dataclass(slots=True)
+class DocChunk:
+    source: str
+    title: str
+    text: str
+
+    def render(self) -> str:
+        label = f"{self.source} - {self.title}" if self.title else self.source
+        return f"=== {label} ===\n{self.text}"
+
+
+def split_sections(text: str, *, source: str = "") -> list[DocChunk]:
+    """Zerlegt Markdown an Überschriften; Titel enthält den Überschriften-Pfad."""
+    chunks: list[DocChunk] = []
+    path: list[tuple[int, str]] = []
+    lines: list[str] = []
+    in_code = False
+
+    def flush() -> None:
+        body = "\n".join(lines).strip()
+        lines.clear()
+        if not body:
+            return
+        title = " > ".join(name for _, name in path)
+        for part in _split_long(body):
+            chunks.append(DocChunk(source=source, title=title, text=part))
+
+    for line in text.splitlines():
+        if line.lstrip().startswith("```"):
+            in_code = not in_code
+        match = None if in_code else _HEADING_RE.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            while path and path[-1][0] >= level:
+                path.pop()
+            path.append((level, match.group(2).strip()))
+            continue
+        lines.append(line)
+    flush()
+    return chunks
+
+
+def _split_long(body: str) -> list[str]:
+    if len(body) <= MAX_CHUNK_CHARS:
+        return [body]
+    parts: list[str] = []
+    current = ""
+    for para in re.split(r"\n\s*\n", body):
+        if current and len(current) + len(para) + 2 > MAX_CHUNK_CHARS:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n\n{para}" if current else para
+        while len(current) > MAX_CHUNK_CHARS:
+            parts.append(current[:MAX_CHUNK_CHARS])
+            current = current[MAX_CHUNK_CHARS:]
+    if current.strip():
+        parts.append(current)
+    return parts
+
+
+class _Bm25:
+    def __init__(self, chunks: list[DocChunk]) -> None:
+        self.chunks = chunks
+        self._tf: list[Counter[str]] = []
+        self._len: list[int] = []
+        df: Counter[str] = Counter()
+        for chunk in chunks:
+            tokens = tokenize(chunk.text) + tokenize(chunk.title) * TITLE_WEIGHT
+            tf = Counter(tokens)
+            self._tf.append(tf)
+            self._len.append(len(tokens))
+            df.update(tf.keys())
+        n = len(chunks)
+        self._avg_len = (sum(self._len) / n) if n else 0.0
+        self._idf = {
+            term: math.log(1.0 + (n - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()
+        }
+
+    def rank(self, query: str) -> list[tuple[float, int]]:
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        if not terms:
+            return []
+        scored: list[tuple[float, int]] = []
+        for idx, tf in enumerate(self._tf):
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._len[idx] / (self._avg_len or 1.0))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (BM25_K1 + 1.0) / (freq + norm)
+            if score > 0.0:
+                scored.append((score, idx))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored
+
+
+def _select(bm25: _Bm25, query: str, *, top_k: int, max_chars: int) -> list[tuple[float, DocChunk]]:
+    picked: list[tuple[float, DocChunk]] = []
+    used = 0
+    for score, idx in bm25.rank(query):
+        if len(picked) >= top_k:
+            break
+        chunk = bm25.chunks[idx]
+        size = len(chunk.render())
+        if picked and used + size > max_chars:
+            continue
+        picked.append((score, chunk))
+        used += size
+    return picked
+
+
+def rank_text_sections(
+    text: str,
+    query: str,
+    *,
+    top_k: int = 3,
+    max_chars: int = 3000,
+    source: str = "",
+) -> str:
+    """Wählt die passendsten Abschnitte aus freiem Text (z.B. Patchnotes)."""
+    if not text or not text.strip():
+        return ""
+    chunks = split_sections(text, source=source)
+    picked = _select(_Bm25(chunks), query, top_k=top_k, max_chars=max_chars)
+    return "\n\n".join(chunk.render() for _, chunk in picked)
+
+
+def conversation_query(
+    messages: list[dict[str, str]], new_question: str, *, turns: int = HISTORY_TURNS
+) -> str:
+    """Suchanfrage aus neuer Frage plus den letzten ``turns`` User-Fragen der Session."""
+    previous = [m["content"] for m in messages if m["role"] == "user"]
+    if previous and previous[-1].strip() == new_question.strip():
+        previous.pop()  # die neue Frage ist bereits gespeichert
+    recent = previous[-turns:] if turns > 0 else []
+    return "\n".join([*recent, new_question])
+
+
+class DocsIndex:
+    """BM25 über Überschriften-Abschnitte aller ``*.md`` in ``docs_path``."""
+
+    def __init__(
+        self,
+        docs_path: Path,
+        *,
+        top_k: int = DEFAULT_TOP_K,
+        max_chars: int = DEFAULT_MAX_CHARS,
+    ) -> None:
+        self.docs_path = Path(docs_path)
+        self.top_k = max(1, int(top_k))
+        self.max_chars = max(500, int(max_chars))
+        self._lock = threading.Lock()
+        self._signature: tuple[tuple[str, int, int], ...] | None = None
+        self._bm25 = _Bm25([])
+        self.builds = 0
+        self.refresh()
+
+    @property
+    def chunks(self) -> list[DocChunk]:
+        return self._bm25.chunks
+
+    def _files(self) -> list[Path]:
+        if not self.docs_path.is_dir():
+            return []
+        return sorted(self.docs_path.glob("*.md"))
+
+    def _current_signature(self) -> tuple[tuple[str, int, int], ...]:
+        signature = []
+        for md_file in self._files():
+            try:
+                stat = md_file.stat()
+            except OSError:
+                continue
+            signature.append((md_file.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def refresh(self) -> bool:
+        """Baut den Index neu, falls sich Dateien geändert haben. True bei Rebuild."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        with self._lock:
+            if signature == self._signature:
+                return False
+            if not self.docs_path.is_dir():
+                log.warning("Docs-Pfad nicht gefunden: %s", self.docs_path)
+            chunks: list[DocChunk] = []
+            for md_file in self._files():
+                try:
+                    content = md_file.read_text(encoding="utf-8")
+                except Exception as exc:
+                    log.warning("Konnte %s nicht lesen: %s", md_file, exc)
+                    continue
+                chunks.extend(split_sections(content, source=md_file.name))
+            self._bm25 = _Bm25(chunks)
+            self._signature = signature
+            self.builds += 1
+            log.info(
+                "FAQ-Docs-Index gebaut: %d Abschnitte aus %d Dateien (%s)",
+                len(chunks),
+                len(signature),
+                self.docs_path,
+            )
+            return True
+
+    def search(
+        self, query: str, *, top_k: int | None = None, max_chars: int | None = None
+    ) -> list[tuple[float, DocChunk]]:
+        self.refresh()
+        return _select(
+            self._bm25,
+            query,
+            top_k=top_k or self.top_k,
+            max_chars=max_chars or self.max_chars,
+        )
+
+    def build_context(self, query: str) -> str:
+        """Dokumentations-Block für den Prompt mit den relevantesten Abschnitten."""
+        hits = self.search(query)
+        if not hits:
+            return CONTEXT_HEADER + NO_MATCH_TEXT
+        return CONTEXT_HEADER + "\n\n".join(chunk.render() for _, chunk in hits)
+
+    def full_context(self) -> str:
+        """Kompletter Korpus (bisheriges Verhalten) - nur für Vergleiche/Benchmarks."""
+        self.refresh()
+        parts = [chunk.render() for chunk in self.chunks]
+        return CONTEXT_HEADER + "\n\n".join(parts) if parts else ""
@@ -0,0 +1,237 @@
+"""
+Idempotency-Store für den MasterBroker.
+
+- Abgeschlossene Antworten liegen in einem LRU (``OrderedDict``) mit fester
+  Obergrenze; Ablauf über einen Min-Heap nach ``expires_at``. ``prune()`` poppt
+  nur fällige Heap-Einträge und ist damit unabhängig von der Tabellengröße.
+- In-flight-Requests haben einen eigenen Deadline-Heap.
+- Optional Write-through nach SQLite (``master_broker_idempotency``), damit ein
+  neu gestarteter Broker kürzlich benutzte Keys weiterhin dedupliziert.
+  Gelesen wird nur bei einem Cache-Miss (PK-Lookup).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from service import db
+
+log = logging.getLogger(__name__)
+
+# Wie oft abgelaufene Zeilen in SQLite gelöscht werden (Sekunden).
+DB_PURGE_INTERVAL_SECONDS = 300.0
+
+
+@dataclass(slots=True)
+class IdempotencyRecord:
+    payload_hash: str
+    response_status: int
+    response_body: dict[str, Any]
+    expires_at: float
+
+
+@dataclass(slots=True)
+class InFlightRequest:
+    payload_hash: str
+    future: asyncio.Future[tuple[int, dict[str, Any]]]
+    deadline: float
+
+
+class IdempotencyStore:
+    """Begrenzter Antwort-Cache mit O(log n)-Ablauf pro Eintrag und optionaler Persistenz."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+        inflight_ttl_seconds: float,
+        persist: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.inflight_ttl_seconds = float(inflight_ttl_seconds)
+        self.persist = bool(persist)
+        self.clock = clock
+
+        self._records: OrderedDict[str, IdempotencyRecord] = OrderedDict()
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._inflight: dict[str, InFlightRequest] = {}
+        self._inflight_heap: list[tuple[float, str]] = []
+        self._last_db_purge = 0.0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    # ---------- abgeschlossene Antworten ----------
+
+    def get(self, key: str) -> IdempotencyRecord | None:
+        record = self._records.get(key)
+        if record is None:
+            return None
+        if record.expires_at <= self.clock():
+            self._records.pop(key, None)
+            return None
+        self._records.move_to_end(key)
+        return record
+
+    def put(
+        self,
+        key: str,
+        *,
+        payload_hash: str,
+        response_status: int,
+        response_body: dict[str, Any],
+    ) -> IdempotencyRecord:
+        record = IdempotencyRecord(
+            payload_hash=payload_hash,
+            response_status=int(response_status),
+            response_body=dict(response_body),
+            expires_at=self.clock() + self.ttl_seconds,
+        )
+        self._insert(key, record)
+        return record
+
+    def _insert(self, key: str, record: IdempotencyRecord) -> None:
+        self._records[key] = record
+        self._records.move_to_end(key)
+        heapq.heappush(self._expiry_heap, (record.expires_at, key))
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+            self.evictions += 1
+        # Verwaiste Heap-Einträge (LRU-evicted/überschrieben) gelegentlich verdichten.
+        if len(self._expiry_heap) > 2 * len(self._records) + 64:
+            self._expiry_heap = [(rec.expires_at, k) for k, rec in self._records.items()]
+            heapq.heapify(self._expiry_heap)
+
+    # ---------- in-flight ----------
+
+    def get_inflight(self, key: str) -> InFlightRequest | None:
+        return self._inflight.get(key)
+
+    def begin_inflight(
+        self, key: str, *, payload_hash: str, future: asyncio.Future[tuple[int, dict[str, Any]]]
+    ) -> InFlightRequest:
+        state = InFlightRequest(
+            payload_hash=payload_hash,
+            future=future,
+            deadline=self.clock() + self.inflight_ttl_seconds,
+        )
+        self._inflight[key] = state
+        heapq.heappush(self._inflight_heap, (state.deadline, key))
+        return state
+
+    def pop_inflight(self, key: str) -> InFlightRequest | None:
+        return self._inflight.pop(key, None)
+
+    # ---------- Ablauf ----------
+
+    def prune(self) -> list[tuple[str, InFlightRequest]]:
+        """
+        Entfernt fällige Einträge; Kosten hängen nur von der Zahl abgelaufener Keys ab.
+
+        Gibt abgelaufene, noch offene In-flight-Requests zurück, damit der Aufrufer
+        deren Waiter mit einem Fehler auflösen kann.
+        """
+        now = self.clock()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            record = self._records.get(key)
+            if record is not None and record.expires_at == expires_at:
+                del self._records[key]
+
+        expired: list[tuple[str, InFlightRequest]] = []
+        heap = self._inflight_heap
+        while heap and heap[0][0] <= now:
+            deadline, key = heapq.heappop(heap)
+            state = self._inflight.get(key)
+            if state is not None and state.deadline == deadline:
+                del self._inflight[key]
+                if not state.future.done():
+                    expired.append((key, state))
+        return expired
+
+    # ---------- SQLite write-through ----------
+
+    async def load(self, key: str) -> IdempotencyRecord | None:
+        """Liest einen noch gültigen Eintrag aus SQLite (nur bei ``persist``)."""
+        if not self.persist:
+            return None
+        try:
+            row = await db.query_one_async(
+                """
+                SELECT payload_hash, response_status, response_body, expires_at
+                FROM master_broker_idempotency
+                WHERE cache_key = ? AND expires_at > ?
+                """,
+                (key, self.clock()),
+            )
+        except Exception:
+            log.warning("Idempotency-Lookup in SQLite fehlgeschlagen (key=%s)", key, exc_info=True)
+            return None
+        if row is None:
+            return None
+        try:
+            body = json.loads(row["response_body"])
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(body, dict):
+            return None
+        return IdempotencyRecord(
+            payload_hash=str(row["payload_hash"]),
+            response_status=int(row["response_status"]),
+            response_body=body,
+            expires_at=float(row["expires_at"]),
+        )
+
+    def restore(self, key: str, record: IdempotencyRecord) -> None:
+        """Übernimmt einen aus SQLite geladenen Eintrag, falls der Key noch fehlt."""
+        if key not in self._records and record.expires_at > self.clock():
+            self._insert(key, record)
+
+    async def write_through(self, key: str, record: IdempotencyRecord) -> None:
+        if not self.persist:
+            return
+        try:
+            await db.execute_async(
+                """
+                INSERT OR REPLACE INTO master_broker_idempotency(
+                  cache_key, payload_hash, response_status, response_body, expires_at
+                ) VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    key,
+                    record.payload_hash,
+                    record.response_status,
+                    json.dumps(record.response_body, ensure_ascii=True, separators=(",", ":")),
+                    record.expires_at,
+                ),
+            )
+            now = self.clock()
+            if now - self._last_db_purge >= DB_PURGE_INTERVAL_SECONDS:
+                self._last_db_purge = now
+                await db.execute_async(
+                    "DELETE FROM master_broker_idempotency WHERE expires_at <= ?", (now,)
+                )
+        except Exception:
+            log.warning("Idempotency-Write-through fehlgeschlagen (key=%s)", key, exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "records": len(self._records),
+            "in_flight": len(self._inflight),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "persist": self.persist,
+        }
@@ -0,0 +1,174 @@
+"""
+Sammel-Erkennung der Join-Quelle bei Join-Bursts.
+
+Pro Join einzeln ``guild.invites()`` abzufragen serialisiert bei einem Raid
+hunderte API-Calls hinter einem Guild-Lock. ``JoinAttributionBatcher`` sammelt
+stattdessen alle Joins einer Guild innerhalb von JOIN_SOURCE_BATCH_WINDOW
+Sekunden und ruft den Flush-Callback EINMAL für den ganzen Batch auf (ein
+Invite-Fetch, ein Snapshot-Write).
+
+``attribute_joins`` verteilt die Invite-Use-Deltas zwischen zwei Snapshots auf
+die Joins des Batches in Ankunftsreihenfolge: jede zusätzliche Nutzung eines
+Codes ist genau ein "Slot", Joins ohne Slot bleiben unzugeordnet.
+
+Genutzt von: user_activity_analyzer.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+JOIN_SOURCE_BATCH_WINDOW = float(os.getenv("JOIN_SOURCE_BATCH_WINDOW_SECONDS", "1.0"))
+JOIN_SOURCE_BATCH_MAX = max(1, int(os.getenv("JOIN_SOURCE_BATCH_MAX", "100")))
+
+INVITE = "invite"
+VANITY = "vanity"
+
+
+@dataclass(slots=True)
+class JoinAttribution:
+    kind: str | None = None
+    code: str | None = None
+    # Anzahl verschiedener Quellen im Batch; > 1 = Zuordnung nur per Reihenfolge
+    sources_in_batch: int = 0
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.sources_in_batch > 1
+
+
+def _uses(info: Mapping[str, Any] | None) -> int:
+    try:
+        return int((info or {}).get("uses") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def invite_use_deltas(
+    before: Mapping[str, Mapping[str, Any]], after: Mapping[str, Mapping[str, Any]]
+) -> list[tuple[str, int]]:
+    """Codes mit gestiegener Nutzung, größtes Delta zuerst."""
+    deltas = [
+        (code, _uses(info) - _uses(before.get(code)))
+        for code, info in after.items()
+        if _uses(info) > _uses(before.get(code))
+    ]
+    deltas.sort(key=lambda item: (-item[1], item[0].lower()))
+    return deltas
+
+
+def attribute_joins(
+    count: int, invite_deltas: list[tuple[str, int]], vanity_delta: int | None = None
+) -> list[JoinAttribution]:
+    """Ordnet ``count`` Joins die Use-Deltas zu (Invites vor Vanity)."""
+    slots: list[tuple[str, str | None]] = []
+    for code, delta in invite_deltas:
+        slots.extend([(INVITE, code)] * delta)
+    if vanity_delta and vanity_delta > 0:
+        slots.extend([(VANITY, None)] * vanity_delta)
+
+    sources = len(set(slots[:count]))
+    result: list[JoinAttribution] = []
+    for index in range(count):
+        if index < len(slots):
+            kind, code = slots[index]
+            result.append(JoinAttribution(kind=kind, code=code, sources_in_batch=sources))
+        else:
+            result.append(JoinAttribution(sources_in_batch=sources))
+    return result
+
+
+class JoinAttributionBatcher:
+    """
+    Sammelt Einträge pro Schlüssel (Guild-ID) über ein kurzes Zeitfenster.
+
+    ``flush(key, items)`` muss pro Eintrag genau ein Ergebnis liefern; jeder
+    ``submit``-Aufrufer bekommt sein Ergebnis zurück. Ein voller Batch
+    (``max_batch``) wird sofort abgeschickt.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Hashable, list[Any]], Awaitable[list[Any]]],
+        *,
+        window_seconds: float = JOIN_SOURCE_BATCH_WINDOW,
+        max_batch: int = JOIN_SOURCE_BATCH_MAX,
+    ) -> None:
+        self._flush = flush
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.max_batch = max(1, int(max_batch))
+        self._pending: dict[Hashable, list[tuple[Any, asyncio.Future[Any]]]] = {}
+        self._timers: dict[Hashable, asyncio.Task[None]] = {}
+        self._running: set[asyncio.Task[None]] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch:
+            timer = self._timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            self._start(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.create_task(
+                self._flush_later(key), name=f"join-attribution.window.{key}"
+            )
+        return await future
+
+    async def _flush_later(self, key: Hashable) -> None:
+        await asyncio.sleep(self.window_seconds)
+        self._timers.pop(key, None)
+        self._start(key)
+
+    def _start(self, key: Hashable) -> None:
+        batch = self._pending.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(key, batch), name=f"join-attribution.flush.{key}")
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, key: Hashable, batch: list[tuple[Any, asyncio.Future[Any]]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self._flush(key, [item for item, _future in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"flush lieferte {len(results)} Ergebnisse für {len(batch)} Einträge"
+                )
+        except asyncio.CancelledError:
+            for _item, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            logger.debug("Join-Batch für %s fehlgeschlagen: %s", key, exc)
+            for _item, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_item, future), result in zip(batch, results, strict=True):
+            if not future.done():
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Bricht offene Fenster/Flushes ab; wartende Aufrufer bekommen CancelledError."""
+        tasks = [*self._timers.values(), *self._running]
+        self._timers.clear()
+        for batch in self._pending.values():
+            for _item, future in batch:
+                future.cancel()
+        self._pending.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
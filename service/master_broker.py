@@ -9,13 +9,17 @@ import logging
 import os
 import secrets
 import time
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
 from dataclasses import dataclass
 from typing import Any
 from urllib.parse import urlsplit
 
 import discord
 from aiohttp import web
+from multidict import CIMultiDict
+
+from service import steam_task_waiters, voice_moves
+from service.idempotency_store import IdempotencyStore, InFlightRequest
 
 logger = logging.getLogger(__name__)
 
@@ -31,21 +35,6 @@ _IDEMPOTENCY_HEADER = "X-Idempotency-Key"
 _REQUEST_ID_HEADER = "X-Request-Id"
 
 
-@dataclass(slots=True)
-class _IdempotencyRecord:
-    payload_hash: str
-    response_status: int
-    response_body: dict[str, Any]
-    created_monotonic: float
-
-
-@dataclass(slots=True)
-class _IdempotencyInFlight:
-    payload_hash: str
-    future: asyncio.Future[tuple[int, dict[str, Any]]]
-    created_monotonic: float
-
-
 @dataclass(slots=True)
 class _IdempotencyDecision:
     should_execute: bool
@@ -72,6 +61,19 @@ class _ResolvedBrokerView:
     should_register: bool = False
 
 
+@dataclass(slots=True)
+class _BatchItemRequest:
+    """Per-item request view so batch items reuse the single-action handlers unchanged."""
+
+    payload: dict[str, Any]
+    headers: CIMultiDict[str]
+    remote: str | None
+    transport: Any = None
+
+    async def json(self) -> dict[str, Any]:
+        return dict(self.payload)
+
+
 class MasterBroker:
     """Localhost-only broker for Discord actions handled by the master runtime."""
 
@@ -82,6 +84,7 @@ class MasterBroker:
         token: str,
         host: str = "127.0.0.1",
         port: int = 8770,
+        persist_idempotency: bool = False,
     ) -> None:
         self.bot = bot
         self.token = str(token or "").strip()
@@ -97,8 +100,6 @@ class MasterBroker:
         self._started = False
         self._lock = asyncio.Lock()
         self._idempotency_lock = asyncio.Lock()
-        self._idempotency_records: dict[str, _IdempotencyRecord] = {}
-        self._idempotency_inflight: dict[str, _IdempotencyInFlight] = {}
 
         self._idempotency_ttl_seconds = self._parse_positive_float(
             os.getenv("MASTER_BROKER_IDEMPOTENCY_TTL_SECONDS"),
@@ -116,6 +117,12 @@ class MasterBroker:
             os.getenv("MASTER_BROKER_IDEMPOTENCY_WAITER_TIMEOUT_SECONDS"),
             default=15.0,
         )
+        self._idempotency = IdempotencyStore(
+            ttl_seconds=self._idempotency_ttl_seconds,
+            max_entries=self._idempotency_max_entries,
+            inflight_ttl_seconds=self._idempotency_inflight_ttl_seconds,
+            persist=persist_idempotency,
+        )
         self._channel_allowlist_enabled, self._allowed_channel_ids = self._read_allowlist(
             "MASTER_BROKER_ALLOWED_CHANNEL_IDS",
             "MASTER_BROKER_ALLOW_CHANNEL_IDS",
@@ -131,6 +138,24 @@ class MasterBroker:
             "MASTER_BROKER_ALLOW_ROLE_IDS",
             "MASTER_BROKER_ROLE_ALLOWLIST_IDS",
         )
+        self._batch_max_items = self._parse_positive_int(
+            os.getenv("MASTER_BROKER_BATCH_MAX_ITEMS"),
+            default=100,
+        )
+        self._batch_max_concurrency = self._parse_positive_int(
+            os.getenv("MASTER_BROKER_BATCH_MAX_CONCURRENCY"),
+            default=4,
+        )
+        self._batch_actions: dict[str, Callable[[web.Request], Awaitable[web.Response]]] = {
+            "send_message": self._handle_send_message,
+            "create_channel": self._handle_create_channel,
+            "delete_channel": self._handle_delete_channel,
+            "send_rich_message": self._handle_send_rich_message,
+            "edit_rich_message": self._handle_edit_rich_message,
+            "add_role": self._handle_add_role,
+            "move_voice": self._handle_move_voice,
+            "get_voice_members": self._handle_get_voice_members,
+        }
 
     @staticmethod
     def _parse_positive_float(raw: str | None, *, default: float) -> float:
@@ -231,6 +256,11 @@ class MasterBroker:
                         "/internal/master/v1/discord/voice-channel/members",
                         self._handle_get_voice_members,
                     ),
+                    web.post("/internal/master/v1/discord/batch", self._handle_batch),
+                    web.post(
+                        "/internal/master/v1/steam/task-finished",
+                        self._handle_steam_task_finished,
+                    ),
                 ]
             )
 
@@ -468,7 +498,7 @@ class MasterBroker:
     @staticmethod
     def _resolve_inflight_future(
         *,
-        state: _IdempotencyInFlight,
+        state: InFlightRequest,
         response_status: int,
         response_body: dict[str, Any],
     ) -> None:
@@ -483,12 +513,18 @@ class MasterBroker:
         idempotency_key: str,
         payload_hash: str,
     ) -> _IdempotencyDecision:
-        now = time.monotonic()
         cache_key = self._idempotency_cache_key(action, idempotency_key)
+        store = self._idempotency
+        # SQLite-Lookup (nur bei Cache-Miss) außerhalb des Locks, damit andere Keys nicht warten.
+        loaded = None
+        if store.persist and store.get(cache_key) is None and not store.get_inflight(cache_key):
+            loaded = await store.load(cache_key)
         async with self._idempotency_lock:
-            self._prune_idempotency_locked(now)
+            self._prune_idempotency_locked()
+            if loaded is not None:
+                store.restore(cache_key, loaded)
 
-            record = self._idempotency_records.get(cache_key)
+            record = store.get(cache_key)
             if record is not None:
                 if record.payload_hash != payload_hash:
                     raise ValueError("idempotency key already used with different payload")
@@ -498,7 +534,7 @@ class MasterBroker:
                     cached_body=dict(record.response_body),
                 )
 
-            in_flight = self._idempotency_inflight.get(cache_key)
+            in_flight = store.get_inflight(cache_key)
             if in_flight is not None:
                 if in_flight.payload_hash != payload_hash:
                     raise ValueError("idempotency key already used with different payload")
@@ -510,11 +546,7 @@ class MasterBroker:
             future: asyncio.Future[tuple[int, dict[str, Any]]] = (
                 asyncio.get_running_loop().create_future()
             )
-            self._idempotency_inflight[cache_key] = _IdempotencyInFlight(
-                payload_hash=payload_hash,
-                future=future,
-                created_monotonic=now,
-            )
+            store.begin_inflight(cache_key, payload_hash=payload_hash, future=future)
             return _IdempotencyDecision(should_execute=True)
 
     async def _complete_idempotent_request(
@@ -527,25 +559,19 @@ class MasterBroker:
         response_body: dict[str, Any],
         cache_response: bool,
     ) -> None:
-        now = time.monotonic()
         cache_key = self._idempotency_cache_key(action, idempotency_key)
         payload_copy = dict(response_body)
+        record = None
         async with self._idempotency_lock:
-            self._prune_idempotency_locked(now)
-            in_flight = self._idempotency_inflight.pop(cache_key, None)
+            self._prune_idempotency_locked()
+            in_flight = self._idempotency.pop_inflight(cache_key)
             if cache_response:
-                self._idempotency_records[cache_key] = _IdempotencyRecord(
+                record = self._idempotency.put(
+                    cache_key,
                     payload_hash=payload_hash,
                     response_status=response_status,
-                    response_body=dict(payload_copy),
-                    created_monotonic=now,
+                    response_body=payload_copy,
                 )
-                if len(self._idempotency_records) > self._idempotency_max_entries:
-                    oldest_key = min(
-                        self._idempotency_records,
-                        key=lambda item: self._idempotency_records[item].created_monotonic,
-                    )
-                    self._idempotency_records.pop(oldest_key, None)
 
             if in_flight is not None:
                 self._resolve_inflight_future(
@@ -553,6 +579,8 @@ class MasterBroker:
                     response_status=response_status,
                     response_body=payload_copy,
                 )
+        if record is not None:
+            await self._idempotency.write_through(cache_key, record)
 
     async def _fail_idempotent_request(
         self,
@@ -570,7 +598,7 @@ class MasterBroker:
             message=message,
         )
         async with self._idempotency_lock:
-            state = self._idempotency_inflight.pop(cache_key, None)
+            state = self._idempotency.pop_inflight(cache_key)
             if state is None:
                 return
             self._resolve_inflight_future(
@@ -614,30 +642,8 @@ class MasterBroker:
                 message="idempotent operation could not be finalized",
             )
 
-    def _prune_idempotency_locked(self, now: float) -> None:
-        stale_records = [
-            key
-            for key, record in self._idempotency_records.items()
-            if now - record.created_monotonic > self._idempotency_ttl_seconds
-        ]
-        for key in stale_records:
-            self._idempotency_records.pop(key, None)
-
-        stale_in_flight = [
-            key for key, state in self._idempotency_inflight.items() if state.future.done()
-        ]
-        for key in stale_in_flight:
-            self._idempotency_inflight.pop(key, None)
-
-        stale_pending_in_flight = [
-            key
-            for key, state in self._idempotency_inflight.items()
-            if now - state.created_monotonic > self._idempotency_inflight_ttl_seconds
-        ]
-        for key in stale_pending_in_flight:
-            state = self._idempotency_inflight.pop(key, None)
-            if state is None:
-                continue
+    def _prune_idempotency_locked(self) -> None:
+        for key, state in self._idempotency.prune():
             payload = self._inflight_failure_payload(
                 idempotency_key=self._idempotency_key_from_cache_key(key),
                 code="idempotency_expired",
@@ -1121,6 +1127,36 @@ class MasterBroker:
             },
         )
 
+    async def _handle_steam_task_finished(self, request: web.Request) -> web.Response:
+        rejected = self._authorize(request)
+        if rejected is not None:
+            return rejected
+
+        try:
+            payload = await self._read_json_object(request)
+            task_id = self._parse_positive_payload_int(payload, "task_id")
+        except ValueError as exc:
+            return self._error_response(
+                request=request,
+                status=400,
+                code="bad_request",
+                message=str(exc),
+            )
+        except Exception:
+            return self._error_response(
+                request=request,
+                status=400,
+                code="bad_request",
+                message="invalid JSON payload",
+            )
+
+        # Nur Weckruf: Status/Ergebnis liest der Waiter selbst aus steam_tasks.
+        woken = steam_task_waiters.notify(task_id)
+        return self._success_response(
+            request=request,
+            result={"task_id": task_id, "waiting": woken},
+        )
+
     async def _handle_send_message(self, request: web.Request) -> web.Response:
         rejected = self._authorize(request)
         if rejected is not None:
@@ -1937,15 +1973,15 @@ class MasterBroker:
                         idempotency_key=idempotency_key,
                     )
 
-            try:
-                await member.move_to(channel)
-            except Exception as exc:
+            move = await voice_moves.move_member(member, channel)
+            if not move.ok:
                 logger.error(
-                    "Master broker move_voice failed (guild=%s user=%s channel=%s): %s",
+                    "Master broker move_voice failed (guild=%s user=%s channel=%s): %s %s",
                     guild_id,
                     user_id,
                     channel_id,
-                    exc,
+                    move.status,
+                    _safe_log_value(move.error),
                 )
                 return self._error_response(
                     request=request,
@@ -2038,5 +2074,176 @@ class MasterBroker:
             },
         )
 
+    def _parse_batch_payload(
+        self, payload: dict[str, Any]
+    ) -> tuple[list[tuple[str, str | None, dict[str, Any]]], int]:
+        actions = payload.get("actions")
+        if not isinstance(actions, list) or not actions:
+            raise ValueError("actions must be a non-empty list")
+        if len(actions) > self._batch_max_items:
+            raise ValueError(f"batch exceeds {self._batch_max_items} actions")
+
+        items: list[tuple[str, str | None, dict[str, Any]]] = []
+        for index, raw in enumerate(actions):
+            if not isinstance(raw, dict):
+                raise ValueError(f"actions[{index}] must be an object")
+            action = str(raw.get("action") or "").strip()
+            if action not in self._batch_actions:
+                raise ValueError(f"actions[{index}].action {action!r} is not supported")
+            item_payload = raw.get("payload")
+            if not isinstance(item_payload, dict):
+                raise ValueError(f"actions[{index}].payload must be an object")
+            key = str(raw.get("idempotency_key") or "").strip() or None
+            items.append((action, key, item_payload))
+
+        concurrency = self._batch_max_concurrency
+        if payload.get("concurrency") is not None:
+            concurrency = min(
+                self._parse_positive_payload_int(payload, "concurrency"),
+                self._batch_max_concurrency,
+            )
+        return items, concurrency
+
+    def _batch_item_request(
+        self,
+        request: web.Request,
+        *,
+        index: int,
+        idempotency_key: str | None,
+        payload: dict[str, Any],
+    ) -> _BatchItemRequest:
+        headers: CIMultiDict[str] = CIMultiDict()
+        headers[_INTERNAL_TOKEN_HEADER] = request.headers.get(_INTERNAL_TOKEN_HEADER) or ""
+        headers[_REQUEST_ID_HEADER] = f"{self._request_id(request)}.{index}"
+        if idempotency_key:
+            headers[_IDEMPOTENCY_HEADER] = idempotency_key
+        return _BatchItemRequest(
+            payload=payload,
+            headers=headers,
+            remote=request.remote,
+            transport=getattr(request, "transport", None),
+        )
+
+    async def _iter_batch_results(
+        self,
+        request: web.Request,
+        items: list[tuple[str, str | None, dict[str, Any]]],
+        *,
+        concurrency: int,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Runs batch items (started in list order) and yields one line per finished item."""
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _run_item(index: int) -> dict[str, Any]:
+            action, key, item_payload = items[index]
+            item_request = self._batch_item_request(
+                request, index=index, idempotency_key=key, payload=item_payload
+            )
+            async with semaphore:
+                try:
+                    response = await self._batch_actions[action](item_request)
+                except Exception:
+                    logger.exception(
+                        "Master broker batch item crashed (action=%s key=%s)",
+                        _safe_log_value(action),
+                        _safe_log_value(key),
+                    )
+                    response = self._error_response(
+                        request=item_request,
+                        status=500,
+                        code="internal_error",
+                        message="internal broker error",
+                        idempotency_key=key,
+                    )
+            body = self._response_payload(response)
+            return {
+                "type": "item",
+                "index": index,
+                "action": action,
+                "status": response.status,
+                **body,
+            }
+
+        tasks = [asyncio.create_task(_run_item(index)) for index in range(len(items))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _handle_batch(self, request: web.Request) -> web.StreamResponse:
+        rejected = self._authorize(request)
+        if rejected is not None:
+            return rejected
+
+        try:
+            payload = await self._read_json_object(request)
+            items, concurrency = self._parse_batch_payload(payload)
+        except ValueError as exc:
+            return self._error_response(
+                request=request,
+                status=400,
+                code="bad_request",
+                message=str(exc),
+            )
+        except Exception:
+            return self._error_response(
+                request=request,
+                status=400,
+                code="bad_request",
+                message="invalid JSON payload",
+            )
+
+        request_id = self._request_id(request)
+        response = web.StreamResponse(
+            status=200,
+            headers={"Content-Type": "application/x-ndjson", _REQUEST_ID_HEADER: request_id},
+        )
+        await response.prepare(request)
+
+        started = time.monotonic()
+        succeeded = 0
+        failed = 0
+        client_gone = False
+        async for line in self._iter_batch_results(request, items, concurrency=concurrency):
+            if line.get("ok"):
+                succeeded += 1
+            else:
+                failed += 1
+            if client_gone:
+                continue
+            try:
+                await response.write(self._ndjson_line(line))
+            except (ConnectionResetError, RuntimeError):
+                # Aktionen laufen weiter, damit Idempotency-Einträge sauber abschließen;
+                # der Client holt Ergebnisse per Retry mit denselben Keys ab.
+                client_gone = True
+
+        summary = {
+            "type": "summary",
+            "request_id": request_id,
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        if not client_gone:
+            try:
+                await response.write(self._ndjson_line(summary))
+                await response.write_eof()
+            except (ConnectionResetError, RuntimeError):
+                pass
+        return response
+
+    @staticmethod
+    def _ndjson_line(payload: dict[str, Any]) -> bytes:
+        return (json.dumps(payload, ensure_ascii=True, separators=(",", ":")) + "\n").encode(
+            "utf-8"
+        )
+
 
 __all__ = ["MasterBroker"]
@@ -0,0 +1,103 @@
+"""
+Permission-Overwrite-Planer für Voice-Kanäle.
+
+Statt pro Rolle/Member ein ``set_permissions`` (je ein HTTP-Call auf denselben
+Kanal-Bucket) abzusetzen, beschreiben Aufrufer nur die gewünschten Änderungen
+(``target -> PermissionOverwrite`` bzw. ``None`` zum Entfernen). Der Planer
+bildet daraus die komplette Ziel-Map, vergleicht sie mit ``channel.overwrites``
+und schickt sie in EINEM ``channel.edit(overwrites=...)``; ohne Änderung gibt
+es gar keinen Call.
+
+Genutzt von: tempvoice/core.py (MinRank, Sprachfilter, Owner-Bans),
+rank_voice_manager.py (Rang-Overwrites).
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+Overwrites = dict[Any, discord.PermissionOverwrite]
+
+
+@dataclass(slots=True)
+class OverwritePlan:
+    target: Overwrites
+    added: list[Any] = field(default_factory=list)
+    changed: list[Any] = field(default_factory=list)
+    removed: list[Any] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def plan_overwrites(
+    current: Mapping[Any, discord.PermissionOverwrite],
+    updates: Mapping[Any, discord.PermissionOverwrite | None],
+) -> OverwritePlan:
+    """
+    Ziel-Map = ``current`` mit ``updates`` überlagert.
+
+    ``None`` oder ein leerer Overwrite entfernt das Target; nicht genannte
+    Targets bleiben unverändert.
+    """
+    target: Overwrites = dict(current)
+    plan = OverwritePlan(target=target)
+    for key, overwrite in updates.items():
+        before = current.get(key)
+        if overwrite is None or overwrite.is_empty():
+            if before is not None:
+                target.pop(key, None)
+                plan.removed.append(key)
+            continue
+        if before is None:
+            plan.added.append(key)
+        elif before == overwrite:
+            continue
+        else:
+            plan.changed.append(key)
+        target[key] = overwrite
+    return plan
+
+
+def drop_targets(
+    current: Mapping[Any, discord.PermissionOverwrite], predicate: Callable[[Any], bool]
+) -> dict[Any, None]:
+    """Updates, die alle Targets entfernen, für die ``predicate`` zutrifft."""
+    return {key: None for key in current if predicate(key)}
+
+
+async def apply_overwrites(
+    channel: Any,
+    updates: Mapping[Any, discord.PermissionOverwrite | None],
+    *,
+    reason: str | None = None,
+) -> bool:
+    """
+    Wendet ``updates`` mit höchstens einem ``channel.edit`` an.
+
+    Gibt ``True`` zurück, wenn ein Edit gesendet wurde. Discord-Fehler werden
+    an den Aufrufer weitergereicht.
+    """
+    if not updates:
+        return False
+    plan = plan_overwrites(channel.overwrites, updates)
+    if not plan.has_changes:
+        return False
+    await channel.edit(overwrites=plan.target, reason=reason)
+    logger.debug(
+        "Overwrites für %s: +%d ~%d -%d (%s)",
+        getattr(channel, "id", "?"),
+        len(plan.added),
+        len(plan.changed),
+        len(plan.removed),
+        reason,
+    )
+    return True
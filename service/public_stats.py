@@ -26,7 +26,7 @@ from urllib.parse import urlsplit
 
 from aiohttp import ClientSession, ClientTimeout, web
 
-from service import db
+from service import db, display_names
 
 log = logging.getLogger(__name__)
 
@@ -119,32 +119,92 @@ def _load_html() -> str:
         raise
 
 
-def _estimate_rank_from_co_players(user_id: int, co_players: list[int]) -> str | None:
-    """Estimate rank for a player with no rank based on their co-players' ranks."""
-    if len(co_players) < 3:
-        return None
+def _load_user_ranks(user_ids: Iterable[int]) -> dict[int, tuple[str | None, int | None]]:
+    """Loads (rank_name, subrank) for all given users with one set-based query."""
+    ids = sorted({int(uid) for uid in user_ids if uid})
+    if not ids:
+        return {}
+    rows = db.query_all(
+        """
+        SELECT user_id, rank_name, subrank
+        FROM user_rank_snapshot
+        WHERE user_id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(ids),),
+    )
+    return {int(row["user_id"]): (row["rank_name"], row["subrank"]) for row in rows}
 
-    rank_scores = []
-    for cp_id in co_players:
-        row = db.query_one(
-            """
-            SELECT deadlock_rank_name, deadlock_subrank
-            FROM steam_links
-            WHERE user_id = ? AND verified = 1
-            ORDER BY primary_account DESC, deadlock_rank_updated_at DESC
-            LIMIT 1
-            """,
-            (cp_id,),
-        )
-        if row and row["deadlock_rank_name"]:
-            score = _rank_to_score(row["deadlock_rank_name"], row["deadlock_subrank"] or 3)
-            rank_scores.append(score)
 
-    if not rank_scores:
+class _RankResolver:
+    """Per-request rank lookup: bulk-loaded ranks, memoized co-player estimates."""
+
+    def __init__(self) -> None:
+        self._ranks: dict[int, tuple[str | None, int | None]] = {}
+        self._loaded: set[int] = set()
+        self._estimates: dict[tuple[int, str], str | None] = {}
+
+    def preload(self, user_ids: Iterable[int]) -> None:
+        missing = {int(uid) for uid in user_ids if uid} - self._loaded
+        if not missing:
+            return
+        self._ranks.update(_load_user_ranks(missing))
+        self._loaded |= missing
+
+    def preload_sessions(self, rows: Iterable[Any]) -> None:
+        """Loads ranks for session users, then for co-players of the unranked ones."""
+        rows = list(rows)
+        self.preload(row["user_id"] for row in rows)
+        co_player_ids: set[int] = set()
+        for row in rows:
+            if self.rank(row["user_id"]):
+                continue
+            co_player_ids.update(self._parse_co_players(row["co_player_ids"]))
+        self.preload(co_player_ids)
+
+    def rank(self, user_id: int) -> str | None:
+        self.preload((user_id,))
+        name = self._ranks.get(int(user_id), (None, None))[0]
+        if name and name.lower() in RANK_ORDER:
+            return name.lower()
         return None
 
-    avg_score = sum(rank_scores) / len(rank_scores)
-    return _score_to_bucket(avg_score)
+    def estimate(self, user_id: int, co_players_raw: str | None) -> str | None:
+        """Estimate rank for a player with no rank based on their co-players' ranks."""
+        key = (int(user_id), co_players_raw or "[]")
+        if key in self._estimates:
+            return self._estimates[key]
+        co_players = self._parse_co_players(co_players_raw)
+        estimate: str | None = None
+        if len(co_players) >= 3:
+            self.preload(co_players)
+            rank_scores = []
+            for cp_id in co_players:
+                name, subrank = self._ranks.get(cp_id, (None, None))
+                if name:
+                    rank_scores.append(_rank_to_score(name, subrank or 3))
+            if rank_scores:
+                estimate = _score_to_bucket(sum(rank_scores) / len(rank_scores))
+        self._estimates[key] = estimate
+        return estimate
+
+    def rank_or_estimate(self, user_id: int, co_players_raw: str | None) -> str | None:
+        return self.rank(user_id) or self.estimate(user_id, co_players_raw)
+
+    @staticmethod
+    def _parse_co_players(raw: str | None) -> list[int]:
+        try:
+            decoded = json.loads(raw or "[]")
+        except Exception:
+            return []
+        if not isinstance(decoded, list):
+            return []
+        co_players: list[int] = []
+        for value in decoded:
+            try:
+                co_players.append(int(value))
+            except (TypeError, ValueError):
+                continue
+        return co_players
 
 
 def _rank_to_score(rank_name: str, subrank: int) -> float:
@@ -381,25 +441,7 @@ def _safe_query_one(
 
 
 def _resolve_display_names(user_ids: Iterable[int]) -> dict[int, str]:
-    names: dict[int, str] = {}
-    unique_ids = sorted({int(uid) for uid in user_ids if uid})
-    for uid in unique_ids:
-        row = _safe_query_one(
-            """
-            SELECT display_name
-            FROM member_events
-            WHERE user_id = ?
-              AND display_name IS NOT NULL
-              AND TRIM(display_name) != ''
-            ORDER BY datetime(timestamp) DESC, id DESC
-            LIMIT 1
-            """,
-            (uid,),
-            optional_tables=("member_events",),
-        )
-        name = (row["display_name"] if row else None) or f"User {uid}"
-        names[uid] = str(name)
-    return names
+    return display_names.resolve(user_ids)
 
 
 def _discord_avatar_url(user_id: str | int | None, avatar_hash: str | None) -> str | None:
@@ -564,6 +606,8 @@ async def handle_activity_heatmap(request: web.Request) -> web.Response:
         heatmap[rank] = {d: {h: [] for h in range(24)} for d in range(7)}
 
     # Users without rank get assigned via co-player heuristic
+    ranks = _RankResolver()
+    ranks.preload_sessions(rows)
     no_rank_users: dict[int, str] = {}  # user_id -> estimated bucket
 
     for row in rows:
@@ -575,25 +619,17 @@ async def handle_activity_heatmap(request: web.Request) -> web.Response:
         day = (started.weekday()) % 7
         hour = started.hour
         user_id = row["user_id"]
-        co_players_raw = row["co_player_ids"] or "[]"
-        channel_name = row["channel_name"]
 
         # Determine rank for this user
-        user_rank = _get_user_rank(user_id)
+        user_rank = ranks.rank(user_id)
         if not user_rank:
             # Try heuristic via co-players
             if user_id in no_rank_users:
                 user_rank = no_rank_users[user_id]
             else:
-                try:
-                    co_ids = json.loads(co_players_raw)
-                    if isinstance(co_ids, list):
-                        estimated = _estimate_rank_from_co_players(user_id, co_ids)
-                        user_rank = estimated
-                        if estimated:
-                            no_rank_users[user_id] = estimated
-                except Exception:
-                    user_rank = None
+                user_rank = ranks.estimate(user_id, row["co_player_ids"])
+                if user_rank:
+                    no_rank_users[user_id] = user_rank
 
         if not user_rank:
             continue
@@ -644,6 +680,7 @@ async def handle_rank_distribution(request: web.Request) -> web.Response:
             rank_counts[name] = row["cnt"]
 
     # Activity by rank over last 30 days (weekly buckets)
+    ranks = _RankResolver()
     weekly = []
     for week in range(weeks_count):
         week_start = now - timedelta(weeks=week + 1)
@@ -657,12 +694,13 @@ async def handle_rank_distribution(request: web.Request) -> web.Response:
             """,
             (week_start.isoformat(), week_end.isoformat()),
         )
+        ranks.preload(row["user_id"] for row in week_rows)
         seen_users: set[int] = set()
         for row in week_rows:
             uid = row["user_id"]
             if uid in seen_users:
                 continue
-            rank = _get_user_rank(uid)
+            rank = ranks.rank(uid)
             if rank and rank in week_data:
                 week_data[rank] += 1
                 seen_users.add(uid)
@@ -713,6 +751,8 @@ async def handle_lane_preferences(request: web.Request) -> web.Response:
         "new_player": set(),
         "unknown": set(),
     }
+    ranks = _RankResolver()
+    ranks.preload_sessions(rows)
 
     for row in rows:
         lane = _detect_lane_from_name(row["channel_name"]) or "unknown"
@@ -722,16 +762,8 @@ async def handle_lane_preferences(request: web.Request) -> web.Response:
         if user_id in seen_users_per_lane[lane]:
             continue
 
-        rank = _get_user_rank(user_id)
-        if not rank:
-            # heuristic
-            try:
-                co_ids = json.loads(row["co_player_ids"] or "[]")
-                rank = _estimate_rank_from_co_players(
-                    user_id, co_ids if isinstance(co_ids, list) else []
-                )
-            except Exception:
-                rank = None
+        # Rank or co-player heuristic
+        rank = ranks.rank_or_estimate(user_id, row["co_player_ids"])
 
         if rank and rank in lane_rank_data:
             lane_rank_data[rank][lane] += 1
@@ -831,6 +863,8 @@ async def handle_timeline(request: web.Request) -> web.Response:
     # Build hourly aggregates
     hourly: dict[int, dict[str, int]] = {h: {r: 0 for r in RANK_ORDER} for h in range(24)}
     hourly_hours: dict[int, dict[str, float]] = {h: {r: 0.0 for r in RANK_ORDER} for h in range(24)}
+    ranks = _RankResolver()
+    ranks.preload_sessions(rows)
     for row in rows:
         try:
             started = datetime.fromisoformat(row["started_at"])
@@ -838,15 +872,7 @@ async def handle_timeline(request: web.Request) -> web.Response:
             continue
 
         hour = started.hour
-        rank = _get_user_rank(row["user_id"])
-        if not rank:
-            try:
-                co_ids = json.loads(row["co_player_ids"] or "[]")
-                rank = _estimate_rank_from_co_players(
-                    row["user_id"], co_ids if isinstance(co_ids, list) else []
-                )
-            except Exception:
-                rank = None
+        rank = ranks.rank_or_estimate(row["user_id"], row["co_player_ids"])
         if rank and rank in hourly[hour]:
             hourly[hour][rank] += 1
             duration = row["duration_seconds"] or 0
@@ -919,13 +945,13 @@ async def handle_voice_history(request: web.Request) -> web.Response:
         # Daily summary (last N days)
         daily_rows = db.query_all(
             """
-            SELECT date(started_at) AS day,
-                   SUM(duration_seconds) AS total_seconds,
-                   COUNT(*) AS sessions,
+            SELECT date(hour) AS day,
+                   SUM(total_seconds) AS total_seconds,
+                   SUM(sessions) AS sessions,
                    COUNT(DISTINCT user_id) AS unique_users
-            FROM voice_session_log
-            WHERE started_at >= datetime('now', ?)
-            GROUP BY date(started_at)
+            FROM voice_rollup_hourly
+            WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+            GROUP BY date(hour)
             ORDER BY day DESC
             """,
             (cutoff,),
@@ -934,11 +960,11 @@ async def handle_voice_history(request: web.Request) -> web.Response:
         # Overall summary
         summary_rows = db.query_all(
             """
-            SELECT COUNT(*) AS total_sessions,
-                   COALESCE(SUM(duration_seconds), 0) AS total_seconds,
+            SELECT COALESCE(SUM(sessions), 0) AS total_sessions,
+                   COALESCE(SUM(total_seconds), 0) AS total_seconds,
                    COUNT(DISTINCT user_id) AS total_users
-            FROM voice_session_log
-            WHERE started_at >= datetime('now', ?)
+            FROM voice_rollup_hourly
+            WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
             """,
             (cutoff,),
         )
@@ -954,20 +980,21 @@ async def handle_voice_history(request: web.Request) -> web.Response:
             WITH grouped AS (
                 SELECT
                     CASE
-                        WHEN ? = 'hour' THEN strftime('%H', started_at)
-                        WHEN ? = 'day' THEN strftime('%w', started_at)
-                        WHEN ? = 'week' THEN strftime('%Y-%W', started_at)
-                        ELSE strftime('%Y-%m', started_at)
+                        WHEN ? = 'hour' THEN strftime('%H', hour)
+                        WHEN ? = 'day' THEN strftime('%w', hour)
+                        WHEN ? = 'week' THEN strftime('%Y-%W', hour)
+                        ELSE strftime('%Y-%m', hour)
                     END AS bucket,
-                    duration_seconds,
-                    COALESCE(peak_users, 0) AS peak_users
-                FROM voice_session_log
-                WHERE started_at >= datetime('now', ?)
+                    total_seconds,
+                    sessions,
+                    sum_peak
+                FROM voice_rollup_hourly
+                WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
             )
             SELECT bucket,
-                   SUM(duration_seconds) AS total_seconds,
-                   COUNT(*) AS sessions,
-                   SUM(peak_users) AS sum_peak
+                   SUM(total_seconds) AS total_seconds,
+                   SUM(sessions) AS sessions,
+                   SUM(sum_peak) AS sum_peak
             FROM grouped
             GROUP BY bucket
             ORDER BY bucket
@@ -1822,6 +1849,8 @@ async def handle_best_times(request: web.Request) -> web.Response:
         d: {h: [] for h in range(24)} for d in range(7)
     }
 
+    ranks = _RankResolver()
+    ranks.preload_sessions(rows)
     for row in rows:
         try:
             started = datetime.fromisoformat(row["started_at"])
@@ -1830,15 +1859,7 @@ async def handle_best_times(request: web.Request) -> web.Response:
 
         hour = started.hour
         day = started.weekday() % 7
-        user_rank = _get_user_rank(row["user_id"])
-        if not user_rank:
-            try:
-                co_ids = json.loads(row["co_player_ids"] or "[]")
-                user_rank = _estimate_rank_from_co_players(
-                    row["user_id"], co_ids if isinstance(co_ids, list) else []
-                )
-            except Exception:
-                user_rank = None
+        user_rank = ranks.rank_or_estimate(row["user_id"], row["co_player_ids"])
 
         if user_rank == rank:
             hourly_counts[hour] += 1
@@ -1995,24 +2016,3 @@ class PublicStatsServer:
             await self._runner.cleanup()
             self._runner = None
             log.info("PublicStatsServer gestoppt")
-
-
-# ── Helper ─────────────────────────────────────────────────────────────────────
-
-
-def _get_user_rank(user_id: int) -> str | None:
-    row = db.query_one(
-        """
-        SELECT deadlock_rank_name
-        FROM steam_links
-        WHERE user_id = ? AND verified = 1
-        ORDER BY primary_account DESC, deadlock_rank_updated_at DESC
-        LIMIT 1
-        """,
-        (user_id,),
-    )
-    if row and row["deadlock_rank_name"]:
-        name = row["deadlock_rank_name"].lower()
-        if name in RANK_ORDER:
-            return name
-    return None
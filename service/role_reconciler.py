@@ -0,0 +1,313 @@
+"""
+Rollen-Abgleich per Mengen-Differenz plus Token-Bucket-Executor.
+
+``RoleReconciler.plan`` vergleicht den Soll-Zustand (z.B. verifizierte IDs aus
+der DB) mit den aktuellen Rolleninhabern und dem Member-Cache und liefert nur
+das Delta:
+
+- ``add``: im Cache, Rolle fehlt (kostet keinen Lookup);
+- ``fetch_add``: nicht im Cache und seit dem letzten Lauf neu bzw. per
+  ``touched`` (z.B. ``steam_links.updated_at``) geändert -> einmal fetchen;
+- ``remove``: hat die Rolle, ist aber nicht mehr gewünscht.
+
+IDs, die schon im letzten Lauf gewünscht und nicht auflösbar waren, kosten
+keinen erneuten ``fetch_member``. Unverändert = kein einziger API-Call.
+Ohne Member-Chunking fehlen viele Inhaber in ``role.members``; hat ein erst
+beim Anwenden aufgelöster Member die Rolle schon, gilt das als ``UNCHANGED``.
+
+``apply_role_changes`` führt das Delta über einen adaptiven ``TokenBucket``
+aus: 429-Antworten (``Retry-After`` / ``X-RateLimit-*``) pausieren den Bucket
+und halbieren die Rate, Erfolge erhöhen sie wieder schrittweise.
+
+Genutzt von: steam_verified_role.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+import discord
+
+from service.discord_utils import _discord_retry_after_seconds, is_transient_discord_http_error
+
+logger = logging.getLogger(__name__)
+
+ADD = "add"
+REMOVE = "remove"
+
+APPLIED = "applied"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+SKIPPED = "skipped"
+FORBIDDEN = "forbidden"
+RATE_LIMITED = "rate_limited"
+HTTP_ERROR = "http_error"
+ERROR = "error"
+
+# Ergebnisse, die im nächsten Lauf nicht erneut versucht werden müssen.
+_SETTLED = {APPLIED, UNCHANGED, NOT_FOUND, FORBIDDEN}
+# Obergrenze, damit ein kaputter Header den Lauf nicht ewig blockiert.
+MAX_PAUSE_SECONDS = 60.0
+
+
+def _header_float(headers: Mapping[str, Any] | None, name: str) -> float | None:
+    if not headers:
+        return None
+    raw = headers.get(name)
+    if raw is None:
+        return None
+    try:
+        return float(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Token-Bucket mit AIMD-Anpassung an Discords Rate-Limit-Antworten."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        *,
+        min_rate: float | None = None,
+        max_rate: float | None = None,
+        recovery_step: float = 0.25,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.min_rate = float(min_rate if min_rate is not None else rate / 8)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.recovery_step = float(recovery_step)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._resume_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Wartezeit bis zum nächsten Token (0 = sofort)."""
+        now = self._clock()
+        if self._resume_at > now:
+            return self._resume_at - now
+        self._refill(now)
+        if self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while (wait := self.delay()) > 0:
+                await asyncio.sleep(wait)
+            self._tokens -= 1.0
+
+    def pause(self, seconds: float) -> None:
+        seconds = min(MAX_PAUSE_SECONDS, max(0.0, float(seconds)))
+        self._resume_at = max(self._resume_at, self._clock() + seconds)
+        self._tokens = 0.0
+
+    def on_success(self) -> None:
+        self.rate = min(self.max_rate, self.rate + self.recovery_step)
+
+    def on_rate_limited(
+        self, retry_after: float | None, headers: Mapping[str, Any] | None = None
+    ) -> None:
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.observe(headers)
+        self.pause(retry_after if retry_after is not None else 1.0)
+
+    def observe(self, headers: Mapping[str, Any] | None) -> None:
+        """Passt sich an ``X-RateLimit-Remaining`` / ``X-RateLimit-Reset-After`` an."""
+        remaining = _header_float(headers, "X-RateLimit-Remaining")
+        reset_after = _header_float(headers, "X-RateLimit-Reset-After")
+        if remaining is None or reset_after is None or reset_after <= 0:
+            return
+        if remaining < 1:
+            self.pause(reset_after)
+            return
+        # Restbudget gleichmäßig über das Fenster verteilen
+        self.rate = min(self.max_rate, max(self.min_rate, remaining / reset_after))
+
+
+@dataclass(slots=True)
+class RoleChange:
+    user_id: int
+    action: str
+    status: str = ERROR
+    attempts: int = 0
+    member: Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == APPLIED
+
+
+@dataclass(slots=True)
+class RoleDelta:
+    add: list[int]
+    fetch_add: list[int]
+    remove: list[int]
+
+    @property
+    def changes(self) -> list[tuple[int, str]]:
+        return (
+            [(uid, ADD) for uid in self.add]
+            + [(uid, ADD) for uid in self.fetch_add]
+            + [(uid, REMOVE) for uid in self.remove]
+        )
+
+    def __bool__(self) -> bool:
+        return bool(self.add or self.fetch_add or self.remove)
+
+
+class RoleReconciler:
+    """Merkt sich den zuletzt angewendeten Soll-Zustand und plant nur Deltas."""
+
+    def __init__(self) -> None:
+        self._applied: set[int] | None = None
+
+    @property
+    def synced(self) -> bool:
+        return self._applied is not None
+
+    def reset(self) -> None:
+        """Nächster ``plan`` betrachtet wieder alle gewünschten IDs als neu."""
+        self._applied = None
+
+    def plan(
+        self,
+        desired: Iterable[int],
+        *,
+        holders: Iterable[int],
+        cached: Iterable[int],
+        touched: Iterable[int] = (),
+    ) -> RoleDelta:
+        desired_set = set(desired)
+        holder_set = set(holders)
+        cached_set = set(cached)
+        if self._applied is None:
+            new = desired_set
+        else:
+            new = (desired_set - self._applied) | (desired_set & set(touched))
+        return RoleDelta(
+            add=sorted((desired_set & cached_set) - holder_set),
+            fetch_add=sorted(new - cached_set - holder_set),
+            remove=sorted(holder_set - desired_set),
+        )
+
+    def commit(self, desired: Iterable[int], results: Iterable[RoleChange] = ()) -> None:
+        """Übernimmt den Soll-Zustand; offene Adds bleiben für den nächsten Lauf "neu"."""
+        retry = {r.user_id for r in results if r.action == ADD and r.status not in _SETTLED}
+        self._applied = set(desired) - retry
+
+
+async def _apply_one(
+    change: RoleChange,
+    *,
+    role: Any,
+    reason: str | None,
+    resolve_member: Callable[[int], Awaitable[Any | None]],
+    bucket: TokenBucket,
+    max_attempts: int,
+) -> None:
+    if change.member is None:
+        try:
+            change.member = await resolve_member(change.user_id)
+        except discord.NotFound as exc:
+            change.status, change.error = NOT_FOUND, str(exc)
+            return
+        except Exception as exc:
+            change.status, change.error = ERROR, str(exc)
+            return
+        if change.member is None:
+            change.status = SKIPPED
+            return
+
+    roles = getattr(change.member, "roles", None)
+    if roles is not None and (role in roles) == (change.action == ADD):
+        change.status = UNCHANGED
+        return
+
+    call = change.member.add_roles if change.action == ADD else change.member.remove_roles
+    while change.attempts < max_attempts:
+        await bucket.acquire()
+        change.attempts += 1
+        try:
+            await call(role, reason=reason)
+            change.status, change.error = APPLIED, None
+            bucket.on_success()
+            return
+        except asyncio.CancelledError:
+            raise
+        except discord.Forbidden as exc:
+            change.status, change.error = FORBIDDEN, str(exc)
+            return
+        except discord.NotFound as exc:
+            change.status, change.error = NOT_FOUND, str(exc)
+            return
+        except discord.HTTPException as exc:
+            if int(getattr(exc, "status", 0) or 0) == 429:
+                change.status, change.error = RATE_LIMITED, str(exc)
+                retry_after = _discord_retry_after_seconds(exc)
+                bucket.on_rate_limited(
+                    retry_after, getattr(getattr(exc, "response", None), "headers", None)
+                )
+                logger.warning(
+                    "Rollen-Änderung rate-limited (user=%s, Versuch %s/%s), Pause %.2fs",
+                    change.user_id,
+                    change.attempts,
+                    max_attempts,
+                    retry_after if retry_after is not None else 1.0,
+                )
+                continue
+            change.status, change.error = HTTP_ERROR, str(exc)
+            if not is_transient_discord_http_error(exc):
+                return
+            bucket.pause(0.75 * change.attempts)
+        except Exception as exc:
+            change.status, change.error = ERROR, str(exc)
+            return
+
+
+async def apply_role_changes(
+    changes: Iterable[tuple[int, str]],
+    *,
+    role: Any,
+    resolve_member: Callable[[int], Awaitable[Any | None]],
+    bucket: TokenBucket,
+    reasons: Mapping[str, str] | None = None,
+    max_attempts: int = 3,
+    should_stop: Callable[[], bool] | None = None,
+) -> list[RoleChange]:
+    """
+    Wendet ``(user_id, ADD|REMOVE)``-Paare nacheinander über ``bucket`` an.
+
+    ``resolve_member`` liefert das Member-Objekt, ``None`` (später erneut
+    versuchen) oder wirft ``discord.NotFound`` (nicht auf dem Server).
+    """
+    results: list[RoleChange] = []
+    for user_id, action in changes:
+        if should_stop is not None and should_stop():
+            break
+        change = RoleChange(user_id=int(user_id), action=action)
+        await _apply_one(
+            change,
+            role=role,
+            reason=(reasons or {}).get(action),
+            resolve_member=resolve_member,
+            bucket=bucket,
+            max_attempts=max(1, max_attempts),
+        )
+        results.append(change)
+    return results
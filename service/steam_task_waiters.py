@@ -0,0 +1,154 @@
+"""
+Ereignisgesteuertes Warten auf steam_tasks.
+
+Wer einen Task in ``steam_tasks`` einstellt, registriert sich hier mit der
+Task-ID und wartet auf ein ``asyncio.Future``. Der Steam-Consumer meldet
+DONE/FAILED über den MasterBroker-Endpoint ``/internal/master/v1/steam/task-finished``,
+der ``notify()`` aufruft; der Waiter liest dann genau einmal die Zeile aus der
+DB (Quelle der Wahrheit bleibt steam_tasks). Bleibt die Meldung aus – Consumer
+ohne Callback, Broker nicht erreichbar –, greift ein langsamer DB-Poll alle
+FALLBACK_POLL_SECONDS.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from service import db
+
+log = logging.getLogger(__name__)
+
+FALLBACK_POLL_SECONDS = float(os.environ.get("STEAM_TASK_FALLBACK_POLL_SECONDS", "5"))
+FINAL_STATUSES = frozenset({"DONE", "FAILED"})
+
+_waiters: dict[int, list[asyncio.Future[None]]] = {}
+_stats: dict[str, int] = {
+    "waits": 0,
+    "notified": 0,
+    "fallback_polls": 0,
+    "timeouts": 0,
+    "unknown_notifications": 0,
+}
+
+
+def _wake(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def register(task_id: int) -> asyncio.Future[None]:
+    """Legt einen Waiter für ``task_id`` an; muss im Event-Loop aufgerufen werden."""
+    future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+    _waiters.setdefault(int(task_id), []).append(future)
+    return future
+
+
+def _unregister(task_id: int, future: asyncio.Future[None]) -> None:
+    futures = _waiters.get(task_id)
+    if not futures:
+        return
+    try:
+        futures.remove(future)
+    except ValueError:
+        pass
+    if not futures:
+        _waiters.pop(task_id, None)
+
+
+def notify(task_id: int) -> bool:
+    """Weckt alle Waiter des Tasks. Thread-sicher; False, wenn niemand wartet."""
+    futures = _waiters.get(int(task_id))
+    if not futures:
+        _stats["unknown_notifications"] += 1
+        return False
+    _stats["notified"] += 1
+    for future in list(futures):
+        future.get_loop().call_soon_threadsafe(_wake, future)
+    return True
+
+
+def pending() -> int:
+    return sum(len(futures) for futures in _waiters.values())
+
+
+def stats() -> dict[str, int]:
+    return dict(_stats, pending=pending())
+
+
+def _decode_row(task_id: int, row: Any) -> dict[str, Any]:
+    status = str(row["status"] or "UNKNOWN").upper()
+    raw_result = row["result"]
+    result: Any = raw_result
+    if isinstance(raw_result, str):
+        try:
+            result = json.loads(raw_result)
+        except json.JSONDecodeError:
+            result = raw_result
+    return {
+        "task_id": task_id,
+        "status": status,
+        "ok": status == "DONE",
+        "timed_out": False,
+        "result": result,
+        "error": str(row["error"]) if row["error"] is not None else None,
+    }
+
+
+async def wait_for_task(
+    task_id: int,
+    *,
+    timeout: float,
+    fallback_interval: float | None = None,
+    task_type: str = "steam task",
+) -> dict[str, Any]:
+    """Wartet auf DONE/FAILED und liefert das Ergebnis im Format von ``_run_steam_task``."""
+    task_id = int(task_id)
+    interval = max(
+        0.1, float(FALLBACK_POLL_SECONDS if fallback_interval is None else fallback_interval)
+    )
+    deadline = time.monotonic() + max(0.0, float(timeout))
+    future = register(task_id)
+    _stats["waits"] += 1
+    try:
+        while True:
+            # Erster Blick sofort: der Consumer kann vor der Registrierung fertig geworden sein.
+            row = await db.query_one_async(
+                "SELECT status, result, error FROM steam_tasks WHERE id = ?",
+                (task_id,),
+            )
+            if row is None:
+                return {
+                    "task_id": task_id,
+                    "status": "MISSING",
+                    "ok": False,
+                    "timed_out": False,
+                    "result": None,
+                    "error": "Steam task disappeared",
+                }
+            outcome = _decode_row(task_id, row)
+            if outcome["status"] in FINAL_STATUSES:
+                return outcome
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _stats["timeouts"] += 1
+                outcome["timed_out"] = True
+                outcome["error"] = outcome["error"] or f"Timed out waiting for {task_type}"
+                return outcome
+
+            if future.done():
+                # Benachrichtigt, aber Status noch nicht final (z.B. verfrühte Meldung):
+                # neuen Waiter holen und weiter warten.
+                _unregister(task_id, future)
+                future = register(task_id)
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout=min(interval, remaining))
+            except TimeoutError:
+                _stats["fallback_polls"] += 1
+    finally:
+        _unregister(task_id, future)
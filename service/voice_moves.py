@@ -0,0 +1,188 @@
+"""
+Paralleler Voice-Move-Executor mit Rate-Limit-Gate.
+
+``move_members`` verschiebt mehrere Member gleichzeitig, begrenzt durch
+VOICE_MOVE_CONCURRENCY (Discord-Bucket für PATCH /guilds/{id}/members/{id}).
+Ein 429 (``discord.RateLimited`` oder HTTP 429) pausiert alle Worker bis
+Retry-After und wiederholt den Move; 5xx werden kurz erneut versucht.
+Ergebnisse kommen pro Member in Eingabereihenfolge zurück.
+
+Genutzt von: deadlock_team_balancer.py, master_broker.py (move_voice).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import discord
+
+from service.discord_utils import _discord_retry_after_seconds, is_transient_discord_http_error
+
+logger = logging.getLogger(__name__)
+
+VOICE_MOVE_CONCURRENCY = max(1, int(os.getenv("VOICE_MOVE_CONCURRENCY", "5")))
+VOICE_MOVE_MAX_ATTEMPTS = max(1, int(os.getenv("VOICE_MOVE_MAX_ATTEMPTS", "4")))
+VOICE_MOVE_TRANSIENT_DELAY = 0.75
+# Obergrenze, damit ein kaputter Retry-After-Header keinen Match-Start blockiert.
+VOICE_MOVE_MAX_RETRY_AFTER = 30.0
+
+MOVED = "moved"
+NOT_IN_VOICE = "not_in_voice"
+FORBIDDEN = "forbidden"
+NOT_FOUND = "not_found"
+RATE_LIMITED = "rate_limited"
+HTTP_ERROR = "http_error"
+ERROR = "error"
+
+
+@dataclass(slots=True)
+class VoiceMoveResult:
+    member: Any
+    target: Any
+    status: str
+    attempts: int = 0
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == MOVED
+
+
+class _RateGate:
+    """Gemeinsame Pause für alle Worker nach einem 429."""
+
+    def __init__(self) -> None:
+        self._resume_at = 0.0
+
+    async def wait(self) -> None:
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+def _retry_after(exc: Exception) -> float | None:
+    if isinstance(exc, discord.RateLimited):
+        return float(exc.retry_after)
+    if isinstance(exc, discord.HTTPException) and int(getattr(exc, "status", 0) or 0) == 429:
+        delay = _discord_retry_after_seconds(exc)
+        return 1.0 if delay is None else delay
+    return None
+
+
+async def _move_one(
+    member: Any,
+    target: Any,
+    *,
+    reason: str | None,
+    require_voice: bool,
+    semaphore: asyncio.Semaphore,
+    gate: _RateGate,
+    max_attempts: int,
+) -> VoiceMoveResult:
+    result = VoiceMoveResult(member=member, target=target, status=ERROR)
+    if require_voice and not (member.voice and member.voice.channel):
+        result.status = NOT_IN_VOICE
+        return result
+
+    while result.attempts < max_attempts:
+        async with semaphore:
+            await gate.wait()
+            result.attempts += 1
+            try:
+                await member.move_to(target, reason=reason)
+                result.status = MOVED
+                result.error = None
+                return result
+            except asyncio.CancelledError:
+                raise
+            except discord.Forbidden as exc:
+                result.status, result.error = FORBIDDEN, str(exc)
+                return result
+            except discord.NotFound as exc:
+                result.status, result.error = NOT_FOUND, str(exc)
+                return result
+            except (discord.RateLimited, discord.HTTPException) as exc:
+                retry_after = _retry_after(exc)
+                if retry_after is not None:
+                    retry_after = min(VOICE_MOVE_MAX_RETRY_AFTER, max(0.0, retry_after))
+                    result.status, result.error = RATE_LIMITED, str(exc)
+                    gate.pause(retry_after)
+                    logger.warning(
+                        "Voice move rate limited (member=%s attempt=%s/%s); pausing %.2fs",
+                        getattr(member, "id", "?"),
+                        result.attempts,
+                        max_attempts,
+                        retry_after,
+                    )
+                    continue
+                result.status, result.error = HTTP_ERROR, str(exc)
+                if not is_transient_discord_http_error(exc):
+                    return result
+            except Exception as exc:
+                result.status, result.error = ERROR, str(exc)
+                return result
+        # 5xx: kurzer Backoff außerhalb des Semaphors
+        if result.attempts < max_attempts:
+            await asyncio.sleep(VOICE_MOVE_TRANSIENT_DELAY * result.attempts)
+    return result
+
+
+async def move_members(
+    moves: Iterable[tuple[Any, Any]],
+    *,
+    reason: str | None = None,
+    concurrency: int | None = None,
+    max_attempts: int | None = None,
+    require_voice: bool = True,
+) -> list[VoiceMoveResult]:
+    """
+    Verschiebt ``(member, target_channel_or_None)``-Paare parallel.
+
+    ``require_voice``: Member ohne Voice-Verbindung werden als NOT_IN_VOICE
+    gemeldet statt einen API-Call zu kosten.
+    """
+    pairs = list(moves)
+    if not pairs:
+        return []
+    semaphore = asyncio.Semaphore(max(1, int(concurrency or VOICE_MOVE_CONCURRENCY)))
+    gate = _RateGate()
+    attempts = max(1, int(max_attempts or VOICE_MOVE_MAX_ATTEMPTS))
+    return list(
+        await asyncio.gather(
+            *(
+                _move_one(
+                    member,
+                    target,
+                    reason=reason,
+                    require_voice=require_voice,
+                    semaphore=semaphore,
+                    gate=gate,
+                    max_attempts=attempts,
+                )
+                for member, target in pairs
+            )
+        )
+    )
+
+
+async def move_member(
+    member: Any,
+    target: Any,
+    *,
+    reason: str | None = None,
+    require_voice: bool = False,
+) -> VoiceMoveResult:
+    """Einzelner Move mit derselben 429-/5xx-Behandlung."""
+    (result,) = await move_members(
+        [(member, target)], reason=reason, concurrency=1, require_voice=require_voice
+    )
+    return result
@@ -0,0 +1,38 @@
+"""Gemeinsame Test-Hilfen: künstliche Uhr und temporäre SQLite-Datenbank."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from service import db
+
+
+class FakeClock:
+    """Aufrufbare Uhr für ``clock=``-Parameter; ``now`` wird im Test weitergestellt."""
+
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def use_temp_db(test: unittest.TestCase, filename: str = "test.sqlite3") -> Path:
+    """Verbindet ``service.db`` für die Dauer des Tests mit einer frischen SQLite-Datei.
+
+    Aufgeräumt wird über ``addCleanup`` (nach ``tearDown``); zurückgegeben wird das
+    temporäre Verzeichnis, z.B. für weitere Dateien wie Journale.
+    """
+    db.close_connection()
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    env = mock.patch.dict(os.environ, {db.ENV_DB_PATH: str(Path(tmp.name) / filename)})
+    env.start()
+    test.addCleanup(env.stop)
+    test.addCleanup(db.close_connection)
+    db.connect()
+    return Path(tmp.name)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs import user_activity_analyzer as analyzer_mod
+from service import db, display_names
+from tests._helpers import use_temp_db
+
+_INSERT_SESSION = """
+    INSERT INTO voice_session_log(
+      user_id, guild_id, channel_id, started_at, ended_at, duration_seconds, co_player_ids
+    ) VALUES (?, 1, 1, ?, ?, ?, ?)
+"""
+
+
+class CoPlayerGraphSyncTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        display_names.clear_cache()
+        use_temp_db(self, "graph.sqlite3")
+        bot = SimpleNamespace(guilds=[], get_user=lambda _uid: None)
+        self.cog = analyzer_mod.UserActivityAnalyzer(bot)
+
+    def tearDown(self) -> None:
+        display_names.clear_cache()
+
+    def _session(self, user_id: int, co_ids: list[int], ended: str, seconds: int = 600) -> None:
+        db.execute(_INSERT_SESSION, (user_id, ended, ended, seconds, json.dumps(co_ids)))
+
+    def _edges(self) -> dict[tuple[int, int], tuple[int, int, str]]:
+        rows = db.query_all(
+            "SELECT user_id, co_player_id, sessions_together, total_minutes_together, "
+            "last_played_together FROM user_co_players"
+        )
+        return {(r[0], r[1]): (r[2], r[3], r[4]) for r in rows}
+
+    async def test_first_run_only_sets_high_water_mark(self) -> None:
+        self._session(1, [2], "2024-01-01 10:00:00")
+
+        self.assertEqual(await self.cog._sync_co_player_graph(), 0)
+
+        self.assertEqual(
+            db.get_kv(analyzer_mod.CO_PLAYER_KV_NS, analyzer_mod.CO_PLAYER_HWM_KEY), "1"
+        )
+        self.assertEqual(self._edges(), {})
+
+    async def test_new_sessions_are_counted_exactly_once(self) -> None:
+        await self.cog._sync_co_player_graph()
+        self._session(1, [2, 3, 1, 2], "2024-01-01 10:00:00", seconds=1200)
+        self._session(1, [2], "2024-01-02 10:00:00", seconds=600)
+        self._session(2, [1], "2024-01-02 10:00:00", seconds=600)
+
+        self.assertEqual(await self.cog._sync_co_player_graph(), 3)
+        self.assertEqual(await self.cog._sync_co_player_graph(), 0)
+
+        self.assertEqual(
+            self._edges(),
+            {
+                (1, 2): (2, 30, "2024-01-02 10:00:00"),
+                (1, 3): (1, 20, "2024-01-01 10:00:00"),
+                (2, 1): (1, 10, "2024-01-02 10:00:00"),
+            },
+        )
+
+    async def test_one_executemany_per_batch(self) -> None:
+        await self.cog._sync_co_player_graph()
+        for idx in range(5):
+            self._session(10 + idx, [99], f"2024-01-0{idx + 1} 10:00:00")
+
+        statements: list[str] = []
+        proxy_cls = db.DBConnectionProxy
+        original = proxy_cls.executemany
+
+        def _spy(proxy, sql, seq):
+            statements.append(sql)
+            return original(proxy, sql, seq)
+
+        with (
+            mock.patch.object(analyzer_mod, "CO_PLAYER_SYNC_BATCH", 2),
+            mock.patch.object(proxy_cls, "executemany", new=_spy),
+        ):
+            written = await self.cog._sync_co_player_graph()
+
+        self.assertEqual(written, 5)
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            db.get_kv(analyzer_mod.CO_PLAYER_KV_NS, analyzer_mod.CO_PLAYER_HWM_KEY), "5"
+        )
+
+
+def _member(uid: int, name: str, bot: bool = False) -> SimpleNamespace:
+    return SimpleNamespace(id=uid, display_name=name, bot=bot)
+
+
+class CoPlayerRealtimeSweepTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "sweep.sqlite3")
+
+    async def test_sweep_writes_all_pairs_in_one_batch(self) -> None:
+        channel_a = SimpleNamespace(
+            members=[_member(1, "A"), _member(2, "B"), _member(3, "C"), _member(9, "Bot", True)]
+        )
+        channel_b = SimpleNamespace(members=[_member(4, "D"), _member(5, "E")])
+        lonely = SimpleNamespace(members=[_member(6, "F")])
+        guilds = [
+            SimpleNamespace(id=1, voice_channels=[channel_a, lonely]),
+            SimpleNamespace(id=2, voice_channels=[channel_b]),
+        ]
+        cog = analyzer_mod.UserActivityAnalyzer(SimpleNamespace(guilds=guilds))
+
+        calls: list[int] = []
+        original = db.DBConnectionProxy.executemany
+
+        def _spy(proxy, sql, seq):
+            seq = list(seq)
+            calls.append(len(seq))
+            return original(proxy, sql, seq)
+
+        with mock.patch.object(db.DBConnectionProxy, "executemany", new=_spy):
+            await cog.track_co_players_realtime()
+            await cog.track_co_players_realtime()
+
+        self.assertEqual(calls, [8, 8])
+        row = db.query_one(
+            "SELECT sessions_together, total_minutes_together, co_player_display_name "
+            "FROM user_co_players WHERE user_id = 2 AND co_player_id = 1"
+        )
+        self.assertEqual(tuple(row), (2, 20, "A"))
+        stats = json.loads(
+            db.get_kv(analyzer_mod.CO_PLAYER_KV_NS, analyzer_mod.CO_PLAYER_SWEEP_STATS_KEY)
+        )
+        self.assertEqual(stats["sweeps"], 2)
+        self.assertEqual(stats["rows_total"], 16)
+        self.assertEqual(stats["last_rows"], 8)
+        self.assertGreaterEqual(stats["last_duration_ms"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+
+from service.dashboard import _loop_hold_watchdog, _LoopHoldTimer
+
+
+class _FakeRequest:
+    method = "GET"
+    path = "/api/voice-history"
+
+
+class LoopHoldWatchdogTests(unittest.IsolatedAsyncioTestCase):
+    async def test_timer_measures_longest_synchronous_step(self) -> None:
+        async def _handler() -> str:
+            await asyncio.sleep(0)
+            time.sleep(0.06)
+            await asyncio.sleep(0)
+            return "ok"
+
+        timer = _LoopHoldTimer(_handler())
+        result = await timer
+
+        self.assertEqual(result, "ok")
+        self.assertGreaterEqual(timer.max_step, 0.05)
+        self.assertEqual(timer.steps, 3)
+
+    async def test_timer_propagates_cancellation_into_coroutine(self) -> None:
+        cleaned_up = asyncio.Event()
+
+        async def _handler() -> None:
+            try:
+                await asyncio.sleep(10)
+            finally:
+                cleaned_up.set()
+
+        task = asyncio.create_task(_run(_handler))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(cleaned_up.is_set())
+
+    async def test_middleware_logs_blocking_handler(self) -> None:
+        async def _blocking(_request):
+            time.sleep(0.06)
+            return "response"
+
+        with self.assertLogs("service.dashboard", level="WARNING") as logs:
+            result = await _loop_hold_watchdog(_FakeRequest(), _blocking)
+
+        self.assertEqual(result, "response")
+        self.assertIn("blocked the event loop", logs.output[0])
+
+    async def test_middleware_stays_quiet_for_cooperative_handler(self) -> None:
+        async def _cooperative(_request):
+            await asyncio.sleep(0.01)
+            return "response"
+
+        with self.assertNoLogs("service.dashboard", level="WARNING"):
+            await _loop_hold_watchdog(_FakeRequest(), _cooperative)
+
+
+async def _run(factory):
+    return await _LoopHoldTimer(factory())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+import unittest
+from unittest import mock
+
+from service import db
+from tests._helpers import use_temp_db
+
+
+class DbReadPoolTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "pool.sqlite3")
+        db.execute("CREATE TABLE IF NOT EXISTS pool_probe(id INTEGER PRIMARY KEY, v TEXT)")
+        db.executemany("INSERT INTO pool_probe(v) VALUES (?)", [("a",), ("b",), ("c",)])
+
+    def test_reads_use_reader_pool(self) -> None:
+        rows = db.query_all("SELECT v FROM pool_probe ORDER BY id")
+
+        self.assertEqual([row["v"] for row in rows], ["a", "b", "c"])
+        stats = db.pool_stats()
+        self.assertTrue(stats["enabled"])
+        self.assertGreaterEqual(stats["acquired"], 1)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_read_does_not_wait_for_writer_lock(self) -> None:
+        held = threading.Event()
+        release = threading.Event()
+
+        def _hold_writer_lock() -> None:
+            with db._LOCK:
+                held.set()
+                release.wait(5)
+
+        worker = threading.Thread(target=_hold_writer_lock)
+        worker.start()
+        try:
+            self.assertTrue(held.wait(5))
+            result: list[object] = []
+            reader = threading.Thread(
+                target=lambda: result.append(db.query_one("SELECT COUNT(*) FROM pool_probe")[0])
+            )
+            reader.start()
+            reader.join(2)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual(result, [3])
+        finally:
+            release.set()
+            worker.join()
+
+    async def test_transaction_reads_see_uncommitted_writes(self) -> None:
+        async with db.transaction() as conn:
+            conn.execute("INSERT INTO pool_probe(v) VALUES ('d')")
+            row = await db.query_one_async("SELECT COUNT(*) FROM pool_probe")
+            self.assertEqual(row[0], 4)
+
+    def test_connection_local_functions_stay_on_writer(self) -> None:
+        db.execute("INSERT INTO pool_probe(v) VALUES ('e')")
+        row = db.query_one("SELECT last_insert_rowid()")
+
+        self.assertEqual(row[0], 4)
+
+    def test_cte_prefixed_writes_stay_on_writer(self) -> None:
+        row = db.query_one(
+            "WITH v(x) AS (SELECT 'f') INSERT INTO pool_probe(v) SELECT x FROM v RETURNING v"
+        )
+
+        self.assertEqual(row[0], "f")
+        self.assertEqual(db.query_one("SELECT COUNT(*) FROM pool_probe")[0], 4)
+        self.assertTrue(db._is_reader_safe("WITH t AS (SELECT updated_at FROM x) SELECT * FROM t"))
+
+    async def test_async_reads_use_dedicated_executor(self) -> None:
+        thread_names: list[str] = []
+        query_all = db.query_all
+
+        def _probe(sql: str, params=()):
+            thread_names.append(threading.current_thread().name)
+            return query_all(sql, params)
+
+        with mock.patch.object(db, "query_all", new=_probe):
+            rows = await db.query_all_async("SELECT v FROM pool_probe WHERE v = ?", ("b",))
+
+        self.assertEqual([row["v"] for row in rows], ["b"])
+        self.assertTrue(thread_names[0].startswith("deadlock-db-read"))
+
+    async def test_query_batch_async_returns_rows_per_statement(self) -> None:
+        counts, values = await db.query_batch_async(
+            [
+                ("SELECT COUNT(*) AS n FROM pool_probe", ()),
+                ("SELECT v FROM pool_probe WHERE id >= ? ORDER BY id", (2,)),
+            ]
+        )
+
+        self.assertEqual(counts[0]["n"], 3)
+        self.assertEqual([row["v"] for row in values], ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+
+from service import db
+from service.deadline_scheduler import DeadlineScheduler
+from tests._helpers import FakeClock, use_temp_db
+
+
+class DeadlineSchedulerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "scheduler.sqlite3")
+
+    async def _drain(self, scheduler: DeadlineScheduler) -> None:
+        await scheduler.run_due()
+        await asyncio.gather(*list(scheduler._running))
+
+    async def test_due_jobs_fire_in_order_and_replace_or_cancel(self) -> None:
+        clock = FakeClock()
+        scheduler = DeadlineScheduler(persist=False, clock=clock)
+        fired: list[str] = []
+
+        async def handler(job) -> None:
+            fired.append(job.key)
+
+        await scheduler.schedule("role", "late", 1_030)
+        await scheduler.schedule("role", "early", 1_010)
+        await scheduler.schedule("role", "moved", 1_005)
+        await scheduler.schedule("role", "moved", 1_020)
+        await scheduler.schedule("role", "moved", 1_050, keep_earlier=True)
+        await scheduler.schedule("role", "gone", 1_001)
+        await scheduler.cancel("role", "gone")
+        self.assertEqual(scheduler.next_due(), 1_010)
+
+        clock.now = 1_025
+        await self._drain(scheduler)
+        self.assertEqual(fired, [])  # noch kein Handler registriert
+
+        scheduler.register("role", handler)
+        await self._drain(scheduler)
+        self.assertEqual(fired, ["early", "moved"])
+        self.assertEqual([job.key for job in scheduler.pending()], ["late"])
+
+    async def test_jobs_survive_restart_and_failures_are_retried(self) -> None:
+        clock = FakeClock()
+        first = DeadlineScheduler(clock=clock)
+        await first.schedule("faq", "s1", 1_010, {"channel_id": 7})
+        await first.schedule("voice", 42, 1_005, persist=False)
+
+        restarted = DeadlineScheduler(clock=clock)
+        self.assertEqual(await restarted.load(), 1)
+        self.assertEqual(await restarted.load(), 0)  # Abgleich der Cogs lädt nicht doppelt
+        job = restarted.get("faq", "s1")
+        self.assertEqual(job.payload, {"channel_id": 7})
+
+        calls = 0
+
+        async def flaky(_job) -> None:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("boom")
+
+        restarted.register("faq", flaky)
+        clock.now = 1_010
+        await self._drain(restarted)
+        retry = restarted.get("faq", "s1")
+        self.assertEqual((retry.attempts, retry.due_at), (1, 1_040))
+
+        clock.now = 1_040
+        await self._drain(restarted)
+        self.assertEqual(calls, 2)
+        self.assertIsNone(restarted.get("faq", "s1"))
+        self.assertEqual(db.query_one("SELECT COUNT(*) FROM scheduled_jobs")[0], 0)
+
+    async def test_fired_job_keeps_a_row_rescheduled_meanwhile(self) -> None:
+        clock = FakeClock()
+        scheduler = DeadlineScheduler(clock=clock)
+        await scheduler.schedule("faq", "s1", 1_010)
+
+        async def handler(_job) -> None:
+            # gleichzeitiges schedule() aus einem anderen Task hat die Zeile schon ersetzt
+            await db.execute_async(
+                "UPDATE scheduled_jobs SET due_at = 2000 WHERE kind = 'faq' AND job_key = 's1'"
+            )
+
+        scheduler.register("faq", handler)
+        clock.now = 1_010
+        await self._drain(scheduler)
+        self.assertIsNone(scheduler.get("faq", "s1"))
+        row = db.query_one("SELECT due_at FROM scheduled_jobs WHERE job_key = 's1'")
+        self.assertEqual(row[0], 2000)
+
+    async def test_loop_sleeps_until_the_next_deadline(self) -> None:
+        scheduler = DeadlineScheduler(persist=False)
+        done = asyncio.get_running_loop().create_future()
+
+        async def handler(job) -> None:
+            done.set_result(job.key)
+
+        scheduler.register("nudge", handler)
+        scheduler.start()
+        try:
+            await asyncio.sleep(0.01)
+            started = time.monotonic()
+            await scheduler.schedule("nudge", 1, time.time() + 0.05)
+            self.assertEqual(await asyncio.wait_for(done, timeout=2), "1")
+            self.assertGreaterEqual(time.monotonic() - started, 0.04)
+            self.assertLessEqual(scheduler.stats["wakeups"], 3)
+        finally:
+            await scheduler.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
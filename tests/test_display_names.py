@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from service import db, display_names
+from tests._helpers import use_temp_db
+
+
+class _FakeGuild:
+    def __init__(self, members: dict[int, str]) -> None:
+        self._members = members
+
+    def get_member(self, uid: int):
+        name = self._members.get(uid)
+        return SimpleNamespace(display_name=name) if name else None
+
+
+class DisplayNameResolverTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        display_names.clear_cache()
+        use_temp_db(self, "names.sqlite3")
+
+    def tearDown(self) -> None:
+        display_names.clear_cache()
+
+    def _seed(self) -> None:
+        db.executemany(
+            "INSERT INTO member_events(user_id, guild_id, event_type, timestamp, display_name) "
+            "VALUES (?, 1, 'join', ?, ?)",
+            [(1, "2024-01-01 10:00:00", "Alt"), (1, "2024-03-01 10:00:00", "Neu")],
+        )
+        db.execute(
+            "INSERT INTO voice_session_log(user_id, guild_id, channel_id, started_at, ended_at, "
+            "duration_seconds, display_name) VALUES (2, 1, 1, ?, ?, 60, 'Voice')",
+            ("2024-02-01 10:00:00", "2024-02-01 10:01:00"),
+        )
+        db.execute(
+            "INSERT INTO user_co_players(user_id, co_player_id, sessions_together, "
+            "total_minutes_together, last_played_together, user_display_name, "
+            "co_player_display_name) VALUES (2, 3, 1, 10, ?, 'VoiceSpäter', 'Partner')",
+            ("2024-05-01 10:00:00",),
+        )
+
+    def test_single_query_picks_latest_name_across_sources(self) -> None:
+        self._seed()
+
+        with mock.patch.object(db, "query_all", wraps=db.query_all) as query:
+            names = display_names.resolve([1, 2, 3, 4, 4])
+
+        self.assertEqual(query.call_count, 1)
+        self.assertEqual(names, {1: "Neu", 2: "VoiceSpäter", 3: "Partner", 4: "User 4"})
+
+    def test_cache_serves_repeat_lookups_until_invalidated(self) -> None:
+        self._seed()
+        display_names.resolve([1, 4])
+
+        with mock.patch.object(db, "query_all", wraps=db.query_all) as query:
+            self.assertEqual(display_names.resolve([1, 4]), {1: "Neu", 4: "User 4"})
+            self.assertEqual(query.call_count, 0)
+
+            display_names.invalidate(1)
+            display_names.resolve([1, 4])
+            self.assertEqual(query.call_count, 1)
+            self.assertEqual(query.call_args.args[1], ("[1]",))
+
+    async def test_guild_member_cache_wins_over_database(self) -> None:
+        self._seed()
+        display_names.resolve([1])
+        bot = SimpleNamespace(
+            guilds=[_FakeGuild({1: "Live", 5: "Nur Live"})], get_user=lambda _uid: None
+        )
+
+        names = await display_names.resolve_async([5, 6], bot=bot)
+
+        self.assertEqual(names, {5: "Nur Live", 6: "User 6"})
+        display_names.invalidate(1)
+        self.assertEqual(display_names.lookup([1], bot=bot), {1: "Live"})
+
+    def test_lru_evicts_oldest_entries(self) -> None:
+        cache = display_names._NameCache(max_entries=2, ttl=60)
+        cache.put_many({1: "a", 2: "b"})
+        cache.get_many([1])
+        cache.put_many({3: "c"})
+
+        found, missing = cache.get_many([1, 2, 3])
+
+        self.assertEqual(found, {1: "a", 3: "c"})
+        self.assertEqual(missing, [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs import server_faq
+from service import faq_docs_index
+
+
+class FaqDocsIndexTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.docs = Path(self._tmp.name)
+        (self.docs / "spieler.md").write_text(
+            "# Spieler\n\nEinleitung.\n\n"
+            "## TempVoice\n\nMit /voice erstellst du einen eigenen Sprachkanal.\n\n"
+            "## Steam-Verknüpfung\n\nNutze /link um deinen Steam Account zu verbinden.\n\n"
+            "```\n# kein Heading im Codeblock\n```\n",
+            encoding="utf-8",
+        )
+        (self.docs / "admin.md").write_text(
+            "# Admin\n\n## Bans\n\nModeratoren nutzen /ban.\n", encoding="utf-8"
+        )
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_split_sections_uses_heading_path(self) -> None:
+        chunks = faq_docs_index.split_sections(
+            (self.docs / "spieler.md").read_text(encoding="utf-8"), source="spieler.md"
+        )
+
+        self.assertEqual(
+            [c.title for c in chunks],
+            ["Spieler", "Spieler > TempVoice", "Spieler > Steam-Verknüpfung"],
+        )
+        self.assertIn("# kein Heading im Codeblock", chunks[-1].text)
+
+    def test_returns_only_relevant_sections(self) -> None:
+        index = faq_docs_index.DocsIndex(self.docs, top_k=2)
+
+        hits = index.search("Wie verbinde ich meinen Steam Account?")
+        context = index.build_context("Wie verbinde ich meinen Steam Account?")
+
+        self.assertEqual(hits[0][1].title, "Spieler > Steam-Verknüpfung")
+        self.assertNotIn("/ban", context)
+        self.assertLess(len(context), len(index.full_context()))
+        self.assertIn(
+            faq_docs_index.NO_MATCH_TEXT, index.build_context("Quantenphysik Schwarzes Loch")
+        )
+
+    def test_follow_up_question_uses_previous_turns(self) -> None:
+        index = faq_docs_index.DocsIndex(self.docs, top_k=1)
+        follow_up = "Und wenn das nicht klappt?"
+        messages = [
+            {"role": "user", "content": "Wie verbinde ich meinen Steam Account?"},
+            {"role": "assistant", "content": "Mit /link."},
+            {"role": "user", "content": follow_up},
+        ]
+
+        query = faq_docs_index.conversation_query(messages, follow_up)
+
+        self.assertEqual(query.count(follow_up), 1)
+        self.assertIn(faq_docs_index.NO_MATCH_TEXT, index.build_context(follow_up))
+        self.assertIn("Steam-Verknüpfung", index.build_context(query))
+
+    async def test_server_faq_thread_follow_up_uses_previous_turns(self) -> None:
+        prompts: list[str] = []
+
+        async def generate_text(**kwargs):
+            prompts.append(kwargs["prompt"])
+            return "Antwort", {}
+
+        ai = SimpleNamespace(generate_text=generate_text)
+        cog = server_faq.ServerFAQ(SimpleNamespace(get_cog=lambda name: ai))
+        session = server_faq.FAQSession(1, 2, None)
+        session.add_user_message("Wie verbinde ich meinen Steam Account?")
+        session.add_assistant_message("Mit /link.")
+        session.add_user_message("Und wenn das nicht klappt?")
+
+        index = faq_docs_index.DocsIndex(self.docs, top_k=1)
+        with mock.patch.object(server_faq, "DOCS_INDEX", index):
+            await cog._generate_answer(session, "Und wenn das nicht klappt?")
+
+        self.assertIn("Steam-Verknüpfung", prompts[0].split("Bisherige Konversation")[0])
+
+    def test_rebuilds_when_file_changes(self) -> None:
+        index = faq_docs_index.DocsIndex(self.docs)
+        self.assertFalse(index.refresh())
+        self.assertEqual(index.builds, 1)
+
+        path = self.docs / "admin.md"
+        path.write_text("# Admin\n\n## Turnier\n\nAnmeldung über /turnier.\n", encoding="utf-8")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        hits = index.search("turnier anmeldung")
+        self.assertEqual(index.builds, 2)
+        self.assertEqual(hits[0][1].source, "admin.md")
+        self.assertFalse(index.search("ban moderatoren"))
+
+    def test_rank_text_sections_trims_patchnotes(self) -> None:
+        patchnotes = "## Items\n\nSpirit Strike nerf.\n\n## Helden\n\nHaze Schaden reduziert.\n"
+
+        picked = faq_docs_index.rank_text_sections(patchnotes, "Was wurde bei Haze geändert?")
+
+        self.assertIn("Haze", picked)
+        self.assertNotIn("Spirit Strike", picked)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from service.idempotency_store import IdempotencyStore
+from tests._helpers import FakeClock
+
+
+class IdempotencyStoreTests(unittest.IsolatedAsyncioTestCase):
+    def _store(self, clock: FakeClock, **kwargs) -> IdempotencyStore:
+        params = {"ttl_seconds": 60.0, "max_entries": 3, "inflight_ttl_seconds": 30.0}
+        params.update(kwargs)
+        return IdempotencyStore(clock=clock, **params)
+
+    def test_expiry_and_lru_eviction(self) -> None:
+        clock = FakeClock()
+        store = self._store(clock)
+        for key in ("a", "b", "c"):
+            store.put(key, payload_hash="h", response_status=200, response_body={"k": key})
+        self.assertIsNotNone(store.get("a"))  # "a" wird zuletzt benutzt
+        store.put("d", payload_hash="h", response_status=200, response_body={})
+
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.evictions, 1)
+
+        clock.now += 61
+        store.prune()
+        self.assertEqual(len(store), 0)
+
+    async def test_inflight_deadline_is_reported_once(self) -> None:
+        clock = FakeClock()
+        store = self._store(clock)
+        future = asyncio.get_running_loop().create_future()
+        store.begin_inflight("x", payload_hash="h", future=future)
+
+        self.assertEqual(store.prune(), [])
+        clock.now += 31
+        expired = store.prune()
+
+        self.assertEqual([key for key, _state in expired], ["x"])
+        self.assertIsNone(store.get_inflight("x"))
+        self.assertEqual(store.prune(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs import user_activity_analyzer as analyzer_mod
+from service import join_attribution
+
+
+class _FakeGuild:
+    def __init__(self, uses: dict[str, int]) -> None:
+        self.id = 5
+        self.vanity_url_code = None
+        self.uses = dict(uses)
+        self.invite_calls = 0
+
+    async def invites(self) -> list[SimpleNamespace]:
+        self.invite_calls += 1
+        return [
+            SimpleNamespace(code=code, uses=uses, inviter=None, channel=None, url="")
+            for code, uses in self.uses.items()
+        ]
+
+    async def vanity_invite(self) -> None:
+        return None
+
+
+class JoinAttributionTests(unittest.IsolatedAsyncioTestCase):
+    def test_deltas_are_spread_over_the_batch_in_order(self) -> None:
+        deltas = join_attribution.invite_use_deltas(
+            {"a": {"uses": 1}, "b": {"uses": 4}},
+            {"a": {"uses": 3}, "b": {"uses": 4}, "c": {"uses": 1}},
+        )
+        self.assertEqual(deltas, [("a", 2), ("c", 1)])
+
+        result = join_attribution.attribute_joins(5, deltas, vanity_delta=1)
+        self.assertEqual(
+            [(r.kind, r.code) for r in result],
+            [("invite", "a"), ("invite", "a"), ("invite", "c"), ("vanity", None), (None, None)],
+        )
+        self.assertTrue(result[0].ambiguous)
+        self.assertFalse(join_attribution.attribute_joins(1, deltas)[0].ambiguous)
+
+    async def test_burst_shares_one_invite_fetch_and_snapshot_write(self) -> None:
+        cog = analyzer_mod.UserActivityAnalyzer(SimpleNamespace(guilds=[]))
+        cog._join_batcher.window_seconds = 0.01
+        guild = _FakeGuild({"raid": 10, "friend": 2})
+        cog._join_invite_snapshot[guild.id] = {"raid": {"uses": 7}, "friend": {"uses": 2}}
+
+        with (
+            mock.patch.object(cog, "_save_invite_snapshot_to_db") as save,
+            mock.patch.object(cog, "_lookup_twitch_streamer_for_code", return_value="streamer"),
+        ):
+            results = await asyncio.gather(*(cog._detect_join_source(guild) for _ in range(3)))
+
+        self.assertEqual(guild.invite_calls, 1)
+        save.assert_called_once()
+        self.assertEqual([r["join_source_kind"] for r in results], ["twitch_streamer"] * 3)
+        self.assertEqual({r["invite_code"] for r in results}, {"raid"})
+        self.assertEqual(results[0]["join_source_batch_size"], 3)
+        self.assertEqual(cog._join_invite_snapshot[guild.id]["raid"]["uses"], 10)
+        await cog._join_batcher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+import unittest
+from unittest import mock
+
+from cogs import lfg_presence_index
+from cogs.lfg_presence_index import SteamPresenceIndex
+from service import db
+from tests._helpers import use_temp_db
+
+_UPSERT_PRESENCE = """
+    INSERT INTO live_player_state(
+      steam_id, last_seen_ts, in_deadlock_now, deadlock_stage, deadlock_minutes, deadlock_updated_at
+    ) VALUES (?, ?, 1, ?, ?, ?)
+    ON CONFLICT(steam_id) DO UPDATE SET
+      last_seen_ts = excluded.last_seen_ts,
+      deadlock_stage = excluded.deadlock_stage,
+      deadlock_minutes = excluded.deadlock_minutes,
+      deadlock_updated_at = excluded.deadlock_updated_at
+"""
+
+
+class SteamPresenceIndexTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "lfg.sqlite3")
+        db.executemany(
+            "INSERT INTO steam_links(user_id, steam_id, verified, primary_account, is_steam_friend) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (1, "s1a", 1, 1, 1),
+                (1, "s1b", 1, 0, 0),
+                (2, "s2", 1, 1, 0),
+                (3, "s3", 0, 1, 1),
+            ],
+        )
+        db.execute(
+            "INSERT INTO user_activity_patterns(user_id, typical_hours, typical_days, "
+            "activity_score_2w) VALUES (2, '[20, 21]', '[4]', 6)"
+        )
+
+    def _presence(self, steam_id: str, stage: str | None, minutes: int | None, ts: int) -> None:
+        db.execute(_UPSERT_PRESENCE, (steam_id, ts, stage, minutes, ts))
+
+    async def test_loads_links_friends_presence_and_patterns(self) -> None:
+        now = int(time.time())
+        self._presence("s1b", "match", 10, now - 90)
+        self._presence("s2", "lobby", None, now - 500)  # veraltet
+        index = SteamPresenceIndex(stale_seconds=120)
+
+        await index.refresh()
+
+        self.assertEqual(index.links, {1: ["s1a", "s1b"], 2: ["s2"]})
+        self.assertEqual(index.friend_ids, frozenset({1}))
+        self.assertEqual(index.online(), {"s1b": ("match", 11)})
+        self.assertEqual(index.online_discord_ids(), {1: ("match", 11)})
+        self.assertEqual(index.patterns([2, 3]), {2: ([20, 21], [4], 6)})
+
+    async def test_incremental_refresh_tracks_changes(self) -> None:
+        now = int(time.time())
+        self._presence("s2", "lobby", None, now - 5)
+        index = SteamPresenceIndex(stale_seconds=120)
+        await index.refresh()
+        self.assertIn("s2", index.online())
+
+        self._presence("s2", None, None, now)
+        self._presence("s1a", "lobby", None, now)
+        with mock.patch.object(lfg_presence_index, "PRESENCE_REFRESH_SECONDS", 0):
+            await index.refresh()
+
+        self.assertEqual(index.online(), {"s1a": ("lobby", None)})
+
+    async def test_burst_of_lookups_triggers_single_refresh(self) -> None:
+        index = SteamPresenceIndex(stale_seconds=120)
+        await index.refresh()
+
+        with mock.patch.object(db, "query_all_async") as query_all:
+            for _ in range(100):
+                await index.refresh()
+                index.online_discord_ids()
+
+        query_all.assert_not_called()
+        self.assertEqual(index.stats["refreshes"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
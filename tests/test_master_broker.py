@@ -5,12 +5,15 @@ import unittest
 from typing import Any
 
 import discord
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
 
 from service.master_broker import (
     _IDEMPOTENCY_HEADER,
     _INTERNAL_TOKEN_HEADER,
     MasterBroker,
 )
+from tests._helpers import use_temp_db
 
 
 class _FakeRequest:
@@ -362,6 +365,110 @@ class MasterBrokerTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(body["error"]["code"], "bad_request")
         self.assertIn("view_spec.type", body["error"]["message"])
 
+    async def test_batch_streams_ndjson_results_per_item(self) -> None:
+        channel = _FakeChannel(555)
+        user = _FakeDmUser(123)
+        bot = _FakeBot(channel=channel, user=user)
+        broker = MasterBroker(bot, token="secret-token")
+        app = web.Application()
+        app.router.add_post("/batch", broker._handle_batch)
+        batch = {
+            "concurrency": 2,
+            "actions": [
+                {
+                    "action": "send_message",
+                    "idempotency_key": "fan-1",
+                    "payload": {"channel_id": 555, "content": "Hallo Kanal"},
+                },
+                {
+                    "action": "send_message",
+                    "idempotency_key": "fan-2",
+                    "payload": {"user_id": 123, "content": "Hallo DM"},
+                },
+                {
+                    "action": "send_message",
+                    "idempotency_key": "fan-3",
+                    "payload": {"channel_id": 555},
+                },
+            ],
+        }
+
+        async with TestClient(TestServer(app)) as client:
+            response = await client.post(
+                "/batch", json=batch, headers={_INTERNAL_TOKEN_HEADER: "secret-token"}
+            )
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.content_type, "application/x-ndjson")
+            lines = [json.loads(line) for line in (await response.text()).splitlines()]
+
+            retry = await client.post(
+                "/batch",
+                json={"actions": batch["actions"][:1]},
+                headers={_INTERNAL_TOKEN_HEADER: "secret-token"},
+            )
+            retry_lines = [json.loads(line) for line in (await retry.text()).splitlines()]
+
+        items = {line["index"]: line for line in lines if line["type"] == "item"}
+        self.assertEqual(items[0]["status"], 200)
+        self.assertEqual(items[0]["idempotency_key"], "fan-1")
+        self.assertEqual(items[1]["result"]["user_id"], 123)
+        self.assertEqual(items[2]["status"], 400)
+        self.assertEqual(items[2]["error"]["code"], "bad_request")
+        self.assertEqual(
+            lines[-1] | {"elapsed_ms": 0, "request_id": ""},
+            {
+                "type": "summary",
+                "request_id": "",
+                "total": 3,
+                "succeeded": 2,
+                "failed": 1,
+                "elapsed_ms": 0,
+            },
+        )
+        self.assertEqual(len(channel.sent_calls), 1)
+        self.assertTrue(retry_lines[0]["cached"])
+
+    async def test_batch_rejects_invalid_envelope_before_streaming(self) -> None:
+        broker = MasterBroker(_FakeBot(), token="secret-token")
+        request = _FakeRequest(
+            {"actions": [{"action": "ban_everyone", "payload": {}}]},
+            headers=self._headers("unused"),
+        )
+
+        response = await broker._handle_batch(request)
+
+        self.assertEqual(response.status, 400)
+        self.assertIn("not supported", self._payload(response)["error"]["message"])
+
+        unauthorized = _FakeRequest({"actions": []}, headers={}, remote="10.0.0.5")
+        self.assertEqual((await broker._handle_batch(unauthorized)).status, 403)
+
+
+class PersistentIdempotencyTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "broker.sqlite3")
+
+    async def test_restarted_broker_dedupes_recent_key(self) -> None:
+        channel = _FakeChannel(555)
+        request = _FakeRequest(
+            {"channel_id": 555, "content": "Nur einmal"},
+            headers={_INTERNAL_TOKEN_HEADER: "secret-token", _IDEMPOTENCY_HEADER: "restart-1"},
+        )
+
+        first = MasterBroker(
+            _FakeBot(channel=channel), token="secret-token", persist_idempotency=True
+        )
+        self.assertEqual((await first._handle_send_message(request)).status, 200)
+
+        restarted = MasterBroker(
+            _FakeBot(channel=channel), token="secret-token", persist_idempotency=True
+        )
+        response = await restarted._handle_send_message(request)
+
+        self.assertEqual(response.status, 200)
+        self.assertTrue(MasterBroker._response_payload(response)["cached"])
+        self.assertEqual(len(channel.sent_calls), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
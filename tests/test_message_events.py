@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs import message_events
+
+
+def _message(
+    *, channel_id: int = 10, guild_id: int | None = 1, bot: bool = False, content: str = ""
+):
+    return SimpleNamespace(
+        author=SimpleNamespace(id=5, bot=bot),
+        channel=SimpleNamespace(id=channel_id),
+        guild=SimpleNamespace(id=guild_id) if guild_id is not None else None,
+        content=content,
+        webhook_id=None,
+        attachments=[],
+        is_system=lambda: False,
+    )
+
+
+class _Bot:
+    def __init__(self) -> None:
+        self.listeners = []
+
+    def add_listener(self, func, name) -> None:
+        self.listeners.append((name, func))
+
+
+class MessageEventDispatcherTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(message_events.privacy, "is_opted_out", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_build_event_normalizes_text(self) -> None:
+        event = message_events.build_event(_message(content="  Wer hat  <@123> BOCK\n auf Runde? "))
+
+        self.assertTrue(event.is_guild)
+        self.assertFalse(event.is_dm)
+        self.assertEqual(event.text_lower, "wer hat <@123> bock auf runde?")
+        self.assertEqual(event.text_plain, "Wer hat BOCK auf Runde?")
+
+    async def test_routes_by_channel_index_scope_and_intent(self) -> None:
+        bot = _Bot()
+        dispatcher = message_events.get_dispatcher(bot)
+        self.assertIs(message_events.get_dispatcher(bot), dispatcher)
+        self.assertEqual(bot.listeners, [("on_message", dispatcher.on_message)])
+
+        seen: dict[str, list[str]] = {"lfg": [], "guild": [], "bots": []}
+
+        def recorder(name):
+            async def handler(event):
+                seen[name].append(event.text)
+
+            return handler
+
+        dispatcher.subscribe(
+            "lfg",
+            recorder("lfg"),
+            channel_ids={42},
+            intent=lambda event: "bock" in event.text_lower,
+        )
+        dispatcher.subscribe("guild", recorder("guild"), scope=message_events.SCOPE_GUILD)
+        dispatcher.subscribe("bots", recorder("bots"), include_bots=True, channel_ids={42})
+
+        await dispatcher.on_message(_message(channel_id=42, content="Bock auf Deadlock"))
+        await dispatcher.on_message(_message(channel_id=42, content="hallo"))
+        await dispatcher.on_message(_message(channel_id=7, content="Bock woanders"))
+        await dispatcher.on_message(_message(channel_id=42, bot=True, content="bock bot"))
+        await dispatcher.on_message(_message(channel_id=99, guild_id=None, content="dm"))
+
+        self.assertEqual(seen["lfg"], ["Bock auf Deadlock"])
+        self.assertEqual(seen["guild"], ["Bock auf Deadlock", "hallo", "Bock woanders"])
+        self.assertEqual(seen["bots"], ["Bock auf Deadlock", "hallo", "bock bot"])
+
+        stats = dispatcher.stats()
+        self.assertEqual(stats["messages"], 5)
+        self.assertEqual(stats["unrouted"], 1)
+        self.assertEqual(stats["handlers"]["lfg"]["calls"], 1)
+        self.assertEqual(stats["handlers"]["lfg"]["skipped"], 2)
+        self.assertEqual(sum(stats["handlers"]["guild"]["histogram"].values()), 3)
+
+        dispatcher.unsubscribe("lfg")
+        await dispatcher.on_message(_message(channel_id=42, content="Bock auf Deadlock"))
+        self.assertEqual(len(seen["lfg"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
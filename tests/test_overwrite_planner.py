@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import discord
+
+from cogs.tempvoice import core as tempvoice_core
+from service import overwrite_planner
+
+
+class _FakeLane:
+    def __init__(self, overwrites: dict, *, category_id: int = 77) -> None:
+        self._overwrites = dict(overwrites)
+        self.id = 1
+        self.category_id = category_id
+        self.guild = SimpleNamespace(id=9)
+        self.edits: list[dict] = []
+
+    @property
+    def overwrites(self) -> dict:
+        return {
+            target: discord.PermissionOverwrite(**dict(ow))
+            for target, ow in self._overwrites.items()
+        }
+
+    def overwrites_for(self, target) -> discord.PermissionOverwrite:
+        return self.overwrites.get(target, discord.PermissionOverwrite())
+
+    async def edit(self, *, overwrites, reason=None) -> None:
+        self.edits.append({"overwrites": overwrites, "reason": reason})
+        self._overwrites = dict(overwrites)
+
+
+class OverwritePlannerTests(unittest.IsolatedAsyncioTestCase):
+    def test_plan_reports_added_changed_removed(self) -> None:
+        keep, change, drop = discord.Object(1), discord.Object(2), discord.Object(3)
+        current = {
+            keep: discord.PermissionOverwrite(view_channel=True),
+            change: discord.PermissionOverwrite(connect=True),
+            drop: discord.PermissionOverwrite(connect=False),
+        }
+        new = discord.Object(4)
+
+        plan = overwrite_planner.plan_overwrites(
+            current,
+            {
+                keep: discord.PermissionOverwrite(view_channel=True),
+                change: discord.PermissionOverwrite(connect=False),
+                drop: None,
+                new: discord.PermissionOverwrite(speak=True),
+                discord.Object(5): None,
+            },
+        )
+
+        self.assertEqual(plan.added, [new])
+        self.assertEqual(plan.changed, [change])
+        self.assertEqual(plan.removed, [drop])
+        self.assertEqual(set(plan.target), {keep, change, new})
+
+    async def test_min_rank_change_is_a_single_edit_and_noop_is_free(self) -> None:
+        ranks = {
+            name: discord.Object(idx)
+            for idx, name in enumerate(("initiate", "seeker", "alchemist", "arcanist"), start=10)
+        }
+        lane = _FakeLane({ranks["arcanist"]: discord.PermissionOverwrite(connect=True)})
+        cog = SimpleNamespace(minrank_blocked_lanes=set(), _rank_roles_cached=lambda _guild: ranks)
+
+        with mock.patch.object(tempvoice_core, "MINRANK_CATEGORY_IDS", {77}):
+            await tempvoice_core.TempVoiceCore._apply_min_rank(cog, lane, "alchemist")
+            await tempvoice_core.TempVoiceCore._apply_min_rank(cog, lane, "alchemist")
+
+        self.assertEqual(len(lane.edits), 1)
+        target = lane.edits[0]["overwrites"]
+        self.assertIs(target[ranks["initiate"]].connect, False)
+        self.assertIs(target[ranks["seeker"]].connect, False)
+        self.assertNotIn(ranks["alchemist"], target)
+        self.assertNotIn(ranks["arcanist"], target)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs import privacy_core as privacy
+from cogs.privacy_controls import PrivacyControls
+from service import db
+from tests._helpers import use_temp_db
+
+
+class OptOutCacheTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        privacy.reset_opt_out_cache()
+        use_temp_db(self, "privacy.sqlite3")
+
+    def tearDown(self) -> None:
+        privacy.reset_opt_out_cache()
+
+    def test_lookups_hit_memory_after_initial_load(self) -> None:
+        db.execute("INSERT INTO user_privacy(user_id, opted_out, updated_at) VALUES (7, 1, 0)")
+
+        with mock.patch.object(db, "query_one", wraps=db.query_one) as query_one:
+            self.assertTrue(privacy.is_opted_out(7))
+            for _ in range(50):
+                self.assertFalse(privacy.is_opted_out(8))
+
+        self.assertEqual(query_one.call_count, 0)
+        self.assertEqual(privacy.opt_out_version(), 0)
+
+    async def test_own_writes_update_set_and_version(self) -> None:
+        self.assertFalse(privacy.is_opted_out(5))
+        db.execute("INSERT INTO coaching_sessions(id, discord_user_id) VALUES ('s1', 5)")
+
+        summary = await privacy.delete_user_data(5)
+        self.assertEqual(summary["coaching_sessions.discord_user_id"], 1)
+        self.assertIn(
+            "TempVoice/Claims/Coaching: 1 Einträge",
+            PrivacyControls(SimpleNamespace())._format_summary(5, summary),
+        )
+        self.assertTrue(privacy.is_opted_out(5))
+        self.assertEqual(privacy.opt_out_version(), 1)
+
+        await privacy.set_opt_in(5)
+        self.assertFalse(privacy.is_opted_out(5))
+        self.assertEqual(privacy.opt_out_version(), 2)
+        self.assertEqual(db.get_kv(privacy.OPT_OUT_VERSION_NS, privacy.OPT_OUT_VERSION_KEY), "2")
+
+    async def test_runtime_cleanup_cancels_pending_voice_nudge(self) -> None:
+        nudge = SimpleNamespace(_cancel_voice_nudge=mock.AsyncMock())
+        bot = SimpleNamespace(get_cog=lambda name: nudge if name == "SteamLinkVoiceNudge" else None)
+
+        await PrivacyControls(bot)._clear_runtime_state(5)
+
+        nudge._cancel_voice_nudge.assert_awaited_once_with(5)
+
+    def test_foreign_change_is_picked_up_after_recheck_interval(self) -> None:
+        self.assertFalse(privacy.is_opted_out(11))
+        # Simuliert einen Standalone-Prozess, der direkt in die DB schreibt.
+        db.execute("INSERT INTO user_privacy(user_id, opted_out, updated_at) VALUES (11, 1, 0)")
+        db.set_kv(privacy.OPT_OUT_VERSION_NS, privacy.OPT_OUT_VERSION_KEY, "3")
+
+        self.assertFalse(privacy.is_opted_out(11))
+        with mock.patch.object(privacy, "OPT_OUT_RECHECK_SECONDS", 0):
+            self.assertTrue(privacy.is_opted_out(11))
+
+        self.assertEqual(privacy.opt_out_version(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
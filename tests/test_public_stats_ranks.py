@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+from service import db, public_stats
+from tests._helpers import use_temp_db
+
+
+class UserRankSnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "ranks.sqlite3")
+
+    def _link(self, user_id: int, steam_id: str, rank: str | None, **extra) -> None:
+        db.execute(
+            """
+            INSERT INTO steam_links(
+              user_id, steam_id, verified, primary_account,
+              deadlock_rank_name, deadlock_subrank, deadlock_rank_updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                user_id,
+                steam_id,
+                extra.get("verified", 1),
+                extra.get("primary", 0),
+                rank,
+                extra.get("subrank", 3),
+                extra.get("updated_at", 100),
+            ),
+        )
+
+    def test_snapshot_follows_primary_verified_account(self) -> None:
+        self._link(1, "a", "Seeker", updated_at=200)
+        self._link(1, "b", "Oracle", primary=1, updated_at=100)
+        self._link(2, "c", "Archon", verified=0)
+
+        self.assertEqual(public_stats._RankResolver().rank(1), "oracle")
+        self.assertIsNone(public_stats._RankResolver().rank(2))
+
+        db.execute("UPDATE steam_links SET deadlock_rank_name = 'Eternus' WHERE steam_id = 'b'")
+        self.assertEqual(public_stats._RankResolver().rank(1), "eternus")
+
+        db.execute("DELETE FROM steam_links WHERE steam_id = 'b'")
+        self.assertEqual(public_stats._RankResolver().rank(1), "seeker")
+
+    def test_rebuild_on_startup_matches_triggers(self) -> None:
+        self._link(5, "x", "Phantom", primary=1)
+        db.execute("DELETE FROM user_rank_snapshot")
+
+        db.init_schema()
+
+        self.assertEqual(public_stats._RankResolver().rank(5), "phantom")
+
+    def test_resolver_loads_session_ranks_in_bulk(self) -> None:
+        for uid, rank in ((10, "Initiate"), (11, "Initiate"), (12, "Seeker")):
+            self._link(uid, f"s{uid}", rank, subrank=1)
+        rows = [
+            {"user_id": 10, "co_player_ids": "[]"},
+            {"user_id": 99, "co_player_ids": "[10, 11, 12]"},
+            {"user_id": 99, "co_player_ids": "[10, 11, 12]"},
+        ]
+        resolver = public_stats._RankResolver()
+
+        with mock.patch.object(
+            public_stats, "_load_user_ranks", wraps=public_stats._load_user_ranks
+        ) as loader:
+            resolver.preload_sessions(rows)
+            self.assertEqual(resolver.rank(10), "initiate")
+            self.assertEqual(resolver.rank_or_estimate(99, rows[1]["co_player_ids"]), "low")
+            self.assertEqual(resolver.rank_or_estimate(99, rows[2]["co_player_ids"]), "low")
+
+        self.assertEqual(loader.call_count, 2)
+
+    def test_estimate_needs_three_co_players(self) -> None:
+        self._link(20, "t", "Ascendant")
+        resolver = public_stats._RankResolver()
+
+        self.assertIsNone(resolver.estimate(1, "[20]"))
+        self.assertIsNone(resolver.estimate(1, "not-json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,27 +1,92 @@
 from __future__ import annotations
 
+import asyncio
+import time
 import unittest
 from unittest import mock
 
+import discord
+
+from cogs import rename_manager
 from cogs.rename_manager import RenameManagerCog
+from service import db
+from tests._helpers import use_temp_db
 
 
 class RenameManagerCogTests(unittest.IsolatedAsyncioTestCase):
-    async def test_set_request_pending_requeues_throttled_request_to_queue_tail(self) -> None:
+    async def test_set_request_pending_keeps_queue_position(self) -> None:
         cog = RenameManagerCog(mock.Mock())
         execute_mock = mock.AsyncMock()
 
         with mock.patch("cogs.rename_manager.db.execute_async", new=execute_mock):
-            await cog._set_request_pending(
-                42,
-                last_error="Channel throttle active (120.0s remaining)",
-                increment_retry=False,
-            )
+            await cog._set_request_pending(42, last_error="HTTP 500: boom")
 
         sql, params = execute_mock.await_args.args
-        self.assertIn("created_at=CURRENT_TIMESTAMP", sql)
-        self.assertNotIn("retry_count=retry_count+1", sql)
-        self.assertEqual(
-            params,
-            ("Channel throttle active (120.0s remaining)", 42),
+        self.assertNotIn("created_at", sql)
+        self.assertIn("retry_count=retry_count+1", sql)
+        self.assertEqual(params, ("HTTP 500: boom", 42))
+
+    async def test_idle_scheduler_does_no_db_work(self) -> None:
+        cog = RenameManagerCog(mock.Mock())
+
+        with (
+            mock.patch.object(db, "transaction") as transaction,
+            mock.patch.object(db, "query_all_async") as query_all,
+            self.assertRaises(TimeoutError),
+        ):
+            await asyncio.wait_for(cog._next_due_channel(), timeout=0.1)
+
+        transaction.assert_not_called()
+        query_all.assert_not_called()
+
+    async def test_wakes_when_channel_throttle_window_opens(self) -> None:
+        cog = RenameManagerCog(mock.Mock())
+        cog._last_rename_attempt_by_channel[7] = (
+            time.monotonic() - rename_manager.RENAME_THROTTLE_SECONDS + 0.05
         )
+        cog._schedule_channel(7, 1)
+        cog._schedule_channel(8, 2)
+
+        self.assertEqual(await asyncio.wait_for(cog._next_due_channel(), timeout=1), 8)
+        started = time.monotonic()
+        self.assertEqual(await asyncio.wait_for(cog._next_due_channel(), timeout=1), 7)
+        self.assertGreater(time.monotonic() - started, 0.02)
+
+
+class RenameQueueDbTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "rename.sqlite3")
+
+    def _statuses(self) -> list[tuple[str, str]]:
+        rows = db.query_all("SELECT new_name, status FROM rename_requests ORDER BY id")
+        return [(r["new_name"], r["status"]) for r in rows]
+
+    async def test_processor_coalesces_per_channel_and_renames(self) -> None:
+        channel = mock.Mock(spec=discord.VoiceChannel)
+        channel.name = "Lane 1"
+        channel.edit = mock.AsyncMock()
+        bot = mock.Mock()
+        bot.is_closed.return_value = False
+        bot.get_channel.return_value = channel
+        bot.loop = asyncio.get_running_loop()
+        cog = RenameManagerCog(bot)
+        await cog._ensure_db_schema()
+        cog._start_rename_processor()
+        try:
+            await cog._enqueue_request(5, "Lane 1 (2/6)", "test")
+            await cog._enqueue_request(5, "Lane 1 (3/6)", "test")
+            for _ in range(100):
+                if channel.edit.await_count:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            cog._rename_task.cancel()
+            await asyncio.gather(cog._rename_task, return_exceptions=True)
+
+        channel.edit.assert_awaited_once_with(name="Lane 1 (3/6)", reason="test")
+        self.assertEqual(self._statuses(), [("Lane 1 (3/6)", "DONE")])
+        self.assertIn(5, cog._last_rename_attempt_by_channel)
+
+
+if __name__ == "__main__":
+    unittest.main()
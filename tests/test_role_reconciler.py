@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import unittest
+
+import discord
+
+from service import role_reconciler
+
+
+class _FakeHttpResponse:
+    def __init__(self, status: int, *, reason: str, headers: dict[str, str] | None = None) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers or {}
+
+
+class _FakeMember:
+    def __init__(
+        self, member_id: int, *, failures: list | None = None, roles: list | None = None
+    ) -> None:
+        self.id = member_id
+        if roles is not None:
+            self.roles = roles
+        self.display_name = f"M{member_id}"
+        self.failures = list(failures or [])
+        self.calls: list[str] = []
+
+    async def _call(self, action: str) -> None:
+        self.calls.append(action)
+        if self.failures:
+            raise self.failures.pop(0)
+
+    async def add_roles(self, role, *, reason=None) -> None:
+        await self._call("add")
+
+    async def remove_roles(self, role, *, reason=None) -> None:
+        await self._call("remove")
+
+
+class RoleReconcilerTests(unittest.IsolatedAsyncioTestCase):
+    def test_plan_only_fetches_new_or_touched_ids(self) -> None:
+        reconciler = role_reconciler.RoleReconciler()
+        desired = {1, 2, 3, 4}
+
+        first = reconciler.plan(desired, holders={1, 9}, cached={1, 2})
+        self.assertEqual(first.add, [2])
+        self.assertEqual(first.fetch_add, [3, 4])
+        self.assertEqual(first.remove, [9])
+
+        # 3 war nicht auf dem Server (settled), 4 scheiterte transient
+        reconciler.commit(
+            desired,
+            [
+                role_reconciler.RoleChange(3, role_reconciler.ADD, role_reconciler.NOT_FOUND),
+                role_reconciler.RoleChange(4, role_reconciler.ADD, role_reconciler.HTTP_ERROR),
+            ],
+        )
+        unchanged = reconciler.plan(desired, holders={1, 2}, cached={1, 2})
+        self.assertEqual(unchanged.fetch_add, [4])
+
+        reconciler.commit(desired)
+        self.assertFalse(reconciler.plan(desired, holders={1, 2}, cached={1, 2}))
+        touched = reconciler.plan(desired | {5}, holders={1, 2}, cached={1, 2}, touched={3})
+        self.assertEqual(touched.fetch_add, [3, 5])
+
+    def test_bucket_adapts_to_rate_limit_headers(self) -> None:
+        now = [0.0]
+        bucket = role_reconciler.TokenBucket(4.0, burst=1, min_rate=0.5, clock=lambda: now[0])
+        self.assertEqual(bucket.delay(), 0.0)
+
+        bucket.on_rate_limited(2.0, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "3"})
+        self.assertEqual(bucket.rate, 2.0)
+        self.assertAlmostEqual(bucket.delay(), 3.0)
+
+        now[0] = 3.0
+        bucket.observe({"X-RateLimit-Remaining": "2", "X-RateLimit-Reset-After": "4"})
+        self.assertEqual(bucket.rate, 0.5)
+        bucket.on_success()
+        self.assertEqual(bucket.rate, 0.75)
+
+    async def test_apply_retries_after_429_and_reports_status(self) -> None:
+        limited = _FakeMember(
+            1,
+            failures=[
+                discord.HTTPException(
+                    _FakeHttpResponse(
+                        429, reason="Too Many Requests", headers={"Retry-After": "0.01"}
+                    ),
+                    "slow down",
+                )
+            ],
+        )
+        forbidden = _FakeMember(
+            2, failures=[discord.Forbidden(_FakeHttpResponse(403, reason="Forbidden"), "nope")]
+        )
+        members = {1: limited, 2: forbidden}
+
+        async def resolve(uid: int):
+            if uid == 3:
+                raise discord.NotFound(_FakeHttpResponse(404, reason="Not Found"), "gone")
+            return members.get(uid)
+
+        bucket = role_reconciler.TokenBucket(100.0, burst=5)
+        results = await role_reconciler.apply_role_changes(
+            [
+                (1, role_reconciler.ADD),
+                (2, role_reconciler.REMOVE),
+                (3, role_reconciler.ADD),
+                (4, role_reconciler.ADD),
+            ],
+            role=object(),
+            resolve_member=resolve,
+            bucket=bucket,
+        )
+
+        self.assertEqual(
+            [r.status for r in results],
+            [
+                role_reconciler.APPLIED,
+                role_reconciler.FORBIDDEN,
+                role_reconciler.NOT_FOUND,
+                role_reconciler.SKIPPED,
+            ],
+        )
+        self.assertEqual(results[0].attempts, 2)
+        self.assertEqual(limited.calls, ["add", "add"])
+        self.assertEqual(bucket.rate, 50.25)
+
+    async def test_uncached_holder_is_not_added_again(self) -> None:
+        role = object()
+        holder = _FakeMember(7, roles=[role])
+        newcomer = _FakeMember(8, roles=[])
+
+        # Ohne Member-Chunking fehlt 7 in role.members und im Cache
+        delta = role_reconciler.RoleReconciler().plan({7, 8}, holders=set(), cached=set())
+        self.assertEqual(delta.fetch_add, [7, 8])
+
+        async def resolve(uid: int):
+            return {7: holder, 8: newcomer}[uid]
+
+        results = await role_reconciler.apply_role_changes(
+            delta.changes,
+            role=role,
+            resolve_member=resolve,
+            bucket=role_reconciler.TokenBucket(100.0, burst=5),
+        )
+
+        self.assertEqual(
+            [r.status for r in results], [role_reconciler.UNCHANGED, role_reconciler.APPLIED]
+        )
+        self.assertEqual((holder.calls, newcomer.calls), ([], ["add"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
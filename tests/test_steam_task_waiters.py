@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import unittest
+from types import SimpleNamespace
+
+from service import db, steam_task_waiters
+from service.master_broker import _INTERNAL_TOKEN_HEADER, MasterBroker
+from tests._helpers import use_temp_db
+
+
+class _FakeRequest:
+    def __init__(self, payload: dict, *, token: str = "secret-token") -> None:
+        self._payload = payload
+        self.headers = {_INTERNAL_TOKEN_HEADER: token}
+        self.remote = "127.0.0.1"
+        self.transport = None
+
+    async def json(self) -> dict:
+        return dict(self._payload)
+
+
+class SteamTaskWaiterTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "steam.sqlite3")
+
+    def _insert_task(self) -> int:
+        db.execute(
+            "INSERT INTO steam_tasks(type, payload, status) "
+            "VALUES('MAINTAIN_BUILD_CATALOG', '{}', 'PENDING')"
+        )
+        return int(db.query_one("SELECT MAX(id) FROM steam_tasks")[0])
+
+    @staticmethod
+    def _finish(task_id: int, status: str = "DONE") -> None:
+        db.execute(
+            "UPDATE steam_tasks SET status = ?, result = ? WHERE id = ?",
+            (status, json.dumps({"data": {"builds": 3}}), task_id),
+        )
+
+    async def test_notification_resolves_without_waiting_for_fallback_poll(self) -> None:
+        task_id = self._insert_task()
+        waiter = asyncio.create_task(
+            steam_task_waiters.wait_for_task(task_id, timeout=30, fallback_interval=30)
+        )
+        await asyncio.sleep(0.05)
+        self.assertEqual(steam_task_waiters.pending(), 1)
+
+        started = time.monotonic()
+        self._finish(task_id)
+        self.assertTrue(steam_task_waiters.notify(task_id))
+        outcome = await asyncio.wait_for(waiter, timeout=2)
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(outcome["status"], "DONE")
+        self.assertTrue(outcome["ok"])
+        self.assertEqual(outcome["result"], {"data": {"builds": 3}})
+        self.assertEqual(steam_task_waiters.pending(), 0)
+
+    async def test_fallback_poll_picks_up_silent_consumer(self) -> None:
+        task_id = self._insert_task()
+        waiter = asyncio.create_task(
+            steam_task_waiters.wait_for_task(task_id, timeout=5, fallback_interval=0.1)
+        )
+        await asyncio.sleep(0.05)
+        self._finish(task_id, "FAILED")
+
+        outcome = await asyncio.wait_for(waiter, timeout=2)
+
+        self.assertEqual(outcome["status"], "FAILED")
+        self.assertFalse(outcome["ok"])
+        self.assertFalse(outcome["timed_out"])
+
+    async def test_timeout_reports_last_status(self) -> None:
+        task_id = self._insert_task()
+
+        outcome = await steam_task_waiters.wait_for_task(
+            task_id, timeout=0.2, fallback_interval=0.1, task_type="GC_SEARCH_BUILDS"
+        )
+
+        self.assertTrue(outcome["timed_out"])
+        self.assertEqual(outcome["status"], "PENDING")
+        self.assertEqual(outcome["error"], "Timed out waiting for GC_SEARCH_BUILDS")
+        self.assertEqual(steam_task_waiters.pending(), 0)
+
+    async def test_broker_callback_wakes_waiter(self) -> None:
+        broker = MasterBroker(SimpleNamespace(), token="secret-token")
+        task_id = self._insert_task()
+        waiter = asyncio.create_task(
+            steam_task_waiters.wait_for_task(task_id, timeout=30, fallback_interval=30)
+        )
+        await asyncio.sleep(0.05)
+        self._finish(task_id)
+
+        rejected = await broker._handle_steam_task_finished(
+            _FakeRequest({"task_id": task_id}, token="wrong")
+        )
+        response = await broker._handle_steam_task_finished(
+            _FakeRequest({"task_id": task_id, "status": "DONE"})
+        )
+        outcome = await asyncio.wait_for(waiter, timeout=2)
+
+        self.assertEqual(rejected.status, 401)
+        self.assertEqual(response.status, 200)
+        self.assertTrue(json.loads(response.text)["result"]["waiting"])
+        self.assertTrue(outcome["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import random
+import unittest
+from itertools import combinations
+from types import SimpleNamespace
+
+from cogs.customgames import team_split
+from cogs.deadlock_team_balancer import _balance_score, _best_split
+
+
+def _score(ranks: list[int], split: tuple[list[int], list[int]]) -> float:
+    team_a, team_b = split
+    return _balance_score([ranks[i] for i in team_a], [ranks[i] for i in team_b])
+
+
+def _legacy_best_score(ranks: list[int], team_size: int) -> float:
+    # Bisheriger Brute-Force: Team B = erste team_size Rest-Spieler.
+    idx = list(range(len(ranks)))
+    best = float("inf")
+    for comb in combinations(idx, team_size):
+        rest = [ranks[i] for i in idx if i not in comb]
+        best = min(best, _balance_score([ranks[i] for i in comb], rest[:team_size]))
+    return best
+
+
+class TeamSplitEngineTests(unittest.TestCase):
+    def test_split_score_matches_balance_score(self) -> None:
+        team_a, team_b = [11, 7, 3, 2], [9, 8, 4, 1]
+        score = team_split.split_score(
+            sum(team_a),
+            sum(r * r for r in team_a),
+            sum(team_b),
+            sum(r * r for r in team_b),
+            4,
+        )
+        self.assertAlmostEqual(score, _balance_score(team_a, team_b))
+
+    def test_exact_split_is_optimal_and_symmetry_free(self) -> None:
+        rng = random.Random(3)
+        self.assertEqual(team_split.count_splits(12, 6), 462)
+        for n in (4, 8, 12):
+            ranks = [rng.randint(0, 11) for _ in range(n)]
+            split = team_split.exact_split(ranks, n // 2)
+
+            self.assertIn(0, split[0])
+            self.assertEqual(sorted(split[0] + split[1]), list(range(n)))
+            self.assertAlmostEqual(_score(ranks, split), _legacy_best_score(ranks, n // 2))
+
+    def test_heuristic_never_worse_than_legacy_brute_force(self) -> None:
+        rng = random.Random(11)
+        for n in (14, 16, 18):
+            for _ in range(5):
+                ranks = sorted((rng.randint(0, 11) for _ in range(n)), reverse=True)
+                split = team_split.best_split(ranks, 6)
+
+                self.assertEqual(len(split[0]), 6)
+                self.assertEqual(len(split[1]), 6)
+                self.assertFalse(set(split[0]) & set(split[1]))
+                self.assertLessEqual(_score(ranks, split), _legacy_best_score(ranks, 6) + 1e-9)
+
+    def test_best_split_keeps_member_pairs(self) -> None:
+        players = [(SimpleNamespace(id=i), rank) for i, rank in enumerate([9, 8, 6, 5, 3, 1])]
+
+        team_a, team_b = _best_split(players)
+
+        self.assertEqual(len(team_a), 3)
+        self.assertEqual(len(team_b), 3)
+        self.assertEqual(sum(r for _, r in team_a), sum(r for _, r in team_b))
+        self.assertEqual({m.id for m, _ in team_a + team_b}, set(range(6)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import unittest
+from types import SimpleNamespace
+
+from cogs import user_retention
+from service import db
+from tests._helpers import use_temp_db
+
+_INSERT_SESSION = """
+    INSERT INTO voice_session_log(
+      user_id, guild_id, channel_id, started_at, ended_at, duration_seconds, points, peak_users
+    ) VALUES (?, 10, 1, datetime('now', ?), datetime('now', ?), 600, 1, 2)
+"""
+
+# Schema-Auszug; die Tabelle wird außerhalb von db.init_schema angelegt.
+_RETENTION_TABLE = """
+    CREATE TABLE IF NOT EXISTS user_retention_tracking(
+      user_id INTEGER PRIMARY KEY,
+      guild_id INTEGER,
+      first_seen_at INTEGER,
+      last_active_at INTEGER,
+      total_active_days INTEGER DEFAULT 0,
+      avg_weekly_sessions REAL DEFAULT 0,
+      updated_at INTEGER
+    )
+"""
+
+
+class UserRetentionSyncTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "retention.sqlite3")
+        db.execute(_RETENTION_TABLE)
+        self.cog = user_retention.UserRetentionCog(SimpleNamespace())
+
+    async def _sync(self, **kwargs) -> int:
+        return await self.cog._sync_activity_data_once(**kwargs)
+
+    def _tracked(self) -> dict[int, tuple]:
+        return {
+            row["user_id"]: (row["total_active_days"], row["updated_at"])
+            for row in db.query_all(
+                "SELECT user_id, total_active_days, updated_at FROM user_retention_tracking"
+            )
+        }
+
+    def test_sync_queries_use_an_index(self) -> None:
+        for sql, params in (
+            (user_retention._RETENTION_AGGREGATE_SQL, (0,)),
+            (user_retention._RETENTION_AGGREGATE_USERS_SQL, (0, "[1, 2]")),
+        ):
+            plan = " | ".join(
+                str(row["detail"]) for row in db.query_all("EXPLAIN QUERY PLAN " + sql, params)
+            )
+            self.assertNotIn("SCAN voice_session_log", plan, plan)
+
+    async def test_incremental_sync_only_touches_new_sessions(self) -> None:
+        db.executemany(
+            _INSERT_SESSION,
+            [
+                (1, "-3 days", "-3 days"),
+                (1, "-2 days", "-2 days"),
+                (2, "-1 days", "-1 days"),
+                (3, "-90 days", "-90 days"),
+            ],
+        )
+
+        self.assertEqual(await self._sync(), 2)
+        first = self._tracked()
+        self.assertEqual(first[1][0], 2)
+        self.assertNotIn(3, first)
+
+        self.assertEqual(await self._sync(), 0)
+
+        db.execute("UPDATE user_retention_tracking SET updated_at = 0")
+        db.executemany(_INSERT_SESSION, [(2, "-1 hours", "-1 hours"), (2, "-5 days", "-5 days")])
+        self.assertEqual(await self._sync(), 1)
+        second = self._tracked()
+        self.assertEqual(second[1][1], 0)
+        self.assertEqual(second[2][0], 3)
+        self.assertGreater(second[2][1], 0)
+
+        db.execute("UPDATE user_retention_tracking SET updated_at = 0")
+        self.assertEqual(await self._sync(full=True), 2)
+        self.assertTrue(all(updated > 0 for _days, updated in self._tracked().values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
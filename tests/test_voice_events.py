@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from bot_core.presence import PresenceMixin
+from cogs import voice_events
+
+
+def _state(channel=None, *, self_mute: bool = False):
+    return SimpleNamespace(
+        channel=channel, mute=False, self_mute=self_mute, deaf=False, self_deaf=False
+    )
+
+
+def _channel(channel_id: int, category_id: int = 100):
+    return SimpleNamespace(id=channel_id, category_id=category_id)
+
+
+class _Bot(PresenceMixin):
+    def __init__(self) -> None:
+        self.cogs = {}
+        self.extensions = {}
+
+    def get_cog(self, name):
+        return None
+
+
+class VoiceEventDispatcherTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(
+            voice_events.privacy, "is_opted_out", side_effect=lambda uid: uid == 2
+        )
+        self.opt_out = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bot = _Bot()
+        self.dispatcher = voice_events.get_dispatcher(self.bot)
+
+    def test_event_kinds(self) -> None:
+        member = SimpleNamespace(id=1, bot=False, guild=SimpleNamespace(id=9))
+        a, b = _channel(10), _channel(11)
+        build = self.dispatcher.build_event
+
+        self.assertEqual(build(member, _state(), _state(a)).kind, voice_events.JOIN)
+        self.assertEqual(build(member, _state(a), _state()).kind, voice_events.LEAVE)
+        self.assertEqual(build(member, _state(a), _state(b)).kind, voice_events.MOVE)
+        self.assertEqual(
+            build(member, _state(a), _state(a, self_mute=True)).kind, voice_events.MUTE
+        )
+        self.assertEqual(
+            build(member, _state(a, self_mute=True), _state(a)).kind, voice_events.UNMUTE
+        )
+        self.assertEqual(build(member, _state(a), _state(b)).category_ids, {100})
+        self.assertIsNone(build(member, _state(), _state(a)).after_voice)
+
+    async def test_filters_are_applied_per_subscription(self) -> None:
+        seen: dict[str, list[int]] = {"all": [], "humans": [], "lanes": [], "moves": []}
+
+        def recorder(name):
+            async def handler(event):
+                seen[name].append(event.member_id)
+
+            return handler
+
+        self.dispatcher.subscribe("all", recorder("all"))
+        self.dispatcher.subscribe(
+            "humans", recorder("humans"), include_bots=False, include_opted_out=False
+        )
+        self.dispatcher.subscribe("lanes", recorder("lanes"), category_ids={200})
+        self.dispatcher.subscribe("moves", recorder("moves"), channel_change_only=True)
+
+        human = SimpleNamespace(id=1, bot=False, guild=SimpleNamespace(id=9))
+        opted_out = SimpleNamespace(id=2, bot=False, guild=SimpleNamespace(id=9))
+        bot_member = SimpleNamespace(id=3, bot=True, guild=SimpleNamespace(id=9))
+        lane = _channel(20, category_id=200)
+
+        await self.bot.on_voice_state_update(human, _state(), _state(lane))
+        await self.bot.on_voice_state_update(opted_out, _state(), _state(_channel(10)))
+        await self.bot.on_voice_state_update(bot_member, _state(), _state(_channel(10)))
+        await self.bot.on_voice_state_update(human, _state(lane), _state(lane, self_mute=True))
+
+        self.assertEqual(seen["all"], [1, 2, 3, 1])
+        self.assertEqual(seen["humans"], [1, 1])
+        self.assertEqual(seen["lanes"], [1, 1])
+        self.assertEqual(seen["moves"], [1, 2, 3])
+        self.assertEqual(self.opt_out.call_count, 3)  # Bots werden nicht geprüft
+
+        stats = self.dispatcher.stats()
+        self.assertEqual(stats["events"], 4)
+        self.assertEqual(stats["handlers"]["humans"]["skipped"], 2)
+
+    async def test_shared_enrichment_runs_once_and_errors_are_isolated(self) -> None:
+        lookups = 0
+
+        async def expensive():
+            nonlocal lookups
+            lookups += 1
+            await asyncio.sleep(0.01)
+            return ["session"]
+
+        results = []
+
+        async def consumer(event):
+            results.append(await event.shared_async("sessions", expensive))
+
+        async def broken(event):
+            raise RuntimeError("boom")
+
+        self.dispatcher.subscribe("a", consumer)
+        self.dispatcher.subscribe("b", consumer)
+        self.dispatcher.subscribe("broken", broken)
+        member = SimpleNamespace(id=1, bot=False, guild=SimpleNamespace(id=9))
+
+        with self.assertLogs(voice_events.log, level="ERROR"):
+            await self.dispatcher.dispatch(member, _state(), _state(_channel(10)))
+
+        self.assertEqual(lookups, 1)
+        self.assertEqual(results, [["session"], ["session"]])
+        self.assertEqual(self.dispatcher.stats()["handlers"]["broken"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import discord
+
+from service import voice_moves
+
+
+class _FakeHttpResponse:
+    def __init__(self, status: int, *, reason: str, headers: dict[str, str] | None = None) -> None:
+        self.status = status
+        self.reason = reason
+        self.headers = headers or {}
+
+
+class _FakeMember:
+    active = 0
+    peak = 0
+
+    def __init__(self, member_id: int, *, in_voice: bool = True, failures: list | None = None):
+        self.id = member_id
+        self.display_name = f"M{member_id}"
+        self.voice = SimpleNamespace(channel=object()) if in_voice else None
+        self.failures = list(failures or [])
+        self.calls = 0
+
+    async def move_to(self, channel, *, reason=None) -> None:
+        self.calls += 1
+        _FakeMember.active += 1
+        _FakeMember.peak = max(_FakeMember.peak, _FakeMember.active)
+        try:
+            await asyncio.sleep(0.02)
+            if self.failures:
+                raise self.failures.pop(0)
+        finally:
+            _FakeMember.active -= 1
+
+
+class VoiceMoveExecutorTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        _FakeMember.active = 0
+        _FakeMember.peak = 0
+
+    async def test_moves_run_in_parallel_up_to_concurrency(self) -> None:
+        target = SimpleNamespace(id=1)
+        members = [_FakeMember(i) for i in range(12)]
+
+        results = await voice_moves.move_members([(m, target) for m in members], concurrency=4)
+
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEqual([r.member.id for r in results], list(range(12)))
+        self.assertEqual(_FakeMember.peak, 4)
+
+    async def test_rate_limits_are_retried_after_retry_after(self) -> None:
+        target = SimpleNamespace(id=1)
+        http_429 = discord.HTTPException(
+            _FakeHttpResponse(429, reason="Too Many Requests", headers={"Retry-After": "0.05"}),
+            {"message": "slow down"},
+        )
+        limited = _FakeMember(1, failures=[discord.RateLimited(0.05)])
+        limited_http = _FakeMember(2, failures=[http_429])
+
+        with mock.patch.object(voice_moves.asyncio, "sleep", wraps=asyncio.sleep) as sleep:
+            results = await voice_moves.move_members([(limited, target), (limited_http, target)])
+
+        self.assertEqual([r.status for r in results], [voice_moves.MOVED, voice_moves.MOVED])
+        self.assertEqual([r.attempts for r in results], [2, 2])
+        self.assertTrue(any(call.args[0] >= 0.04 for call in sleep.call_args_list))
+
+    async def test_reports_per_player_failures(self) -> None:
+        target = SimpleNamespace(id=1)
+        forbidden = discord.Forbidden(_FakeHttpResponse(403, reason="Forbidden"), "nope")
+        members = [
+            _FakeMember(1),
+            _FakeMember(2, in_voice=False),
+            _FakeMember(3, failures=[forbidden]),
+            _FakeMember(4, failures=[RuntimeError("boom")]),
+        ]
+
+        results = await voice_moves.move_members([(m, target) for m in members])
+
+        self.assertEqual(
+            [r.status for r in results],
+            [
+                voice_moves.MOVED,
+                voice_moves.NOT_IN_VOICE,
+                voice_moves.FORBIDDEN,
+                voice_moves.ERROR,
+            ],
+        )
+        self.assertEqual(members[1].calls, 0)
+        self.assertEqual(members[2].calls, 1)
+        self.assertEqual(results[3].error, "boom")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import unittest
+
+from service import db
+from tests._helpers import use_temp_db
+
+_INSERT_SESSION = """
+    INSERT INTO voice_session_log(
+      user_id, guild_id, channel_id, started_at, ended_at, duration_seconds, points, peak_users
+    ) VALUES (?, ?, 1, datetime('now', ?), datetime('now', ?), ?, ?, ?)
+"""
+
+
+class VoiceRollupHourlyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        use_temp_db(self, "rollup.sqlite3")
+
+    def _seed(self) -> None:
+        db.executemany(
+            _INSERT_SESSION,
+            [
+                (1, 10, "-3 hours", "-2 hours", 3600, 20, 4),
+                (1, 10, "-3 hours", "-150 minutes", 1800, 8, 2),
+                (2, 10, "-3 hours", "-2 hours", 3600, 20, 4),
+                (2, None, "-2 days", "-47 hours", 3600, 12, 3),
+                (3, 10, "-40 days", "-40 days", 900, 1, 2),
+            ],
+        )
+
+    def _rollup(self) -> list[tuple]:
+        return [
+            tuple(row)
+            for row in db.query_all(
+                "SELECT guild_id, user_id, sessions, total_seconds, total_points, sum_peak "
+                "FROM voice_rollup_hourly ORDER BY hour, guild_id, user_id"
+            )
+        ]
+
+    def test_insert_trigger_accumulates_per_hour_and_user(self) -> None:
+        self._seed()
+
+        self.assertEqual(
+            self._rollup(),
+            [
+                (10, 3, 1, 900, 1, 2),
+                (0, 2, 1, 3600, 12, 3),
+                (10, 1, 2, 5400, 28, 6),
+                (10, 2, 1, 3600, 20, 4),
+            ],
+        )
+
+    def test_rebuild_matches_trigger_state(self) -> None:
+        self._seed()
+        expected = self._rollup()
+        db.execute("DELETE FROM voice_rollup_hourly")
+
+        written = db.rebuild_voice_rollup()
+
+        self.assertEqual(written, 4)
+        self.assertEqual(self._rollup(), expected)
+
+    def test_partial_rebuild_keeps_older_hours(self) -> None:
+        self._seed()
+        db.execute("UPDATE voice_rollup_hourly SET sessions = 99")
+
+        db.rebuild_voice_rollup(days=7)
+
+        sessions = [row[2] for row in self._rollup()]
+        self.assertEqual(sessions, [99, 1, 2, 1])
+
+    def test_rollup_buckets_match_raw_session_log(self) -> None:
+        self._seed()
+        raw = db.query_all(
+            """
+            SELECT strftime('%w', started_at) AS bucket, SUM(duration_seconds) AS secs,
+                   COUNT(*) AS sessions
+            FROM voice_session_log
+            WHERE started_at >= datetime('now', '-14 day')
+            GROUP BY bucket ORDER BY bucket
+            """
+        )
+        rolled = db.query_all(
+            """
+            SELECT strftime('%w', hour) AS bucket, SUM(total_seconds) AS secs,
+                   SUM(sessions) AS sessions
+            FROM voice_rollup_hourly
+            WHERE hour >= strftime('%Y-%m-%d %H:00:00', 'now', '-14 day')
+            GROUP BY bucket ORDER BY bucket
+            """
+        )
+
+        self.assertEqual([tuple(r) for r in rolled], [tuple(r) for r in raw])
+
+
+if __name__ == "__main__":
+    unittest.main()
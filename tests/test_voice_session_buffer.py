@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import unittest
+from unittest import mock
+
+from cogs import privacy_core as privacy
+from cogs.voice_session_buffer import VoiceSessionWriteBuffer
+from service import db
+from tests._helpers import use_temp_db
+
+
+def _record(user_id: int, seconds: int = 600, points: int = 10) -> dict:
+    return {
+        "user_id": user_id,
+        "display_name": f"U{user_id}",
+        "guild_id": 1,
+        "channel_id": 2,
+        "channel_name": "Lane",
+        "started_at": "2024-01-01 10:00:00",
+        "ended_at": "2024-01-01 10:10:00",
+        "seconds": seconds,
+        "points": points,
+        "peak_users": 3,
+        "user_counts_json": "[]",
+        "co_player_ids_json": "[]",
+    }
+
+
+class VoiceSessionWriteBufferTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        privacy.reset_opt_out_cache()
+        self.addCleanup(privacy.reset_opt_out_cache)
+        self.journal = use_temp_db(self, "buffer.sqlite3") / "journal.jsonl"
+
+    def _counts(self) -> tuple[int, list[tuple]]:
+        logged = db.query_one("SELECT COUNT(*) FROM voice_session_log")[0]
+        stats = db.query_all(
+            "SELECT user_id, total_seconds, total_points FROM voice_stats ORDER BY user_id"
+        )
+        return logged, [tuple(r) for r in stats]
+
+    async def test_flush_coalesces_sessions_into_one_transaction(self) -> None:
+        buffer = VoiceSessionWriteBuffer(self.journal)
+        buffer.add(_record(1))
+        buffer.add(_record(1, seconds=300, points=5))
+        buffer.add(_record(2))
+        self.assertTrue(buffer.has_pending(1))
+        self.assertEqual(self._counts(), (0, []))
+
+        with mock.patch.object(db, "transaction", wraps=db.transaction) as tx:
+            self.assertEqual(await buffer.flush(), 3)
+
+        self.assertEqual(tx.call_count, 1)
+        self.assertEqual(self._counts(), (3, [(1, 900, 15), (2, 600, 10)]))
+        self.assertFalse(self.journal.exists())
+        self.assertFalse(buffer.has_pending(1))
+
+    async def test_batch_size_wakes_flusher(self) -> None:
+        buffer = VoiceSessionWriteBuffer(self.journal, flush_seconds=60, flush_batch=2)
+        await buffer.start()
+        try:
+            buffer.add(_record(1))
+            buffer.add(_record(2))
+            for _ in range(50):
+                if not len(buffer):
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(self._counts()[0], 2)
+        finally:
+            await buffer.close()
+
+    async def test_journal_replays_after_crash(self) -> None:
+        crashed = VoiceSessionWriteBuffer(self.journal)
+        crashed.add(_record(5))
+        crashed.add(_record(6))
+        del crashed  # kein flush/close: simuliert harten Abbruch
+
+        restarted = VoiceSessionWriteBuffer(self.journal)
+        self.assertEqual(await restarted.replay(), 2)
+
+        self.assertEqual(self._counts(), (2, [(5, 600, 10), (6, 600, 10)]))
+
+    async def test_replay_skips_entries_committed_before_crash(self) -> None:
+        buffer = VoiceSessionWriteBuffer(self.journal)
+        buffer.add(_record(7))
+        journal_before_flush = self.journal.read_text(encoding="utf-8")
+        await buffer.flush()
+        # Absturz zwischen COMMIT und Journal-Bereinigung
+        self.journal.write_text(journal_before_flush, encoding="utf-8")
+
+        restarted = VoiceSessionWriteBuffer(self.journal)
+        self.assertEqual(await restarted.replay(), 0)
+        restarted.add(_record(8))
+        await restarted.close()
+
+        self.assertEqual(self._counts(), (2, [(7, 600, 10), (8, 600, 10)]))
+
+    async def test_bad_record_is_set_aside_after_repeated_failures(self) -> None:
+        buffer = VoiceSessionWriteBuffer(self.journal, max_flush_attempts=2)
+        buffer.add(_record(1))
+        buffer.add(dict(_record(2), user_counts_json={"nicht": "bindbar"}))
+        buffer.add(_record(3))
+
+        for _ in range(2):
+            with self.assertRaises(sqlite3.Error):
+                await buffer.flush()
+        self.assertEqual(len(buffer), 3)
+
+        self.assertEqual(await buffer.flush(), 2)
+        self.assertEqual(self._counts(), (2, [(1, 600, 10), (3, 600, 10)]))
+        self.assertEqual(len(buffer), 0)
+        self.assertFalse(self.journal.exists())
+        self.assertEqual(buffer.stats["set_aside"], 1)
+        rejected = buffer.rejected_path.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line)["user_id"] for line in rejected], [2])
+
+    async def test_opted_out_user_sessions_are_never_written(self) -> None:
+        buffer = VoiceSessionWriteBuffer(self.journal)
+        buffer.add(_record(1))
+        buffer.add(_record(2))
+        await privacy.delete_user_data(1)
+
+        # Backstop ohne discard_user: der Flush verwirft die Session selbst
+        self.assertEqual(await buffer.flush(), 1)
+        self.assertEqual(self._counts(), (1, [(2, 600, 10)]))
+
+        buffer.add(_record(3))
+        await privacy.delete_user_data(3)
+        self.assertEqual(buffer.discard_user(3), 1)
+        self.assertFalse(self.journal.exists())
+        self.assertEqual(await VoiceSessionWriteBuffer(self.journal).replay(), 0)
+        self.assertEqual(self._counts(), (1, [(2, 600, 10)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+import unittest
+
+from cogs.voice_activity_tracker import UserCountStats, VoiceActivityTrackerCog
+
+
+class UserCountStatsTests(unittest.TestCase):
+    def test_tracks_summary_and_histogram(self) -> None:
+        stats = UserCountStats()
+        for value in (2, 3, 3, 5, 40):
+            stats.add(value)
+
+        payload = json.loads(stats.to_json())
+
+        self.assertEqual(payload["n"], 5)
+        self.assertEqual(payload["sum"], 53)
+        self.assertEqual((payload["min"], payload["max"]), (2, 40))
+        self.assertEqual(payload["mean"], 10.6)
+        self.assertEqual(payload["hist"][3], 2)
+        self.assertEqual(payload["hist"][UserCountStats.HIST_BUCKETS], 1)
+
+    def test_size_stays_constant_for_long_sessions(self) -> None:
+        short, long = UserCountStats(), UserCountStats()
+        short.add(4)
+        for idx in range(50_000):
+            long.add(2 + idx % 10)
+
+        self.assertEqual(len(long.hist), len(short.hist))
+        self.assertLess(len(long.to_json()), 200)
+
+    def test_missing_stats_serialize_as_empty(self) -> None:
+        payload = json.loads(VoiceActivityTrackerCog._user_counts_json(None))
+
+        self.assertEqual(
+            payload, {"n": 0, "sum": 0, "min": None, "max": None, "mean": 0.0, "hist": []}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()